@@ -2,23 +2,46 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import requests
-from requests.auth import HTTPBasicAuth
-import numpy as np
-import json
+import functools
+import time
 import os
 
 # 載入 .env 環境變數
 from dotenv import load_dotenv
 load_dotenv()
 
+from src.api.circuit_breaker import Deadline
+from src.pipeline.base_data import compute_base_data, fact_table_scope
+from src.pipeline.batch import ReportStore
+from src.pipeline.progressive import ProvisionalTotals
+from src.pipeline.shared_sources import (cached_woocommerce, peek_woocommerce, cached_refund_ledger,
+                                         cached_overview_stats, cached_order_count, cached_meta_summary,
+                                         cached_meta_ads, cached_hourly_ad_spend, base_data_generation)
+from src.pipeline.warmer import CacheWarmer, warm_standard_ranges
+from src.cache.data_cache import DataCache, create_cache_backend
+from src.ui.streamlit_reporter import StreamlitReporter
+from src.utils.product_analytics import PRODUCT_METRICS, query_top_products
+from src.utils.refunds import apply_refunds
+from src.utils.timeseries import orders_to_hourly, insights_to_hourly, align_hourly
+from src.utils.fact_table import DailyFactTable
+from src.utils.arrow_views import to_arrow, project
+from src.utils.order_explorer import SORT_COLUMNS
+from src.utils.downsample import auto_grain
+from src.ui.charts import trend_line_chart, roas_chart, profit_chart, share_pie_chart, colored_bar_chart
+from src.ui.figure_cache import FigureCache
+from src.utils.exporter import available_formats, export_bytes, export_file_name, EXPORT_FORMATS
+from src.utils.cost_calculator import calculate_cogs, calculate_total_costs, apply_cogs_rate
+from src.constants import CACHE_WARMER_ENV, RENDER_DEADLINE_SECONDS, PROGRESSIVE_RENDER_INTERVAL
+
+# 時間粒度選項對應事實表的彙總粒度
+FACT_GRAINS = {"每日": 'day', "每週": 'week', "每月": 'month'}
+GRAIN_LABELS = {grain: label for label, grain in FACT_GRAINS.items()}
+
 # 導入我們的安全配置模組
 try:
-    from src.config import Config, setup_api_connections, get_active_config
-    from src.api.meta_ads import get_enhanced_meta_ads_data, show_token_management, MetaAdsAPI
-    from src.api.meta_token_manager import show_token_manager_ui, MetaTokenManager
+    from src.config import get_active_config
+    from src.ui.token_management import show_token_manager_ui
     SECURE_MODE = True
 except ImportError:
     # 如果模組不存在，回退到原始模式
@@ -97,18 +120,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 設定參數
-SHIPPING_COSTS = {
-    "全家便利商店": 69, "萊爾富": 58, "宅配": 180, "全家": 69, "超商取貨": 60, "Unknown": 0, "未知": 0
-}
-
-PAYMENT_FEES = {
-    "超商取貨付款": 0.53, "Line Pay": 2.94, "信用卡": 2.5725, "貨到付款": 0.53,
-    "ATM轉帳": 0.0, "Unknown": 0.0, "未知": 0.0
-}
-
-TAX_RATE = 0.05  # 5%
-
 # 主標題
 st.markdown("""
 <div class="main-header">
@@ -189,140 +200,670 @@ with st.sidebar:
                                value=(datetime.now() - timedelta(days=30), datetime.now()),
                                max_value=datetime.now())
 
+    granularity = st.radio("時間粒度", options=["自動", "每小時", "每日", "每週", "每月"], index=0, horizontal=True,
+                           help="自動：依期間長度選擇每日/每週/每月；每週/每月直接讀取事實表預先計算的彙總；每小時模式以訂單建立時間及 Meta 廣告主時區的小時數據對齊，適合快閃活動分析")
+
+    overview_pushdown = st.checkbox("快速總覽模式（伺服器端彙總）",
+                                    help="總覽指標直接使用 WooCommerce Analytics 報表計算，不下載訂單；需要付款/運送方式等明細時再載入訂單")
+    overview_first = st.checkbox("總覽優先（先顯示標頭指標）", value=True,
+                                 help="首次載入期間時，先以每個來源一次請求取得訂單數與廣告費/曝光/點擊總計，逐筆訂單明細隨後載入")
+
     st.subheader("調試設定")
     st.session_state.debug_mode = st.checkbox("啟用調試模式", help="顯示詳細的 Meta API 請求和響應信息")
 
-# 計算函數
-def calculate_shipping_costs(shipping_methods):
-    shipping_costs = {}
-    total_shipping_cost = 0
-    for method, count in shipping_methods.items():
-        cost_per_order = 0
-        for key, cost in SHIPPING_COSTS.items():
-            if key.lower() in method.lower() or method.lower() in key.lower():
-                cost_per_order = cost
-                break
-        total_cost = cost_per_order * count
-        shipping_costs[method] = {'count': count, 'cost_per_order': cost_per_order, 'total_cost': total_cost}
-        total_shipping_cost += total_cost
-    return shipping_costs, total_shipping_cost
-
-def calculate_payment_fees(orders_df):
-    payment_fees = {}
-    total_payment_fee = 0
-    if not orders_df.empty:
-        payment_summary = orders_df.groupby('payment_method').agg({'total': ['count', 'sum']}).round(2)
-        payment_summary.columns = ['order_count', 'total_amount']
-        payment_summary = payment_summary.reset_index()
+# 以下快取函式為數據管線（src/pipeline）的 Streamlit 轉接：訊息經由 StreamlitReporter 顯示在頁面上
+# 訂單與廣告數據存放在共用快取（DASHBOARD_CACHE_URL），多個副本共用同一份；
+# 過期後先顯示舊數據並在背景重新抓取（背景抓取以日誌回報，不使用 Streamlit 元件）
+
+@st.cache_resource(show_spinner=False)  # 每個程序一個共用快取連線
+def get_data_cache():
+    return DataCache(create_cache_backend())
+
+def get_enhanced_woocommerce_data(url, key, secret, start_date, end_date, deadline=None, on_page=None):
+    # 5分鐘內為新數據，平衡數據新鮮度和性能
+    return cached_woocommerce(get_data_cache(), (url, key, secret), start_date, end_date, StreamlitReporter(), deadline,
+                              on_page)
+
+@st.cache_data(ttl=300, show_spinner=False)  # 伺服器端彙總的總覽數據，回應很小
+def get_wc_overview_stats(url, key, secret, start_date, end_date):
+    return cached_overview_stats(get_data_cache(), (url, key, secret), start_date, end_date, StreamlitReporter()).value
+
+def get_headline_totals(wc_credentials, meta_source, start_date, end_date):
+    # 標頭指標：訂單數取自 X-WP-Total、廣告總計取自 insights 的 default_summary，每個來源只需一次請求
+    data_cache, reporter = get_data_cache(), StreamlitReporter()
+    return {
+        'orders': cached_order_count(data_cache, wc_credentials, start_date, end_date, reporter).value
+        if wc_credentials else None,
+        'ads': cached_meta_summary(data_cache, meta_source, start_date, end_date, reporter).value
+        if meta_source else None,
+    }
+
+def get_refund_ledger(url, key, secret):
+    # 退款增量同步，只處理上次同步後有異動的訂單；帳本放在共用快取，由預熱排程保持更新
+    return cached_refund_ledger(get_data_cache(), (url, key, secret), StreamlitReporter()).value
+
+@st.cache_data(ttl=300, show_spinner=False)  # 每小時廣告支出序列（資料量為每日的 24 倍，只快取彙總後的序列）
+def get_hourly_ad_spend(token, account_id, start_date, end_date):
+    return cached_hourly_ad_spend(get_data_cache(), token, account_id, start_date, end_date, StreamlitReporter()).value
+
+@st.cache_resource(show_spinner=False)  # 每個程序、每組商店/廣告帳號共用一份事實表（本地 Parquet）
+def get_fact_table(scope):
+    return DailyFactTable(scope=scope)
+
+@st.cache_resource(show_spinner=False)  # 批次作業（scripts/batch_report.py）預先計算的報表
+def get_report_store():
+    return ReportStore()
+
+def get_meta_ads_data(meta_source, start_date, end_date, debug_mode, deadline=None):
+    # 5分鐘內為新數據
+    return cached_meta_ads(get_data_cache(), meta_source, start_date, end_date, StreamlitReporter(debug_mode),
+                           token_store=st.session_state, debug_mode=debug_mode, deadline=deadline)
+
+@st.cache_resource(show_spinner=False)  # 每個程序只啟動一個預熱排程
+def get_cache_warmer():
+    return CacheWarmer(None)
+
+def start_cache_warmer(wc_credentials, meta_source):
+    # 背景預熱近 7/30/90 天與本月至今（含預設範圍），跨過午夜時立即預熱新的一天，
+    # 預設設定開啟儀表板時直接命中快取；由獨立的 scripts/cache_warmer.py 預熱時設定 DASHBOARD_CACHE_WARMER=off
+    # token 更新或改用其他 API 設定時只更換預熱對象，不另外啟動排程（舊憑證不再使用）
+    # 事實表只在數據重新抓取後寫入（upserted 記錄各期間已寫入的資料時間）
+    data_cache, fact_table = get_data_cache(), get_fact_table(fact_table_scope(wc_credentials, meta_source))
+    warmer, upserted = get_cache_warmer(), {}
+    warmer.retarget(
+        lambda today: warm_standard_ranges(data_cache, wc_credentials, meta_source, today, fact_table,
+                                           upserted=upserted),
+        target=(wc_credentials, meta_source)
+    )
+    return warmer.start()
+
+@st.cache_resource(ttl=300, show_spinner=False)  # 數據階段：與成本參數無關的抓取與彙總，回傳物件為共用，不可修改
+def load_base_data(wc_credentials, meta_source, start_date, end_date, debug_mode, data_generation=(0, 0, 0),
+                   _prefetched_orders=None):
+    # data_generation：此期間訂單、退款帳本與廣告數據的背景更新次數，共用快取換入新數據時使本快取重新計算
+    # _prefetched_orders：主程式冷啟動時已逐頁抓取的訂單結果（不參與雜湊）
+    # 批次作業已預先計算相同期間時直接讀取快照，只重新套用最新的退款帳本
+    sources = [name for name, configured in (('woocommerce', wc_credentials), ('meta', meta_source)) if configured]
+    scope = fact_table_scope(wc_credentials, meta_source)
+    fact_table = get_fact_table(scope)
+    snapshot = get_report_store().load_snapshot(start_date, end_date, sources, scope)
+    if snapshot is not None:
+        orders_df = snapshot['orders_df']
+        if wc_credentials and not orders_df.empty:
+            orders_df = apply_refunds(orders_df, get_refund_ledger(*wc_credentials))
+        base_data = compute_base_data(orders_df, snapshot['line_items_df'], snapshot['payment_methods'],
+                                      snapshot['shipping_methods'], snapshot['ads_df'], start_date, end_date,
+                                      fact_table)
+        base_data['report_generated_at'] = snapshot['generated_at']
+        base_data['data_as_of'], base_data['stale'] = snapshot['generated_at'], False
+        base_data['partial_sources'] = []
+        return base_data
+
+    orders_df, line_items_df, payment_methods, shipping_methods = pd.DataFrame(), pd.DataFrame(), {}, {}
+    ads_df = pd.DataFrame()
+    results = {}
+    # 載入時限：上游緩慢時各來源改用快取或部分數據，畫面在有限時間內完成
+    deadline = Deadline(RENDER_DEADLINE_SECONDS)
+
+    # WooCommerce 數據獲取
+    if wc_credentials:
+        results['WooCommerce'] = (_prefetched_orders if _prefetched_orders is not None
+                                  else get_enhanced_woocommerce_data(*wc_credentials, start_date, end_date, deadline))
+        orders_df, line_items_df, payment_methods, shipping_methods = results['WooCommerce'].value
+        # 套用退款帳本，營收以扣除退款後的淨額計算
+        if not orders_df.empty:
+            orders_df = apply_refunds(orders_df, get_refund_ledger(*wc_credentials))
+
+    # Meta 廣告數據獲取
+    if meta_source:
+        results['Meta 廣告'] = get_meta_ads_data(meta_source, start_date, end_date, debug_mode, deadline)
+        ads_df = results['Meta 廣告'].value
+
+    # 逾時截斷或來源失敗的結果不寫入事實表，保留先前完整抓取的日期
+    partial = [source for source, name in (('woocommerce', 'WooCommerce'), ('meta', 'Meta 廣告'))
+               if name in results and results[name].partial]
+    base_data = compute_base_data(orders_df, line_items_df, payment_methods, shipping_methods, ads_df,
+                                  start_date, end_date, fact_table, partial)
+    # 資料時間以最舊的來源為準
+    base_data['data_as_of'] = min((result.fetched_at for result in results.values()), default=datetime.now())
+    base_data['stale'] = any(result.stale for result in results.values())
+    base_data['partial_sources'] = [name for name, result in results.items() if result.partial]
+    return base_data
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=50)  # 依數據版本快取匯出檔，_df 不參與雜湊
+def get_export_payload(data_version, export_label, fmt, _df):
+    return export_bytes(_df, fmt)
+
+
+@st.cache_resource(show_spinner=False)  # 每個程序共用一份圖表快取
+def get_figure_cache():
+    return FigureCache()
+
+def cached_figure(name, data, options, builder):
+    """從圖表快取取得圖表：輸入數據指紋與選項相同時重用已建立的圖表（不可修改回傳的圖表）"""
+    figure, hit = get_figure_cache().get_or_build(name, data, options, builder)
+    st.session_state.setdefault('figure_cache_log', []).append((name, hit))
+    return figure
+
+def timed_section(section_name):
+    """
+    區塊計時裝飾器：調試模式下於區塊底部顯示本次執行耗時及圖表快取命中情況
+
+    搭配 st.fragment 使用時，可觀察單一區塊重新執行的成本。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            st.session_state.figure_cache_log = []
+            started_at = time.perf_counter()
+            result = func(*args, **kwargs)
+            if st.session_state.get('debug_mode', False):
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                st.caption(f"⏱️ {section_name}執行耗時：{elapsed_ms:.0f} ms")
+                if st.session_state.figure_cache_log:
+                    st.caption("圖表快取：" + "、".join(
+                        f"{name} {'命中' if hit else '未命中'}" for name, hit in st.session_state.figure_cache_log
+                    ))
+            return result
+        return wrapper
+    return decorator
+
+def build_payment_table(payment_fees_detail, total_orders):
+    """付款方式統計表（畫面與匯出共用）"""
+    payment_data = []
+    for method, details in payment_fees_detail.items():
+        payment_data.append({
+            '付款方式': method, '訂單數': details['count'],
+            '總金額': f"${details['total_amount']:,.0f}", '手續費率': f"{details['fee_rate']}%",
+            '手續費': f"${details['fee_amount']:,.0f}", '占比': f"{(details['count']/total_orders*100):.1f}%"
+        })
+    return pd.DataFrame(payment_data).sort_values('訂單數', ascending=False)
+
+def build_shipping_table(shipping_costs_detail, total_orders):
+    """運送方式統計表（畫面與匯出共用）"""
+    shipping_data = []
+    for method, details in shipping_costs_detail.items():
+        shipping_data.append({
+            '運送方式': method, '訂單數': details['count'], '單筆運費': f"${details['cost_per_order']}",
+            '總運費': f"${details['total_cost']:,.0f}", '占比': f"{(details['count']/total_orders*100):.1f}%"
+        })
+    return pd.DataFrame(shipping_data).sort_values('訂單數', ascending=False)
+
+@timed_section("標頭指標")
+def render_headline_cards(placeholder, headline):
+    """顯示標頭指標（訂單數、廣告費、曝光、點擊），完整數據載入後由正式總覽取代"""
+    ads = headline['ads']
+    if headline['orders'] is None and ads is None:
+        return
+    with placeholder.container():
+        col1, col2, col3, col4 = st.columns(4)
+        with col1: st.metric("總訂單數", f"{headline['orders']:,}" if headline['orders'] is not None else "—")
+        with col2: st.metric("廣告費", f"${ads['ad_spend']:,.0f}" if ads else "—")
+        with col3: st.metric("總曝光", f"{ads['impressions']:,}" if ads else "—")
+        with col4: st.metric("總點擊", f"{ads['clicks']:,}" if ads else "—")
+
+def provisional_overview_renderer(placeholder):
+    """
+    建立逐頁更新暫估總覽的回呼（訂單頁抵達時顯示 KPI 與每日營收，完整數據載入後由正式總覽取代）
+
+    畫面更新間隔不小於 PROGRESSIVE_RENDER_INTERVAL 秒，避免分頁很多時反覆繪圖
+    """
+    provisional = ProvisionalTotals()
+    last_render = [0.0]
+
+    def on_page(orders, loaded, expected):
+        provisional.add_page(orders, loaded, expected)
+        now = time.monotonic()
+        if now - last_render[0] < PROGRESSIVE_RENDER_INTERVAL and (expected is None or loaded < expected):
+            return
+        last_render[0] = now
+        snapshot = provisional.snapshot()
+        with placeholder.container():
+            progress_text = f"{snapshot['loaded']:,} / {snapshot['expected']:,}" if snapshot['expected'] else f"{snapshot['loaded']:,}"
+            st.caption(f"⏳ 載入中（已載入 {progress_text} 筆訂單），以下為暫估數字，載入完成後自動更新")
+            col1, col2, col3 = st.columns(3)
+            with col1: st.metric("總營收（暫估）", f"${snapshot['revenue']:,.0f}", help="訂單金額合計，尚未扣除退款")
+            with col2: st.metric("總訂單數（暫估）", f"{snapshot['orders']:,}")
+            with col3: st.metric("客單價（暫估）", f"${snapshot['avg_order_value']:.0f}")
+            if not snapshot['daily'].empty:
+                fig = trend_line_chart(snapshot['daily'], 'date', ['revenue'], '每日營收（暫估）',
+                                       labels={'value': '金額 ($)', 'date': '日期'}, height=300)
+                st.plotly_chart(fig, use_container_width=True, key=f"provisional_revenue_{snapshot['loaded']}")
+
+    return on_page
+
+@timed_section("快速總覽")
+def render_pushdown_sections(overview_stats, ads_summary):
+    """
+    快速總覽模式：以伺服器端彙總取代營運總覽與趨勢分析
+
+    成本分析、付款/運送方式、數據匯出與詳細數據需要訂單明細，只顯示說明，勾選載入完整訂單分析後才顯示
+    """
+    totals, daily_stats = overview_stats['totals'], overview_stats['daily']
+    st.markdown("""<div class="clean-section-header"><h2>營運總覽</h2></div>""", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.metric("總營收", f"${totals['revenue']:,.0f}", help="已扣除退款的淨營收")
+    with col2: st.metric("總訂單數", f"{totals['orders']:,}")
+    with col3: st.metric("客單價", f"${totals['avg_order_value']:.0f}")
+    with col4: st.metric("退款金額", f"${totals['refunds']:,.0f}")
+    if ads_summary:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1: st.metric("廣告費", f"${ads_summary['ad_spend']:,.0f}")
+        with col2: st.metric("總曝光", f"{ads_summary['impressions']:,}")
+        with col3: st.metric("總點擊", f"{ads_summary['clicks']:,}")
+        with col4: st.metric("ROAS", f"{totals['revenue'] / ads_summary['ad_spend']:.2f}"
+                             if ads_summary['ad_spend'] else "—")
+    st.caption("數據來源：WooCommerce Analytics 報表（伺服器端彙總）")
+
+    st.header("趨勢分析")
+    if not daily_stats.empty:
+        fig_stats = px.line(daily_stats, x='date', y='revenue', title='每日營收',
+                            labels={'revenue': '金額 ($)', 'date': '日期'})
+        fig_stats.update_layout(height=400)
+        st.plotly_chart(fig_stats, use_container_width=True)
+    else:
+        st.info("此期間沒有每日營收數據")
+
+    st.info("快速總覽模式只包含伺服器端彙總的指標；成本分析、付款/運送方式、數據匯出與詳細數據需要訂單明細，"
+            "勾選上方「載入完整訂單分析」後顯示")
+
+# 以下各區塊皆為 fragment：區塊內的互動只重新執行該區塊，共用數據階段的快取結果（ctx）
+
+@st.fragment
+@timed_section("營運總覽")
+def render_overview_section(ctx):
+    """營運總覽、成本分析、廣告數據與付款/運送方式分析"""
+    total_revenue, total_orders, total_refunds = ctx['total_revenue'], ctx['total_orders'], ctx['total_refunds']
+    avg_order_value, estimated_net_profit, estimated_cogs = ctx['avg_order_value'], ctx['estimated_net_profit'], ctx['estimated_cogs']
+    total_all_costs, total_ad_spend, business_tax = ctx['total_all_costs'], ctx['total_ad_spend'], ctx['business_tax']
+    total_shipping_cost, total_payment_fee = ctx['total_shipping_cost'], ctx['total_payment_fee']
+    total_impressions, total_clicks, ctr, roas = ctx['total_impressions'], ctx['total_clicks'], ctx['ctr'], ctx['roas']
+    ads_df, payment_methods, shipping_methods = ctx['ads_df'], ctx['payment_methods'], ctx['shipping_methods']
+    payment_fees_detail, shipping_costs_detail = ctx['payment_fees_detail'], ctx['shipping_costs_detail']
+
+    # 營運總覽
+    st.markdown("""<div class="clean-section-header"><h2>營運總覽</h2></div>""", unsafe_allow_html=True)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1: st.metric("總營收", f"${total_revenue:,.0f}", help="已扣除退款的淨營收")
+    with col2: st.metric("總訂單數", f"{total_orders:,}")
+    with col3: st.metric("客單價", f"${avg_order_value:.0f}")
+    with col4: st.metric("退款金額", f"${total_refunds:,.0f}")
+    with col5: st.metric("估計淨利", f"${estimated_net_profit:,.0f}")
+    
+    # 成本分析
+    st.markdown(f"""<div class="clean-section-header"><h2>成本分析（總成本：${total_all_costs:,.0f}）</h2></div>""", unsafe_allow_html=True)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1: st.metric("估計進貨成本", f"${estimated_cogs:,.0f}")
+    with col2: st.metric("運費", f"${total_shipping_cost:,.0f}")
+    with col3: st.metric("金流服務費", f"${total_payment_fee:,.0f}")
+    with col4: st.metric("廣告費", f"${total_ad_spend:,.0f}")
+    with col5: st.metric("營業稅", f"${business_tax:,.0f}")
+    
+    # 廣告數據
+    if not ads_df.empty:
+        st.markdown("""<div class="clean-section-header"><h2>廣告數據</h2></div>""", unsafe_allow_html=True)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1: st.metric("總曝光", f"{total_impressions:,}")
+        with col2: st.metric("總點擊", f"{total_clicks:,}")
+        with col3: st.metric("點擊率", f"{ctr:.2f}%")
+        with col4: st.metric("ROAS", f"{roas:.2f}")
+    
+    # 成本結構分析
+    st.header("成本結構分析")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        cost_structure = {'估計進貨成本': estimated_cogs, '廣告費': total_ad_spend, '運費': total_shipping_cost, '金流服務費': total_payment_fee, '營業稅': business_tax}
+        filtered_costs = {k: v for k, v in cost_structure.items() if v > 0}
+        
+        if filtered_costs:
+            cost_df = pd.DataFrame(list(filtered_costs.items()), columns=['成本類型', '金額'])
+            fig_cost = cached_figure("成本結構分布", cost_df, {},
+                                     lambda: share_pie_chart(cost_df, '金額', '成本類型', '成本結構分布'))
+            st.plotly_chart(fig_cost, use_container_width=True)
+    
+    with col2:
+        financial_summary = {'總營收': total_revenue, '總成本': total_all_costs, '估計淨利': estimated_net_profit}
+        summary_df = pd.DataFrame(list(financial_summary.items()), columns=['項目', '金額'])
+        fig_summary = cached_figure("營收成本獲利比較", summary_df, {},
+                                    lambda: colored_bar_chart(summary_df, '項目', '金額', '營收、成本與獲利比較',
+                                                              ['red', 'yellow', 'green']))
+        st.plotly_chart(fig_summary, use_container_width=True)
+    
+    # 付款方式分析
+    if payment_methods:
+        st.header("付款方式分析")
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            payment_df = build_payment_table(payment_fees_detail, total_orders)
+            st.subheader("付款方式統計")
+            st.dataframe(payment_df, use_container_width=True, hide_index=True)
+        
+        with col2:
+            payment_chart_df = pd.DataFrame(list(payment_methods.items()), columns=['付款方式', '訂單數'])
+            fig_payment = cached_figure("付款方式分布", payment_chart_df, {},
+                                        lambda: share_pie_chart(payment_chart_df, '訂單數', '付款方式', '付款方式分布',
+                                                                show_legend=False))
+            st.plotly_chart(fig_payment, use_container_width=True)
+    
+    # 運送方式分析
+    if shipping_methods:
+        st.header("運送方式分析")
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            shipping_df = build_shipping_table(shipping_costs_detail, total_orders)
+            st.subheader("運送方式統計")
+            st.dataframe(shipping_df, use_container_width=True, hide_index=True)
+        
+        with col2:
+            shipping_chart_df = pd.DataFrame(list(shipping_methods.items()), columns=['運送方式', '訂單數'])
+            fig_shipping = cached_figure("運送方式偏好", shipping_chart_df, {},
+                                         lambda: colored_bar_chart(shipping_chart_df, '運送方式', '訂單數', '運送方式偏好',
+                                                                   'Blues', xaxis_tickangle=-45))
+            st.plotly_chart(fig_shipping, use_container_width=True)
+
+@st.fragment
+@timed_section("趨勢分析")
+def render_trend_section(ctx):
+    """趨勢分析圖表（每小時模式下營收與廣告支出以小時序列對齊）"""
+    merged_df, orders_df, granularity = ctx['merged_df'], ctx['orders_df'], ctx['granularity']
+    start_date, end_date, meta_source = ctx['start_date'], ctx['end_date'], ctx['meta_source']
+
+    st.header("趨勢分析")
+
+    # 每小時模式：營收與廣告支出以小時序列對齊
+    if granularity == "每小時":
+        hourly_spend = insights_to_hourly([], 'spend')
+        if meta_source is not None:
+            if meta_source[0] == 'secure':
+                hourly_token, hourly_account = meta_source[4], meta_source[3]
+            else:
+                hourly_token, hourly_account = meta_source[1], meta_source[2]
+            hourly_spend = get_hourly_ad_spend(hourly_token, hourly_account, start_date, end_date)
+        trend_df = align_hourly(orders_to_hourly(orders_df), hourly_spend, start_date, end_date)
+        trend_x, trend_label = 'datetime', '每小時'
+    else:
+        trend_df, trend_x, trend_label = merged_df, 'date', granularity
+
+    # 圖表（長序列自動降採樣並改用 WebGL）
+    col1, col2 = st.columns(2)
+    with col1:
+        # 只以圖表用到的欄位計算指紋，成本率改變時營收/ROAS 圖可直接重用
+        revenue_spend_df = trend_df[[trend_x, 'revenue', 'spend']]
+        fig1 = cached_figure("營收 vs 廣告支出", revenue_spend_df, {'label': trend_label},
+                             lambda: trend_line_chart(revenue_spend_df, trend_x, ['revenue', 'spend'],
+                                                      f'{trend_label}營收 vs 廣告支出',
+                                                      labels={'value': '金額 ($)', 'variable': '指標'}))
+        st.plotly_chart(fig1, use_container_width=True)
+    
+    with col2:
+        if not trend_df.empty and 'roas' in trend_df.columns:
+            roas_df = trend_df[[trend_x, 'roas']]
+            fig2 = cached_figure("ROAS 趨勢", roas_df, {}, lambda: roas_chart(roas_df, trend_x))
+            st.plotly_chart(fig2, use_container_width=True)
+    
+    # 每日淨利圖表（每小時模式下仍以每日呈現）
+    profit_label = '每日' if granularity == "每小時" else granularity
+    st.subheader(f"{profit_label}估計淨利分析")
+    profit_df = merged_df[['date', 'estimated_net_profit']]
+    fig3 = cached_figure("估計淨利", profit_df, {'label': profit_label},
+                         lambda: profit_chart(profit_df, f'{profit_label}估計淨利'))
+    st.plotly_chart(fig3, use_container_width=True)
+
+@st.fragment
+@timed_section("數據匯出")
+def render_export_section(ctx):
+    """數據匯出：使用者按下產生後才建立匯出檔，並依數據版本快取"""
+    merged_df, total_orders = ctx['merged_df'], ctx['total_orders']
+    payment_methods, shipping_methods = ctx['payment_methods'], ctx['shipping_methods']
+    # 匯出版本：數據版本加上會影響匯出內容的參數
+    export_version = f"{ctx['data_version']}_{ctx['granularity']}_{ctx['cogs_rate']}"
+
+    # 匯出項目以函式延後建立，未匯出時不產生任何表格
+    export_sources = {}
+    if not merged_df.empty:
+        export_sources['每日數據'] = lambda: merged_df
+    if payment_methods:
+        export_sources['付款分析'] = lambda: build_payment_table(ctx['payment_fees_detail'], total_orders)
+    if shipping_methods:
+        export_sources['運送分析'] = lambda: build_shipping_table(ctx['shipping_costs_detail'], total_orders)
+    if not merged_df.empty:
+        export_sources['成本分析'] = lambda: merged_df
+
+    st.header("數據匯出")
+    if not export_sources:
+        st.info("目前沒有可匯出的數據")
+        return
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        export_label = st.selectbox("匯出項目", options=list(export_sources.keys()), key="export_label")
+    with col2:
+        export_format = st.selectbox("格式", options=available_formats(), key="export_format")
+    with col3:
+        st.write("")
+        if st.button("產生匯出檔", key="prepare_export"):
+            st.session_state.export_request = (export_version, export_label, export_format)
+
+    if st.session_state.get('export_request') == (export_version, export_label, export_format):
+        payload = get_export_payload(export_version, export_label, export_format, export_sources[export_label]())
+        st.download_button(f"下載{export_label}（{export_format}）", data=payload,
+                           file_name=export_file_name(export_label, export_format, datetime.now().strftime('%Y%m%d_%H%M')),
+                           mime=EXPORT_FORMATS[export_format][1], key="download_export")
+        st.caption(f"檔案大小：{len(payload) / 1024:,.1f} KB")
+
+@st.fragment
+@timed_section("詳細數據")
+def render_detail_section(ctx):
+    """詳細數據表格（每日、訂單、廣告、成本明細與商品分析）"""
+    merged_df, orders_df, ads_df, line_items_df = ctx['merged_df'], ctx['orders_df'], ctx['ads_df'], ctx['line_items_df']
+    product_partitions, granularity, cogs_rate = ctx['product_partitions'], ctx['granularity'], ctx['cogs_rate']
+    order_index, merged_table, ads_table = ctx['order_index'], ctx['merged_table'], ctx['ads_table']
+    start_date, end_date = ctx['start_date'], ctx['end_date']
+    total_revenue, estimated_cogs, estimated_net_profit = ctx['total_revenue'], ctx['estimated_cogs'], ctx['estimated_net_profit']
+    total_shipping_cost, total_payment_fee, total_ad_spend = ctx['total_shipping_cost'], ctx['total_payment_fee'], ctx['total_ad_spend']
+    business_tax, total_all_costs = ctx['business_tax'], ctx['total_all_costs']
+    shipping_costs_detail, payment_fees_detail = ctx['shipping_costs_detail'], ctx['payment_fees_detail']
+
+    if st.checkbox("顯示詳細數據"):
+        st.header("詳細分析數據")
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["每日營收與成本", "每日績效", "訂單明細", "廣告績效", "成本明細", "商品分析"])
+        
+        with tab1:
+            if not merged_df.empty:
+                st.caption(f"粒度：{'每日' if granularity == '每小時' else granularity}")
+                # Arrow 欄位投影，不複製數據
+                daily_cost_table = project(merged_table, {
+                    'date': '日期', 'revenue': '營收', 'estimated_cogs': '估計進貨成本',
+                    'daily_shipping_cost': '運費', 'daily_payment_fee': '金流服務費',
+                    'spend': '廣告費', 'business_tax': '營業稅', 'estimated_net_profit': '估計淨利'
+                })
+                # 使用 column_config 統一格式化所有金額欄位
+                money_columns = ['營收', '估計進貨成本', '運費', '金流服務費', '廣告費', '營業稅', '估計淨利']
+                column_config = {col: st.column_config.NumberColumn(col, format="$%.2f") for col in money_columns}
+                st.dataframe(daily_cost_table, use_container_width=True, hide_index=True, column_config=column_config)
+                st.info("💡 提示：運費和金流服務費按日平均分配計算")
         
-        for _, row in payment_summary.iterrows():
-            method, count, amount = row['payment_method'], int(row['order_count']), float(row['total_amount'])
-            fee_rate = 0.0
-            for key, rate in PAYMENT_FEES.items():
-                if key.lower() in method.lower() or method.lower() in key.lower():
-                    fee_rate = rate
-                    break
-            fee_amount = amount * (fee_rate / 100)
-            payment_fees[method] = {'count': count, 'total_amount': amount, 'fee_rate': fee_rate, 'fee_amount': fee_amount}
-            total_payment_fee += fee_amount
-    return payment_fees, total_payment_fee
-
-
-
-@st.cache_data(ttl=86400, show_spinner=False)  # 快取24小時（1天），每天只查詢一次
-
-@st.cache_data(ttl=300, show_spinner=False)  # 快取5分鐘，平衡數據新鮮度和性能
-def get_enhanced_woocommerce_data(url, key, secret, start_date, end_date):
-    try:
-        clean_url = url.rstrip('/')
-        endpoint = f"{clean_url}/wp-json/wc/v3/orders"
-        auth = HTTPBasicAuth(key, secret)
-        params = {
-            'after': start_date.strftime('%Y-%m-%d') + 'T00:00:00',
-            'before': end_date.strftime('%Y-%m-%d') + 'T23:59:59',
-            'per_page': 100, 'status': 'completed,processing,on-hold,wmp-in-transit,wmp-shipped,ry-at-cvs', 'orderby': 'date', 'order': 'desc'
-        }
+        with tab2:
+            if not merged_df.empty:
+                display_table = project(merged_table, {'date': '日期', 'revenue': '營收', 'spend': '廣告支出', 'roas': 'ROAS'})
+                st.dataframe(
+                    display_table,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "營收": st.column_config.NumberColumn("營收", format="$%.2f"),
+                        "廣告支出": st.column_config.NumberColumn("廣告支出", format="$%.2f"),
+                        "ROAS": st.column_config.NumberColumn("ROAS", format="%.2f")
+                    }
+                )
+        
+        with tab3:
+            if len(order_index) > 0:
+                # 伺服器端篩選、排序與分頁：只傳送目前頁面到瀏覽器
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    status_filter = st.multiselect("訂單狀態", options=order_index.options('status'), key="order_status_filter")
+                with col2:
+                    payment_filter = st.multiselect("付款方式", options=order_index.options('payment_method'), key="order_payment_filter")
+                with col3:
+                    shipping_filter = st.multiselect("運送方式", options=order_index.options('shipping_method'), key="order_shipping_filter")
+
+                # 最高金額的預設值隨數據而變：鍵包含期間與目前數據的最高金額，換期間或數據更新後不沿用舊的上限
+                _, amount_max = order_index.amount_range()
+                col1, col2, col3, col4, col5 = st.columns(5)
+                with col1:
+                    min_amount = st.number_input("最低金額", min_value=0.0, value=0.0, step=100.0, key="order_min_amount")
+                with col2:
+                    max_amount = st.number_input("最高金額", min_value=0.0, value=amount_max, step=100.0,
+                                                 key=f"order_max_amount_{start_date}_{end_date}_{amount_max}")
+                with col3:
+                    sort_label = st.selectbox("排序依據", options=list(SORT_COLUMNS.keys()), key="order_sort_by")
+                with col4:
+                    sort_descending = st.selectbox("排序方向", options=["遞減", "遞增"], key="order_sort_dir") == "遞減"
+                with col5:
+                    page_size = st.selectbox("每頁筆數", options=[25, 50, 100, 200], index=1, key="order_page_size")
+
+                matched = order_index.match(status_filter, payment_filter, shipping_filter, min_amount, max_amount,
+                                            sort_by=SORT_COLUMNS[sort_label], descending=sort_descending)
+                total_pages = max(1, -(-len(matched) // page_size))
+                page = st.number_input("頁碼", min_value=1, max_value=total_pages, value=1, step=1, key="order_page")
+                page_orders = order_index.page(matched, page, page_size)
+
+                display_orders = project(page_orders, {
+                    'order_id': '訂單ID', 'date': '日期', 'total': '金額', 'refund_total': '退款', 'status': '狀態',
+                    'customer_id': '客戶ID', 'payment_method': '付款方式', 'shipping_method': '運送方式'
+                })
+                st.dataframe(
+                    display_orders,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "金額": st.column_config.NumberColumn("金額", format="$%.2f"),
+                        "退款": st.column_config.NumberColumn("退款", format="$%.2f"),
+                        "日期": st.column_config.DateColumn("日期", format="YYYY-MM-DD")
+                    }
+                )
+                st.caption(f"符合條件 {len(matched):,} 筆（共 {len(order_index):,} 筆），第 {page} / {total_pages} 頁")
+
+        with tab4:
+            if not ads_df.empty:
+                display_ads = project(ads_table, {
+                    'date': '日期', 'spend': '廣告支出', 'impressions': '曝光數', 'clicks': '點擊數',
+                    'reach': '觸及人數', 'ctr': '點擊率', 'cpm': '千次曝光成本', 'cpc': '單次點擊成本'
+                })
+                # 使用 column_config 格式化各種類型的數據
+                ads_column_config = {'日期': st.column_config.DateColumn("日期", format="YYYY-MM-DD")}
+                if '廣告支出' in display_ads.column_names:
+                    ads_column_config['廣告支出'] = st.column_config.NumberColumn("廣告支出", format="$%.2f")
+                if '千次曝光成本' in display_ads.column_names:
+                    ads_column_config['千次曝光成本'] = st.column_config.NumberColumn("千次曝光成本", format="$%.2f")
+                if '單次點擊成本' in display_ads.column_names:
+                    ads_column_config['單次點擊成本'] = st.column_config.NumberColumn("單次點擊成本", format="$%.2f")
+                if '曝光數' in display_ads.column_names:
+                    ads_column_config['曝光數'] = st.column_config.NumberColumn("曝光數", format="%d")
+                if '點擊數' in display_ads.column_names:
+                    ads_column_config['點擊數'] = st.column_config.NumberColumn("點擊數", format="%d")
+                if '觸及人數' in display_ads.column_names:
+                    ads_column_config['觸及人數'] = st.column_config.NumberColumn("觸及人數", format="%d")
+                if '點擊率' in display_ads.column_names:
+                    ads_column_config['點擊率'] = st.column_config.NumberColumn("點擊率", format="%.2f%%")
+                st.dataframe(display_ads, use_container_width=True, hide_index=True, column_config=ads_column_config)
         
-        with st.spinner("正在獲取 WooCommerce 數據..."):
-            all_orders, page = [], 1
-            while True:
-                params['page'] = page
-                response = requests.get(endpoint, auth=auth, params=params, timeout=30)
-                if response.status_code == 200:
-                    orders = response.json()
-                    if not orders: break
-                    all_orders.extend(orders)
-                    page += 1
-                    if len(all_orders) >= 1000: break
-                else:
-                    if page == 1:
-                        st.error(f"WooCommerce API 錯誤: {response.text}")
-                        return pd.DataFrame(), {}, {}
-                    else: break
+        with tab5:
+            cost_details = []
+            cost_details.append({
+                '成本類型': '估計進貨成本', '項目': f'{cogs_rate}% 成本率',
+                '基準金額': f"${total_revenue:,.0f}", '費率/單價': f"{cogs_rate}%", '總額': f"${estimated_cogs:,.0f}"
+            })
             
-            order_data, payment_methods, shipping_methods = [], {}, {}
-            for order in all_orders:
-                order_info = {
-                    'order_id': order['id'], 'date': pd.to_datetime(order['date_created']).date(),
-                    'total': float(order['total']), 'status': order['status'],
-                    'customer_id': order.get('customer_id', 0),
-                    'payment_method': order.get('payment_method_title', '未知'), 'shipping_method': '未知',
-                    'email': order.get('billing', {}).get('email', '')
-                }
-                payment_method = order.get('payment_method_title', '未知')
-                payment_methods[payment_method] = payment_methods.get(payment_method, 0) + 1
-                
-                shipping_lines = order.get('shipping_lines', [])
-                if shipping_lines:
-                    shipping_method = shipping_lines[0].get('method_title', '未知')
-                    order_info['shipping_method'] = shipping_method
-                    shipping_methods[shipping_method] = shipping_methods.get(shipping_method, 0) + 1
-                else:
-                    shipping_methods['未知'] = shipping_methods.get('未知', 0) + 1
-                order_data.append(order_info)
+            if shipping_costs_detail:
+                for method, details in shipping_costs_detail.items():
+                    if details['total_cost'] > 0:
+                        cost_details.append({
+                            '成本類型': '運費', '項目': method, '基準金額': f"{details['count']} 筆訂單",
+                            '費率/單價': f"${details['cost_per_order']}", '總額': f"${details['total_cost']:,.0f}"
+                        })
             
-            df = pd.DataFrame(order_data)
-            st.success(f"成功獲取 {len(all_orders)} 筆 WooCommerce 訂單")
-            return df, payment_methods, shipping_methods
-    except Exception as e:
-        st.error(f"WooCommerce 連接錯誤: {str(e)}")
-        return pd.DataFrame(), {}, {}
-
-@st.cache_data(ttl=300, show_spinner=False)  # 快取5分鐘
-def get_meta_ads_data_basic(token, account_id, start_date, end_date):
-    try:
-        if not account_id.startswith('act_'): account_id = f"act_{account_id}"
-        url = f"https://graph.facebook.com/v23.0/{account_id}/insights"
-        params = {
-            'access_token': token, 'fields': 'spend,impressions,clicks,reach,frequency,cpm,cpc,ctr',
-            'time_range': json.dumps({
-                'since': start_date.strftime('%Y-%m-%d'),
-                'until': end_date.strftime('%Y-%m-%d')
-            }),
-            'level': 'account', 'time_increment': 1
-        }
-        
-        with st.spinner("正在獲取 Meta 廣告數據..."):
-            response = requests.get(url, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                processed_data = []
-                for item in data.get('data', []):
-                    processed_data.append({
-                        'date': pd.to_datetime(item['date_start']).date(),
-                        'spend': float(item.get('spend', 0)), 'impressions': int(item.get('impressions', 0)),
-                        'clicks': int(item.get('clicks', 0)), 'reach': int(item.get('reach', 0)),
-                        'ctr': float(item.get('ctr', 0)), 'cpm': float(item.get('cpm', 0)), 'cpc': float(item.get('cpc', 0))
-                    })
-                df = pd.DataFrame(processed_data)
-                st.success(f"成功獲取 {len(processed_data)} 筆 Meta 廣告數據")
-                return df
+            if payment_fees_detail:
+                for method, details in payment_fees_detail.items():
+                    if details['fee_amount'] > 0:
+                        cost_details.append({
+                            '成本類型': '金流服務費', '項目': method, '基準金額': f"${details['total_amount']:,.0f}",
+                            '費率/單價': f"{details['fee_rate']}%", '總額': f"${details['fee_amount']:,.0f}"
+                        })
+            
+            if total_ad_spend > 0:
+                cost_details.append({
+                    '成本類型': '廣告費', '項目': 'Meta 廣告', '基準金額': '-',
+                    '費率/單價': '-', '總額': f"${total_ad_spend:,.0f}"
+                })
+            
+            cost_details.append({
+                '成本類型': '營業稅', '項目': '5% 營業稅', '基準金額': f"${total_revenue:,.0f}",
+                '費率/單價': '5%', '總額': f"${business_tax:,.0f}"
+            })
+            
+            if cost_details:
+                cost_df = pd.DataFrame(cost_details)
+                st.dataframe(cost_df, use_container_width=True, hide_index=True)
+                
+                st.subheader("成本摘要")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.write("**商品相關成本**")
+                    st.write(f"估計進貨成本: ${estimated_cogs:,.0f}")
+                    st.write(f"運費: ${total_shipping_cost:,.0f}")
+                    st.write(f"金流服務費: ${total_payment_fee:,.0f}")
+                with col2:
+                    st.write("**行銷成本**")
+                    st.write(f"廣告費: ${total_ad_spend:,.0f}")
+                with col3:
+                    st.write("**稅務與總計**")
+                    st.write(f"營業稅: ${business_tax:,.0f}")
+                    st.write(f"**總成本: ${total_all_costs:,.0f}**")
+                    st.write(f"**估計淨利: ${estimated_net_profit:,.0f}**")
+
+        with tab6:
+            if not line_items_df.empty:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    sort_metric = st.selectbox("排序指標", options=list(PRODUCT_METRICS.keys()),
+                                               format_func=lambda m: PRODUCT_METRICS[m], key="product_sort_metric")
+                with col2:
+                    top_n = st.number_input("顯示前 N 名", min_value=5, max_value=100, value=10, step=5, key="product_top_n")
+                with col3:
+                    product_range = st.date_input("商品分析期間", value=(start_date, end_date),
+                                                  min_value=start_date, max_value=end_date, key="product_date_range")
+                with col4:
+                    by_variation = st.checkbox("依商品規格分列", key="product_by_variation")
+
+                range_start, range_end = (product_range if len(product_range) == 2 else (start_date, end_date))
+                top_products = query_top_products(
+                    product_partitions, metric=sort_metric, n=int(top_n),
+                    start_date=range_start, end_date=range_end,
+                    cogs_rate=cogs_rate, by_variation=by_variation
+                )
+                top_products = top_products.rename(columns={
+                    'product_id': '商品ID', 'variation_id': '規格ID', 'name': '商品名稱',
+                    'revenue': '營收', 'units': '銷量', 'orders': '訂單數',
+                    'margin': '估計毛利', 'repeat_share': '回購占比'
+                })
+                st.dataframe(
+                    top_products,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "營收": st.column_config.NumberColumn("營收", format="$%.0f"),
+                        "估計毛利": st.column_config.NumberColumn("估計毛利", format="$%.0f"),
+                        "回購占比": st.column_config.NumberColumn("回購占比", format="%.1f%%")
+                    }
+                )
+                st.info(f"💡 提示：估計毛利以 {cogs_rate}% 進貨成本率計算；回購占比為同一客戶再次購買同商品的銷量比例")
             else:
-                st.error(f"Meta 廣告 API 錯誤: {response.text}")
-                return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Meta 廣告連接錯誤: {str(e)}")
-        return pd.DataFrame()
+                st.info("目前沒有商品明細數據")
 
 # 主要分析邏輯
 if len(date_range) == 2:
@@ -332,399 +873,139 @@ if len(date_range) == 2:
     debug_mode = st.session_state.get('debug_mode', False)
 
     if wc_configured or meta_configured:
-        orders_df, payment_methods, shipping_methods, ads_df = pd.DataFrame(), {}, {}, pd.DataFrame()
-        
-        # WooCommerce 數據獲取
+        wc_credentials, meta_source = None, None
+
         if wc_configured:
             if SECURE_MODE:
                 wc_config, _ = get_active_config()
-                orders_df, payment_methods, shipping_methods = get_enhanced_woocommerce_data(
-                    wc_config['url'], wc_config['consumer_key'], wc_config['consumer_secret'], start_date, end_date
-                )
+                wc_credentials = (wc_config['url'], wc_config['consumer_key'], wc_config['consumer_secret'])
             else:
-                orders_df, payment_methods, shipping_methods = get_enhanced_woocommerce_data(
-                    wc_url, wc_key, wc_secret, start_date, end_date
-                )
-        
-        # Meta 廣告數據獲取
+                wc_credentials = (wc_url, wc_key, wc_secret)
+
         if meta_configured:
             if SECURE_MODE:
                 _, meta_config = get_active_config()
                 # 使用新的 Token 管理器的 Token（如果有的話）
                 if 'meta_access_token' in st.session_state:
                     meta_config['long_lived_token'] = st.session_state.meta_access_token
-                ads_df = get_enhanced_meta_ads_data(meta_config, start_date, end_date, debug_mode)
-            else:
-                ads_df = get_meta_ads_data_basic(meta_token, meta_account_id, start_date, end_date)
-        
-        # 如果有數據，繼續分析
-        if not orders_df.empty or not ads_df.empty:
-            # 計算基本指標
-            if not orders_df.empty:
-                total_revenue, total_orders = orders_df['total'].sum(), len(orders_df)
-                avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-            else:
-                total_revenue = total_orders = avg_order_value = 0
-            
-            if not ads_df.empty:
-                total_ad_spend = ads_df['spend'].sum()
-                total_impressions, total_clicks = ads_df['impressions'].sum(), ads_df['clicks'].sum()
-            else:
-                total_ad_spend = total_impressions = total_clicks = 0
-            
-            # 計算成本
-            estimated_cogs = total_revenue * (cogs_rate / 100)
-            shipping_costs_detail, total_shipping_cost = calculate_shipping_costs(shipping_methods)
-            payment_fees_detail, total_payment_fee = calculate_payment_fees(orders_df)
-            business_tax = total_revenue * TAX_RATE
-            
-            # 計算總成本和淨利
-            total_all_costs = estimated_cogs + total_shipping_cost + total_payment_fee + total_ad_spend + business_tax
-            estimated_net_profit = total_revenue - total_all_costs
-            roas = total_revenue / total_ad_spend if total_ad_spend > 0 else 0
-            ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
-            
-            # 營運總覽
-            st.markdown("""<div class="clean-section-header"><h2>營運總覽</h2></div>""", unsafe_allow_html=True)
-            total_orders = len(orders_df)
-            col1, col2, col3, col4 = st.columns(4)
-            with col1: st.metric("總營收", f"${total_revenue:,.0f}")
-            with col2: st.metric("總訂單數", f"{total_orders:,}")
-            with col3: st.metric("客單價", f"${avg_order_value:.0f}")
-            with col4: st.metric("估計淨利", f"${estimated_net_profit:,.0f}")
-            
-            # 成本分析
-            st.markdown(f"""<div class="clean-section-header"><h2>成本分析（總成本：${total_all_costs:,.0f}）</h2></div>""", unsafe_allow_html=True)
-            col1, col2, col3, col4, col5 = st.columns(5)
-            with col1: st.metric("估計進貨成本", f"${estimated_cogs:,.0f}")
-            with col2: st.metric("運費", f"${total_shipping_cost:,.0f}")
-            with col3: st.metric("金流服務費", f"${total_payment_fee:,.0f}")
-            with col4: st.metric("廣告費", f"${total_ad_spend:,.0f}")
-            with col5: st.metric("營業稅", f"${business_tax:,.0f}")
-            
-            # 廣告數據
-            if not ads_df.empty:
-                st.markdown("""<div class="clean-section-header"><h2>廣告數據</h2></div>""", unsafe_allow_html=True)
-                col1, col2, col3, col4 = st.columns(4)
-                with col1: st.metric("總曝光", f"{total_impressions:,}")
-                with col2: st.metric("總點擊", f"{total_clicks:,}")
-                with col3: st.metric("點擊率", f"{ctr:.2f}%")
-                with col4: st.metric("ROAS", f"{roas:.2f}")
-            
-            # 成本結構分析
-            st.header("成本結構分析")
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                cost_structure = {'估計進貨成本': estimated_cogs, '廣告費': total_ad_spend, '運費': total_shipping_cost, '金流服務費': total_payment_fee, '營業稅': business_tax}
-                filtered_costs = {k: v for k, v in cost_structure.items() if v > 0}
-                
-                if filtered_costs:
-                    cost_df = pd.DataFrame(list(filtered_costs.items()), columns=['成本類型', '金額'])
-                    fig_cost = px.pie(cost_df, values='金額', names='成本類型', title='成本結構分布')
-                    fig_cost.update_traces(textposition='inside', textinfo='percent+label')
-                    fig_cost.update_layout(height=400)
-                    st.plotly_chart(fig_cost, use_container_width=True)
-            
-            with col2:
-                financial_summary = {'總營收': total_revenue, '總成本': total_all_costs, '估計淨利': estimated_net_profit}
-                summary_df = pd.DataFrame(list(financial_summary.items()), columns=['項目', '金額'])
-                fig_summary = px.bar(summary_df, x='項目', y='金額', title='營收、成本與獲利比較',
-                                   color='金額', color_continuous_scale=['red', 'yellow', 'green'])
-                fig_summary.update_layout(height=400, showlegend=False)
-                st.plotly_chart(fig_summary, use_container_width=True)
-            
-            # 付款方式分析
-            if payment_methods:
-                st.header("付款方式分析")
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    payment_data = []
-                    for method, details in payment_fees_detail.items():
-                        payment_data.append({
-                            '付款方式': method, '訂單數': details['count'],
-                            '總金額': f"${details['total_amount']:,.0f}", '手續費率': f"{details['fee_rate']}%",
-                            '手續費': f"${details['fee_amount']:,.0f}", '占比': f"{(details['count']/total_orders*100):.1f}%"
-                        })
-                    payment_df = pd.DataFrame(payment_data).sort_values('訂單數', ascending=False)
-                    st.subheader("付款方式統計")
-                    st.dataframe(payment_df, use_container_width=True, hide_index=True)
-                
-                with col2:
-                    payment_chart_df = pd.DataFrame(list(payment_methods.items()), columns=['付款方式', '訂單數'])
-                    fig_payment = px.pie(payment_chart_df, values='訂單數', names='付款方式', title='付款方式分布')
-                    fig_payment.update_traces(textposition='inside', textinfo='percent+label')
-                    fig_payment.update_layout(height=400, showlegend=False)
-                    st.plotly_chart(fig_payment, use_container_width=True)
-            
-            # 運送方式分析
-            if shipping_methods:
-                st.header("運送方式分析")
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    shipping_data = []
-                    for method, details in shipping_costs_detail.items():
-                        shipping_data.append({
-                            '運送方式': method, '訂單數': details['count'], '單筆運費': f"${details['cost_per_order']}",
-                            '總運費': f"${details['total_cost']:,.0f}", '占比': f"{(details['count']/total_orders*100):.1f}%"
-                        })
-                    shipping_df = pd.DataFrame(shipping_data).sort_values('訂單數', ascending=False)
-                    st.subheader("運送方式統計")
-                    st.dataframe(shipping_df, use_container_width=True, hide_index=True)
-                
-                with col2:
-                    shipping_chart_df = pd.DataFrame(list(shipping_methods.items()), columns=['運送方式', '訂單數'])
-                    fig_shipping = px.bar(shipping_chart_df, x='運送方式', y='訂單數', title='運送方式偏好',
-                                        color='訂單數', color_continuous_scale='Blues')
-                    fig_shipping.update_layout(xaxis_tickangle=-45, height=400, showlegend=False)
-                    st.plotly_chart(fig_shipping, use_container_width=True)
-            
-            # 趨勢分析
-            st.header("趨勢分析")
-            
-            # 合併每日數據
-            if not orders_df.empty and not ads_df.empty:
-                daily_orders = orders_df.groupby('date')['total'].sum().reset_index()
-                daily_ads = ads_df.groupby('date')['spend'].sum().reset_index()
-                merged_df = pd.merge(daily_orders, daily_ads, on='date', how='outer').fillna(0)
-                merged_df.rename(columns={'total': 'revenue'}, inplace=True)
-            elif not orders_df.empty:
-                merged_df = orders_df.groupby('date')['total'].sum().reset_index()
-                merged_df.rename(columns={'total': 'revenue'}, inplace=True)
-                merged_df['spend'] = 0
+                meta_source = ('secure', meta_config['app_id'], meta_config['app_secret'],
+                               meta_config['account_id'], meta_config.get('long_lived_token'))
             else:
-                merged_df = ads_df.groupby('date')['spend'].sum().reset_index()
-                merged_df['revenue'] = 0
-            
-            # 計算每日運費和金流手續費（基於實際訂單）
-            if not orders_df.empty:
-                # 每日運費計算
-                daily_shipping = orders_df.groupby('date')['shipping_method'].apply(
-                    lambda methods: sum(
-                        next((cost for key, cost in SHIPPING_COSTS.items()
-                              if key.lower() in method.lower() or method.lower() in key.lower()), 0)
-                        for method in methods
-                    )
-                ).reset_index()
-                daily_shipping.columns = ['date', 'daily_shipping_cost']
-
-                # 每日金流手續費計算
-                daily_payment = orders_df.groupby('date').apply(
-                    lambda group: sum(
-                        float(row['total']) * (next((rate for key, rate in PAYMENT_FEES.items()
-                                                     if key.lower() in row['payment_method'].lower()
-                                                     or row['payment_method'].lower() in key.lower()), 0) / 100)
-                        for _, row in group.iterrows()
+                meta_source = ('basic', meta_token, meta_account_id)
+
+        # 快速總覽模式：總覽由伺服器端彙總，需要訂單層級欄位（付款/運送方式）時才回退到訂單抓取
+        overview_stats = None
+        if wc_configured and overview_pushdown:
+            load_order_level = st.checkbox("載入完整訂單分析（付款方式、運送方式、成本明細）", key="load_order_level")
+            if not load_order_level:
+                overview_stats = get_wc_overview_stats(*wc_credentials, start_date, end_date)
+                if overview_stats is None:
+                    st.warning("WooCommerce Analytics 報表無法使用，改用訂單層級數據")
+
+        # 背景預熱常用期間（DASHBOARD_CACHE_WARMER=off 時由獨立的背景工作負責）
+        if os.getenv(CACHE_WARMER_ENV, 'app') == 'app':
+            start_cache_warmer(wc_credentials, meta_source)
+
+        if overview_stats is not None:
+            ads_summary = (cached_meta_summary(get_data_cache(), meta_source, start_date, end_date,
+                                               StreamlitReporter()).value if meta_source else None)
+            render_pushdown_sections(overview_stats, ads_summary)
+        else:
+            # 冷啟動（共用快取及預先計算的報表都沒有此期間）：訂單逐頁抵達即顯示暫估總覽，完成後由正式數字取代
+            # 在快取函式外抓取，畫面更新不會被 st.cache_resource 記錄重播；每個工作階段每個期間只檢查一次
+            # 總覽優先時，先以每個來源一次請求顯示標頭指標，再逐頁載入訂單明細
+            headline_area, provisional_area, prefetched_orders = st.empty(), st.empty(), None
+            range_key = (wc_credentials, start_date, end_date)
+            checked_ranges = st.session_state.setdefault('checked_ranges', set())
+            if wc_credentials and range_key not in checked_ranges:
+                checked_ranges.add(range_key)
+                sources = ['woocommerce'] + (['meta'] if meta_source else [])
+                if (not get_report_store().has_snapshot(start_date, end_date, sources,
+                                                        fact_table_scope(wc_credentials, meta_source))
+                        and peek_woocommerce(get_data_cache(), wc_credentials, start_date, end_date) is None):
+                    if overview_first:
+                        render_headline_cards(headline_area,
+                                              get_headline_totals(wc_credentials, meta_source, start_date, end_date))
+                    prefetched_orders = get_enhanced_woocommerce_data(
+                        *wc_credentials, start_date, end_date, Deadline(RENDER_DEADLINE_SECONDS),
+                        on_page=provisional_overview_renderer(provisional_area)
                     )
-                ).reset_index()
-                daily_payment.columns = ['date', 'daily_payment_fee']
-
-                # 合併運費和手續費到 merged_df
-                merged_df = pd.merge(merged_df, daily_shipping, on='date', how='left')
-                merged_df = pd.merge(merged_df, daily_payment, on='date', how='left')
-                merged_df['daily_shipping_cost'] = merged_df['daily_shipping_cost'].fillna(0)
-                merged_df['daily_payment_fee'] = merged_df['daily_payment_fee'].fillna(0)
+
+            # 數據階段（快取）：抓取、退款、事實表、成本明細都與成本率無關
+            base_data = load_base_data(wc_credentials, meta_source, start_date, end_date, debug_mode,
+                                       base_data_generation(get_data_cache(), wc_credentials, meta_source,
+                                                            start_date, end_date),
+                                       prefetched_orders)
+            headline_area.empty()
+            provisional_area.empty()
+            orders_df, line_items_df, ads_df = base_data['orders_df'], base_data['line_items_df'], base_data['ads_df']
+            payment_methods, shipping_methods = base_data['payment_methods'], base_data['shipping_methods']
+            shipping_costs_detail = base_data['shipping_costs_detail']
+            payment_fees_detail = base_data['payment_fees_detail']
+            base_totals = base_data['totals']
+            if base_data.get('report_generated_at'):
+                st.caption(f"📦 使用預先計算的報表（產生於 {base_data['report_generated_at']:%Y-%m-%d %H:%M}）")
             else:
-                merged_df['daily_shipping_cost'] = 0
-                merged_df['daily_payment_fee'] = 0
-
-            # 計算其他每日指標
-            merged_df['roas'] = merged_df['revenue'] / merged_df['spend'].replace(0, 1)
-            merged_df['estimated_cogs'] = merged_df['revenue'] * (cogs_rate / 100)
-            merged_df['business_tax'] = merged_df['revenue'] * TAX_RATE
-            merged_df['estimated_net_profit'] = (merged_df['revenue'] - merged_df['estimated_cogs'] -
-                                               merged_df['daily_shipping_cost'] - merged_df['daily_payment_fee'] -
-                                               merged_df['spend'] - merged_df['business_tax'])
-            
-            # 圖表
-            col1, col2 = st.columns(2)
-            with col1:
-                fig1 = px.line(merged_df, x='date', y=['revenue', 'spend'], title='每日營收 vs 廣告支出',
-                              labels={'value': '金額 ($)', 'variable': '指標'})
-                fig1.update_layout(height=400)
-                st.plotly_chart(fig1, use_container_width=True)
-            
-            with col2:
-                if not merged_df.empty and 'roas' in merged_df.columns:
-                    fig2 = px.line(merged_df, x='date', y='roas', title='ROAS 趨勢')
-                    fig2.add_hline(y=1, line_dash="dash", line_color="red", annotation_text="損益平衡")
-                    fig2.add_hline(y=3, line_dash="dot", line_color="green", annotation_text="目標值")
-                    fig2.update_layout(height=400)
-                    st.plotly_chart(fig2, use_container_width=True)
-            
-            # 每日淨利圖表
-            st.subheader("每日估計淨利分析")
-            fig3 = px.bar(merged_df, x='date', y='estimated_net_profit', title='每日估計淨利',
-                         color='estimated_net_profit', color_continuous_scale=['red', 'yellow', 'green'],
-                         labels={'estimated_net_profit': '估計淨利 ($)', 'date': '日期'})
-            fig3.add_hline(y=0, line_dash="solid", line_color="black", annotation_text="損益平衡線")
-            fig3.update_layout(height=450)
-            st.plotly_chart(fig3, use_container_width=True)
-            
-            # 數據匯出
-            st.header("數據匯出")
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                if 'merged_df' in locals():
-                    csv_data = merged_df.to_csv(index=False)
-                    st.download_button("下載每日數據", data=csv_data, 
-                                     file_name=f"每日數據_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
-            
-            with col2:
-                if payment_methods and 'payment_df' in locals():
-                    payment_csv = payment_df.to_csv(index=False)
-                    st.download_button("下載付款分析", data=payment_csv,
-                                     file_name=f"付款分析_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
-            
-            with col3:
-                if shipping_methods and 'shipping_df' in locals():
-                    shipping_csv = shipping_df.to_csv(index=False)
-                    st.download_button("下載運送分析", data=shipping_csv,
-                                     file_name=f"運送分析_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
-            
-            with col4:
-                if 'merged_df' in locals():
-                    cost_csv = merged_df.to_csv(index=False)
-                    st.download_button("下載成本分析", data=cost_csv,
-                                     file_name=f"成本分析_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
-            
-            # 詳細數據表格
-            if st.checkbox("顯示詳細數據"):
-                st.header("詳細分析數據")
-                tab1, tab2, tab3, tab4, tab5 = st.tabs(["每日營收與成本", "每日績效", "訂單明細", "廣告績效", "成本明細"])
-                
-                with tab1:
-                    if 'merged_df' in locals() and not merged_df.empty:
-                        daily_cost_df = merged_df[['date', 'revenue', 'estimated_cogs', 'daily_shipping_cost',
-                                                 'daily_payment_fee', 'spend', 'business_tax', 'estimated_net_profit']].copy()
-                        daily_cost_df = daily_cost_df.rename(columns={
-                            'date': '日期', 'revenue': '營收', 'estimated_cogs': '估計進貨成本',
-                            'daily_shipping_cost': '運費', 'daily_payment_fee': '金流服務費',
-                            'spend': '廣告費', 'business_tax': '營業稅', 'estimated_net_profit': '估計淨利'
-                        })
-                        # 使用 column_config 統一格式化所有金額欄位
-                        money_columns = ['營收', '估計進貨成本', '運費', '金流服務費', '廣告費', '營業稅', '估計淨利']
-                        column_config = {col: st.column_config.NumberColumn(col, format="$%.2f") for col in money_columns}
-                        st.dataframe(daily_cost_df, use_container_width=True, hide_index=True, column_config=column_config)
-                        st.info("💡 提示：運費和金流服務費按日平均分配計算")
-                
-                with tab2:
-                    if 'merged_df' in locals() and not merged_df.empty:
-                        display_df = merged_df[['date', 'revenue', 'spend', 'roas']].copy()
-                        display_df = display_df.rename(columns={'date': '日期', 'revenue': '營收', 'spend': '廣告支出', 'roas': 'ROAS'})
-                        st.dataframe(
-                            display_df,
-                            use_container_width=True,
-                            hide_index=True,
-                            column_config={
-                                "營收": st.column_config.NumberColumn("營收", format="$%.2f"),
-                                "廣告支出": st.column_config.NumberColumn("廣告支出", format="$%.2f"),
-                                "ROAS": st.column_config.NumberColumn("ROAS", format="%.2f")
-                            }
-                        )
-                
-                with tab3:
-                    if not orders_df.empty:
-                        display_orders = orders_df[['order_id', 'date', 'total', 'status', 'customer_id', 'payment_method', 'shipping_method']].copy()
-                        # 使用 Streamlit 的 column_config 來格式化，而不是 apply
-                        display_orders = display_orders.rename(columns={
-                            'order_id': '訂單ID', 'date': '日期', 'total': '金額', 'status': '狀態',
-                            'customer_id': '客戶ID', 'payment_method': '付款方式', 'shipping_method': '運送方式'
-                        })
-                        st.dataframe(
-                            display_orders,
-                            use_container_width=True,
-                            hide_index=True,
-                            column_config={
-                                "金額": st.column_config.NumberColumn("金額", format="$%.2f")
-                            }
-                        )
-                
-                with tab4:
-                    if not ads_df.empty:
-                        display_ads = ads_df.copy()
-                        display_ads = display_ads.rename(columns={
-                            'date': '日期', 'spend': '廣告支出', 'impressions': '曝光數', 'clicks': '點擊數',
-                            'reach': '觸及人數', 'ctr': '點擊率', 'cpm': '千次曝光成本', 'cpc': '單次點擊成本'
-                        })
-                        # 使用 column_config 格式化各種類型的數據
-                        ads_column_config = {}
-                        if '廣告支出' in display_ads.columns:
-                            ads_column_config['廣告支出'] = st.column_config.NumberColumn("廣告支出", format="$%.2f")
-                        if '千次曝光成本' in display_ads.columns:
-                            ads_column_config['千次曝光成本'] = st.column_config.NumberColumn("千次曝光成本", format="$%.2f")
-                        if '單次點擊成本' in display_ads.columns:
-                            ads_column_config['單次點擊成本'] = st.column_config.NumberColumn("單次點擊成本", format="$%.2f")
-                        if '曝光數' in display_ads.columns:
-                            ads_column_config['曝光數'] = st.column_config.NumberColumn("曝光數", format="%d")
-                        if '點擊數' in display_ads.columns:
-                            ads_column_config['點擊數'] = st.column_config.NumberColumn("點擊數", format="%d")
-                        if '觸及人數' in display_ads.columns:
-                            ads_column_config['觸及人數'] = st.column_config.NumberColumn("觸及人數", format="%d")
-                        if '點擊率' in display_ads.columns:
-                            ads_column_config['點擊率'] = st.column_config.NumberColumn("點擊率", format="%.2f%%")
-                        st.dataframe(display_ads, use_container_width=True, hide_index=True, column_config=ads_column_config)
-                
-                with tab5:
-                    cost_details = []
-                    cost_details.append({
-                        '成本類型': '估計進貨成本', '項目': f'{cogs_rate}% 成本率',
-                        '基準金額': f"${total_revenue:,.0f}", '費率/單價': f"{cogs_rate}%", '總額': f"${estimated_cogs:,.0f}"
-                    })
-                    
-                    if shipping_costs_detail:
-                        for method, details in shipping_costs_detail.items():
-                            if details['total_cost'] > 0:
-                                cost_details.append({
-                                    '成本類型': '運費', '項目': method, '基準金額': f"{details['count']} 筆訂單",
-                                    '費率/單價': f"${details['cost_per_order']}", '總額': f"${details['total_cost']:,.0f}"
-                                })
-                    
-                    if payment_fees_detail:
-                        for method, details in payment_fees_detail.items():
-                            if details['fee_amount'] > 0:
-                                cost_details.append({
-                                    '成本類型': '金流服務費', '項目': method, '基準金額': f"${details['total_amount']:,.0f}",
-                                    '費率/單價': f"{details['fee_rate']}%", '總額': f"${details['fee_amount']:,.0f}"
-                                })
-                    
-                    if total_ad_spend > 0:
-                        cost_details.append({
-                            '成本類型': '廣告費', '項目': 'Meta 廣告', '基準金額': '-',
-                            '費率/單價': '-', '總額': f"${total_ad_spend:,.0f}"
-                        })
-                    
-                    cost_details.append({
-                        '成本類型': '營業稅', '項目': '5% 營業稅', '基準金額': f"${total_revenue:,.0f}",
-                        '費率/單價': '5%', '總額': f"${business_tax:,.0f}"
-                    })
-                    
-                    if cost_details:
-                        cost_df = pd.DataFrame(cost_details)
-                        st.dataframe(cost_df, use_container_width=True, hide_index=True)
-                        
-                        st.subheader("成本摘要")
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.write("**商品相關成本**")
-                            st.write(f"估計進貨成本: ${estimated_cogs:,.0f}")
-                            st.write(f"運費: ${total_shipping_cost:,.0f}")
-                            st.write(f"金流服務費: ${total_payment_fee:,.0f}")
-                        with col2:
-                            st.write("**行銷成本**")
-                            st.write(f"廣告費: ${total_ad_spend:,.0f}")
-                        with col3:
-                            st.write("**稅務與總計**")
-                            st.write(f"營業稅: ${business_tax:,.0f}")
-                            st.write(f"**總成本: ${total_all_costs:,.0f}**")
-                            st.write(f"**估計淨利: ${estimated_net_profit:,.0f}**")
+                st.caption(f"🕒 資料時間：{base_data['data_as_of']:%Y-%m-%d %H:%M}"
+                           + ("（數據已過期，正在背景更新，重新整理頁面即可看到最新數據）" if base_data['stale'] else ""))
+            if base_data['partial_sources']:
+                st.warning(f"⚠️ {'、'.join(base_data['partial_sources'])} 回應過慢或暫時無法連線，"
+                           "以下數字只包含已載入的部分數據")
+                if st.button("重新載入數據", key="reload_partial"):
+                    load_base_data.clear()
+                    st.rerun()
 
+            # 如果有數據，繼續分析
+            if not orders_df.empty or not ads_df.empty:
+                # 基本指標
+                total_revenue, total_orders, total_refunds = base_totals['revenue'], base_totals['orders'], base_totals['refunds']
+                avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+                total_ad_spend = base_totals['ad_spend']
+                total_impressions, total_clicks = base_totals['impressions'], base_totals['clicks']
+                total_shipping_cost, total_payment_fee = base_totals['shipping_cost'], base_totals['payment_fee']
+                business_tax = base_totals['business_tax']
+
+                # 參數階段：成本率只影響進貨成本與淨利，純數值運算
+                estimated_cogs = calculate_cogs(total_revenue, cogs_rate)
+                total_all_costs = calculate_total_costs(estimated_cogs, total_shipping_cost, total_payment_fee,
+                                                        total_ad_spend, business_tax)
+                estimated_net_profit = total_revenue - total_all_costs
+                roas = total_revenue / total_ad_spend if total_ad_spend > 0 else 0
+                ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
             
-        else:
-            st.warning("無法獲取數據，請檢查 API 連接設定")
+                # 依粒度讀取事實表預先彙總的結果，再套用成本率
+                if granularity == "自動":
+                    granularity = GRAIN_LABELS[auto_grain(start_date, end_date)]
+                fact_grain = FACT_GRAINS.get(granularity, 'day')
+                fact_table = get_fact_table(fact_table_scope(wc_credentials, meta_source))
+                merged_df = apply_cogs_rate(fact_table.read(start_date, end_date, fact_grain), cogs_rate).rename(columns={
+                    'shipping_cost': 'daily_shipping_cost', 'payment_fee': 'daily_payment_fee', 'tax': 'business_tax'
+                })
+
+                # 各區塊共用的輸入
+                section_ctx = {
+                    'start_date': start_date, 'end_date': end_date, 'granularity': granularity, 'cogs_rate': cogs_rate,
+                    'meta_source': meta_source, 'orders_df': orders_df, 'line_items_df': line_items_df, 'ads_df': ads_df,
+                    'merged_df': merged_df, 'product_partitions': base_data['product_partitions'],
+                    'data_version': base_data['data_version'], 'order_index': base_data['order_index'],
+                    'merged_table': to_arrow(merged_df), 'ads_table': base_data['ads_table'],
+                    'payment_methods': payment_methods, 'shipping_methods': shipping_methods,
+                    'payment_fees_detail': payment_fees_detail, 'shipping_costs_detail': shipping_costs_detail,
+                    'total_revenue': total_revenue, 'total_orders': total_orders, 'total_refunds': total_refunds,
+                    'avg_order_value': avg_order_value, 'total_ad_spend': total_ad_spend,
+                    'total_impressions': total_impressions, 'total_clicks': total_clicks, 'ctr': ctr, 'roas': roas,
+                    'total_shipping_cost': total_shipping_cost, 'total_payment_fee': total_payment_fee,
+                    'business_tax': business_tax, 'estimated_cogs': estimated_cogs,
+                    'total_all_costs': total_all_costs, 'estimated_net_profit': estimated_net_profit,
+                }
+
+                render_overview_section(section_ctx)
+                render_trend_section(section_ctx)
+                render_export_section(section_ctx)
+                render_detail_section(section_ctx)
+
+            else:
+                st.warning("無法獲取數據，請檢查 API 連接設定")
     else:
         st.info("請在左側面板設定 API 連接以查看真實數據")
 else:
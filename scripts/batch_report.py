@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次報表：在營業時間外預先計算每日事實表、成本明細與 KPI 摘要
+儀表板首次載入相同期間時直接讀取報表快照，不需等待 API
+
+用法：
+  python scripts/batch_report.py                                  # 預設：昨天、上週、近 30 天
+  python scripts/batch_report.py --preset yesterday --preset last_week
+  python scripts/batch_report.py --range 2025-09-01 2025-09-30 --format csv
+
+排程範例（crontab，每天 02:00 計算日/週報表，營業時間每小時更新近 30 天）：
+  0 2 * * *     cd /path/to/dashboard && python scripts/batch_report.py --preset yesterday --preset last_week
+  0 9-21 * * *  cd /path/to/dashboard && python scripts/batch_report.py --preset last_30_days
+
+API 設定讀取方式與儀表板相同（.streamlit/secrets.toml 或環境變數）
+"""
+
+import os
+import sys
+import logging
+import argparse
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dotenv import load_dotenv
+from src.config import Config
+from src.pipeline.batch import RANGE_PRESETS, OUTPUT_FORMATS, resolve_ranges, run_batch_report
+from src.constants import DATA_DIR
+
+DEFAULT_PRESETS = ['yesterday', 'last_week', 'last_30_days']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="預先計算電商業績報表")
+    parser.add_argument('--preset', action='append', choices=sorted(RANGE_PRESETS), help="常用期間（可重複指定）")
+    parser.add_argument('--range', action='append', nargs=2, metavar=('START', 'END'), type=date.fromisoformat,
+                        help="自訂期間 YYYY-MM-DD YYYY-MM-DD（可重複指定）")
+    parser.add_argument('--format', action='append', choices=sorted(OUTPUT_FORMATS), dest='formats',
+                        help="輸出格式（可重複指定，預設 parquet 及 csv）")
+    parser.add_argument('--cogs-rate', type=float, default=50, help="KPI 摘要使用的進貨成本率 (%%)，預設 50")
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f"本地數據目錄，預設 {DATA_DIR}")
+    parser.add_argument('--skip-meta', action='store_true', help="不抓取 Meta 廣告數據")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+
+    ranges = [tuple(r) for r in args.range or []]
+    if args.preset or not ranges:
+        ranges += resolve_ranges(args.preset or DEFAULT_PRESETS)
+
+    config = Config()
+    wc_config, meta_config = config.get_woocommerce_config(), config.get_meta_config()
+    wc_credentials = None
+    if wc_config.get('url') and wc_config.get('consumer_key'):
+        wc_credentials = (wc_config['url'], wc_config['consumer_key'], wc_config['consumer_secret'])
+    meta_source = None
+    if not args.skip_meta and meta_config.get('account_id') and meta_config.get('long_lived_token'):
+        meta_source = ('secure', meta_config['app_id'], meta_config['app_secret'],
+                       meta_config['account_id'], meta_config['long_lived_token'])
+
+    if not wc_credentials and not meta_source:
+        logging.error("未設定 WooCommerce 或 Meta API，請檢查 secrets.toml 或環境變數")
+        return 2
+
+    failed = 0
+    for start_date, end_date in ranges:
+        try:
+            result = run_batch_report(start_date, end_date, wc_credentials, meta_source, args.cogs_rate,
+                                      args.formats or list(OUTPUT_FORMATS), args.data_dir)
+            failed += bool(result['missing'])
+        except Exception:
+            logging.exception("報表計算失敗: %s ~ %s", start_date, end_date)
+            failed += 1
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+訂單分頁回應解析基準測試
+比較整份 response.json()、src/api/http.py 串流解析（只保留 WC_ORDER_FIELDS）
+及以 _fields 請求（伺服器端只回傳需要的欄位）的解析時間與記憶體峰值，並列出各壓縮格式的傳輸大小
+
+錄製的分頁：將 /orders 回應（每頁一個 JSON 陣列，可為 .json 或 .json.gz）存放在同一目錄；
+未指定目錄時以模擬的完整訂單產生分頁
+
+用法：python scripts/benchmark_http_parsing.py [錄製目錄] [--pages 頁數]
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pandas as pd
+import requests
+import urllib3
+from src.api import http
+from src.api.woocommerce import WC_ORDER_FIELDS
+from src.constants import WC_MAX_ORDERS_PER_PAGE
+
+
+def generate_page(page, per_page=WC_MAX_ORDERS_PER_PAGE):
+    """產生一頁模擬的完整 WooCommerce 訂單（含 meta_data、_links 等未使用的欄位）"""
+    random.seed(page)
+    now = datetime(2025, 10, 1)
+    orders = []
+    for i in range(per_page):
+        order_id = 100000 + page * per_page + i
+        created = now - timedelta(days=random.randint(0, 364), seconds=random.randint(0, 86399))
+        address = {'first_name': '小明', 'last_name': '王', 'address_1': '中山路 100 號', 'city': '台北市',
+                   'postcode': '100', 'country': 'TW', 'phone': '0912345678'}
+        orders.append({
+            'id': order_id,
+            'status': 'completed',
+            'currency': 'TWD',
+            'date_created': created.strftime('%Y-%m-%dT%H:%M:%S'),
+            'date_modified': created.strftime('%Y-%m-%dT%H:%M:%S'),
+            'total': f"{random.randint(200, 5000)}.00",
+            'customer_id': random.randint(0, 20000),
+            'customer_note': '',
+            'billing': {**address, 'email': f"user{random.randint(1, 50000)}@example.com"},
+            'shipping': address,
+            'payment_method_title': '信用卡',
+            'meta_data': [{'id': order_id * 10 + k, 'key': f"_meta_{k}", 'value': 'x' * 80} for k in range(12)],
+            'line_items': [{'id': order_id * 10 + k, 'name': f"商品 {k}", 'product_id': k, 'variation_id': 0,
+                            'quantity': 1, 'total': '500.00', 'sku': f"SKU-{k}",
+                            'meta_data': [{'key': 'color', 'value': '紅'}]} for k in range(random.randint(1, 4))],
+            'shipping_lines': [{'id': 1, 'method_title': '7-11', 'total': '60.00'}],
+            'refunds': [],
+            '_links': {'self': [{'href': f"https://shop.example/wp-json/wc/v3/orders/{order_id}"}],
+                       'collection': [{'href': 'https://shop.example/wp-json/wc/v3/orders'}]},
+        })
+    return json.dumps(orders, ensure_ascii=False).encode()
+
+
+def load_recorded_pages(directory):
+    """讀取錄製的分頁（.json / .json.gz）"""
+    pages = []
+    for path in sorted(Path(directory).glob('*.json*')):
+        data = path.read_bytes()
+        pages.append(gzip.decompress(data) if path.suffix == '.gz' else data)
+    return pages
+
+
+def streamed_response(compressed):
+    """以 gzip 回應模擬 stream=True 取得、尚未讀取內容的回應"""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(compressed), headers={'Content-Encoding': 'gzip'},
+                                        preload_content=False, decode_content=False)
+    return response
+
+
+def full_parse(compressed):
+    """原作法：整份下載並解析（response.json()）"""
+    response = streamed_response(compressed)
+    return response.json()
+
+
+def streaming_parse(compressed):
+    """串流解析並只保留 WC_ORDER_FIELDS（未安裝 ijson 時為整份解析後篩選）"""
+    return http.read_json_items(streamed_response(compressed), WC_ORDER_FIELDS)
+
+
+def measure(func, compressed_pages, repeat):
+    """所有分頁的解析時間（毫秒，取最短）與單頁記憶體峰值（MB，取最大）"""
+    elapsed = min(timeit.repeat(lambda: [func(page) for page in compressed_pages], number=1, repeat=repeat)) * 1000
+    peak = 0
+    for page in compressed_pages:
+        tracemalloc.start()
+        kept = func(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del kept
+    return elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="訂單分頁回應解析基準測試")
+    parser.add_argument('directory', nargs='?', help="錄製的分頁目錄（預設使用模擬數據）")
+    parser.add_argument('--pages', type=int, default=20, help="模擬的分頁數")
+    parser.add_argument('--repeat', type=int, default=3, help="計時重複次數")
+    args = parser.parse_args()
+
+    pages = load_recorded_pages(args.directory) if args.directory else [generate_page(p) for p in range(args.pages)]
+    if not pages:
+        print(f"❌ {args.directory} 中沒有 .json / .json.gz 分頁")
+        return
+    compressed_pages = [gzip.compress(page) for page in pages]
+    fields_pages = [gzip.compress(json.dumps([http.project(order, WC_ORDER_FIELDS) for order in json.loads(page)],
+                                             ensure_ascii=False).encode()) for page in pages]
+
+    print(f"📊 訂單分頁解析基準測試（{len(pages)} 頁，{'錄製數據' if args.directory else '模擬數據'}）")
+    print(f"串流解析器：{'ijson ' + http.ijson.backend if http.ijson else '未安裝 ijson（整份解析後篩選）'}")
+    print("=" * 60)
+
+    sizes = {'未壓縮': sum(len(page) for page in pages), 'gzip': sum(len(page) for page in compressed_pages),
+             '_fields＋gzip': sum(len(page) for page in fields_pages)}
+    if http.BROTLI_AVAILABLE:
+        try:
+            import brotli
+        except ImportError:
+            import brotlicffi as brotli
+        sizes['br'] = sum(len(brotli.compress(page)) for page in pages)
+    print("傳輸大小：")
+    for name, size in sizes.items():
+        print(f"  {name:<12} {size / 1024 ** 2:8.2f} MB（{size / sizes['未壓縮']:.0%}）")
+    print("-" * 60)
+
+    results = []
+    for label, func, inputs in (('整份解析', full_parse, compressed_pages),
+                                ('串流解析＋欄位篩選', streaming_parse, compressed_pages),
+                                ('_fields＋串流解析', streaming_parse, fields_pages)):
+        elapsed, peak = measure(func, inputs, args.repeat)
+        results.append({'方式': label, '解析時間 (ms)': elapsed, '單頁記憶體峰值 (MB)': peak})
+
+    result_df = pd.DataFrame(results).set_index('方式')
+    print(result_df.round(2).to_string())
+    print("-" * 60)
+    print("改善倍數（相對於整份解析）：")
+    print((result_df.iloc[0] / result_df.iloc[1:]).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+訂單數據表型別基準測試
+比較舊版（object 日期與字串欄位）與 src/utils/schema.py 型別定義的記憶體用量及分組速度
+
+用法：python scripts/benchmark_schema.py [訂單數]
+"""
+
+import os
+import sys
+import random
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pandas as pd
+from src.api.woocommerce import WooCommerceAPI
+from src.utils.cost_calculator import calculate_payment_fees
+from src.utils.fact_table import build_daily_facts
+
+PAYMENT_METHODS = ['信用卡', 'Line Pay', '超商取貨付款', 'ATM轉帳', '街口支付']
+SHIPPING_METHODS = ['全家', '7-11', '萊爾富', '宅配', '黑貓宅急便']
+STATUSES = ['completed', 'processing', 'on-hold', 'wmp-in-transit', 'wmp-shipped', 'ry-at-cvs']
+
+
+def generate_orders(n_orders):
+    """產生模擬的 WooCommerce 訂單回應"""
+    random.seed(42)
+    now = datetime(2025, 10, 1)
+    orders = []
+    for i in range(n_orders):
+        created = now - timedelta(days=random.randint(0, 364), seconds=random.randint(0, 86399))
+        orders.append({
+            'id': 100000 + i,
+            'date_created': created.strftime('%Y-%m-%dT%H:%M:%S'),
+            'total': f"{random.randint(200, 5000)}.00",
+            'status': random.choice(STATUSES),
+            'customer_id': random.randint(0, 20000),
+            'payment_method_title': random.choice(PAYMENT_METHODS),
+            'billing': {'email': f"user{random.randint(1, 50000)}@example.com"},
+            'shipping_lines': [{'method_title': random.choice(SHIPPING_METHODS)}],
+            'refunds': [],
+        })
+    return orders
+
+
+def legacy_frame(typed):
+    """還原為舊版型別：date 為 Python date 物件、類別欄位為字串"""
+    legacy = typed.copy()
+    legacy['date'] = legacy['date'].dt.date
+    for column in ['status', 'payment_method', 'shipping_method']:
+        legacy[column] = legacy[column].astype(object)
+    return legacy
+
+
+def best_of(func, repeat=5):
+    """執行多次取最短時間（毫秒）"""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    n_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"📊 訂單數據表型別基準測試（{n_orders:,} 筆訂單）")
+    print("=" * 60)
+
+    typed, _, _ = WooCommerceAPI._normalize_orders(generate_orders(n_orders))
+    legacy = legacy_frame(typed)
+    frames = {'舊版': legacy, '型別化': typed}
+
+    benchmarks = {
+        '依付款方式分組': lambda df: df.groupby('payment_method', observed=True)['total'].sum(),
+        '依日期分組': lambda df: df.groupby('date')['total'].sum(),
+        '付款手續費計算': lambda df: calculate_payment_fees(df),
+        '每日事實表建立': lambda df: build_daily_facts(df, pd.DataFrame()),
+    }
+
+    results = []
+    for label, df in frames.items():
+        row = {'型別': label, '記憶體 (MB)': df.memory_usage(deep=True).sum() / 1024 ** 2}
+        for name, func in benchmarks.items():
+            row[f"{name} (ms)"] = best_of(lambda: func(df))
+        results.append(row)
+
+    result_df = pd.DataFrame(results).set_index('型別')
+    print(result_df.round(2).to_string())
+    print("-" * 60)
+    speedup = result_df.loc['舊版'] / result_df.loc['型別化']
+    print("改善倍數：")
+    print(speedup.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
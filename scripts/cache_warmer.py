@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快取預熱工作：定期抓取常用期間（近 7/30/90 天、本月至今）寫入共用快取
+儀表板以預設設定開啟時直接命中快取，不在前景呼叫 API；跨過午夜時立即重新預熱
+
+用法：
+  python scripts/cache_warmer.py                  # 持續執行（預設每 10 分鐘）
+  python scripts/cache_warmer.py --once           # 只預熱一次（可由 crontab 排程）
+  python scripts/cache_warmer.py --interval 300
+
+使用獨立的背景工作時，儀表板應設定 DASHBOARD_CACHE_WARMER=off，避免每個副本重複預熱；
+共用快取位置（DASHBOARD_CACHE_URL）必須與儀表板相同。
+API 設定讀取方式與儀表板相同（.streamlit/secrets.toml 或環境變數）
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dotenv import load_dotenv
+from src.config import Config
+from src.api.meta_token_manager import MetaTokenManager
+from src.cache.data_cache import DataCache, create_cache_backend
+from src.pipeline.warmer import WARM_PRESETS, CacheWarmer, warm_standard_ranges
+from src.utils.fact_table import DailyFactTable, fact_scope
+from src.constants import CACHE_WARM_INTERVAL
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="預熱儀表板的共用快取")
+    parser.add_argument('--once', action='store_true', help="只預熱一次後結束")
+    parser.add_argument('--interval', type=float, default=CACHE_WARM_INTERVAL,
+                        help=f"預熱間隔（秒），預設 {CACHE_WARM_INTERVAL}")
+    parser.add_argument('--skip-meta', action='store_true', help="不預熱 Meta 廣告數據")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+
+    config = Config()
+    wc_config, meta_config = config.get_woocommerce_config(), config.get_meta_config()
+    wc_credentials = None
+    if wc_config.get('url') and wc_config.get('consumer_key'):
+        wc_credentials = (wc_config['url'], wc_config['consumer_key'], wc_config['consumer_secret'])
+    meta_source = None
+    if not args.skip_meta and meta_config.get('account_id'):
+        # 與儀表板相同：優先使用 Token 管理器保存的 token，快取鍵才會一致
+        token = (MetaTokenManager(meta_config['app_id'], meta_config['app_secret']).get_valid_token()
+                 or meta_config.get('long_lived_token'))
+        if token:
+            meta_source = ('secure', meta_config['app_id'], meta_config['app_secret'], meta_config['account_id'], token)
+
+    if not wc_credentials and not meta_source:
+        logging.error("未設定 WooCommerce 或 Meta API，請檢查 secrets.toml 或環境變數")
+        return 2
+
+    # 事實表範圍與儀表板相同（商店網址與設定的廣告帳號，略過 Meta 時也一樣）
+    scope = fact_scope(wc_credentials[0] if wc_credentials else None, meta_config.get('account_id'))
+    data_cache, fact_table, upserted = DataCache(create_cache_backend()), DailyFactTable(scope=scope), {}
+    warmer = CacheWarmer(
+        lambda today: warm_standard_ranges(data_cache, wc_credentials, meta_source, today, fact_table, WARM_PRESETS,
+                                           upserted=upserted),
+        interval=args.interval
+    )
+    if args.once:
+        warmer.run_once()
+        data_cache.wait_for_refreshes()
+        return 0 if warmer.last_warmed else 1
+
+    try:
+        warmer.run_forever()
+    except KeyboardInterrupt:
+        logging.info("快取預熱已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
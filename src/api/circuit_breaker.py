@@ -0,0 +1,146 @@
+# circuit_breaker.py - 斷路器與請求時限
+"""
+上游 API 緩慢或故障時的保護機制
+- CircuitBreaker：同一來源連續失敗達門檻後斷路，斷路期間的請求立即失敗（不等待逾時），
+  經過重設時間後放行一次試探請求，成功即恢復
+- Deadline：一次畫面載入的總時限，每個請求的逾時時間不超過剩餘時間
+"""
+
+import threading
+import time
+import requests
+from typing import Callable, Dict, Optional
+from src.constants import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """來源已斷路，請求未送出"""
+
+
+class DeadlineExceeded(Exception):
+    """已超過載入時限，請求未送出"""
+
+
+class Deadline:
+    """載入時限"""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            seconds: 時限（秒）
+            clock: 單調時鐘（測試時可替換）
+        """
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """剩餘秒數（不小於 0）"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """請求的逾時時間：不超過剩餘時間"""
+        return min(default, self.remaining())
+
+    def check(self, source: str) -> None:
+        """已逾時則拋出 DeadlineExceeded"""
+        if self.expired():
+            raise DeadlineExceeded(f"{source} 已超過載入時限")
+
+
+class CircuitBreaker:
+    """單一來源的斷路器（執行緒安全）"""
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name: 來源名稱
+            failure_threshold: 連續失敗幾次後斷路
+            reset_timeout: 斷路後多久放行試探請求（秒）
+            clock: 單調時鐘（測試時可替換）
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> None:
+        """檢查是否可送出請求，斷路中（或試探請求進行中）時拋出 CircuitOpenError"""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(f"{self.name} 暫時無法連線（斷路中）")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures, self.opened_at, self._probing = 0, None, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._probing = False
+
+    def call(self, request: Callable[[], requests.Response]) -> requests.Response:
+        """
+        經由斷路器送出請求：連線錯誤、逾時及 5xx/429 回應計為失敗
+
+        Args:
+            request: 送出請求的函式
+
+        Returns:
+            回應（失敗的回應也照常回傳，由呼叫端處理）
+        """
+        self.allow()
+        try:
+            response = request()
+        except Exception:
+            self.record_failure()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            self.record_failure()
+        else:
+            self.record_success()
+        return response
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    取得來源的共用斷路器（同一程序內的所有請求共用狀態）
+
+    Args:
+        name: 來源名稱，例如 'woocommerce'、'meta'
+
+    Returns:
+        CircuitBreaker
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
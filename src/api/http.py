@@ -0,0 +1,117 @@
+# http.py - 共用 HTTP 傳輸層
+"""
+共用 HTTP 傳輸層模組
+提供各 API 客戶端共用的 requests Session（連線池），
+讓分頁與並行請求重複使用 TCP/TLS 連線
+
+- 壓縮協商：宣告 gzip / deflate，安裝 brotli 時加上 br（urllib3 負責解壓縮）
+- 條件式請求快取：帶有 ETag / Last-Modified 的 GET 回應保存在磁碟，以 304 重新驗證（見 http_cache.py，
+  DASHBOARD_HTTP_CACHE=off 時停用）
+- 串流解析：大型 JSON 陣列（例如整頁訂單）邊下載邊解析，只保留需要的欄位（需要 ijson，未安裝時整份解析後再篩選）
+"""
+
+import os
+import threading
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Iterator, List, Optional
+from src.api.http_cache import CachingAdapter
+from src.constants import HTTP_CACHE_ENV, HTTP_POOL_MAXSIZE, HTTP_STREAM_CHUNK_SIZE
+
+# 串流 JSON 解析器為選用依賴
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# brotli 解壓縮為選用依賴（urllib3 偵測到 brotli 或 brotlicffi 時才能解碼 br）
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+ACCEPT_ENCODING = 'br, gzip, deflate' if BROTLI_AVAILABLE else 'gzip, deflate'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    取得共用的 HTTP Session（執行緒安全的延遲初始化）
+
+    Returns:
+        requests.Session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+                pool = {'pool_connections': HTTP_POOL_MAXSIZE, 'pool_maxsize': HTTP_POOL_MAXSIZE}
+                if os.getenv(HTTP_CACHE_ENV, 'on') == 'off':
+                    adapter = HTTPAdapter(**pool)
+                else:
+                    adapter = CachingAdapter(**pool)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def project(item: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    """只保留指定的頂層欄位（fields 為 None 時原樣返回）"""
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def iter_json_items(response: requests.Response, fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    """
+    逐一產生回應中頂層 JSON 陣列的元素，只保留指定欄位
+
+    請求以 stream=True 送出且已安裝 ijson 時，邊讀取（已解壓縮的）回應邊解析，
+    整份回應不會同時存在於記憶體；否則退回 response.json() 後再篩選欄位。
+
+    Args:
+        response: 回應（內容為 JSON 陣列）
+        fields: 需要的頂層欄位，None 表示全部保留
+
+    Yields:
+        篩選後的元素
+
+    Raises:
+        ValueError: 內容不是合法的 JSON
+        requests.exceptions.ConnectionError: 串流讀取時連線中斷
+    """
+    fields = tuple(fields) if fields is not None else None
+    raw = getattr(response, 'raw', None)
+    # 內容已讀入記憶體（未使用 stream=True）或無法串流時，直接解析整份內容
+    if ijson is None or raw is None or not hasattr(raw, 'read') or getattr(response, '_content', False) is not False:
+        for item in response.json():
+            yield project(item, fields)
+        return
+
+    raw.decode_content = True  # 由 urllib3 解開 gzip / br
+    try:
+        for item in ijson.items(raw, 'item', use_float=True, buf_size=HTTP_STREAM_CHUNK_SIZE):
+            yield project(item, fields)
+    except ijson.JSONError as e:
+        # 與 response.json() 一致，內容不是合法 JSON 時拋出 ValueError
+        raise ValueError(f"JSON 內容不完整或格式錯誤: {e}") from e
+    except urllib3.exceptions.HTTPError as e:
+        raise requests.exceptions.ConnectionError(e) from e
+    finally:
+        response.close()
+
+
+def read_json_items(response: requests.Response, fields: Optional[Iterable[str]] = None) -> List[Dict]:
+    """讀取回應中的 JSON 陣列並只保留指定欄位（見 iter_json_items）"""
+    return list(iter_json_items(response, fields))
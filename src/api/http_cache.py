@@ -0,0 +1,180 @@
+# http_cache.py - HTTP 條件式請求磁碟快取
+"""
+共用 HTTP 傳輸層下的磁碟快取
+- 保存帶有 ETag / Last-Modified 的 GET 回應原始內容（仍為壓縮格式，讀取時由 urllib3 解壓縮）
+- 再次請求時以 If-None-Match / If-Modified-Since 重新驗證，伺服器回應 304 時直接使用保存的內容
+- 快取鍵為網址加上排序後的參數，去除 access_token 等憑證參數
+- 以 SQLiteCache 保存，總大小超過上限時淘汰最久未使用的項目，項目自第一次保存起超過 HTTP_CACHE_TTL 後失效
+- 新回應不預先整份讀入記憶體：呼叫端讀取（或串流解析）內容時同時記錄原始位元組，讀到結尾才保存，
+  未讀完（連線中斷或提早關閉）的回應不保存
+
+未變動的歷史期間（例如已結束月份的訂單分頁）重新整理時只需 304 回應，不必重新傳輸內容。
+"""
+
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from src.cache.backend import make_key
+from src.cache.sqlite_cache import SQLiteCache
+from src.constants import (DATA_DIR, HTTP_CACHE_FILE, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_SECRET_PARAMS,
+                           HTTP_CACHE_TTL)
+
+logger = logging.getLogger(__name__)
+
+# 304 回應中不應覆寫保存內容的標頭（描述的是 304 本身的內容）
+_BODY_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'content-type'}
+
+
+def cache_url(url: str) -> str:
+    """快取鍵使用的網址：去除憑證參數，其餘參數依名稱排序"""
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name.lower() not in HTTP_CACHE_SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+class _TeeReader:
+    """讀取原始（未解壓縮）回應內容並同時記錄，讀到結尾時交給 on_complete 保存"""
+
+    def __init__(self, raw: urllib3.HTTPResponse, on_complete: Callable[[bytes], None], max_bytes: int):
+        self._raw = raw
+        self._on_complete = on_complete
+        self._max_bytes = max_bytes
+        self._chunks: Optional[List[bytes]] = []
+        self._size = 0
+        self.closed = False
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._raw.read(amt, decode_content=False)
+        if self._chunks is not None:
+            if data:
+                self._size += len(data)
+                self._chunks.append(data)
+                if self._size > self._max_bytes:
+                    self._chunks = None  # 超過快取上限的回應不可能保存，不再記錄
+            if self._chunks is not None and (amt is None or (amt != 0 and not data)):
+                body, self._chunks = b''.join(self._chunks), None
+                self._on_complete(body)
+        return data
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._chunks = None
+            self._raw.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """以條件式請求重新驗證的快取轉接器（掛載在共用 Session 上）"""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 ttl: float = HTTP_CACHE_TTL, **kwargs):
+        """
+        Args:
+            path: SQLite 檔案路徑（預設為 DATA_DIR 下的 HTTP_CACHE_FILE）
+            max_bytes: 快取總大小上限（位元組）
+            ttl: 項目自第一次保存起的最長保存時間（秒）
+            **kwargs: 傳給 HTTPAdapter（連線池設定）
+        """
+        super().__init__(**kwargs)
+        self.path = path or str(Path(DATA_DIR) / HTTP_CACHE_FILE)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {'revalidated': 0, 'stored': 0, 'uncached': 0}
+        self._store = None
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self) -> SQLiteCache:
+        """快取儲存（第一次使用時才建立檔案）"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = SQLiteCache(self.path, self.max_bytes)
+        return self._store
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        key = make_key('http', cache_url(request.url))
+        entry = self._load(key)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            entry['headers'].update((name, value) for name, value in response.headers.items()
+                                    if name.lower() not in _BODY_HEADERS)
+            self._save(key, entry)
+            self.stats['revalidated'] += 1
+            logger.debug("HTTP 快取重新驗證（304）: %s", cache_url(request.url))
+            return self._replay(request, entry, io.BytesIO(entry['body']))
+
+        if not self._cacheable(response):
+            self.stats['uncached'] += 1
+            return response
+
+        entry = {
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() != 'transfer-encoding'},  # 保存的內容已去除分塊編碼
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        }
+
+        def store(body: bytes) -> None:
+            self._save(key, {**entry, 'body': body})
+            self.stats['stored'] += 1
+
+        return self._replay(request, entry, _TeeReader(response.raw, store, self.max_bytes))
+
+    @staticmethod
+    def _cacheable(response: requests.Response) -> bool:
+        """200 且帶有 ETag 或 Last-Modified、未標示 no-store 的回應才保存"""
+        if response.status_code != 200:
+            return False
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            return False
+        return bool(response.headers.get('ETag') or response.headers.get('Last-Modified'))
+
+    def _load(self, key: str) -> Optional[Dict]:
+        """讀取保存的回應，快取無法使用時視為未命中"""
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            logger.warning("讀取 HTTP 快取失敗: %s", e)
+            return None
+
+    def _save(self, key: str, entry: Dict) -> None:
+        """保存回應（有效時間從第一次保存起算），快取無法使用時略過（不影響請求結果）"""
+        ttl = self.ttl - (time.time() - entry.get('stored_at', 0))
+        if ttl <= 0:
+            return
+        try:
+            self.store.set(key, entry, ttl)
+        except Exception as e:
+            logger.warning("寫入 HTTP 快取失敗: %s", e)
+
+    def _replay(self, request: requests.PreparedRequest, entry: Dict, body) -> requests.Response:
+        """以原始內容（保存的內容或邊讀邊記錄的網路回應）建立回應（內容未讀取，可串流解析）"""
+        raw = urllib3.HTTPResponse(
+            body=body, headers=entry['headers'], status=entry['status'],
+            reason=entry['reason'], preload_content=False, decode_content=False, request_method='GET'
+        )
+        return self.build_response(request, raw)
@@ -1,37 +1,56 @@
 # meta_api_enhanced.py
 import requests
-import streamlit as st
 import json
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, MutableMapping
+from src.api.circuit_breaker import Deadline, get_breaker
+from src.api.http import get_session
+from src.pipeline.reporter import Reporter, LoggingReporter
+from src.utils.schema import apply_schema, ADS_SCHEMA
 
 class MetaAdsAPI:
     """增強版 Meta Ads API 客戶端（含自動 Token 刷新）"""
     
-    def __init__(self, app_id: str, app_secret: str, account_id: str, long_lived_token: str = None):
+    def __init__(self, app_id: str, app_secret: str, account_id: str, long_lived_token: str = None,
+                 token_store: Optional[MutableMapping] = None, reporter: Optional[Reporter] = None,
+                 deadline: Optional[Deadline] = None):
+        """
+        Args:
+            app_id: Meta App ID
+            app_secret: Meta App Secret
+            account_id: 廣告帳號 ID
+            long_lived_token: 長期 Token
+            token_store: 保存 token 資訊的字典（Streamlit 端傳入 st.session_state，預設為本物件專用的字典）
+            reporter: 進度與訊息回報（預設輸出到日誌）
+            deadline: 載入時限（逾時後不再送出請求）
+        """
         self.app_id = app_id
         self.app_secret = app_secret
         self.account_id = account_id if account_id.startswith('act_') else f"act_{account_id}"
         self.base_url = "https://graph.facebook.com/v23.0"
         self.current_token = long_lived_token
+        self.token_store = token_store if token_store is not None else {}
+        self.reporter = reporter or LoggingReporter()
+        self.deadline = deadline
+        self.breaker = get_breaker('meta')
         
-        # 從 session state 恢復 token 信息
-        if 'meta_token_info' in st.session_state:
-            token_info = st.session_state.meta_token_info
+        # 從 token store 恢復 token 信息
+        if 'meta_token_info' in self.token_store:
+            token_info = self.token_store['meta_token_info']
             self.current_token = token_info.get('access_token', self.current_token)
     
     def _save_token_info(self, token_info: dict):
-        """保存 token 信息到 session state"""
-        st.session_state.meta_token_info = token_info
+        """保存 token 信息到 token store"""
+        self.token_store['meta_token_info'] = token_info
         self.current_token = token_info['access_token']
     
     def _is_token_expired(self) -> bool:
         """檢查 token 是否即將過期"""
-        if 'meta_token_info' not in st.session_state:
+        if 'meta_token_info' not in self.token_store:
             return True
         
-        token_info = st.session_state.meta_token_info
+        token_info = self.token_store['meta_token_info']
         if 'expires_at' not in token_info:
             return True
         
@@ -75,30 +94,30 @@ class MetaAdsAPI:
             
             self._save_token_info(token_info)
             
-            st.success(f"Token 已成功刷新，有效期至：{expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            self.reporter.success(f"Token 已成功刷新，有效期至：{expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
             
             return token_info
             
         except requests.exceptions.RequestException as e:
             error_msg = f"Token 刷新失敗: {str(e)}"
-            st.error(error_msg)
+            self.reporter.error(error_msg)
             raise Exception(error_msg)
     
     def _validate_and_refresh_token(self) -> str:
         """驗證並刷新 token"""
-        # 只有 session state 中有明確的過期時間且即將到期才主動刷新
+        # 只有 token store 中有明確的過期時間且即將到期才主動刷新
         # 避免每次 app 重啟就嘗試刷新（會導致 400 錯誤）
-        if 'meta_token_info' in st.session_state:
-            token_info = st.session_state.meta_token_info
+        if 'meta_token_info' in self.token_store:
+            token_info = self.token_store['meta_token_info']
             if 'expires_at' in token_info:
                 try:
                     expires_at = datetime.fromisoformat(token_info['expires_at'])
                     if expires_at < datetime.now() + timedelta(days=7):
-                        st.info("檢測到 Token 即將過期，正在自動刷新...")
+                        self.reporter.info("檢測到 Token 即將過期，正在自動刷新...")
                         try:
                             self.refresh_long_lived_token()
                         except Exception as e:
-                            st.error(f"自動刷新 Token 失敗: {str(e)}")
+                            self.reporter.error(f"自動刷新 Token 失敗: {str(e)}")
                 except Exception:
                     pass
 
@@ -120,11 +139,17 @@ class MetaAdsAPI:
         max_retries = 2
         
         for attempt in range(max_retries):
+            # 逾時或斷路時直接拋出（不重試）
+            timeout = 30
+            if self.deadline is not None:
+                self.deadline.check("Meta 廣告")
+                timeout = self.deadline.timeout(timeout)
             try:
                 if method.upper() == 'GET':
-                    response = requests.get(url, params=params, timeout=30)
+                    # 查詢經由共用傳輸層（連線池與條件式請求快取）
+                    response = self.breaker.call(lambda: get_session().get(url, params=params, timeout=timeout))
                 else:
-                    response = requests.post(url, data=params, timeout=30)
+                    response = self.breaker.call(lambda: requests.post(url, data=params, timeout=timeout))
                 
                 response.raise_for_status()
                 return response.json()
@@ -141,9 +166,9 @@ class MetaAdsAPI:
                         # Token 無效或過期
                         if error_code in [190, 102, 463]:
                             # 如果 token 來自環境變數，不嘗試自動刷新（會 400），直接告知使用者
-                            token_data = st.session_state.get('meta_token_data', {})
+                            token_data = self.token_store.get('meta_token_data', {})
                             if token_data.get('from_env'):
-                                st.error(
+                                self.reporter.error(
                                     "❌ META_LONG_LIVED_TOKEN 已過期。\n\n"
                                     "請至 [Meta Graph API Explorer](https://developers.facebook.com/tools/explorer/) "
                                     "取得新 Token，在 Dashboard 側邊欄「Token 管理」轉換為長期 Token 後，"
@@ -151,7 +176,7 @@ class MetaAdsAPI:
                                 )
                                 break
                             if attempt < max_retries - 1:
-                                st.warning("Token 無效，嘗試刷新...")
+                                self.reporter.warning("Token 無效，嘗試刷新...")
                                 try:
                                     self.refresh_long_lived_token()
                                     params['access_token'] = self.current_token
@@ -173,9 +198,8 @@ class MetaAdsAPI:
                 import time
                 time.sleep(1)
     
-    def get_ads_insights(self, start_date: datetime, end_date: datetime, debug_mode: bool = False) -> dict:
-        """獲取廣告洞察數據"""
-        # 調整日期範圍 - 避免查詢太近期的數據（Meta API有延遲）
+    def _insights_range(self, start_date: datetime, end_date: datetime, debug_mode: bool = False) -> tuple:
+        """調整查詢的日期範圍 - 避免查詢太近期的數據（Meta API有延遲）"""
         today = datetime.now().date()
         if isinstance(end_date, datetime):
             end_date = end_date.date()
@@ -185,13 +209,19 @@ class MetaAdsAPI:
         if end_date >= today:
             end_date = today - timedelta(days=1)  # 至少查詢昨天以前的數據
             if debug_mode:
-                st.info(f"⚠️ 為確保數據完整性，查詢範圍調整至 {end_date}")
+                self.reporter.info(f"⚠️ 為確保數據完整性，查詢範圍調整至 {end_date}")
 
         # 確保開始日期不會超過結束日期
         if start_date > end_date:
             start_date = end_date - timedelta(days=7)  # 默認查詢7天
             if debug_mode:
-                st.warning(f"⚠️ 日期範圍調整為：{start_date} 至 {end_date}")
+                self.reporter.warning(f"⚠️ 日期範圍調整為：{start_date} 至 {end_date}")
+
+        return start_date, end_date
+
+    def get_ads_insights(self, start_date: datetime, end_date: datetime, debug_mode: bool = False) -> dict:
+        """獲取廣告洞察數據"""
+        start_date, end_date = self._insights_range(start_date, end_date, debug_mode)
 
         endpoint = f"{self.account_id}/insights"
         params = {
@@ -206,33 +236,96 @@ class MetaAdsAPI:
         }
 
         if debug_mode:
-            st.write(f"🔍 調試：查詢帳號 {self.account_id}")
-            st.write(f"🔍 調試：日期範圍 {start_date} 至 {end_date}")
-            st.write(f"🔍 調試：API 參數")
-            debug_params = params.copy()
-            st.json(debug_params)
+            self.reporter.debug(f"🔍 調試：查詢帳號 {self.account_id}")
+            self.reporter.debug(f"🔍 調試：日期範圍 {start_date} 至 {end_date}")
+            self.reporter.debug(f"🔍 調試：API 參數", payload=params.copy())
 
         result = self._make_api_request(endpoint, params)
 
         # 額外的數據驗證和統計
         if debug_mode and 'data' in result:
             raw_data = result['data']
-            st.write(f"🔍 調試：API 返回 {len(raw_data)} 筆原始數據")
+            self.reporter.debug(f"🔍 調試：API 返回 {len(raw_data)} 筆原始數據")
 
             if raw_data:
-                st.write("🔍 調試：第一筆原始數據樣本:")
-                st.json(raw_data[0])
+                self.reporter.debug("🔍 調試：第一筆原始數據樣本:", payload=raw_data[0])
 
                 # 統計零廣告費天數
                 zero_spend_days = sum(1 for item in raw_data if float(item.get('spend', 0)) == 0)
                 total_spend = sum(float(item.get('spend', 0)) for item in raw_data)
 
-                st.info(f"📊 總廣告費: ${total_spend:,.2f}")
+                self.reporter.info(f"📊 總廣告費: ${total_spend:,.2f}")
                 if zero_spend_days > 0:
-                    st.warning(f"⚠️ 發現 {zero_spend_days}/{len(raw_data)} 天的廣告費為 $0")
+                    self.reporter.warning(f"⚠️ 發現 {zero_spend_days}/{len(raw_data)} 天的廣告費為 $0")
 
         return result
     
+    def get_insights_summary(self, start_date: datetime, end_date: datetime) -> dict:
+        """
+        以 default_summary 一次取得期間的廣告總計（與每日數據使用相同的日期範圍調整）
+
+        Returns:
+            {'ad_spend', 'impressions', 'clicks'}
+        """
+        start_date, end_date = self._insights_range(start_date, end_date)
+        params = {
+            'fields': 'spend,impressions,clicks',
+            'time_range': json.dumps({
+                'since': start_date.strftime('%Y-%m-%d'),
+                'until': end_date.strftime('%Y-%m-%d')
+            }),
+            'level': 'account',
+            'default_summary': 'true'
+        }
+        result = self._make_api_request(f"{self.account_id}/insights", params)
+        summary = result.get('summary') or (result.get('data') or [{}])[0]
+        return {
+            'ad_spend': float(summary.get('spend', 0) or 0),
+            'impressions': int(summary.get('impressions', 0) or 0),
+            'clicks': int(summary.get('clicks', 0) or 0),
+        }
+
+    def get_hourly_insights(self, start_date: datetime, end_date: datetime) -> list:
+        """
+        獲取每小時廣告數據（依廣告主時區彙總）
+
+        每日 24 筆，資料量較大，會依 paging cursor 取完所有分頁。
+
+        Returns:
+            原始數據列表，每筆含 date_start 及 hourly_stats_aggregated_by_advertiser_time_zone
+        """
+        today = datetime.now().date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        end_date = min(end_date, today)
+
+        endpoint = f"{self.account_id}/insights"
+        params = {
+            'fields': 'spend,impressions,clicks,date_start',
+            'time_range': json.dumps({
+                'since': start_date.strftime('%Y-%m-%d'),
+                'until': end_date.strftime('%Y-%m-%d')
+            }),
+            'level': 'account',
+            'time_increment': 1,
+            'breakdowns': 'hourly_stats_aggregated_by_advertiser_time_zone',
+            'limit': 1000
+        }
+
+        rows = []
+        while True:
+            result = self._make_api_request(endpoint, dict(params))
+            rows.extend(result.get('data', []))
+
+            next_cursor = result.get('paging', {}).get('cursors', {}).get('after')
+            if not next_cursor or 'next' not in result.get('paging', {}):
+                break
+            params['after'] = next_cursor
+
+        return rows
+
     def get_account_info(self) -> dict:
         """獲取帳號信息"""
         endpoint = f"{self.account_id}"
@@ -250,110 +343,79 @@ class MetaAdsAPI:
         except:
             return False
 
-def get_enhanced_meta_ads_data(config: dict, start_date: datetime, end_date: datetime, debug_mode: bool = False):
-    """使用增強版 Meta API 獲取數據"""
+def insights_to_ads_frame(rows: list) -> pd.DataFrame:
+    """
+    將每日廣告洞察原始數據轉為廣告 DataFrame（套用廣告欄位型別）
+
+    Args:
+        rows: insights 回應的 data 列表
+
+    Returns:
+        DataFrame(date, spend, impressions, clicks, reach, ctr, cpm, cpc)
+    """
+    processed_data = []
+    for item in rows:
+        processed_data.append({
+            'date': pd.to_datetime(item['date_start']).date(),
+            'spend': float(item.get('spend', 0)),
+            'impressions': int(item.get('impressions', 0)),
+            'clicks': int(item.get('clicks', 0)),
+            'reach': int(item.get('reach', 0)),
+            'ctr': float(item.get('ctr', 0)),
+            'cpm': float(item.get('cpm', 0)),
+            'cpc': float(item.get('cpc', 0))
+        })
+    return apply_schema(pd.DataFrame(processed_data), ADS_SCHEMA)
+
+
+def get_enhanced_meta_ads_data(config: dict, start_date: datetime, end_date: datetime, debug_mode: bool = False,
+                               reporter: Optional[Reporter] = None, token_store: Optional[MutableMapping] = None,
+                               deadline: Optional[Deadline] = None):
+    """
+    使用增強版 Meta API 獲取數據
+
+    Args:
+        config: Meta 設定（app_id、app_secret、account_id、long_lived_token）
+        start_date: 開始日期
+        end_date: 結束日期
+        debug_mode: 是否回報調試訊息
+        reporter: 進度與訊息回報（預設輸出到日誌）
+        token_store: 保存 token 資訊的字典
+        deadline: 載入時限
+
+    Returns:
+        廣告 DataFrame，失敗時為空的 DataFrame
+    """
+    reporter = reporter or LoggingReporter()
     try:
         # 初始化 API 客戶端
         api_client = MetaAdsAPI(
             app_id=config['app_id'],
             app_secret=config['app_secret'],
             account_id=config['account_id'],
-            long_lived_token=config.get('long_lived_token')
+            long_lived_token=config.get('long_lived_token'),
+            token_store=token_store,
+            reporter=reporter,
+            deadline=deadline
         )
 
         # 測試連接
         if not api_client.test_connection():
-            st.error("Meta API 連接測試失敗")
+            reporter.error("Meta API 連接測試失敗")
             return pd.DataFrame()
 
-        with st.spinner("正在獲取 Meta 廣告數據..."):
+        with reporter.stage("正在獲取 Meta 廣告數據..."):
             # 獲取廣告數據
             insights_data = api_client.get_ads_insights(start_date, end_date, debug_mode)
-            
-            # 處理數據
-            processed_data = []
-            for item in insights_data.get('data', []):
-                processed_data.append({
-                    'date': pd.to_datetime(item['date_start']).date(),
-                    'spend': float(item.get('spend', 0)),
-                    'impressions': int(item.get('impressions', 0)),
-                    'clicks': int(item.get('clicks', 0)),
-                    'reach': int(item.get('reach', 0)),
-                    'ctr': float(item.get('ctr', 0)),
-                    'cpm': float(item.get('cpm', 0)),
-                    'cpc': float(item.get('cpc', 0))
-                })
-            
-            df = pd.DataFrame(processed_data)
+            df = insights_to_ads_frame(insights_data.get('data', []))
             
             if not df.empty:
-                st.success(f"成功獲取 {len(processed_data)} 筆 Meta 廣告數據")
+                reporter.success(f"成功獲取 {len(df)} 筆 Meta 廣告數據", rows=len(df))
             else:
-                st.info("指定期間內沒有廣告數據")
+                reporter.info("指定期間內沒有廣告數據")
             
             return df
             
     except Exception as e:
-        st.error(f"Meta 廣告數據獲取失敗: {str(e)}")
+        reporter.error(f"Meta 廣告數據獲取失敗: {str(e)}")
         return pd.DataFrame()
-
-def show_token_management():
-    """顯示 Token 管理界面"""
-    # 為了避免循環導入，直接在這裡實現簡化版本
-    st.subheader("Meta Token 管理")
-    
-    # 顯示當前 token 狀態
-    if 'meta_token_info' in st.session_state:
-        token_info = st.session_state.meta_token_info
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.info("**當前 Token 狀態**")
-            if 'expires_at' in token_info:
-                expires_at = datetime.fromisoformat(token_info['expires_at'])
-                days_left = (expires_at - datetime.now()).days
-                
-                if days_left > 7:
-                    st.success(f"Token 有效，剩餘 {days_left} 天")
-                elif days_left > 0:
-                    st.warning(f"Token 將在 {days_left} 天後過期")
-                else:
-                    st.error("Token 已過期")
-                
-                st.caption(f"到期時間: {expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        with col2:
-            if st.button("手動刷新 Token"):
-                try:
-                    # 這裡需要獲取配置，但為了避免循環導入，簡化處理
-                    st.info("請使用下方的初始化功能重新生成 Token")
-                except Exception as e:
-                    st.error(f"刷新失敗: {str(e)}")
-    else:
-        st.info("尚未設定 Token 信息")
-    
-    # 初始化長期 Token
-    with st.expander("初始化長期 Token"):
-        st.info("首次使用時，請使用短期 Token 生成長期 Token")
-        short_token = st.text_input("短期 Access Token", type="password", key="short_token_input")
-        
-        if st.button("生成長期 Token") and short_token:
-            try:
-                # 獲取 Meta 配置
-                if hasattr(st, 'secrets') and 'meta' in st.secrets:
-                    app_id = st.secrets.meta.app_id
-                    app_secret = st.secrets.meta.app_secret
-                    account_id = st.secrets.meta.account_id
-                    
-                    api_client = MetaAdsAPI(
-                        app_id=app_id,
-                        app_secret=app_secret,
-                        account_id=account_id
-                    )
-                    token_info = api_client.refresh_long_lived_token(short_token)
-                    st.success("長期 Token 生成成功！")
-                    st.json(token_info)
-                else:
-                    st.error("無法獲取 Meta API 配置")
-            except Exception as e:
-                st.error(f"生成失敗: {str(e)}")
\ No newline at end of file
@@ -2,19 +2,21 @@
 Meta Token 自動管理模組
 負責：短期 token → 長期 token 轉換、自動更新、持久化儲存
 """
-import streamlit as st
 import requests
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Mapping, MutableMapping
 import os
+from src.pipeline.reporter import Reporter, LoggingReporter
 
 
 class MetaTokenManager:
     """Meta Token 自動管理器（支援雲端部署）"""
 
-    def __init__(self, app_id: str, app_secret: str, storage_mode: str = "auto"):
+    def __init__(self, app_id: str, app_secret: str, storage_mode: str = "auto",
+                 session_store: Optional[MutableMapping] = None, secrets: Optional[Mapping] = None,
+                 reporter: Optional[Reporter] = None):
         """
         初始化 Token 管理器
 
@@ -26,8 +28,14 @@ class MetaTokenManager:
                 - "secrets": 使用 Streamlit Secrets（適合雲端部署）
                 - "session": 僅使用 Session State（重啟會失效）
                 - "file": 使用本地檔案（適合本地開發）
+            session_store: 工作階段儲存（Streamlit 中傳入 st.session_state，預設為獨立字典）
+            secrets: 唯讀設定（Streamlit 中傳入 st.secrets）
+            reporter: 訊息回報（預設輸出到日誌）
         """
         self.app_id = app_id
+        self.session_store = session_store if session_store is not None else {}
+        self.secrets = secrets if secrets is not None else {}
+        self.reporter = reporter or LoggingReporter()
         self.app_secret = app_secret
         self.storage_mode = storage_mode
         self.exchange_url = "https://graph.facebook.com/v23.0/oauth/access_token"
@@ -186,7 +194,7 @@ class MetaTokenManager:
         try:
             if self.storage_mode == "session":
                 # 儲存到 Session State
-                st.session_state.meta_token_data = token_data
+                self.session_store['meta_token_data'] = token_data
 
             elif self.storage_mode == "file":
                 # 儲存到本地檔案
@@ -195,11 +203,11 @@ class MetaTokenManager:
 
             elif self.storage_mode == "secrets":
                 # Secrets 是唯讀的，只能顯示警告
-                st.session_state.meta_token_data = token_data
-                st.info("💡 提示：如需長期儲存，請將 Token 加入 Zeabur 環境變數")
+                self.session_store['meta_token_data'] = token_data
+                self.reporter.info("💡 提示：如需長期儲存，請將 Token 加入 Zeabur 環境變數")
 
         except Exception as e:
-            st.warning(f"儲存 token 失敗: {str(e)}")
+            self.reporter.warning(f"儲存 token 失敗: {str(e)}")
 
     def load_token(self) -> Optional[Dict]:
         """
@@ -211,8 +219,8 @@ class MetaTokenManager:
         """
         try:
             # 1. 優先從 Session State 載入（所有模式都適用）
-            if 'meta_token_data' in st.session_state:
-                return st.session_state.meta_token_data
+            if 'meta_token_data' in self.session_store:
+                return self.session_store['meta_token_data']
 
             # 2. 從環境變數載入（適合 Zeabur 等雲端平台）
             env_token = os.getenv('META_LONG_LIVED_TOKEN')
@@ -228,7 +236,7 @@ class MetaTokenManager:
                     'from_env': True  # 標記為來自環境變數
                 }
                 # 快取到 session
-                st.session_state.meta_token_data = token_data
+                self.session_store['meta_token_data'] = token_data
                 return token_data
 
             # 3. 根據儲存模式載入
@@ -241,8 +249,8 @@ class MetaTokenManager:
 
             elif self.storage_mode == "secrets":
                 # 從 secrets 讀取（如果有設定）
-                if hasattr(st, 'secrets') and 'meta_token' in st.secrets:
-                    token_secrets = st.secrets.meta_token
+                if 'meta_token' in self.secrets:
+                    token_secrets = self.secrets['meta_token']
                     return {
                         'access_token': token_secrets.get('access_token'),
                         'expires_at': token_secrets.get('expires_at'),
@@ -253,27 +261,27 @@ class MetaTokenManager:
             return None
 
         except Exception as e:
-            st.warning(f"載入 token 失敗: {str(e)}")
+            self.reporter.warning(f"載入 token 失敗: {str(e)}")
             return None
 
     def delete_token(self) -> None:
         """刪除儲存的 token"""
         try:
             if self.storage_mode == "session":
-                if 'meta_token_data' in st.session_state:
-                    del st.session_state.meta_token_data
+                if 'meta_token_data' in self.session_store:
+                    del self.session_store['meta_token_data']
 
             elif self.storage_mode == "file":
                 if self.storage_path.exists():
                     self.storage_path.unlink()
 
             elif self.storage_mode == "secrets":
-                if 'meta_token_data' in st.session_state:
-                    del st.session_state.meta_token_data
-                st.warning("⚠️ Secrets 中的 Token 需要手動從 Zeabur 環境變數中刪除")
+                if 'meta_token_data' in self.session_store:
+                    del self.session_store['meta_token_data']
+                self.reporter.warning("⚠️ Secrets 中的 Token 需要手動從 Zeabur 環境變數中刪除")
 
         except Exception as e:
-            st.warning(f"刪除 token 失敗: {str(e)}")
+            self.reporter.warning(f"刪除 token 失敗: {str(e)}")
 
     def get_valid_token(self) -> Optional[str]:
         """
@@ -298,178 +306,18 @@ class MetaTokenManager:
 
         # 4. 如果即將過期，嘗試自動刷新（僅限非環境變數的 Token）
         try:
-            st.info("🔄 Token 即將過期，正在自動刷新...")
+            self.reporter.info("🔄 Token 即將過期，正在自動刷新...")
             new_token_data = self.refresh_token(token_data['access_token'])
-            st.success("✅ Token 已自動更新！")
+            self.reporter.success("✅ Token 已自動更新！")
             return new_token_data['access_token']
 
         except Exception as e:
             # Token 刷新失敗 - 自動刪除無效的 token
-            st.error(f"❌ Token 刷新失敗: {str(e)}")
-            st.warning("⚠️ Token 已完全過期，正在自動清除...")
+            self.reporter.error(f"❌ Token 刷新失敗: {str(e)}")
+            self.reporter.warning("⚠️ Token 已完全過期，正在自動清除...")
 
             # 直接刪除無效 token，不使用按鈕（避免渲染問題）
             self.delete_token()
-            st.info("✅ 已清除無效 Token，請重新整理頁面並設定新 Token")
+            self.reporter.info("✅ 已清除無效 Token，請重新整理頁面並設定新 Token")
 
             return None
-
-
-def show_token_manager_ui(app_id: str, app_secret: str) -> Optional[str]:
-    """
-    顯示 Token 管理 UI（簡化版本，無 OAuth，支援雲端部署）
-
-    Args:
-        app_id: Meta App ID
-        app_secret: Meta App Secret
-
-    Returns:
-        有效的 access token，如果沒有則返回 None
-    """
-    st.subheader("🔑 Meta Token 管理")
-
-    manager = MetaTokenManager(app_id, app_secret)
-
-    # 顯示儲存模式資訊
-    storage_mode_emoji = {
-        "file": "💾",
-        "session": "🔄",
-        "secrets": "🔒"
-    }
-    storage_mode_desc = {
-        "file": "本地檔案（開發環境）",
-        "session": "Session State（雲端部署）",
-        "secrets": "Streamlit Secrets"
-    }
-    st.caption(f"{storage_mode_emoji.get(manager.storage_mode, '📦')} 儲存模式: {storage_mode_desc.get(manager.storage_mode, manager.storage_mode)}")
-
-    # 雲端部署提示
-    if manager.storage_mode == "session":
-        st.info("💡 雲端部署模式：Token 會在服務重啟後消失，建議將長期 Token 加入環境變數")
-
-    # 嘗試取得有效的 token
-    current_token = manager.get_valid_token()
-
-    # 顯示目前狀態
-    token_data = manager.load_token()
-
-    if token_data and current_token:
-        # Token 有效
-        st.success("✅ Token 已設定且有效")
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            created_at = datetime.fromisoformat(token_data['created_at'])
-            st.metric("建立日期", created_at.strftime("%Y-%m-%d"))
-
-        with col2:
-            # 計算實際使用天數（從建立日期開始）
-            days_used = (datetime.now() - created_at).days
-            # Meta 長期 Token 有效期是 60 天
-            recommend_update_days = 50
-
-            if token_data.get('from_env'):
-                # 環境變數 Token：顯示已使用天數和建議更新提醒
-                if days_used >= recommend_update_days:
-                    st.metric("已使用", f"{days_used} 天", delta="⚠️ 建議更新", delta_color="inverse")
-                else:
-                    days_until_update = recommend_update_days - days_used
-                    st.metric("已使用", f"{days_used} 天", delta=f"{days_until_update} 天後更新")
-            else:
-                # 本地 Token：顯示剩餘天數
-                expires_at = datetime.fromisoformat(token_data['expires_at'])
-                days_left = (expires_at - datetime.now()).days
-                st.metric("剩餘天數", f"{days_left} 天")
-
-        with col3:
-            pass  # 移除手動更新按鈕（無法用過期 token 換新 token）
-
-        # 使用新短期 Token 更新（永遠顯示，方便隨時更換）
-        with st.expander("🔄 更換 Token（貼入新短期 Token）"):
-            st.info("從 Graph API Explorer 產生新 Token 後貼入此處，系統將轉換為長期 Token（60 天）")
-            new_short_token = st.text_input(
-                "新的短期 Access Token",
-                type="password",
-                placeholder="貼上從 Graph API Explorer 取得的 token",
-                key="new_short_token_input"
-            )
-            if st.button("🔄 轉換並更新", type="primary", key="update_token_btn"):
-                if new_short_token:
-                    try:
-                        with st.spinner("轉換中..."):
-                            token_data_new = manager.exchange_short_to_long_token(new_short_token)
-                            st.success(f"✅ 轉換成功！請複製下方長期 Token 更新到 Zeabur")
-                            st.code(token_data_new['access_token'])
-                            st.caption("複製上方完整 Token → Zeabur → Variables → META_LONG_LIVED_TOKEN")
-                    except Exception as e:
-                        st.error(f"轉換失敗: {str(e)}")
-                else:
-                    st.warning("請輸入新的短期 Token")
-
-        # 顯示 Token（摺疊）
-        with st.expander("🔍 查看 Token 資訊"):
-            # 顯示完整 Token（可複製）
-            st.text_area(
-                "完整 Access Token（可複製）",
-                value=current_token,
-                height=100,
-                help="請複製此 Token 到 Zeabur 環境變數"
-            )
-
-            st.caption(f"Token 長度: {len(current_token)} 字元")
-            st.caption(f"開頭: {current_token[:20]}...")
-            st.caption(f"結尾: ...{current_token[-20:]}")
-
-            # Zeabur 環境變數設定提示
-            if manager.storage_mode == "session":
-                st.markdown("---")
-                st.markdown("**💾 長期儲存到 Zeabur 環境變數：**")
-                st.code(f"META_LONG_LIVED_TOKEN={current_token}", language="bash")
-                st.caption("⚠️ 複製上方完整 Token 到 Zeabur → Variables → META_LONG_LIVED_TOKEN")
-            else:
-                st.markdown("---")
-                st.markdown("**💾 設定到 Zeabur（如需雲端部署）：**")
-                st.caption("1. 複製上方完整 Token")
-                st.caption("2. 在 Zeabur Variables 中新增 META_LONG_LIVED_TOKEN")
-                st.caption("3. 貼上 Token 並儲存")
-
-            if st.button("🗑️ 刪除 Token"):
-                manager.delete_token()
-                st.success("Token 已刪除")
-                st.rerun()
-
-    else:
-        # 需要設定 Token
-        st.info("請輸入短期 Token，系統將自動轉換為長期 Token（60 天有效期）")
-
-        st.markdown("""
-        **📝 如何取得短期 Token：**
-        1. 前往 [Meta Graph API Explorer](https://developers.facebook.com/tools/explorer/)
-        2. 選擇你的應用程式
-        3. 在「權限」中勾選：`ads_read`、`ads_management`
-        4. 點擊「產生存取權杖」
-        5. 複製 Token 並貼到下方
-        """)
-
-        short_token = st.text_input(
-            "短期 Access Token",
-            type="password",
-            placeholder="請貼上從 Graph API Explorer 取得的 token"
-        )
-
-        if st.button("🔄 轉換為長期 Token", type="primary"):
-            if short_token:
-                try:
-                    with st.spinner("轉換中..."):
-                        token_data = manager.exchange_short_to_long_token(short_token)
-                        st.success(f"✅ 轉換成功！Token 有效期約 {token_data['expires_in'] // 86400} 天")
-                        st.balloons()
-                        st.rerun()
-                except Exception as e:
-                    st.error(f"❌ 轉換失敗: {str(e)}")
-                    st.info("請確認：\n1. Token 是否正確\n2. App ID 和 App Secret 是否正確\n3. Token 權限是否包含 ads_read")
-            else:
-                st.warning("請輸入短期 Token")
-
-    return current_token
@@ -4,19 +4,43 @@ WooCommerce REST API 客戶端模組
 負責從 WooCommerce 商店獲取訂單數據
 """
 
-import streamlit as st
+import math
+import queue
 import pandas as pd
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from requests.auth import HTTPBasicAuth
-from datetime import datetime
-from typing import Tuple, Dict
-from src.constants import WC_API_VERSION, WC_MAX_ORDERS_PER_PAGE, WC_MAX_ORDERS_TOTAL
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Tuple, Dict, List, Optional
+from src.api.circuit_breaker import CircuitOpenError, Deadline, DeadlineExceeded, get_breaker
+from src.api.http import get_session, read_json_items
+from src.pipeline.reporter import Reporter, LoggingReporter
+from src.constants import (WC_API_VERSION, WC_MAX_ORDERS_PER_PAGE, WC_MAX_ORDERS_TOTAL,
+                           WC_SHARD_MAX_ORDERS, WC_SHARD_MAX_WORKERS)
+from src.utils.schema import apply_schema, ORDER_SCHEMA, LINE_ITEM_SCHEMA
+
+WC_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# 子窗口計數失敗（與 X-WP-Total 不存在的 None 區分）
+_PROBE_FAILED = object()
+
+# 預設抓取的訂單狀態：標準狀態和自訂狀態
+ORDER_STATUSES = 'completed,processing,on-hold,wmp-in-transit,wmp-shipped,ry-at-cvs'
+
+# 訂單正規化（_normalize_orders / _normalize_line_items）與暫估 KPI 用到的頂層欄位，
+# 以 _fields 請求並在串流解析時只保留這些欄位（完整訂單含 meta_data、_links 等大型欄位）
+WC_ORDER_FIELDS = ('id', 'date_created', 'total', 'status', 'customer_id', 'payment_method_title',
+                   'billing', 'shipping_lines', 'refunds', 'line_items')
+
+# 逐頁回呼：(本頁訂單, 已載入訂單數, 預計訂單數或 None)
+PageCallback = Callable[[List[Dict], int, Optional[int]], None]
 
 
 class WooCommerceAPI:
     """WooCommerce API 客戶端"""
 
-    def __init__(self, url: str, consumer_key: str, consumer_secret: str):
+    def __init__(self, url: str, consumer_key: str, consumer_secret: str, reporter: Optional[Reporter] = None,
+                 deadline: Optional[Deadline] = None):
         """
         初始化 WooCommerce API 客戶端
 
@@ -24,15 +48,36 @@ class WooCommerceAPI:
             url: WooCommerce 商店網址
             consumer_key: Consumer Key
             consumer_secret: Consumer Secret
+            reporter: 進度與訊息回報（預設輸出到日誌）
+            deadline: 載入時限（逾時後不再送出請求，已抓取的訂單標記為部分數據）
         """
         self.url = url.rstrip('/')
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
         self.auth = HTTPBasicAuth(consumer_key, consumer_secret)
+        self.session = get_session()
         self.endpoint = f"{self.url}/wp-json/wc/{WC_API_VERSION}/orders"
+        self.reports_endpoint = f"{self.url}/wp-json/wc-analytics/reports"
+        self.reporter = reporter or LoggingReporter()
+        self.deadline = deadline
+        self.breaker = get_breaker('woocommerce')
+        self.partial = False  # 最近一次抓取是否因逾時、斷路或請求失敗而只取得部分訂單
+        self.error_statuses: List[int] = []  # 最近一次抓取中後續分頁的非 200 狀態碼
+
+    def _get(self, url: str, params: Dict, timeout: float = 30, stream: bool = False) -> requests.Response:
+        """
+        經由斷路器送出 GET 請求，逾時時間不超過載入時限的剩餘時間
+
+        stream=True 時回應內容在讀取時才下載（交給 read_json_items 串流解析）
+        """
+        if self.deadline is not None:
+            self.deadline.check("WooCommerce")
+            timeout = self.deadline.timeout(timeout)
+        return self.breaker.call(lambda: self.session.get(url, auth=self.auth, params=params, timeout=timeout,
+                                                          stream=stream))
 
     def get_orders(self, start_date: datetime, end_date: datetime,
-                   status: str = 'completed,processing,on-hold,wmp-in-transit,wmp-shipped,ry-at-cvs') -> Tuple[pd.DataFrame, Dict, Dict]:
+                   status: str = ORDER_STATUSES) -> Tuple[pd.DataFrame, Dict, Dict]:
         """
         獲取訂單數據
 
@@ -47,89 +92,456 @@ class WooCommerceAPI:
             - payment_methods: 付款方式統計
             - shipping_methods: 運送方式統計
         """
+        orders_df, _, payment_methods, shipping_methods = self.get_orders_with_line_items(
+            start_date, end_date, status
+        )
+        return orders_df, payment_methods, shipping_methods
+
+    def get_orders_with_line_items(self, start_date: datetime, end_date: datetime,
+                                   status: str = ORDER_STATUSES,
+                                   on_page: Optional[PageCallback] = None
+                                   ) -> Tuple[pd.DataFrame, pd.DataFrame, Dict, Dict]:
+        """
+        獲取訂單數據及商品明細（同一批 API 請求，不會重複抓取）
+
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            status: 訂單狀態（逗號分隔）
+            on_page: 每頁訂單抵達時的回呼（於呼叫端執行緒執行，可用來顯示暫估數字）
+
+        Returns:
+            (orders_df, line_items_df, payment_methods, shipping_methods)
+            - line_items_df: 每筆訂單商品一列的明細表
+        """
         try:
-            params = {
-                'after': start_date.strftime('%Y-%m-%d') + 'T00:00:00',
-                'before': end_date.strftime('%Y-%m-%d') + 'T23:59:59',
-                'per_page': WC_MAX_ORDERS_PER_PAGE,
-                'status': status,
-                'orderby': 'date',
-                'order': 'desc'
-            }
+            with self.reporter.stage("正在獲取 WooCommerce 數據..."):
+                all_orders = self._fetch_raw_orders(start_date, end_date, status, on_page)
+                if all_orders is None:
+                    return pd.DataFrame(), pd.DataFrame(), {}, {}
+
+                df, payment_methods, shipping_methods = self._normalize_orders(all_orders)
+                line_items_df = self._normalize_line_items(all_orders)
+                if self.partial:
+                    # 由呼叫端（共用快取、畫面）辨識部分數據，不當作完整結果保存
+                    df.attrs['partial'] = True
+                    statuses = sorted(set(self.error_statuses))
+                    reason = (f"分頁請求失敗（HTTP {'、'.join(map(str, statuses))}）" if statuses
+                              else "回應過慢或暫時無法連線")
+                    self.reporter.warning(f"WooCommerce {reason}，只載入 {len(all_orders)} 筆訂單（部分數據）",
+                                          orders=len(all_orders), partial=True, statuses=statuses)
+                else:
+                    self.reporter.success(f"成功獲取 {len(all_orders)} 筆 WooCommerce 訂單", orders=len(all_orders))
 
-            with st.spinner("正在獲取 WooCommerce 數據..."):
-                all_orders = []
-                page = 1
-
-                # 分頁獲取訂單
-                while True:
-                    params['page'] = page
-                    response = requests.get(
-                        self.endpoint,
-                        auth=self.auth,
-                        params=params,
-                        timeout=30
-                    )
-
-                    if response.status_code == 200:
-                        orders = response.json()
-                        if not orders:
-                            break
-
-                        all_orders.extend(orders)
-                        page += 1
-
-                        # 限制最大訂單數
-                        if len(all_orders) >= WC_MAX_ORDERS_TOTAL:
-                            break
-                    else:
-                        if page == 1:
-                            st.error(f"WooCommerce API 錯誤: {response.text}")
-                            return pd.DataFrame(), {}, {}
-                        else:
-                            break
-
-                # 處理訂單數據
-                order_data = []
-                payment_methods = {}
-                shipping_methods = {}
-
-                for order in all_orders:
-                    # 基本訂單資訊
-                    order_info = {
-                        'order_id': order['id'],
-                        'date': pd.to_datetime(order['date_created']).date(),
-                        'total': float(order['total']),
-                        'status': order['status'],
-                        'customer_id': order.get('customer_id', 0),
-                        'payment_method': order.get('payment_method_title', '未知'),
-                        'shipping_method': '未知'
-                    }
-
-                    # 統計付款方式
-                    payment_method = order.get('payment_method_title', '未知')
-                    payment_methods[payment_method] = payment_methods.get(payment_method, 0) + 1
-
-                    # 統計運送方式
-                    shipping_lines = order.get('shipping_lines', [])
-                    if shipping_lines:
-                        shipping_method = shipping_lines[0].get('method_title', '未知')
-                        order_info['shipping_method'] = shipping_method
-                        shipping_methods[shipping_method] = shipping_methods.get(shipping_method, 0) + 1
-                    else:
-                        shipping_methods['未知'] = shipping_methods.get('未知', 0) + 1
-
-                    order_data.append(order_info)
-
-                # 轉換為 DataFrame
-                df = pd.DataFrame(order_data)
-                st.success(f"成功獲取 {len(all_orders)} 筆 WooCommerce 訂單")
-
-                return df, payment_methods, shipping_methods
+                return df, line_items_df, payment_methods, shipping_methods
 
         except Exception as e:
-            st.error(f"WooCommerce 連接錯誤: {str(e)}")
-            return pd.DataFrame(), {}, {}
+            self.reporter.error(f"WooCommerce 連接錯誤: {str(e)}")
+            return pd.DataFrame(), pd.DataFrame(), {}, {}
+
+    def _fetch_raw_orders(self, start_date: datetime, end_date: datetime, status: str,
+                          on_page: Optional[PageCallback] = None) -> Optional[List[Dict]]:
+        """
+        以日期窗口分片抓取原始訂單 JSON
+
+        先用 X-WP-Total 估算訂單量，把期間切成多個 after/before 窗口，
+        每個窗口只需淺分頁（避免 MySQL 深分頁 OFFSET 變慢或逾時），
+        窗口並行抓取後再以訂單 ID 去重。每頁抵達時回報進度並呼叫 on_page。
+
+        Returns:
+            依建立時間由新到舊排序的訂單列表；第一次請求即失敗時返回 None
+        """
+        after, before = _day_bounds(start_date, end_date)
+
+        self.partial, self.error_statuses = False, []
+        response = self._request_orders(after, before, status, page=1, per_page=1)
+        if response.status_code != 200:
+            self.reporter.error(f"WooCommerce API 錯誤: {response.text}", status_code=response.status_code)
+            return None
+
+        header_total = _total_from_headers(response)
+        windows = self._plan_windows(after, before, status, header_total)
+
+        # 由新到舊累計，超過上限的舊窗口不抓取（與原本只取最新訂單的行為一致）
+        selected_windows, planned_total = [], 0
+        for window in sorted(windows, key=lambda w: w[0], reverse=True):
+            if window[2] == 0:
+                continue
+            if planned_total >= WC_MAX_ORDERS_TOTAL:
+                break
+            selected_windows.append(window)
+            planned_total += window[2]
+
+        # 沒有 X-WP-Total 時無法得知總數，不顯示進度
+        expected = min(planned_total, WC_MAX_ORDERS_TOTAL) if header_total is not None else None
+        orders_by_id = {}
+        for orders in self._iter_window_pages(selected_windows, status):
+            for order in orders:
+                orders_by_id[order['id']] = order
+            if expected:
+                loaded = min(len(orders_by_id), expected)
+                self.reporter.progress(f"已載入 {loaded:,} / {expected:,} 筆訂單", loaded, expected)
+            if on_page is not None:
+                on_page(orders, len(orders_by_id), expected)
+
+        all_orders = sorted(orders_by_id.values(), key=lambda o: o.get('date_created', ''), reverse=True)
+        return all_orders[:WC_MAX_ORDERS_TOTAL]
+
+    def _request_orders(self, after: datetime, before: datetime, status: str,
+                        page: int, per_page: int = WC_MAX_ORDERS_PER_PAGE, stream: bool = False) -> requests.Response:
+        """發送單頁訂單請求（只請求 WC_ORDER_FIELDS 欄位）"""
+        params = {
+            'after': after.strftime(WC_DATETIME_FORMAT),
+            'before': before.strftime(WC_DATETIME_FORMAT),
+            'per_page': per_page,
+            'page': page,
+            'status': status,
+            'orderby': 'date',
+            'order': 'desc',
+            '_fields': ','.join(WC_ORDER_FIELDS)
+        }
+        return self._get(self.endpoint, params, stream=stream)
+
+    def count_orders(self, start_date: datetime, end_date: datetime, status: str = ORDER_STATUSES) -> Optional[int]:
+        """
+        取得期間內的訂單數（只送出一次 per_page=1 請求，讀取 X-WP-Total，不下載訂單）
+
+        Returns:
+            訂單數；標頭不存在（例如被代理伺服器移除）時返回 None，請求失敗時拋出例外
+        """
+        after, before = _day_bounds(start_date, end_date)
+        return self._count_orders(after, before, status)
+
+    def _count_orders(self, after: datetime, before: datetime, status: str) -> Optional[int]:
+        """以 per_page=1 的請求讀取 X-WP-Total，取得窗口內訂單數"""
+        response = self._request_orders(after, before, status, page=1, per_page=1)
+        response.raise_for_status()
+        return _total_from_headers(response)
+
+    def _plan_windows(self, after: datetime, before: datetime, status: str,
+                      total: Optional[int]) -> List[Tuple[datetime, datetime, int]]:
+        """
+        依訂單量自適應切分日期窗口
+
+        訂單數超過 WC_SHARD_MAX_ORDERS 的窗口會依時間等分，
+        子窗口數量由訂單數決定；子窗口再各自計數，訂單集中的時段會繼續細分。
+        子窗口計數失敗（逾時、斷路或非 200）時略過該子窗口並標記為部分數據，其餘窗口照常抓取。
+
+        Returns:
+            [(after, before, order_count), ...]；after/before 皆包含在內，子窗口在下一個子窗口開始的前一秒結束，
+            相鄰窗口不共用邊界秒，邊界上的訂單只會被一個窗口抓取
+        """
+        # 沒有 X-WP-Total（例如被代理伺服器移除）時無法估算，整段視為一個窗口
+        if total is None:
+            return [(after, before, WC_MAX_ORDERS_TOTAL)]
+
+        span = before - after
+        if total <= WC_SHARD_MAX_ORDERS or span <= timedelta(hours=1):
+            return [(after, before, total)]
+
+        parts = math.ceil(total / WC_SHARD_MAX_ORDERS)
+        step = span / parts
+        starts = sorted({(after + step * i).replace(microsecond=0) for i in range(parts)})
+        ends = [start - timedelta(seconds=1) for start in starts[1:]] + [before]
+        sub_windows = list(zip(starts, ends))
+
+        with ThreadPoolExecutor(max_workers=WC_SHARD_MAX_WORKERS) as executor:
+            counts = list(executor.map(lambda w: self._probe_window(w[0], w[1], status), sub_windows))
+
+        windows = []
+        for (sub_after, sub_before), count in zip(sub_windows, counts):
+            if count is _PROBE_FAILED:
+                continue
+            windows.extend(self._plan_windows(sub_after, sub_before, status, count))
+        return windows
+
+    def _probe_window(self, after: datetime, before: datetime, status: str):
+        """子窗口計數；失敗時標記為部分數據並返回 _PROBE_FAILED"""
+        try:
+            return self._count_orders(after, before, status)
+        except (DeadlineExceeded, CircuitOpenError, requests.exceptions.RequestException) as e:
+            response = getattr(e, 'response', None)
+            if response is not None:
+                self.error_statuses.append(response.status_code)
+            self.partial = True
+            return _PROBE_FAILED
+
+    def _iter_window_pages(self, windows: List[Tuple[datetime, datetime, int]], status: str) -> Iterator[List[Dict]]:
+        """
+        並行抓取各日期窗口，依抵達順序逐頁產生訂單
+
+        分頁由工作執行緒放入佇列，產生器在呼叫端執行緒取出，
+        回呼（例如更新 Streamlit 畫面）因此不會在工作執行緒中執行。
+        """
+        pages: queue.Queue = queue.Queue()
+        window_done = object()
+
+        def fetch(window):
+            try:
+                self._fetch_window(window[0], window[1], status, on_page=pages.put)
+            finally:
+                pages.put(window_done)
+
+        with ThreadPoolExecutor(max_workers=WC_SHARD_MAX_WORKERS) as executor:
+            futures = [executor.submit(fetch, window) for window in windows]
+            remaining = len(futures)
+            while remaining:
+                page = pages.get()
+                if page is window_done:
+                    remaining -= 1
+                    continue
+                yield page
+            for future in futures:
+                future.result()  # 窗口抓取的例外在此拋出
+
+    def _fetch_window(self, after: datetime, before: datetime, status: str,
+                      on_page: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+        """抓取單一日期窗口內的所有訂單（淺分頁），逾時或請求失敗時保留已抓取的分頁並標記為部分數據"""
+        window_orders = []
+        page = 1
+
+        while True:
+            try:
+                response = self._request_orders(after, before, status, page=page, stream=True)
+            except (DeadlineExceeded, CircuitOpenError, requests.exceptions.RequestException):
+                self.partial = True
+                break
+            if response.status_code != 200:
+                # 後續分頁失敗：已抓取的分頁保留，整體結果標記為部分數據
+                response.close()
+                self.error_statuses.append(response.status_code)
+                self.partial = True
+                break
+
+            try:
+                orders = read_json_items(response, WC_ORDER_FIELDS)
+            except (requests.exceptions.RequestException, ValueError):
+                # 串流讀取中斷或內容不完整：保留已抓取的分頁
+                self.partial = True
+                break
+            if not orders:
+                break
+
+            window_orders.extend(orders)
+            if on_page is not None:
+                on_page(orders)
+            if len(orders) < WC_MAX_ORDERS_PER_PAGE or len(window_orders) >= WC_MAX_ORDERS_TOTAL:
+                break
+            page += 1
+
+        return window_orders
+
+    @staticmethod
+    def _normalize_orders(all_orders: List[Dict]) -> Tuple[pd.DataFrame, Dict, Dict]:
+        """
+        將原始訂單轉換為訂單 DataFrame 及付款/運送方式統計
+
+        Returns:
+            (orders_df, payment_methods, shipping_methods)
+        """
+        order_data = []
+        payment_methods = {}
+        shipping_methods = {}
+
+        for order in all_orders:
+            created_at = pd.to_datetime(order['date_created'])
+
+            # 基本訂單資訊
+            order_info = {
+                'order_id': order['id'],
+                'date': created_at.date(),
+                'created_at': created_at,
+                'total': float(order['total']),
+                'status': order['status'],
+                'customer_id': order.get('customer_id', 0),
+                'payment_method': order.get('payment_method_title', '未知'),
+                'shipping_method': '未知',
+                'email': order.get('billing', {}).get('email', ''),
+                'refund_total': _sum_refunds(order.get('refunds'))
+            }
+
+            # 統計付款方式
+            payment_method = order.get('payment_method_title', '未知')
+            payment_methods[payment_method] = payment_methods.get(payment_method, 0) + 1
+
+            # 統計運送方式
+            shipping_lines = order.get('shipping_lines', [])
+            if shipping_lines:
+                shipping_method = shipping_lines[0].get('method_title', '未知')
+                order_info['shipping_method'] = shipping_method
+                shipping_methods[shipping_method] = shipping_methods.get(shipping_method, 0) + 1
+            else:
+                shipping_methods['未知'] = shipping_methods.get('未知', 0) + 1
+
+            order_data.append(order_info)
+
+        # 轉換為 DataFrame（套用訂單欄位型別）
+        return apply_schema(pd.DataFrame(order_data), ORDER_SCHEMA), payment_methods, shipping_methods
+
+    @staticmethod
+    def _normalize_line_items(all_orders: List[Dict]) -> pd.DataFrame:
+        """
+        將原始訂單展開為商品明細表（每個 line item 一列）
+
+        客戶識別優先使用 customer_id，訪客訂單改用帳單 email，
+        供回購分析判斷同一位客戶。
+        """
+        item_data = []
+
+        for order in all_orders:
+            order_date = pd.to_datetime(order['date_created']).date()
+            customer_id = order.get('customer_id', 0)
+            email = (order.get('billing', {}).get('email') or '').lower()
+            customer_key = f"id:{customer_id}" if customer_id else (f"email:{email}" if email else '')
+
+            for item in order.get('line_items', []):
+                item_data.append({
+                    'order_id': order['id'],
+                    'date': order_date,
+                    'customer_key': customer_key,
+                    'product_id': item.get('product_id', 0),
+                    'variation_id': item.get('variation_id', 0),
+                    'name': item.get('name', '未知商品'),
+                    'sku': item.get('sku', ''),
+                    'quantity': int(item.get('quantity', 0)),
+                    'total': float(item.get('total', 0) or 0)
+                })
+
+        return apply_schema(pd.DataFrame(item_data, columns=[
+            'order_id', 'date', 'customer_key', 'product_id', 'variation_id',
+            'name', 'sku', 'quantity', 'total'
+        ]), LINE_ITEM_SCHEMA)
+
+    def get_refund_updates(self, modified_after: datetime) -> pd.DataFrame:
+        """
+        增量獲取退款資訊：只抓取 modified_after 之後有異動的訂單
+
+        只請求 id / 建立時間 / 退款摘要欄位，回應體積遠小於完整訂單。
+
+        Args:
+            modified_after: 只抓取此時間之後修改過的訂單（未帶時區時視為本機時間）
+
+        Returns:
+            DataFrame(order_id, date, refund_total)；請求失敗時拋出例外
+        """
+        params = {
+            # 以 UTC 並標示 Z 送出，並要求以 GMT 修改時間比對，不受商店時區設定影響
+            'modified_after': modified_after.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'dates_are_gmt': 'true',
+            'status': 'any',
+            'per_page': WC_MAX_ORDERS_PER_PAGE,
+            '_fields': 'id,date_created,refunds',
+        }
+
+        refund_data = []
+        page = 1
+
+        while True:
+            params['page'] = page
+            response = self._get(self.endpoint, params)
+            response.raise_for_status()
+
+            orders = response.json()
+            if not orders:
+                break
+
+            for order in orders:
+                refund_data.append({
+                    'order_id': order['id'],
+                    'date': pd.to_datetime(order['date_created']).date(),
+                    'refund_total': _sum_refunds(order.get('refunds'))
+                })
+
+            if len(orders) < WC_MAX_ORDERS_PER_PAGE:
+                break
+            page += 1
+
+        return pd.DataFrame(refund_data, columns=['order_id', 'date', 'refund_total'])
+
+    def get_report_stats(self, report: str, start_date: datetime, end_date: datetime) -> Tuple[Dict, pd.DataFrame]:
+        """
+        呼叫 WooCommerce Analytics 報表統計端點（伺服器端彙總）
+
+        Args:
+            report: 報表名稱，例如 'revenue'、'orders'
+            start_date: 開始日期
+            end_date: 結束日期
+
+        Returns:
+            (totals, intervals_df)
+            - totals: 整個期間的彙總數值
+            - intervals_df: 每日彙總（date 欄位 + 各 subtotals 欄位）
+            請求失敗（例如未安裝 WooCommerce Admin）時拋出例外
+        """
+        params = {
+            'interval': 'day',
+            'after': start_date.strftime('%Y-%m-%d') + 'T00:00:00',
+            'before': end_date.strftime('%Y-%m-%d') + 'T23:59:59',
+            'per_page': WC_MAX_ORDERS_PER_PAGE,
+        }
+
+        totals = {}
+        intervals = []
+        page = 1
+
+        # 每頁最多 100 個區間，超過 100 天的期間需要分頁
+        while True:
+            params['page'] = page
+            response = self._get(f"{self.reports_endpoint}/{report}/stats", params)
+            response.raise_for_status()
+
+            data = response.json()
+            totals = data.get('totals', totals)
+            for interval in data.get('intervals', []):
+                row = {'date': pd.to_datetime(interval['date_start']).date()}
+                row.update(interval.get('subtotals', {}))
+                intervals.append(row)
+
+            total_pages = int(response.headers.get('X-WP-TotalPages', 1) or 1)
+            if page >= total_pages:
+                break
+            page += 1
+
+        return totals, pd.DataFrame(intervals)
+
+    def get_overview_stats(self, start_date: datetime, end_date: datetime) -> Optional[Dict]:
+        """
+        以伺服器端彙總取得總覽指標（營收、訂單數、客單價、退款）及每日營收
+
+        只需 revenue/stats 與 orders/stats 兩個小回應，不下載任何訂單。
+
+        Returns:
+            {'totals': {...}, 'daily': DataFrame(date, revenue, orders, refunds)}；
+            報表端點不可用時返回 None，呼叫端應改用訂單層級的資料
+        """
+        try:
+            revenue_totals, revenue_daily = self.get_report_stats('revenue', start_date, end_date)
+            orders_totals, _ = self.get_report_stats('orders', start_date, end_date)
+        except (requests.exceptions.RequestException, ValueError, CircuitOpenError, DeadlineExceeded):
+            return None
+
+        orders_count = int(orders_totals.get('orders_count', revenue_totals.get('orders_count', 0)) or 0)
+        revenue = float(revenue_totals.get('total_sales', 0) or 0)
+        totals = {
+            'revenue': revenue,
+            'orders': orders_count,
+            'avg_order_value': float(orders_totals.get('avg_order_value', 0) or 0) or (
+                revenue / orders_count if orders_count > 0 else 0),
+            'refunds': abs(float(revenue_totals.get('refunds', 0) or 0)),
+        }
+
+        if revenue_daily.empty:
+            daily = pd.DataFrame(columns=['date', 'revenue', 'orders', 'refunds'])
+        else:
+            subtotals = revenue_daily.reindex(columns=['total_sales', 'orders_count', 'refunds'], fill_value=0)
+            daily = pd.DataFrame({
+                'date': revenue_daily['date'],
+                'revenue': subtotals['total_sales'].astype(float),
+                'orders': subtotals['orders_count'].astype(int),
+                'refunds': subtotals['refunds'].astype(float).abs(),
+            })
+
+        return {'totals': totals, 'daily': daily}
 
     def test_connection(self) -> bool:
         """
@@ -140,17 +552,34 @@ class WooCommerceAPI:
         """
         try:
             params = {'per_page': 1}
-            response = requests.get(
-                self.endpoint,
-                auth=self.auth,
-                params=params,
-                timeout=10
-            )
+            response = self._get(self.endpoint, params, timeout=10)
             return response.status_code == 200
         except:
             return False
 
 
+def _day_bounds(start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+    """期間的 after/before 時間（開始日 00:00:00 至結束日 23:59:59）"""
+    after = datetime.strptime(start_date.strftime('%Y-%m-%d') + 'T00:00:00', WC_DATETIME_FORMAT)
+    before = datetime.strptime(end_date.strftime('%Y-%m-%d') + 'T23:59:59', WC_DATETIME_FORMAT)
+    return after, before
+
+
+def _total_from_headers(response: requests.Response) -> Optional[int]:
+    """從 X-WP-Total 標頭讀取符合條件的訂單總數，標頭不存在時返回 None"""
+    try:
+        return int(response.headers['X-WP-Total'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _sum_refunds(refunds) -> float:
+    """加總訂單上的退款摘要（WooCommerce 以負數表示退款金額）"""
+    if not refunds:
+        return 0.0
+    return sum(abs(float(refund.get('total', 0) or 0)) for refund in refunds)
+
+
 def get_woocommerce_data(url: str, consumer_key: str, consumer_secret: str,
                         start_date: datetime, end_date: datetime) -> Tuple[pd.DataFrame, Dict, Dict]:
     """
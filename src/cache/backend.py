@@ -0,0 +1,85 @@
+# backend.py - 快取後端介面
+"""
+這個模組定義數據層共用快取的後端介面，包括：
+- CacheBackend：以位元組存取的基底類別，提供物件序列化的 get / set
+- make_key：含版本號的快取鍵（參數以雜湊表示，憑證不會以明文出現在鍵中）
+- 跨程序的抓取鎖（acquire_lock / release_lock），供 DataCache 合併多個副本的同時抓取
+
+實作見 sqlite_cache.py（本機磁碟，多程序共用同一檔案）與 redis_cache.py（Redis 協定，多副本共用）。
+"""
+
+import hashlib
+import pickle
+from typing import Any, Optional
+from src.constants import CACHE_KEY_VERSION
+
+KEY_PREFIX = "dashboard"
+
+
+def make_key(name: str, *parts: Any, version: int = CACHE_KEY_VERSION) -> str:
+    """
+    產生快取鍵：dashboard:v<版本>:<名稱>:<參數雜湊>
+
+    Args:
+        name: 數據名稱（例如 wc_orders）
+        *parts: 影響結果的參數（以 repr 計算雜湊）
+        version: 快取鍵版本
+
+    Returns:
+        快取鍵
+    """
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).hexdigest()
+    return f"{KEY_PREFIX}:v{version}:{name}:{digest}"
+
+
+class CacheBackend:
+    """快取後端基底類別（子類別實作位元組層級的存取）"""
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """讀取項目，不存在或已過期時返回 None"""
+        raise NotImplementedError
+
+    def set_bytes(self, key: str, data: bytes, ttl: Optional[float] = None) -> None:
+        """
+        寫入項目
+
+        Args:
+            key: 快取鍵
+            data: 內容
+            ttl: 有效時間（秒），None 表示不過期（仍可能因大小上限被淘汰）
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """刪除項目"""
+        raise NotImplementedError
+
+    def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        嘗試取得跨程序的鎖（不等待）
+
+        預設不支援跨程序鎖，一律成功；共用後端覆寫此方法。
+
+        Args:
+            key: 鎖的鍵
+            owner: 持有者識別碼（釋放時比對）
+            ttl: 鎖的有效時間（秒），持有者異常結束時自動失效
+
+        Returns:
+            是否取得
+        """
+        return True
+
+    def release_lock(self, key: str, owner: str) -> None:
+        """釋放由 owner 持有的鎖"""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """讀取並還原物件"""
+        data = self.get_bytes(key)
+        if data is None:
+            return default
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """序列化並寫入物件（DataFrame、字典等）"""
+        self.set_bytes(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
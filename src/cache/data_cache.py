@@ -0,0 +1,336 @@
+# data_cache.py - 數據層共用快取
+"""
+這個模組將快取後端接到數據管線，包括：
+- create_cache_backend：依網址建立後端（sqlite:///路徑、redis://主機:埠/資料庫）
+- DataCache：以數據名稱及參數查詢共用快取，未命中時抓取並寫回；
+  同一個鍵的同時請求合併為一次抓取（程序內以執行緒等待，跨程序以後端的抓取鎖）；
+  過期的數據先回傳並在背景重新抓取（stale-while-revalidate）；
+  來源失敗或逾時（結果不完整）時改用最後一次完整的數據
+
+Streamlit 的 st.cache_data 只在單一程序內有效；多個副本部署時，
+抓取結果經由共用後端分享，同一份訂單與廣告數據只需下載一次。
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from src.cache.backend import CacheBackend, make_key
+from src.cache.redis_cache import RedisCache
+from src.cache.sqlite_cache import SQLiteCache
+from src.constants import (CACHE_URL_ENV, CACHE_SQLITE_FILE, CACHE_DEFAULT_TTL, CACHE_MAX_BYTES, CACHE_LOCK_TTL,
+                           CACHE_LOCK_POLL_INTERVAL, CACHE_LOCK_WAIT_TIMEOUT, CACHE_MAX_STALE, CACHE_REFRESH_WORKERS,
+                           CACHE_REFRESH_BACKOFF_BASE, CACHE_REFRESH_BACKOFF_MAX, CACHE_FALLBACK_MAX_AGE, DATA_DIR)
+
+logger = logging.getLogger("dashboard.cache")
+
+_MISSING = object()
+
+
+def create_cache_backend(url: Optional[str] = None, max_bytes: int = CACHE_MAX_BYTES) -> CacheBackend:
+    """
+    依網址建立快取後端
+
+    Args:
+        url: sqlite:///相對或絕對路徑、redis://[:密碼@]主機:埠/資料庫；
+             None 時讀取環境變數 DASHBOARD_CACHE_URL，未設定則使用 DATA_DIR 下的 SQLite 檔案
+        max_bytes: 快取總大小上限（位元組）
+
+    Returns:
+        CacheBackend
+    """
+    url = url or os.getenv(CACHE_URL_ENV)
+    if not url:
+        return SQLiteCache(str(Path(DATA_DIR) / CACHE_SQLITE_FILE), max_bytes)
+    if url.startswith('redis://'):
+        return RedisCache.from_url(url, max_bytes)
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):], max_bytes)
+    raise ValueError(f"不支援的快取後端: {url}")
+
+
+class CacheResult(NamedTuple):
+    """快取查詢結果"""
+    value: Any
+    fetched_at: datetime  # 數據抓取時間（畫面顯示「資料時間」）
+    stale: bool  # 是否已超過有效時間（背景更新中）
+    partial: bool = False  # 來源失敗或逾時且沒有可用的舊數據，數據可能不完整
+
+
+class _Flight:
+    """程序內進行中的一次抓取，等待者共用其結果或例外"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class DataCache:
+    """
+    數據層共用快取（single-flight 合併 + stale-while-revalidate）
+
+    - 同一個鍵同時只有一次抓取：程序內的其他執行緒等待並共用同一個結果；
+      後端支援跨程序鎖時，其他程序（副本）等待持有鎖的一方寫入共用快取後直接讀取
+    - 超過有效時間但未超過最長過期時間的數據直接回傳（標記為 stale），同時在背景重新抓取；
+      背景抓取失敗時依退避時間延後重試，期間繼續使用舊數據
+    - 前景抓取失敗或結果不完整（cacheable 為 False）時，改用最長保留時間內最後一次完整的數據（標記為 stale）；
+      沒有舊數據時回傳不完整的結果（標記為 partial）
+    """
+
+    def __init__(self, backend: CacheBackend, lock_ttl: float = CACHE_LOCK_TTL,
+                 poll_interval: float = CACHE_LOCK_POLL_INTERVAL, wait_timeout: float = CACHE_LOCK_WAIT_TIMEOUT,
+                 max_stale: float = CACHE_MAX_STALE, refresh_workers: int = CACHE_REFRESH_WORKERS,
+                 backoff_base: float = CACHE_REFRESH_BACKOFF_BASE, backoff_max: float = CACHE_REFRESH_BACKOFF_MAX,
+                 fallback_max_age: float = CACHE_FALLBACK_MAX_AGE):
+        """
+        Args:
+            backend: 快取後端
+            lock_ttl: 跨程序抓取鎖的有效時間（秒）
+            poll_interval: 等待其他程序抓取時查詢共用快取的間隔（秒）
+            wait_timeout: 等待其他程序抓取的最長時間（秒），逾時後自行抓取
+            max_stale: 超過有效時間後仍可回傳舊數據的最長時間（秒）
+            refresh_workers: 背景重新抓取的執行緒數
+            backoff_base: 背景重新抓取失敗後的等待時間（秒），連續失敗時加倍
+            backoff_max: 背景重新抓取失敗後的最長等待時間（秒）
+            fallback_max_age: 來源失敗時仍可使用的最舊數據（秒），項目在後端保留到此時間為止
+        """
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+        self.max_stale = max_stale
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fallback_max_age = max(fallback_max_age, max_stale)
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._refreshing = set()
+        self._failures: Dict[str, Tuple[int, float]] = {}  # 鍵 -> (連續失敗次數, 下次可重試的時間)
+        self._generations: Dict[str, int] = {}  # 鍵 -> 背景更新換入新數據的次數
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'fetches': 0, 'coalesced': 0, 'refreshes': 0, 'refresh_failures': 0,
+                      'fallbacks': 0}
+
+    def _count(self, stat: str) -> None:
+        """統計計數（前景與背景執行緒同時更新）"""
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def generation(self, name: str, parts: tuple) -> int:
+        """
+        指定數據背景更新換入新數據的次數
+
+        呼叫端將此值納入衍生結果的快取鍵，只有該數據更新時才重新計算（其他期間或來源的更新不影響）
+        """
+        with self._flights_lock:
+            return self._generations.get(make_key(name, *parts), 0)
+
+    def _read(self, key: str, ttl: float, max_age: Optional[float] = None) -> Optional[CacheResult]:
+        """
+        讀取共用快取，沒有可用數據（不存在、超過可使用時間或後端無法使用）時返回 None
+
+        max_age 為可使用的最長時間（秒），預設為有效時間加最長過期時間
+        """
+        try:
+            entry = self.backend.get(key, _MISSING)
+        except Exception as e:
+            logger.warning("共用快取讀取失敗，直接抓取: %s", e, extra={'event': {'key': key, 'error': str(e)}})
+            return None
+        if entry is _MISSING:
+            return None
+        age = time.time() - entry['fetched_at']
+        if age > (ttl + self.max_stale if max_age is None else max_age):
+            return None
+        return CacheResult(entry['value'], datetime.fromtimestamp(entry['fetched_at']), age > ttl)
+
+    def _write(self, key: str, value: Any, ttl: float) -> CacheResult:
+        """寫入共用快取（保留到來源失敗時仍可使用的最長時間為止）"""
+        fetched_at = time.time()
+        try:
+            self.backend.set(key, {'value': value, 'fetched_at': fetched_at}, ttl + self.fallback_max_age)
+        except Exception as e:
+            logger.warning("共用快取寫入失敗: %s", e, extra={'event': {'key': key, 'error': str(e)}})
+        return CacheResult(value, datetime.fromtimestamp(fetched_at), False)
+
+    def _try_lock(self, lock_key: str, owner: str) -> bool:
+        """嘗試取得跨程序鎖，後端無法使用時視為取得（直接抓取）"""
+        try:
+            return self.backend.acquire_lock(lock_key, owner, self.lock_ttl)
+        except Exception as e:
+            logger.warning("共用快取鎖無法使用: %s", e, extra={'event': {'key': lock_key, 'error': str(e)}})
+            return True
+
+    def _unlock(self, lock_key: str, owner: str) -> None:
+        try:
+            self.backend.release_lock(lock_key, owner)
+        except Exception as e:
+            logger.warning("共用快取鎖釋放失敗: %s", e, extra={'event': {'key': lock_key, 'error': str(e)}})
+
+    def peek(self, name: str, parts: tuple, ttl: float = CACHE_DEFAULT_TTL) -> Optional[CacheResult]:
+        """只讀取共用快取（不抓取），沒有可直接使用的數據時返回 None"""
+        return self._read(make_key(name, *parts), ttl)
+
+    def get_or_fetch(self, name: str, parts: tuple, fetch: Callable[[], Any], ttl: float = CACHE_DEFAULT_TTL,
+                     cacheable: Optional[Callable[[Any], bool]] = None,
+                     refresh: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        讀取共用快取，未命中時抓取並寫回（只回傳數據，見 fetch_result）
+        """
+        return self.fetch_result(name, parts, fetch, ttl, cacheable, refresh).value
+
+    def fetch_result(self, name: str, parts: tuple, fetch: Callable[[], Any], ttl: float = CACHE_DEFAULT_TTL,
+                     cacheable: Optional[Callable[[Any], bool]] = None,
+                     refresh: Optional[Callable[[], Any]] = None) -> CacheResult:
+        """
+        讀取共用快取，未命中時抓取並寫回（同一個鍵同時只抓取一次）
+
+        數據已過期但未超過最長過期時間時立即回傳舊數據，並在背景以 refresh 重新抓取。
+        後端無法使用時（例如 Redis 斷線）直接呼叫 fetch，不影響儀表板運作。
+
+        Args:
+            name: 數據名稱
+            parts: 影響結果的參數
+            fetch: 抓取函式（於呼叫端執行緒執行）
+            ttl: 有效時間（秒）
+            cacheable: 判斷結果是否寫入共用快取（例如抓取失敗回傳的空表不寫入，避免其他副本沿用）
+            refresh: 背景重新抓取使用的函式（不可依賴畫面，例如改用日誌回報），預設為 fetch
+
+        Returns:
+            CacheResult(數據, 抓取時間, 是否過期)
+        """
+        key = make_key(name, *parts)
+        cached = self._read(key, ttl)
+        if cached is not None:
+            if cached.stale:
+                self._count('stale_hits')
+                self._schedule_refresh(key, refresh or fetch, ttl, cacheable)
+            else:
+                self._count('hits')
+            return cached
+
+        # 程序內：第一個未命中的執行緒負責抓取，其餘等待同一個結果
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count('coalesced')
+            return flight.wait()
+
+        try:
+            flight.value = self._fetch_once(key, fetch, ttl, cacheable)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _fetch_once(self, key: str, fetch: Callable[[], Any], ttl: float,
+                    cacheable: Optional[Callable[[Any], bool]]) -> CacheResult:
+        """跨程序：取得抓取鎖後抓取；鎖由其他程序持有時等待其結果寫入共用快取"""
+        lock_key, owner = f"{key}:lock", uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        locked = self._try_lock(lock_key, owner)
+        while not locked:
+            time.sleep(self.poll_interval)
+            cached = self._read(key, ttl)
+            if cached is not None:
+                self._count('coalesced')
+                return cached
+            if time.monotonic() >= deadline:
+                logger.warning("等待其他程序抓取逾時，自行抓取", extra={'event': {'key': key}})
+                break
+            locked = self._try_lock(lock_key, owner)
+
+        try:
+            # 取得鎖前其他程序可能剛寫入
+            cached = self._read(key, ttl) if locked else None
+            if cached is not None:
+                self._count('hits')
+                return cached
+            self._count('fetches')
+            try:
+                value = fetch()
+            except Exception:
+                fallback = self._fallback(key, ttl)
+                if fallback is None:
+                    raise
+                return fallback
+            if cacheable is None or cacheable(value):
+                return self._write(key, value, ttl)
+            return self._fallback(key, ttl) or CacheResult(value, datetime.now(), False, True)
+        finally:
+            if locked:
+                self._unlock(lock_key, owner)
+
+    def _fallback(self, key: str, ttl: float) -> Optional[CacheResult]:
+        """抓取失敗或不完整時改用最後一次完整的數據"""
+        cached = self._read(key, ttl, self.fallback_max_age)
+        if cached is None:
+            return None
+        self._count('fallbacks')
+        logger.warning("來源抓取失敗或不完整，改用 %s 的快取數據", f"{cached.fetched_at:%Y-%m-%d %H:%M}",
+                       extra={'event': {'key': key, 'fetched_at': cached.fetched_at.isoformat()}})
+        return CacheResult(cached.value, cached.fetched_at, True)
+
+    def _schedule_refresh(self, key: str, refresh: Callable[[], Any], ttl: float,
+                          cacheable: Optional[Callable[[Any], bool]]) -> None:
+        """排入背景重新抓取（同一個鍵只排一次，失敗退避期間不重試）"""
+        with self._flights_lock:
+            failures = self._failures.get(key)
+            if key in self._refreshing or (failures and time.monotonic() < failures[1]):
+                return
+            self._refreshing.add(key)
+        self._refresh_pool.submit(self._refresh, key, refresh, ttl, cacheable)
+
+    def _refresh(self, key: str, refresh: Callable[[], Any], ttl: float,
+                 cacheable: Optional[Callable[[Any], bool]]) -> None:
+        """背景重新抓取：其他程序正在更新時略過，成功後換入新數據"""
+        lock_key, owner = f"{key}:lock", uuid.uuid4().hex
+        try:
+            if not self._try_lock(lock_key, owner):
+                return
+            try:
+                self._count('refreshes')
+                value = refresh()
+                if cacheable is not None and not cacheable(value):
+                    raise ValueError("重新抓取的結果無效")
+                self._write(key, value, ttl)
+            finally:
+                self._unlock(lock_key, owner)
+            with self._flights_lock:
+                self._failures.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+        except Exception as e:
+            with self._flights_lock:
+                count = self._failures.get(key, (0, 0))[0] + 1
+                delay = min(self.backoff_base * 2 ** (count - 1), self.backoff_max)
+                self._failures[key] = (count, time.monotonic() + delay)
+            self._count('refresh_failures')
+            logger.warning("背景重新抓取失敗，%.0f 秒後再試: %s", delay, e,
+                           extra={'event': {'key': key, 'failures': count, 'retry_in': delay, 'error': str(e)}})
+        finally:
+            with self._flights_lock:
+                self._refreshing.discard(key)
+
+    def wait_for_refreshes(self) -> None:
+        """等待目前排入的背景重新抓取完成（測試及批次作業使用）"""
+        while self._refreshing:
+            time.sleep(0.01)
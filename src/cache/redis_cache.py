@@ -0,0 +1,258 @@
+# redis_cache.py - Redis 協定快取後端
+"""
+Redis 快取後端
+以精簡的 RESP 客戶端（標準函式庫 socket，不需安裝 redis 套件）連線，
+多個副本連到同一個 Redis 即可共用抓取結果
+
+大小上限：每個項目的大小記錄在 <前綴>:sizes（HASH），存取時間記錄在 <前綴>:lru（ZSET），
+總大小超過上限時淘汰最久未使用的項目；建議 Redis 本身也設定 maxmemory-policy allkeys-lru。
+寫入項目與移除索引各以一個 Lua 腳本執行，大小記錄與總大小在多個副本同時寫入時仍一致。
+抓取鎖以 SET NX PX 實作，多個副本同時未命中時只有一個副本抓取；釋放鎖以 Lua 腳本比對持有者後刪除（單一原子操作）。
+"""
+
+import select
+import socket
+import threading
+import time
+from typing import List, Optional, Union
+from urllib.parse import urlparse, unquote
+from src.cache.backend import CacheBackend, KEY_PREFIX
+from src.constants import CACHE_MAX_BYTES
+
+RespValue = Union[None, int, bytes, List['RespValue']]
+
+
+# 只刪除自己持有的鎖：比對與刪除在 Redis 內以單一原子操作執行
+RELEASE_LOCK_SCRIPT = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+
+# 寫入項目並更新索引（KEYS：項目、sizes、lru、總大小；ARGV：內容、PX 毫秒（0 表示不過期）、存取時間），回傳新的總大小
+SET_ENTRY_SCRIPT = (
+    "if ARGV[2] == '0' then redis.call('SET', KEYS[1], ARGV[1]) "
+    "else redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2]) end "
+    "local previous = tonumber(redis.call('HGET', KEYS[2], KEYS[1]) or 0) "
+    "redis.call('HSET', KEYS[2], KEYS[1], string.len(ARGV[1])) "
+    "redis.call('ZADD', KEYS[3], ARGV[3], KEYS[1]) "
+    "return redis.call('INCRBY', KEYS[4], string.len(ARGV[1]) - previous)"
+)
+
+# 移除項目的索引（KEYS 同上；ARGV[1] 為 '1' 時同時刪除項目，否則只在項目已不存在時移除），回傳釋放的大小
+FORGET_SCRIPT = (
+    "if ARGV[1] ~= '1' and redis.call('EXISTS', KEYS[1]) == 1 then return 0 end "
+    "local size = tonumber(redis.call('HGET', KEYS[2], KEYS[1]) or 0) "
+    "redis.call('DEL', KEYS[1]) "
+    "redis.call('HDEL', KEYS[2], KEYS[1]) "
+    "redis.call('ZREM', KEYS[3], KEYS[1]) "
+    "if size > 0 then redis.call('INCRBY', KEYS[4], -size) end "
+    "return size"
+)
+
+
+class RedisError(Exception):
+    """Redis 伺服器回傳錯誤"""
+
+
+class RESPClient:
+    """
+    精簡的 Redis 協定客戶端（單一連線，以鎖保護）
+
+    只在指令送出前重試：建立連線失敗時重試一次，閒置期間已被伺服器關閉的連線在送出前重連。
+    指令送出後的錯誤（包括讀取逾時）直接拋出，不重送，避免 INCRBY、SET NX PX 等指令重複執行。
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RESPClient':
+        """由 redis://[:密碼@]主機:埠/資料庫 建立客戶端"""
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, password, **kwargs)
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._send_and_read(('AUTH', self.password))
+        if self.db:
+            self._send_and_read(('SELECT', self.db))
+
+    def close(self) -> None:
+        """關閉連線"""
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock, self._reader = None, None
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        """將指令編碼為 RESP 陣列"""
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode('utf-8')
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> RespValue:
+        """讀取一個回應"""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis 連線已關閉")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload
+        if prefix == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"無法解析的 Redis 回應: {line!r}")
+
+    def _is_stale(self) -> bool:
+        """閒置的連線在送出指令前就可讀取（伺服器已關閉連線或送出非預期的資料）時視為失效"""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _ensure_connected(self) -> None:
+        """確保有可用的連線，建立連線失敗時重試一次"""
+        if self._sock is not None and self._is_stale():
+            self._close()
+        for attempt in range(2):
+            if self._sock is not None:
+                return
+            try:
+                self._connect()
+            except Exception as e:
+                self._close()  # 驗證或選擇資料庫失敗時不保留未完成設定的連線
+                if attempt == 1 or not isinstance(e, OSError):
+                    raise
+
+    def _send_and_read(self, args: tuple) -> RespValue:
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def execute(self, *args) -> RespValue:
+        """
+        執行一個指令
+
+        Args:
+            *args: 指令與參數（字串、數字或位元組）
+
+        Returns:
+            回應（位元組、整數、None 或列表）
+        """
+        with self._lock:
+            self._ensure_connected()
+            try:
+                return self._send_and_read(args)
+            except OSError:
+                # 指令可能已在伺服器執行，不重送
+                self._close()
+                raise
+
+
+class RedisCache(CacheBackend):
+    """Redis 快取（TTL 由 Redis 的 PX 處理，大小上限由 LRU 索引淘汰）"""
+
+    def __init__(self, client: RESPClient, max_bytes: int = CACHE_MAX_BYTES, prefix: str = KEY_PREFIX):
+        """
+        Args:
+            client: RESP 客戶端
+            max_bytes: 快取總大小上限（位元組）
+            prefix: 索引鍵前綴
+        """
+        self.client = client
+        self.max_bytes = max_bytes
+        self.lru_key = f"{prefix}:lru"
+        self.sizes_key = f"{prefix}:sizes"
+        self.total_key = f"{prefix}:bytes"
+
+    @classmethod
+    def from_url(cls, url: str, max_bytes: int = CACHE_MAX_BYTES) -> 'RedisCache':
+        return cls(RESPClient.from_url(url), max_bytes)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        data = self.client.execute('GET', key)
+        if data is None:
+            # 已過期（或被 Redis 淘汰）：同步移除索引
+            self._forget(key)
+            return None
+        self.client.execute('ZADD', self.lru_key, time.time(), key)
+        return data
+
+    def set_bytes(self, key: str, data: bytes, ttl: Optional[float] = None) -> None:
+        px = max(1, int(ttl * 1000)) if ttl is not None else 0
+        total = self.client.execute('EVAL', SET_ENTRY_SCRIPT, 4, key, self.sizes_key, self.lru_key, self.total_key,
+                                    data, px, time.time())
+        if total > self.max_bytes:
+            self._evict(total)
+
+    def _evict(self, total: int) -> None:
+        """
+        依最久未使用的順序淘汰，直到總大小不超過上限
+
+        已過期（或被 Redis 淘汰）的項目先從索引移除並扣減總大小，不佔用空間，也不會因此淘汰仍有效的項目
+        """
+        live = []
+        for member in self.client.execute('ZRANGE', self.lru_key, 0, -1):
+            key = member.decode('utf-8')
+            if self.client.execute('EXISTS', key):
+                live.append(key)
+            else:
+                total -= self._forget(key)
+        for key in live:
+            if total <= self.max_bytes:
+                break
+            total -= self._forget(key, delete=True)
+
+    def _forget(self, key: str, delete: bool = False) -> int:
+        """移除項目的索引（可同時刪除項目），回傳釋放的大小；不刪除時只移除已不存在的項目"""
+        return self.client.execute('EVAL', FORGET_SCRIPT, 4, key, self.sizes_key, self.lru_key, self.total_key,
+                                   int(delete))
+
+    def delete(self, key: str) -> None:
+        self._forget(key, delete=True)
+
+    def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        return self.client.execute('SET', key, owner, 'NX', 'PX', max(1, int(ttl * 1000))) is not None
+
+    def release_lock(self, key: str, owner: str) -> None:
+        # 只釋放自己持有的鎖（鎖已過期並被其他副本取得時不刪除）
+        self.client.execute('EVAL', RELEASE_LOCK_SCRIPT, 1, key, owner)
+
+    def total_bytes(self) -> int:
+        """目前記錄的總大小（位元組）"""
+        return int(self.client.execute('GET', self.total_key) or 0)
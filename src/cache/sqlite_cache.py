@@ -0,0 +1,124 @@
+# sqlite_cache.py - SQLite 快取後端
+"""
+本機磁碟快取後端
+以單一 SQLite 檔案保存項目，同一台機器上的多個程序（或掛載同一磁碟的副本）共用；
+支援 TTL 與總大小上限（超過時淘汰最久未使用的項目），以及跨程序的抓取鎖（cache_locks 表）
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from src.cache.backend import CacheBackend
+from src.constants import CACHE_MAX_BYTES
+
+
+class SQLiteCache(CacheBackend):
+    """SQLite 快取（WAL 模式，每個執行緒一個連線）"""
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Args:
+            path: SQLite 檔案路徑
+            max_bytes: 快取總大小上限（位元組）
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_locks (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """取得目前執行緒的連線"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set_bytes(self, key: str, data: bytes, ttl: Optional[float] = None) -> None:
+        conn = self._connect()
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), expires_at, now)
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """刪除過期項目，總大小仍超過上限時依最久未使用的順序淘汰"""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evict_keys = []
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", evict_keys)
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO cache_locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                                  (key, owner, now + ttl))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release_lock(self, key: str, owner: str) -> None:
+        self._connect().execute("DELETE FROM cache_locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def total_bytes(self) -> int:
+        """目前快取的總大小（位元組）"""
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
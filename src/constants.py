@@ -56,9 +56,58 @@ META_TOKEN_REFRESH_THRESHOLD_DAYS = 7  # Token 剩餘天數少於此值時自動
 WC_API_VERSION = "v3"
 WC_MAX_ORDERS_PER_PAGE = 100
 WC_MAX_ORDERS_TOTAL = 1000  # 單次查詢最多取得的訂單數
+WC_SHARD_MAX_ORDERS = 500  # 每個日期窗口最多訂單數（窗口內分頁不超過 5 頁，避免深分頁 OFFSET）
+WC_SHARD_MAX_WORKERS = 4  # 同時抓取的日期窗口數
+WC_REFUND_SYNC_LOOKBACK_DAYS = 90  # 首次同步退款時回溯的天數
+WC_REFUND_SYNC_OVERLAP_MINUTES = 5  # 增量同步時與上次同步時間重疊的分鐘數（避免時鐘誤差漏單）
+
+# ============================================
+# HTTP 連線設定
+# ============================================
+HTTP_POOL_MAXSIZE = 10  # 每個主機保留的連線數
+HTTP_STREAM_CHUNK_SIZE = 64 * 1024  # 串流解析 JSON 回應時每次讀取的位元組數
+HTTP_CACHE_ENV = "DASHBOARD_HTTP_CACHE"  # HTTP 條件式請求磁碟快取：on（預設）或 off
+HTTP_CACHE_FILE = "http_cache.sqlite3"  # DATA_DIR 下保存 HTTP 回應的 SQLite 檔案
+HTTP_CACHE_MAX_BYTES = 128 * 1024 * 1024  # HTTP 快取總大小上限，超過時淘汰最久未使用的回應
+HTTP_CACHE_TTL = 7 * 24 * 3600  # HTTP 快取項目的最長保存時間（秒），自第一次保存起算，304 不會延長
+HTTP_CACHE_SECRET_PARAMS = {'consumer_key', 'consumer_secret', 'access_token', 'appsecret_proof', 'auth',
+                            'client_secret', 'fb_exchange_token'}  # 不列入 HTTP 快取鍵的憑證參數
+CIRCUIT_FAILURE_THRESHOLD = 3  # 同一來源連續失敗幾次後斷路（暫停請求）
+CIRCUIT_RESET_TIMEOUT = 60  # 斷路後多久（秒）放行一次試探請求
+RENDER_DEADLINE_SECONDS = 20  # 前景抓取的總時限（秒），逾時的來源改用快取或部分數據
+
+# ============================================
+# 本地數據儲存
+# ============================================
+DATA_DIR = "data"  # 本地數據目錄（退款帳本、事實表等）
+EXPORT_CSV_CHUNK_ROWS = 50000  # 匯出 CSV 時每塊寫入的列數
+REPORT_MAX_AGE_MINUTES = 60  # 預先計算的報表涵蓋今天時，可直接使用的最長時間（分鐘）
+
+# ============================================
+# 共用快取設定（多個副本共用抓取結果）
+# ============================================
+CACHE_URL_ENV = "DASHBOARD_CACHE_URL"  # 快取後端設定的環境變數：sqlite:///路徑 或 redis://[:密碼@]主機:埠/資料庫
+CACHE_SQLITE_FILE = "cache.sqlite3"  # 未設定時使用 DATA_DIR 下的 SQLite 檔案
+CACHE_KEY_VERSION = 2  # 快取鍵版本，快取數據的結構改變時遞增，舊版本的項目不再被讀取並逐漸淘汰
+CACHE_DEFAULT_TTL = 300  # 預設有效時間（秒）
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # 快取總大小上限，超過時淘汰最久未使用的項目
+CACHE_LOCK_TTL = 180  # 抓取鎖的有效時間（秒），持有者異常結束時鎖會自動失效
+CACHE_LOCK_POLL_INTERVAL = 0.5  # 等待其他程序抓取時查詢共用快取的間隔（秒）
+CACHE_LOCK_WAIT_TIMEOUT = 180  # 等待其他程序抓取的最長時間（秒），逾時後自行抓取
+CACHE_MAX_STALE = 3600  # 超過有效時間後仍可先顯示舊數據的最長時間（秒），期間內於背景重新抓取
+CACHE_FALLBACK_MAX_AGE = 7 * 24 * 3600  # 來源失敗或逾時時仍可使用的最舊數據（秒）
+CACHE_REFRESH_WORKERS = 2  # 背景重新抓取的執行緒數
+CACHE_REFRESH_BACKOFF_BASE = 30  # 背景重新抓取失敗後的等待時間（秒），連續失敗時加倍
+CACHE_REFRESH_BACKOFF_MAX = 600  # 背景重新抓取失敗後的最長等待時間（秒）
+CACHE_WARMER_ENV = "DASHBOARD_CACHE_WARMER"  # 預熱排程：app（預設，在儀表板程序內執行）或 off（改由 scripts/cache_warmer.py 執行）
+CACHE_WARM_INTERVAL = 600  # 預熱常用期間的間隔（秒），需小於有效時間加最長過期時間
+CACHE_WARM_MIDNIGHT_DELAY = 60  # 跨日後延遲幾秒預熱新的日期範圍
 
 # ============================================
 # UI 設定
 # ============================================
+CHART_MAX_POINTS = 1000  # 趨勢圖每條線的點數上限，超過時降採樣並改用 WebGL 繪製
+FIGURE_CACHE_MAX_ENTRIES = 64  # 圖表快取最多保留的圖表數
+PROGRESSIVE_RENDER_INTERVAL = 0.5  # 載入期間更新暫估總覽的最短間隔（秒）
 PAGE_TITLE = "商業分析儀表板"
 PAGE_ICON = "📊"
\ No newline at end of file
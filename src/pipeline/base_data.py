@@ -0,0 +1,329 @@
+# base_data.py - 數據階段（不依賴 UI）
+"""
+這個模組負責與成本參數無關的數據抓取與彙總，包括：
+- WooCommerce 訂單、商品明細與退款帳本同步
+- Meta 廣告每日/每小時數據（安全模式與基本模式）
+- 標頭指標快速路徑：訂單數（X-WP-Total）與廣告總計（default_summary），每個來源一次請求
+- 基本指標、運費與金流成本、每日事實表寫入及畫面用的索引
+
+所有訊息經由 Reporter 回報，可在 Streamlit、命令列或背景工作中使用；
+快取由呼叫端（例如 app.py 的 st.cache_*）負責。
+"""
+
+import json
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, MutableMapping, Optional, Tuple
+
+from src.api.circuit_breaker import Deadline, get_breaker
+from src.api.http import get_session
+from src.api.woocommerce import PageCallback, WooCommerceAPI
+from src.api.meta_ads import MetaAdsAPI, get_enhanced_meta_ads_data, insights_to_ads_frame
+from src.pipeline.reporter import Reporter, LoggingReporter
+from src.utils.arrow_views import to_arrow
+from src.utils.cost_calculator import calculate_shipping_costs, calculate_payment_fees, calculate_business_tax
+from src.utils.fact_table import SOURCE_COLUMNS, DailyFactTable, build_daily_facts, fact_scope
+from src.utils.order_explorer import OrderIndex
+from src.utils.product_analytics import build_product_day_partitions
+from src.utils.refunds import RefundLedger
+from src.utils.timeseries import insights_to_hourly
+from src.constants import WC_MAX_ORDERS_TOTAL
+
+
+def fetch_woocommerce(credentials: Tuple[str, str, str], start_date: date, end_date: date,
+                      reporter: Optional[Reporter] = None, deadline: Optional[Deadline] = None,
+                      on_page: Optional[PageCallback] = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict, Dict]:
+    """
+    獲取期間內的訂單與商品明細
+
+    Args:
+        credentials: (商店網址, consumer key, consumer secret)
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+        deadline: 載入時限，逾時時 orders_df.attrs['partial'] 為 True
+        on_page: 每頁訂單抵達時的回呼（見 progressive.ProvisionalTotals）
+
+    Returns:
+        (orders_df, line_items_df, payment_methods, shipping_methods)
+    """
+    url, key, secret = credentials
+    return WooCommerceAPI(url, key, secret, reporter=reporter,
+                          deadline=deadline).get_orders_with_line_items(start_date, end_date, on_page=on_page)
+
+
+def fetch_order_count(credentials: Tuple[str, str, str], start_date: date, end_date: date,
+                      reporter: Optional[Reporter] = None) -> Optional[int]:
+    """
+    以 X-WP-Total 標頭取得期間內的訂單數（不下載訂單）
+
+    Args:
+        credentials: (商店網址, consumer key, consumer secret)
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+
+    Returns:
+        訂單數，無法取得時為 None
+    """
+    reporter = reporter or LoggingReporter()
+    try:
+        url, key, secret = credentials
+        return WooCommerceAPI(url, key, secret, reporter=reporter).count_orders(start_date, end_date)
+    except Exception as e:
+        reporter.warning(f"訂單數快速查詢失敗: {str(e)}")
+        return None
+
+
+def sync_refund_ledger(credentials: Tuple[str, str, str], reporter: Optional[Reporter] = None) -> Dict:
+    """
+    增量同步退款帳本，失敗時沿用本地帳本
+
+    Args:
+        credentials: (商店網址, consumer key, consumer secret)
+        reporter: 訊息回報
+
+    Returns:
+        訂單 ID -> 退款資訊
+    """
+    reporter = reporter or LoggingReporter()
+    url, key, secret = credentials
+    ledger = RefundLedger(store_url=url)
+    try:
+        ledger.sync(WooCommerceAPI(url, key, secret, reporter=reporter))
+    except Exception as e:
+        reporter.warning(f"退款同步失敗，使用本地退款帳本: {str(e)}")
+    return ledger.ledger
+
+
+def fetch_meta_ads_basic(token: str, account_id: str, start_date: date, end_date: date,
+                         reporter: Optional[Reporter] = None, deadline: Optional[Deadline] = None) -> pd.DataFrame:
+    """
+    基本模式：直接以存取權杖獲取帳戶層級的每日廣告數據
+
+    Args:
+        token: 存取權杖
+        account_id: 廣告帳號 ID（可不含 act_ 前綴）
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+        deadline: 載入時限
+
+    Returns:
+        廣告 DataFrame，失敗時為空的 DataFrame
+    """
+    reporter = reporter or LoggingReporter()
+    try:
+        if not account_id.startswith('act_'): account_id = f"act_{account_id}"
+        url = f"https://graph.facebook.com/v23.0/{account_id}/insights"
+        params = {
+            'access_token': token, 'fields': 'spend,impressions,clicks,reach,frequency,cpm,cpc,ctr',
+            'time_range': json.dumps({
+                'since': start_date.strftime('%Y-%m-%d'),
+                'until': end_date.strftime('%Y-%m-%d')
+            }),
+            'level': 'account', 'time_increment': 1
+        }
+
+        timeout = 30
+        if deadline is not None:
+            deadline.check("Meta 廣告")
+            timeout = deadline.timeout(timeout)
+        with reporter.stage("正在獲取 Meta 廣告數據..."):
+            response = get_breaker('meta').call(lambda: get_session().get(url, params=params, timeout=timeout))
+            if response.status_code == 200:
+                df = insights_to_ads_frame(response.json().get('data', []))
+                reporter.success(f"成功獲取 {len(df)} 筆 Meta 廣告數據", rows=len(df))
+                return df
+            else:
+                reporter.error(f"Meta 廣告 API 錯誤: {response.text}", status_code=response.status_code)
+                return pd.DataFrame()
+    except Exception as e:
+        reporter.error(f"Meta 廣告連接錯誤: {str(e)}")
+        return pd.DataFrame()
+
+
+def fetch_meta_ads(meta_source: tuple, start_date: date, end_date: date, reporter: Optional[Reporter] = None,
+                   token_store: Optional[MutableMapping] = None, debug_mode: bool = False,
+                   deadline: Optional[Deadline] = None) -> pd.DataFrame:
+    """
+    依 Meta 數據來源獲取每日廣告數據
+
+    Args:
+        meta_source: ('secure', app_id, app_secret, account_id, token) 或 ('basic', token, account_id)
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+        token_store: 保存 token 資訊的字典（僅安全模式使用）
+        debug_mode: 是否回報調試訊息
+        deadline: 載入時限
+
+    Returns:
+        廣告 DataFrame
+    """
+    if meta_source[0] == 'secure':
+        _, app_id, app_secret, account_id, token = meta_source
+        meta_config = {'app_id': app_id, 'app_secret': app_secret, 'account_id': account_id, 'long_lived_token': token}
+        return get_enhanced_meta_ads_data(meta_config, start_date, end_date, debug_mode,
+                                          reporter=reporter, token_store=token_store, deadline=deadline)
+    _, token, account_id = meta_source
+    return fetch_meta_ads_basic(token, account_id, start_date, end_date, reporter, deadline)
+
+
+def fetch_hourly_ad_spend(token: str, account_id: str, start_date: date, end_date: date,
+                          reporter: Optional[Reporter] = None) -> pd.Series:
+    """
+    獲取每小時廣告支出序列，失敗時回傳空序列
+
+    Args:
+        token: 存取權杖
+        account_id: 廣告帳號 ID
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+
+    Returns:
+        以小時為索引的廣告支出
+    """
+    reporter = reporter or LoggingReporter()
+    try:
+        api_client = MetaAdsAPI(app_id='', app_secret='', account_id=account_id, long_lived_token=token,
+                                reporter=reporter)
+        return insights_to_hourly(api_client.get_hourly_insights(start_date, end_date), 'spend')
+    except Exception as e:
+        reporter.warning(f"每小時廣告數據獲取失敗: {str(e)}")
+        return insights_to_hourly([], 'spend')
+
+
+def fetch_meta_summary(meta_source: tuple, start_date: date, end_date: date,
+                       reporter: Optional[Reporter] = None) -> Optional[Dict]:
+    """
+    以 default_summary 取得期間的廣告總計（一次請求，不需逐日數據）
+
+    Args:
+        meta_source: ('secure', app_id, app_secret, account_id, token) 或 ('basic', token, account_id)
+        start_date: 開始日期
+        end_date: 結束日期
+        reporter: 訊息回報
+
+    Returns:
+        {'ad_spend', 'impressions', 'clicks'}，無法取得時為 None
+    """
+    reporter = reporter or LoggingReporter()
+    if meta_source[0] == 'secure':
+        _, app_id, app_secret, account_id, token = meta_source
+    else:
+        (_, token, account_id), app_id, app_secret = meta_source, '', ''
+    try:
+        api_client = MetaAdsAPI(app_id=app_id, app_secret=app_secret, account_id=account_id,
+                                long_lived_token=token, reporter=reporter)
+        return api_client.get_insights_summary(start_date, end_date)
+    except Exception as e:
+        reporter.warning(f"廣告總計快速查詢失敗: {str(e)}")
+        return None
+
+
+def fact_table_scope(wc_credentials: Optional[Tuple[str, str, str]], meta_source: Optional[tuple]) -> str:
+    """
+    事實表的存檔範圍（商店網址與廣告帳號）
+
+    Args:
+        wc_credentials: (商店網址, consumer key, consumer secret)，未設定時為 None
+        meta_source: ('secure', app_id, app_secret, account_id, token) 或 ('basic', token, account_id)，未設定時為 None
+
+    Returns:
+        fact_scope 識別碼
+    """
+    account_id = None
+    if meta_source:
+        account_id = meta_source[3] if meta_source[0] == 'secure' else meta_source[2]
+    return fact_scope(wc_credentials[0] if wc_credentials else None, account_id)
+
+
+def _complete(df: pd.DataFrame) -> bool:
+    """來源數據是否可寫入事實表：空表（抓取失敗或沒有數據）與逾時截斷的部分數據都不寫入"""
+    return df is not None and not df.empty and not df.attrs.get('partial')
+
+
+def update_fact_table(fact_table: DailyFactTable, orders_df: Optional[pd.DataFrame], ads_df: Optional[pd.DataFrame],
+                      start_date: date, end_date: date, partial_sources: Iterable[str] = ()) -> None:
+    """
+    將期間內的訂單與廣告數據寫入每日事實表（預先彙總週/月）
+
+    只更新完整抓取的來源的欄位：抓取失敗、回傳空表或部分數據的來源保留事實表中的舊數據，
+    避免以 0 或不完整的加總覆蓋先前完整抓取的日期。
+
+    Args:
+        fact_table: 每日事實表
+        orders_df: 訂單（已套用退款），未設定此來源時為 None
+        ads_df: 每日廣告數據，未設定此來源時為 None
+        start_date: 開始日期
+        end_date: 結束日期
+        partial_sources: 不完整的來源（'woocommerce' / 'meta'，例如共用快取回傳 partial 的結果），不寫入
+    """
+    partial_sources = set(partial_sources)
+    if 'woocommerce' not in partial_sources and _complete(orders_df):
+        facts_start = start_date
+        if len(orders_df) >= WC_MAX_ORDERS_TOTAL:
+            # 訂單數達上限時最早一天可能不完整，不寫入事實表
+            facts_start = max(start_date, pd.to_datetime(orders_df['date']).min().date() + timedelta(days=1))
+        fact_table.upsert(build_daily_facts(orders_df, None, facts_start, end_date), SOURCE_COLUMNS['woocommerce'])
+    if 'meta' not in partial_sources and _complete(ads_df):
+        fact_table.upsert(build_daily_facts(None, ads_df, start_date, end_date), SOURCE_COLUMNS['meta'])
+
+
+def compute_base_data(orders_df: pd.DataFrame, line_items_df: pd.DataFrame, payment_methods: Dict,
+                      shipping_methods: Dict, ads_df: pd.DataFrame, start_date: date, end_date: date,
+                      fact_table: Optional[DailyFactTable] = None, partial_sources: Iterable[str] = ()) -> Dict:
+    """
+    計算與成本參數無關的指標，並寫入每日事實表
+
+    Args:
+        orders_df: 訂單（已套用退款）
+        line_items_df: 商品明細
+        payment_methods: 付款方式 -> 訂單數
+        shipping_methods: 運送方式 -> 訂單數
+        ads_df: 每日廣告數據
+        start_date: 開始日期
+        end_date: 結束日期
+        fact_table: 每日事實表，為 None 時不寫入
+        partial_sources: 不完整的來源（'woocommerce' / 'meta'），不寫入事實表
+
+    Returns:
+        數據階段結果（回傳物件為共用，呼叫端不可修改）
+    """
+    # 基本指標與不受成本率影響的成本
+    total_revenue = orders_df['net_total'].sum() if not orders_df.empty else 0
+    total_ad_spend = ads_df['spend'].sum() if not ads_df.empty else 0
+    shipping_costs_detail, total_shipping_cost = calculate_shipping_costs(shipping_methods)
+    payment_fees_detail, total_payment_fee = calculate_payment_fees(orders_df)
+    totals = {
+        'revenue': total_revenue,
+        'orders': len(orders_df),
+        'refunds': orders_df['refund_total'].sum() if not orders_df.empty else 0,
+        'ad_spend': total_ad_spend,
+        'impressions': ads_df['impressions'].sum() if not ads_df.empty else 0,
+        'clicks': ads_df['clicks'].sum() if not ads_df.empty else 0,
+        'shipping_cost': total_shipping_cost,
+        'payment_fee': total_payment_fee,
+        'business_tax': calculate_business_tax(total_revenue),
+    }
+
+    # 每日事實表：寫入本次抓取的日期
+    if fact_table is not None:
+        update_fact_table(fact_table, orders_df, ads_df, start_date, end_date, partial_sources)
+
+    return {
+        'orders_df': orders_df,
+        'line_items_df': line_items_df,
+        'ads_df': ads_df,
+        'payment_methods': payment_methods,
+        'shipping_methods': shipping_methods,
+        'shipping_costs_detail': shipping_costs_detail,
+        'payment_fees_detail': payment_fees_detail,
+        'product_partitions': build_product_day_partitions(line_items_df),
+        'order_index': OrderIndex(orders_df),
+        'ads_table': to_arrow(ads_df),
+        'totals': totals,
+        'data_version': f"{start_date}_{end_date}_{datetime.now().strftime('%Y%m%d%H%M%S')}",  # 每次重新載入即更新
+    }
@@ -0,0 +1,308 @@
+# batch.py - 批次報表預先計算
+"""
+這個模組負責在營業時間外預先計算報表（由排程執行 scripts/batch_report.py），包括：
+- 常用期間（昨天、上週、近 7/30/90 天、本月至今）的日期換算
+- 重用數據管線抓取 WooCommerce / Meta 數據並計算成本明細與 KPI 摘要
+- ReportStore：將每日事實、成本明細與 KPI 摘要寫入本地報表目錄（Parquet / CSV），
+  同時保存訂單、商品明細與廣告數據快照，儀表板首次載入相同期間時直接讀取
+
+報表目錄結構：data/reports/<存檔範圍>/<開始日期>_<結束日期>/
+存檔範圍與事實表相同（fact_table_scope：商店網址與廣告帳號），其他商店或廣告帳號的工作階段不會讀到此快照
+"""
+
+import json
+import shutil
+import pandas as pd
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.pipeline.base_data import (fetch_woocommerce, sync_refund_ledger, fetch_meta_ads, compute_base_data,
+                                     fact_table_scope)
+from src.pipeline.reporter import Reporter, LoggingReporter
+from src.utils.cost_calculator import calculate_cogs, calculate_total_costs
+from src.utils.exporter import EXPORT_FORMATS, export_bytes
+from src.utils.fact_table import DailyFactTable
+from src.utils.refunds import apply_refunds
+from src.constants import DATA_DIR, REPORT_MAX_AGE_MINUTES
+
+# 常用期間：名稱 -> 由今天換算 (開始日期, 結束日期)；近 N 天與儀表板預設範圍相同（今天往前 N 天至今天）
+RANGE_PRESETS: Dict[str, Callable[[date], Tuple[date, date]]] = {
+    'yesterday': lambda today: (today - timedelta(days=1), today - timedelta(days=1)),
+    'last_week': lambda today: (today - timedelta(days=today.weekday() + 7), today - timedelta(days=today.weekday() + 1)),
+    'last_7_days': lambda today: (today - timedelta(days=7), today),
+    'last_30_days': lambda today: (today - timedelta(days=30), today),
+    'last_90_days': lambda today: (today - timedelta(days=90), today),
+    'month_to_date': lambda today: (today.replace(day=1), today),
+}
+
+# 報表輸出格式：命令列名稱 -> 匯出格式（src/utils/exporter.py）
+OUTPUT_FORMATS = {'parquet': 'Parquet', 'csv': 'CSV'}
+
+# 快照數據表（固定以 Parquet 保存，供儀表板載入）及所屬來源；未列入報表的來源保存為空表
+SNAPSHOT_FRAMES = {'orders_df': 'woocommerce', 'line_items_df': 'woocommerce', 'ads_df': 'meta'}
+
+
+def resolve_ranges(presets: Iterable[str], today: Optional[date] = None) -> List[Tuple[date, date]]:
+    """
+    將期間名稱換算為日期範圍
+
+    Args:
+        presets: RANGE_PRESETS 的鍵
+        today: 基準日期，預設為今天
+
+    Returns:
+        (開始日期, 結束日期) 列表
+    """
+    today = today or date.today()
+    ranges = []
+    for name in presets:
+        if name not in RANGE_PRESETS:
+            raise ValueError(f"不支援的期間: {name}")
+        ranges.append(RANGE_PRESETS[name](today))
+    return ranges
+
+
+def summarize_kpis(totals: Dict, cogs_rate: float) -> Dict:
+    """
+    由數據階段的總計計算 KPI 摘要（損益）
+
+    Args:
+        totals: compute_base_data 回傳的 totals
+        cogs_rate: 進貨成本率（%）
+
+    Returns:
+        KPI 摘要
+    """
+    revenue, orders = float(totals['revenue']), int(totals['orders'])
+    ad_spend, impressions, clicks = float(totals['ad_spend']), int(totals['impressions']), int(totals['clicks'])
+    cogs = calculate_cogs(revenue, cogs_rate)
+    total_costs = calculate_total_costs(cogs, totals['shipping_cost'], totals['payment_fee'], ad_spend,
+                                        totals['business_tax'])
+    return {
+        'revenue': revenue,
+        'orders': orders,
+        'avg_order_value': revenue / orders if orders > 0 else 0.0,
+        'refunds': float(totals['refunds']),
+        'ad_spend': ad_spend,
+        'impressions': impressions,
+        'clicks': clicks,
+        'ctr': clicks / impressions * 100 if impressions > 0 else 0.0,
+        'roas': revenue / ad_spend if ad_spend > 0 else 0.0,
+        'shipping_cost': float(totals['shipping_cost']),
+        'payment_fee': float(totals['payment_fee']),
+        'business_tax': float(totals['business_tax']),
+        'cogs_rate': cogs_rate,
+        'estimated_cogs': float(cogs),
+        'total_costs': float(total_costs),
+        'net_profit': float(revenue - total_costs),
+    }
+
+
+def cost_breakdown_frame(detail: Dict, key: str) -> pd.DataFrame:
+    """
+    將成本明細字典（calculate_shipping_costs / calculate_payment_fees 的輸出）轉為 DataFrame
+
+    Args:
+        detail: 方式 -> 明細
+        key: 方式欄位名稱
+
+    Returns:
+        每種方式一列的 DataFrame
+    """
+    if not detail:
+        return pd.DataFrame(columns=[key])
+    return pd.DataFrame.from_dict(detail, orient='index').rename_axis(key).reset_index()
+
+
+class ReportStore:
+    """預先計算報表的本地儲存"""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        """
+        Args:
+            data_dir: 本地數據目錄
+        """
+        self.root = Path(data_dir) / "reports"
+
+    def report_dir(self, start_date: date, end_date: date, scope: str = '') -> Path:
+        """期間的報表目錄（依存檔範圍分開）"""
+        return (self.root / scope if scope else self.root) / f"{start_date}_{end_date}"
+
+    def save(self, start_date: date, end_date: date, base_data: Dict, facts: pd.DataFrame, summary: Dict,
+             sources: List[str], formats: Iterable[str] = tuple(OUTPUT_FORMATS),
+             generated_at: Optional[datetime] = None, scope: str = '') -> Path:
+        """
+        寫入一個期間的報表（先寫入暫存目錄再替換，讀取端不會看到寫到一半的報表）
+
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            base_data: compute_base_data 的輸出
+            facts: 期間內的每日事實
+            summary: summarize_kpis 的輸出
+            sources: 報表包含的數據來源（'woocommerce' / 'meta'），只保存完整抓取的來源
+            formats: 輸出格式（OUTPUT_FORMATS 的鍵）
+            generated_at: 產生時間，預設為現在
+            scope: 存檔範圍（fact_table_scope）
+
+        Returns:
+            報表目錄
+        """
+        generated_at = generated_at or datetime.now()
+        target = self.report_dir(start_date, end_date, scope)
+        staging = target.with_name(target.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        tables = {
+            'daily_facts': facts,
+            'shipping_costs': cost_breakdown_frame(base_data['shipping_costs_detail'], 'shipping_method'),
+            'payment_fees': cost_breakdown_frame(base_data['payment_fees_detail'], 'payment_method'),
+            'kpi_summary': pd.DataFrame([summary]),
+        }
+        for name, df in tables.items():
+            for fmt in formats:
+                export_format = OUTPUT_FORMATS[fmt]
+                (staging / f"{name}.{EXPORT_FORMATS[export_format][0]}").write_bytes(export_bytes(df, export_format))
+
+        for name, source in SNAPSHOT_FRAMES.items():
+            frame = base_data[name] if source in sources else pd.DataFrame()
+            frame.to_parquet(staging / f"{name}.parquet", index=False)
+
+        has_orders = 'woocommerce' in sources
+        manifest = {
+            'start_date': str(start_date),
+            'end_date': str(end_date),
+            'scope': scope,
+            'generated_at': generated_at.isoformat(),
+            'sources': sorted(sources),
+            'summary': summary,
+            'payment_methods': {k: int(v) for k, v in base_data['payment_methods'].items()} if has_orders else {},
+            'shipping_methods': {k: int(v) for k, v in base_data['shipping_methods'].items()} if has_orders else {},
+        }
+        with open(staging / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        shutil.rmtree(target, ignore_errors=True)
+        staging.rename(target)
+        return target
+
+    def load_manifest(self, start_date: date, end_date: date, scope: str = '') -> Optional[Dict]:
+        """讀取期間的報表資訊，不存在或存檔範圍不符時返回 None"""
+        path = self.report_dir(start_date, end_date, scope) / "manifest.json"
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if manifest.get('scope', '') == scope else None
+
+    @staticmethod
+    def is_fresh(manifest: Dict, now: Optional[datetime] = None, max_age_minutes: int = REPORT_MAX_AGE_MINUTES) -> bool:
+        """
+        報表是否可直接使用
+
+        期間在產生時已結束的報表一直有效（遲來的退款由呼叫端以退款帳本重新套用）；
+        涵蓋產生當天的報表只在 max_age_minutes 內有效。
+        """
+        now = now or datetime.now()
+        generated_at = datetime.fromisoformat(manifest['generated_at'])
+        if generated_at.date() > date.fromisoformat(manifest['end_date']):
+            return True
+        return now - generated_at <= timedelta(minutes=max_age_minutes)
+
+    def has_snapshot(self, start_date: date, end_date: date, sources: Iterable[str], scope: str = '',
+                     now: Optional[datetime] = None) -> bool:
+        """同一存檔範圍的期間是否有可直接使用的快照（只讀取報表資訊，不載入數據）"""
+        manifest = self.load_manifest(start_date, end_date, scope)
+        return manifest is not None and set(sources) <= set(manifest['sources']) and self.is_fresh(manifest, now)
+
+    def load_snapshot(self, start_date: date, end_date: date, sources: Iterable[str], scope: str = '',
+                      now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        載入期間的數據快照
+
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            sources: 需要的數據來源，報表須全部包含
+            scope: 存檔範圍（fact_table_scope），須與產生報表時相同
+            now: 目前時間（測試用）
+
+        Returns:
+            含 orders_df / line_items_df / ads_df / payment_methods / shipping_methods / generated_at 的字典；
+            沒有報表、存檔範圍不符、來源不足或報表過舊時返回 None
+        """
+        if not self.has_snapshot(start_date, end_date, sources, scope, now):
+            return None
+
+        manifest = self.load_manifest(start_date, end_date, scope)
+        report_dir = self.report_dir(start_date, end_date, scope)
+        snapshot = {name: pd.read_parquet(report_dir / f"{name}.parquet") for name in SNAPSHOT_FRAMES}
+        snapshot['payment_methods'] = manifest['payment_methods']
+        snapshot['shipping_methods'] = manifest['shipping_methods']
+        snapshot['generated_at'] = datetime.fromisoformat(manifest['generated_at'])
+        return snapshot
+
+
+def run_batch_report(start_date: date, end_date: date, wc_credentials: Optional[Tuple[str, str, str]] = None,
+                     meta_source: Optional[tuple] = None, cogs_rate: float = 50,
+                     formats: Iterable[str] = tuple(OUTPUT_FORMATS), data_dir: str = DATA_DIR,
+                     reporter: Optional[Reporter] = None) -> Dict:
+    """
+    計算一個期間的報表：抓取數據、更新每日事實表並寫入報表目錄
+
+    Args:
+        start_date: 開始日期
+        end_date: 結束日期
+        wc_credentials: (商店網址, consumer key, consumer secret)，None 表示不抓取 WooCommerce
+        meta_source: Meta 數據來源（見 fetch_meta_ads），None 表示不抓取
+        cogs_rate: KPI 摘要使用的進貨成本率（%）
+        formats: 輸出格式（OUTPUT_FORMATS 的鍵）
+        data_dir: 本地數據目錄
+        reporter: 訊息回報
+
+    Returns:
+        {'summary': KPI 摘要, 'sources': 完整取得數據的來源, 'missing': 沒有取得或只取得部分數據的來源,
+         'report_dir': 報表目錄}
+    """
+    reporter = reporter or LoggingReporter()
+    orders_df, line_items_df, payment_methods, shipping_methods = pd.DataFrame(), pd.DataFrame(), {}, {}
+    ads_df = pd.DataFrame()
+    requested, sources = [], []
+
+    with reporter.stage(f"計算報表 {start_date} ~ {end_date}"):
+        if wc_credentials:
+            requested.append('woocommerce')
+            orders_df, line_items_df, payment_methods, shipping_methods = fetch_woocommerce(
+                wc_credentials, start_date, end_date, reporter
+            )
+            # 逾時、斷路或分頁失敗而不完整的訂單與沒有取得數據的來源相同：不寫入事實表，也不列入快照
+            if not orders_df.empty and not orders_df.attrs.get('partial'):
+                sources.append('woocommerce')
+            if not orders_df.empty:
+                orders_df = apply_refunds(orders_df, sync_refund_ledger(wc_credentials, reporter))
+
+        if meta_source:
+            requested.append('meta')
+            ads_df = fetch_meta_ads(meta_source, start_date, end_date, reporter)
+            if not ads_df.empty and not ads_df.attrs.get('partial'):
+                sources.append('meta')
+
+        scope = fact_table_scope(wc_credentials, meta_source)
+        fact_table = DailyFactTable(data_dir, scope)
+        base_data = compute_base_data(orders_df, line_items_df, payment_methods, shipping_methods, ads_df,
+                                      start_date, end_date, fact_table,
+                                      [source for source in requested if source not in sources])
+        summary = summarize_kpis(base_data['totals'], cogs_rate)
+        report_dir = ReportStore(data_dir).save(start_date, end_date, base_data,
+                                                fact_table.read(start_date, end_date), summary, sources, formats,
+                                                scope=scope)
+
+    # 沒有取得完整數據的來源不列入報表，儀表板需要時會改為即時抓取
+    missing = [source for source in requested if source not in sources]
+    if missing:
+        reporter.warning(f"{start_date} ~ {end_date} 沒有取得完整數據: {', '.join(missing)}", missing=missing)
+    reporter.success(f"報表已寫入 {report_dir}", start_date=str(start_date), end_date=str(end_date),
+                     revenue=summary['revenue'], orders=summary['orders'], net_profit=summary['net_profit'])
+    return {'summary': summary, 'sources': sources, 'missing': missing, 'report_dir': report_dir}
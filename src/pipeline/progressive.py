@@ -0,0 +1,61 @@
+# progressive.py - 逐頁暫估指標
+"""
+這個模組負責在訂單逐頁抵達時累計暫估的 KPI，包括：
+- 訂單數、營收（訂單金額，尚未套用退款帳本）與客單價
+- 每日營收（供趨勢圖在抓取期間先行顯示）
+
+暫估數字只在冷啟動抓取期間顯示，完整抓取後由數據階段（base_data.compute_base_data）的結果取代。
+"""
+
+import pandas as pd
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+class ProvisionalTotals:
+    """逐頁累計的暫估 KPI（以訂單 ID 去重，相鄰日期窗口的重複訂單只計一次）"""
+
+    def __init__(self):
+        self.revenue = 0.0
+        self.orders = 0
+        self.loaded = 0
+        self.expected: Optional[int] = None
+        self._daily_revenue: Dict[str, float] = defaultdict(float)
+        self._seen = set()
+
+    def add_page(self, orders: List[Dict], loaded: int, expected: Optional[int]) -> None:
+        """
+        加入一頁原始訂單（WooCommerceAPI 的 on_page 回呼格式）
+
+        Args:
+            orders: 本頁訂單 JSON
+            loaded: 已載入訂單數
+            expected: 預計訂單數，未知時為 None
+        """
+        for order in orders:
+            if order['id'] in self._seen:
+                continue
+            self._seen.add(order['id'])
+            total = float(order.get('total') or 0)
+            self.revenue += total
+            self.orders += 1
+            self._daily_revenue[str(order.get('date_created', ''))[:10]] += total
+        self.loaded, self.expected = loaded, expected
+
+    def snapshot(self) -> Dict:
+        """
+        目前的暫估 KPI
+
+        Returns:
+            {'revenue', 'orders', 'avg_order_value', 'loaded', 'expected', 'daily': DataFrame(date, revenue)}
+        """
+        daily = pd.DataFrame(sorted(self._daily_revenue.items()), columns=['date', 'revenue'])
+        daily['date'] = pd.to_datetime(daily['date'])
+        return {
+            'revenue': self.revenue,
+            'orders': self.orders,
+            'avg_order_value': self.revenue / self.orders if self.orders else 0,
+            'loaded': self.loaded,
+            'expected': self.expected,
+            'daily': daily,
+        }
@@ -0,0 +1,103 @@
+# reporter.py - 數據管線事件回報
+"""
+這個模組定義數據管線回報進度、訊息與錯誤的介面，包括：
+- Reporter：基底類別，所有事件都經由 emit() 送出
+- LoggingReporter：以結構化日誌輸出（預設，適合背景工作與命令列）
+- CallbackReporter：將事件字典交給回呼函式（適合測試與自訂整合）
+
+API 客戶端與管線只依賴這個介面，不直接呼叫 Streamlit；
+Streamlit 端的轉接見 src/ui/streamlit_reporter.py。
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator
+
+logger = logging.getLogger("dashboard.pipeline")
+
+# 事件等級對應的日誌等級
+LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'success': logging.INFO,
+    'stage': logging.INFO,
+    'progress': logging.DEBUG,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+}
+
+
+class Reporter:
+    """事件回報基底類別（預設忽略所有事件）"""
+
+    def emit(self, level: str, message: str, **data: Any) -> None:
+        """
+        送出事件
+
+        Args:
+            level: 事件等級（debug / info / success / stage / progress / warning / error）
+            message: 訊息
+            **data: 附加的結構化資料
+        """
+
+    def debug(self, message: str, **data: Any) -> None:
+        self.emit('debug', message, **data)
+
+    def info(self, message: str, **data: Any) -> None:
+        self.emit('info', message, **data)
+
+    def success(self, message: str, **data: Any) -> None:
+        self.emit('success', message, **data)
+
+    def warning(self, message: str, **data: Any) -> None:
+        self.emit('warning', message, **data)
+
+    def error(self, message: str, **data: Any) -> None:
+        self.emit('error', message, **data)
+
+    def progress(self, message: str, done: int, total: int) -> None:
+        """回報進度（done / total）"""
+        self.emit('progress', message, done=done, total=total)
+
+    @contextmanager
+    def stage(self, message: str) -> Iterator[None]:
+        """
+        標記一個處理階段，結束時回報耗時
+
+        Args:
+            message: 階段說明
+        """
+        started_at = time.perf_counter()
+        self.emit('stage', message, status='started')
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            self.emit('stage', message, status='finished', elapsed_ms=round(elapsed_ms, 1))
+
+
+class LoggingReporter(Reporter):
+    """以結構化日誌輸出事件（logger: dashboard.pipeline）"""
+
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+
+    def emit(self, level: str, message: str, **data: Any) -> None:
+        event = {'level': level, 'message': message, **data}
+        self.log.log(LOG_LEVELS.get(level, logging.INFO), message, extra={'event': event})
+
+
+class CallbackReporter(Reporter):
+    """將事件字典交給回呼函式"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Args:
+            callback: 接收事件字典（level、message、time 及附加資料）的函式
+        """
+        self.callback = callback
+
+    def emit(self, level: str, message: str, **data: Any) -> None:
+        self.callback({'level': level, 'message': message, 'time': datetime.now().isoformat(), **data})
@@ -0,0 +1,122 @@
+# shared_sources.py - 經由共用快取的數據來源
+"""
+這個模組將數據管線的抓取函式接到共用快取（src/cache/data_cache.py），包括：
+- 訂單、退款帳本、總覽統計、標頭指標、Meta 每日/每小時廣告數據的快取鍵與有效時間
+- 數據階段依賴的各快取鍵的背景更新次數（base_data_generation）
+- 前景抓取使用呼叫端的 Reporter（例如畫面）及載入時限，背景重新抓取一律以日誌回報且不設時限
+- 不完整的結果（抓取失敗的空表、逾時只取得部分訂單）不寫入共用快取，由共用快取改用最後一次完整的數據
+
+儀表板與預熱排程（warmer.py）共用這些函式，確保兩者使用相同的快取鍵。
+"""
+
+from datetime import date
+from typing import MutableMapping, Optional, Tuple
+
+from src.api.circuit_breaker import Deadline
+from src.api.woocommerce import PageCallback, WooCommerceAPI
+from src.cache.data_cache import CacheResult, DataCache
+from src.pipeline.base_data import (fetch_woocommerce, fetch_order_count, sync_refund_ledger, fetch_meta_ads,
+                                     fetch_meta_summary, fetch_hourly_ad_spend)
+from src.pipeline.reporter import Reporter
+from src.constants import CACHE_DEFAULT_TTL
+
+
+def cached_woocommerce(data_cache: DataCache, credentials: Tuple[str, str, str], start_date: date, end_date: date,
+                       reporter: Optional[Reporter] = None, deadline: Optional[Deadline] = None,
+                       on_page: Optional[PageCallback] = None) -> CacheResult:
+    """期間內的訂單與商品明細（抓取失敗的空結果及部分訂單不寫入共用快取；on_page 只在前景抓取時呼叫）"""
+    return data_cache.fetch_result(
+        'wc_orders', (*credentials, start_date, end_date),
+        lambda: fetch_woocommerce(credentials, start_date, end_date, reporter, deadline, on_page),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: not result[0].empty and not result[0].attrs.get('partial'),
+        refresh=lambda: fetch_woocommerce(credentials, start_date, end_date)
+    )
+
+
+def peek_woocommerce(data_cache: DataCache, credentials: Tuple[str, str, str], start_date: date,
+                     end_date: date) -> Optional[CacheResult]:
+    """只讀取共用快取中的訂單（不抓取），未命中時返回 None"""
+    return data_cache.peek('wc_orders', (*credentials, start_date, end_date), ttl=CACHE_DEFAULT_TTL)
+
+
+def base_data_generation(data_cache: DataCache, credentials: Optional[Tuple[str, str, str]],
+                         meta_source: Optional[tuple], start_date: date, end_date: date) -> Tuple[int, int, int]:
+    """
+    期間數據階段使用的訂單、退款帳本與 Meta 廣告數據各自的背景更新次數
+
+    納入數據階段的快取鍵：只有這個期間、這些來源的數據更新時才重新計算
+    """
+    return (
+        data_cache.generation('wc_orders', (*credentials, start_date, end_date)) if credentials else 0,
+        data_cache.generation('wc_refund_ledger', credentials) if credentials else 0,
+        data_cache.generation('meta_ads', (meta_source, start_date, end_date)) if meta_source else 0,
+    )
+
+
+def cached_refund_ledger(data_cache: DataCache, credentials: Tuple[str, str, str],
+                         reporter: Optional[Reporter] = None) -> CacheResult:
+    """增量同步後的退款帳本"""
+    return data_cache.fetch_result(
+        'wc_refund_ledger', credentials,
+        lambda: sync_refund_ledger(credentials, reporter),
+        ttl=CACHE_DEFAULT_TTL,
+        refresh=lambda: sync_refund_ledger(credentials)
+    )
+
+
+def cached_overview_stats(data_cache: DataCache, credentials: Tuple[str, str, str], start_date: date,
+                          end_date: date, reporter: Optional[Reporter] = None) -> CacheResult:
+    """伺服器端彙總的總覽統計（報表無法使用時為 None，不寫入共用快取）"""
+    url, key, secret = credentials
+    return data_cache.fetch_result(
+        'wc_overview', (*credentials, start_date, end_date),
+        lambda: WooCommerceAPI(url, key, secret, reporter=reporter).get_overview_stats(start_date, end_date),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: result is not None,
+        refresh=lambda: WooCommerceAPI(url, key, secret).get_overview_stats(start_date, end_date)
+    )
+
+
+def cached_order_count(data_cache: DataCache, credentials: Tuple[str, str, str], start_date: date, end_date: date,
+                       reporter: Optional[Reporter] = None) -> CacheResult:
+    """期間內的訂單數（X-WP-Total，無法取得時為 None，不寫入共用快取）"""
+    return data_cache.fetch_result(
+        'wc_order_count', (*credentials, start_date, end_date),
+        lambda: fetch_order_count(credentials, start_date, end_date, reporter),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: result is not None,
+        refresh=lambda: fetch_order_count(credentials, start_date, end_date)
+    )
+
+
+def cached_meta_summary(data_cache: DataCache, meta_source: tuple, start_date: date, end_date: date,
+                        reporter: Optional[Reporter] = None) -> CacheResult:
+    """Meta 廣告總計（default_summary，無法取得時為 None，不寫入共用快取）"""
+    return data_cache.fetch_result(
+        'meta_summary', (meta_source, start_date, end_date),
+        lambda: fetch_meta_summary(meta_source, start_date, end_date, reporter),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: result is not None,
+        refresh=lambda: fetch_meta_summary(meta_source, start_date, end_date)
+    )
+
+
+def cached_meta_ads(data_cache: DataCache, meta_source: tuple, start_date: date, end_date: date,
+                    reporter: Optional[Reporter] = None, token_store: Optional[MutableMapping] = None,
+                    debug_mode: bool = False, deadline: Optional[Deadline] = None) -> CacheResult:
+    """Meta 每日廣告數據（空結果不寫入共用快取）"""
+    return data_cache.fetch_result(
+        'meta_ads', (meta_source, start_date, end_date),
+        lambda: fetch_meta_ads(meta_source, start_date, end_date, reporter, token_store=token_store,
+                               debug_mode=debug_mode, deadline=deadline),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: not result.empty,
+        refresh=lambda: fetch_meta_ads(meta_source, start_date, end_date)
+    )
+
+
+def cached_hourly_ad_spend(data_cache: DataCache, token: str, account_id: str, start_date: date, end_date: date,
+                           reporter: Optional[Reporter] = None) -> CacheResult:
+    """Meta 每小時廣告支出序列（空結果不寫入共用快取）"""
+    return data_cache.fetch_result(
+        'meta_hourly_spend', (token, account_id, start_date, end_date),
+        lambda: fetch_hourly_ad_spend(token, account_id, start_date, end_date, reporter),
+        ttl=CACHE_DEFAULT_TTL, cacheable=lambda result: not result.empty,
+        refresh=lambda: fetch_hourly_ad_spend(token, account_id, start_date, end_date)
+    )
@@ -0,0 +1,186 @@
+# warmer.py - 快取預熱排程
+"""
+這個模組負責在背景定期預熱常用期間（近 7/30/90 天、本月至今）的共用快取，包括：
+- warm_standard_ranges：經由 shared_sources 抓取各期間的訂單、退款帳本與廣告數據，
+  使儀表板以預設設定開啟時直接命中快取，不在前景呼叫 API
+- CacheWarmer：背景執行緒排程，每隔固定時間預熱一次；跨過午夜時（期間的日期全部改變）立即重新預熱
+
+可由 app.py 在程序內啟動，或以 scripts/cache_warmer.py 作為獨立的背景工作執行。
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from src.cache.data_cache import DataCache
+from src.pipeline.base_data import update_fact_table
+from src.pipeline.batch import resolve_ranges
+from src.pipeline.reporter import Reporter, LoggingReporter
+from src.pipeline.shared_sources import cached_woocommerce, cached_refund_ledger, cached_meta_ads
+from src.utils.fact_table import DailyFactTable
+from src.utils.refunds import apply_refunds
+from src.constants import CACHE_WARM_INTERVAL, CACHE_WARM_MIDNIGHT_DELAY
+
+# 預熱的期間（src/pipeline/batch.py 的 RANGE_PRESETS），近 30 天為儀表板預設範圍
+WARM_PRESETS = ['last_7_days', 'last_30_days', 'last_90_days', 'month_to_date']
+
+
+def warm_standard_ranges(data_cache: DataCache, wc_credentials: Optional[Tuple[str, str, str]],
+                         meta_source: Optional[tuple], today: date, fact_table: Optional[DailyFactTable] = None,
+                         presets: Iterable[str] = WARM_PRESETS, reporter: Optional[Reporter] = None,
+                         upserted: Optional[Dict] = None) -> Dict:
+    """
+    預熱常用期間的共用快取
+
+    已在快取中且未過期的期間不會重新抓取；過期的期間由共用快取在背景重新抓取。
+    提供 upserted 時，只有數據實際重新抓取過（資料時間改變）的期間才寫入事實表，快取命中時不重寫 Parquet。
+
+    Args:
+        data_cache: 共用快取
+        wc_credentials: (商店網址, consumer key, consumer secret)，為 None 時略過 WooCommerce
+        meta_source: Meta 數據來源，為 None 時略過 Meta
+        today: 基準日期
+        fact_table: 每日事實表，為 None 時不寫入
+        presets: 預熱的期間名稱
+        reporter: 訊息回報
+        upserted: 各期間已寫入事實表的數據時間（由呼叫端跨次保存，本函式更新），None 表示每次都寫入
+
+    Returns:
+        {'ranges': 預熱的期間, 'failed': 失敗的 (期間, 來源)}
+    """
+    reporter = reporter or LoggingReporter()
+    ranges = resolve_ranges(presets, today)
+    failed = []
+    ledger, ledger_fetched_at = None, None
+    for start_date, end_date in ranges:
+        orders_df, ads_df, fetched, incomplete = None, None, [], []
+        if wc_credentials:
+            try:
+                result = cached_woocommerce(data_cache, wc_credentials, start_date, end_date, reporter)
+                orders_df, fetched = result.value[0], fetched + [result.fetched_at]
+                if ledger is None:
+                    ledger_result = cached_refund_ledger(data_cache, wc_credentials, reporter)
+                    ledger, ledger_fetched_at = ledger_result.value, ledger_result.fetched_at
+                if result.partial:
+                    # 共用快取在來源失敗時回傳空的部分結果而不拋出例外
+                    reporter.warning(f"預熱 WooCommerce 數據不完整（{start_date} ~ {end_date}）")
+                    failed.append(((start_date, end_date), 'woocommerce'))
+                    incomplete.append('woocommerce')
+            except Exception as e:
+                reporter.warning(f"預熱 WooCommerce 數據失敗（{start_date} ~ {end_date}）: {str(e)}")
+                failed.append(((start_date, end_date), 'woocommerce'))
+                orders_df = None
+        if meta_source:
+            try:
+                result = cached_meta_ads(data_cache, meta_source, start_date, end_date, reporter)
+                ads_df, fetched = result.value, fetched + [result.fetched_at]
+                if result.partial:
+                    reporter.warning(f"預熱 Meta 廣告數據不完整（{start_date} ~ {end_date}）")
+                    failed.append(((start_date, end_date), 'meta'))
+                    incomplete.append('meta')
+            except Exception as e:
+                reporter.warning(f"預熱 Meta 廣告數據失敗（{start_date} ~ {end_date}）: {str(e)}")
+                failed.append(((start_date, end_date), 'meta'))
+
+        # 事實表只寫入完整抓取的來源（未設定、失敗或不完整的來源保留舊數據）；
+        # 訂單、退款帳本與廣告的資料時間都與上次寫入相同時為快取命中，不重寫
+        version = (tuple(fetched), ledger_fetched_at, tuple(incomplete))
+        written = upserted is not None and upserted.get((start_date, end_date)) == version
+        if fact_table is not None and (orders_df is not None or ads_df is not None) and not written:
+            if orders_df is not None and not orders_df.empty and ledger is not None:
+                orders_df = apply_refunds(orders_df, ledger)
+            update_fact_table(fact_table, orders_df, ads_df, start_date, end_date, incomplete)
+            if upserted is not None:
+                upserted[(start_date, end_date)] = version
+        if fetched:
+            reporter.debug(f"已預熱 {start_date} ~ {end_date}（資料時間 {min(fetched):%Y-%m-%d %H:%M}）",
+                           start_date=str(start_date), end_date=str(end_date))
+
+    reporter.info(f"快取預熱完成：{len(ranges)} 個期間，{len(failed)} 個來源失敗",
+                  ranges=len(ranges), failed=len(failed))
+    return {'ranges': ranges, 'failed': failed}
+
+
+def seconds_until_next_day(now: datetime, delay: float = CACHE_WARM_MIDNIGHT_DELAY) -> float:
+    """
+    距離下一個午夜（加上延遲）的秒數
+
+    Args:
+        now: 目前時間
+        delay: 午夜後延遲的秒數（等待訂單與廣告數據跨日）
+
+    Returns:
+        秒數
+    """
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+    return (next_midnight - now).total_seconds() + delay
+
+
+class CacheWarmer:
+    """背景快取預熱排程"""
+
+    def __init__(self, warm: Optional[Callable[[date], object]], interval: float = CACHE_WARM_INTERVAL,
+                 now: Callable[[], datetime] = datetime.now, reporter: Optional[Reporter] = None):
+        """
+        Args:
+            warm: 預熱函式，參數為基準日期；None 表示尚未設定（見 retarget）
+            interval: 預熱間隔（秒），應小於共用快取的有效時間加上可使用舊數據的時間
+            now: 目前時間（測試時可替換）
+            reporter: 訊息回報
+        """
+        self.warm = warm
+        self.target = None
+        self.interval = interval
+        self.now = now
+        self.reporter = reporter or LoggingReporter()
+        self.last_warmed: Optional[date] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def retarget(self, warm: Callable[[date], object], target: Hashable = None) -> None:
+        """
+        更換預熱函式（例如 token 更新後改用新的數據來源），排程執行緒不變
+
+        Args:
+            warm: 新的預熱函式
+            target: 預熱對象的識別（與目前相同時不更換）
+        """
+        if self.warm is not None and target == self.target:
+            return
+        self.warm, self.target = warm, target
+
+    def run_once(self) -> None:
+        """以今天為基準預熱一次，失敗時只記錄"""
+        warm = self.warm
+        if warm is None:
+            return
+        today = self.now().date()
+        try:
+            warm(today)
+            self.last_warmed = today
+        except Exception as e:
+            self.reporter.error(f"快取預熱失敗: {str(e)}")
+
+    def next_wait(self) -> float:
+        """距離下一次預熱的秒數：固定間隔，跨過午夜時提前"""
+        return max(0.0, min(self.interval, seconds_until_next_day(self.now())))
+
+    def run_forever(self) -> None:
+        """持續預熱直到 stop()"""
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.next_wait())
+
+    def start(self) -> 'CacheWarmer':
+        """在背景執行緒中啟動（重複呼叫不會建立新的執行緒）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止排程並等待執行緒結束"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
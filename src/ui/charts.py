@@ -0,0 +1,136 @@
+# charts.py - 圖表
+"""
+這個模組負責儀表板圖表的建立，包括：
+- 營收 vs 廣告支出、ROAS 折線圖
+- 估計淨利圖
+- 成本結構、付款方式、運送方式等分布圖
+
+數據點超過 CHART_MAX_POINTS 時先以 LTTB 降採樣，並改用 WebGL（scattergl）繪製，
+不論日期範圍多長，圖表 JSON 大小與瀏覽器繪製時間都有上限。
+"""
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from typing import Dict, List, Optional
+from src.constants import CHART_MAX_POINTS
+from src.utils.downsample import downsample_frame
+
+
+def trend_line_chart(df: pd.DataFrame, x: str, y: List[str], title: str,
+                     labels: Optional[Dict[str, str]] = None, height: int = 400,
+                     max_points: int = CHART_MAX_POINTS) -> go.Figure:
+    """
+    趨勢折線圖（長序列自動降採樣並使用 WebGL）
+
+    Args:
+        df: 圖表數據（依 x 遞增排序）
+        x: x 軸欄位
+        y: y 軸欄位列表
+        title: 標題
+        labels: 軸標籤
+        height: 圖表高度
+        max_points: 超過此點數時降採樣並改用 WebGL
+
+    Returns:
+        Plotly Figure
+    """
+    large = len(df) > max_points
+    plot_df = downsample_frame(df, x, y, max_points) if large else df
+    fig = px.line(plot_df, x=x, y=y if len(y) > 1 else y[0], title=title, labels=labels or {},
+                  render_mode='webgl' if large else 'auto')
+    fig.update_layout(height=height)
+    return fig
+
+
+def roas_chart(df: pd.DataFrame, x: str, height: int = 400, max_points: int = CHART_MAX_POINTS) -> go.Figure:
+    """
+    ROAS 趨勢圖（含損益平衡線與目標值）
+
+    Args:
+        df: 含 roas 欄位的數據
+        x: x 軸欄位
+        height: 圖表高度
+        max_points: 超過此點數時降採樣並改用 WebGL
+
+    Returns:
+        Plotly Figure
+    """
+    fig = trend_line_chart(df, x, ['roas'], 'ROAS 趨勢', height=height, max_points=max_points)
+    fig.add_hline(y=1, line_dash="dash", line_color="red", annotation_text="損益平衡")
+    fig.add_hline(y=3, line_dash="dot", line_color="green", annotation_text="目標值")
+    return fig
+
+
+def profit_chart(df: pd.DataFrame, title: str, height: int = 450,
+                 max_points: int = CHART_MAX_POINTS) -> go.Figure:
+    """
+    估計淨利圖：點數不多時為長條圖，超過上限時改為降採樣的 WebGL 折線圖
+
+    Args:
+        df: 含 date、estimated_net_profit 欄位的數據
+        title: 標題
+        height: 圖表高度
+        max_points: 超過此點數時降採樣並改用 WebGL
+
+    Returns:
+        Plotly Figure
+    """
+    labels = {'estimated_net_profit': '估計淨利 ($)', 'date': '日期'}
+    if len(df) > max_points:
+        plot_df = downsample_frame(df, 'date', ['estimated_net_profit'], max_points)
+        fig = px.line(plot_df, x='date', y='estimated_net_profit', title=title, labels=labels, render_mode='webgl')
+    else:
+        fig = px.bar(df, x='date', y='estimated_net_profit', title=title,
+                     color='estimated_net_profit', color_continuous_scale=['red', 'yellow', 'green'], labels=labels)
+    fig.add_hline(y=0, line_dash="solid", line_color="black", annotation_text="損益平衡線")
+    fig.update_layout(height=height)
+    return fig
+
+
+def share_pie_chart(df: pd.DataFrame, values: str, names: str, title: str,
+                    show_legend: bool = True, height: int = 400) -> go.Figure:
+    """
+    占比圓餅圖（標籤顯示於圖內）
+
+    Args:
+        df: 圖表數據
+        values: 數值欄位
+        names: 類別欄位
+        title: 標題
+        show_legend: 是否顯示圖例
+        height: 圖表高度
+
+    Returns:
+        Plotly Figure
+    """
+    fig = px.pie(df, values=values, names=names, title=title)
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(height=height)
+    if not show_legend:
+        fig.update_layout(showlegend=False)
+    return fig
+
+
+def colored_bar_chart(df: pd.DataFrame, x: str, y: str, title: str, color_scale,
+                      xaxis_tickangle: Optional[int] = None, height: int = 400) -> go.Figure:
+    """
+    依數值著色的長條圖
+
+    Args:
+        df: 圖表數據
+        x: 類別欄位
+        y: 數值欄位（同時作為顏色）
+        title: 標題
+        color_scale: 連續色階
+        xaxis_tickangle: x 軸標籤角度
+        height: 圖表高度
+
+    Returns:
+        Plotly Figure
+    """
+    fig = px.bar(df, x=x, y=y, title=title, color=y, color_continuous_scale=color_scale)
+    fig.update_layout(height=height, showlegend=False)
+    if xaxis_tickangle is not None:
+        fig.update_layout(xaxis_tickangle=xaxis_tickangle)
+    return fig
@@ -0,0 +1,86 @@
+# figure_cache.py - 圖表快取
+"""
+這個模組負責 Plotly 圖表的快取，包括：
+- 以輸入數據的雜湊指紋加上圖表選項作為快取鍵
+- 輸入未改變時直接重用已建立的圖表，不重新執行 plotly express
+- 記錄每個圖表的命中/未命中次數，供調試模式顯示
+"""
+
+import hashlib
+import threading
+import pandas as pd
+import plotly.graph_objects as go
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+from src.constants import FIGURE_CACHE_MAX_ENTRIES
+
+
+def frame_fingerprint(data: Any) -> str:
+    """
+    計算輸入數據的指紋
+
+    DataFrame 以 pandas 逐列雜湊（含欄位名稱與型別）計算，其他物件以 repr 計算。
+
+    Args:
+        data: DataFrame、dict 或其他可 repr 的物件
+
+    Returns:
+        十六進位指紋字串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr(list(zip(data.columns, data.dtypes.astype(str)))).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        digest.update(repr(data).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """圖表快取（LRU，跨會話共用）"""
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_MAX_ENTRIES):
+        """
+        初始化圖表快取
+
+        Args:
+            max_entries: 最多保留的圖表數
+        """
+        self.max_entries = max_entries
+        self._figures: "OrderedDict[Tuple[str, str], go.Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def get_or_build(self, name: str, data: Any, options: Dict[str, Any],
+                     builder: Callable[[], go.Figure]) -> Tuple[go.Figure, bool]:
+        """
+        取得圖表，快取中沒有時以 builder 建立
+
+        快取的圖表為共用物件，呼叫端不可修改。
+
+        Args:
+            name: 圖表名稱
+            data: 圖表輸入數據
+            options: 影響圖表外觀的選項（標題、粒度等）
+            builder: 建立圖表的函式
+
+        Returns:
+            (圖表, 是否命中快取)
+        """
+        key = (name, frame_fingerprint(data) + frame_fingerprint(sorted(options.items())))
+        with self._lock:
+            stats = self.stats.setdefault(name, {'hits': 0, 'misses': 0})
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                stats['hits'] += 1
+                return figure, True
+            stats['misses'] += 1
+
+        figure = builder()
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return figure, False
@@ -0,0 +1,62 @@
+# streamlit_reporter.py - 數據管線事件的 Streamlit 轉接
+"""
+這個模組將數據管線的事件轉為 Streamlit 元件：
+- info / success / warning / error -> st.info / st.success / st.warning / st.error
+- stage -> st.spinner
+- progress -> st.progress（同一個回報者共用一條進度條，完成時移除）
+- debug -> 調試模式下以 st.write / st.json 顯示
+"""
+
+import streamlit as st
+from contextlib import contextmanager
+from typing import Any, Iterator
+from src.pipeline.reporter import Reporter
+
+
+class StreamlitReporter(Reporter):
+    """在 Streamlit 頁面上顯示管線事件"""
+
+    def __init__(self, debug_mode: bool = False):
+        """
+        Args:
+            debug_mode: 是否顯示 debug 事件
+        """
+        self.debug_mode = debug_mode
+        self._progress_bar = None
+
+    def emit(self, level: str, message: str, **data: Any) -> None:
+        if level == 'debug':
+            if self.debug_mode:
+                st.write(message)
+                if 'payload' in data:
+                    st.json(data['payload'])
+        elif level == 'info':
+            st.info(message)
+        elif level == 'success':
+            st.success(message)
+        elif level == 'warning':
+            st.warning(message)
+        elif level == 'error':
+            st.error(message)
+        elif level == 'progress':
+            self._update_progress(message, data['done'], data['total'])
+
+    def _update_progress(self, message: str, done: int, total: int) -> None:
+        if self._progress_bar is None:
+            self._progress_bar = st.progress(0.0, text=message)
+        if done >= total:
+            self._progress_bar.empty()
+            self._progress_bar = None
+        else:
+            self._progress_bar.progress(done / total, text=message)
+
+    @contextmanager
+    def stage(self, message: str) -> Iterator[None]:
+        try:
+            with st.spinner(message):
+                yield
+        finally:
+            # 未達到總數即結束（例如逾時只取得部分數據）時也移除進度條
+            if self._progress_bar is not None:
+                self._progress_bar.empty()
+                self._progress_bar = None
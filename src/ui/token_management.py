@@ -0,0 +1,240 @@
+# token_management.py - Meta Token 管理界面
+"""
+這個模組提供 Meta Token 管理的 Streamlit 界面：
+- show_token_manager_ui：安全模式側邊欄的 Token 設定、更換與檢視（MetaTokenManager）
+- show_token_management：以短期 Token 生成長期 Token 的簡化界面（MetaAdsAPI）
+
+Token 的交換、驗證與儲存都在 src/api，本模組只負責顯示與輸入。
+"""
+
+import streamlit as st
+from datetime import datetime
+from typing import Optional
+from src.api.meta_ads import MetaAdsAPI
+from src.api.meta_token_manager import MetaTokenManager
+from src.ui.streamlit_reporter import StreamlitReporter
+
+
+def show_token_manager_ui(app_id: str, app_secret: str) -> Optional[str]:
+    """
+    顯示 Token 管理 UI（簡化版本，無 OAuth，支援雲端部署）
+
+    Args:
+        app_id: Meta App ID
+        app_secret: Meta App Secret
+
+    Returns:
+        有效的 access token，如果沒有則返回 None
+    """
+    st.subheader("🔑 Meta Token 管理")
+
+    manager = MetaTokenManager(app_id, app_secret, session_store=st.session_state,
+                               secrets=st.secrets, reporter=StreamlitReporter())
+
+    # 顯示儲存模式資訊
+    storage_mode_emoji = {
+        "file": "💾",
+        "session": "🔄",
+        "secrets": "🔒"
+    }
+    storage_mode_desc = {
+        "file": "本地檔案（開發環境）",
+        "session": "Session State（雲端部署）",
+        "secrets": "Streamlit Secrets"
+    }
+    st.caption(f"{storage_mode_emoji.get(manager.storage_mode, '📦')} 儲存模式: {storage_mode_desc.get(manager.storage_mode, manager.storage_mode)}")
+
+    # 雲端部署提示
+    if manager.storage_mode == "session":
+        st.info("💡 雲端部署模式：Token 會在服務重啟後消失，建議將長期 Token 加入環境變數")
+
+    # 嘗試取得有效的 token
+    current_token = manager.get_valid_token()
+
+    # 顯示目前狀態
+    token_data = manager.load_token()
+
+    if token_data and current_token:
+        # Token 有效
+        st.success("✅ Token 已設定且有效")
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            created_at = datetime.fromisoformat(token_data['created_at'])
+            st.metric("建立日期", created_at.strftime("%Y-%m-%d"))
+
+        with col2:
+            # 計算實際使用天數（從建立日期開始）
+            days_used = (datetime.now() - created_at).days
+            # Meta 長期 Token 有效期是 60 天
+            recommend_update_days = 50
+
+            if token_data.get('from_env'):
+                # 環境變數 Token：顯示已使用天數和建議更新提醒
+                if days_used >= recommend_update_days:
+                    st.metric("已使用", f"{days_used} 天", delta="⚠️ 建議更新", delta_color="inverse")
+                else:
+                    days_until_update = recommend_update_days - days_used
+                    st.metric("已使用", f"{days_used} 天", delta=f"{days_until_update} 天後更新")
+            else:
+                # 本地 Token：顯示剩餘天數
+                expires_at = datetime.fromisoformat(token_data['expires_at'])
+                days_left = (expires_at - datetime.now()).days
+                st.metric("剩餘天數", f"{days_left} 天")
+
+        with col3:
+            pass  # 移除手動更新按鈕（無法用過期 token 換新 token）
+
+        # 使用新短期 Token 更新（永遠顯示，方便隨時更換）
+        with st.expander("🔄 更換 Token（貼入新短期 Token）"):
+            st.info("從 Graph API Explorer 產生新 Token 後貼入此處，系統將轉換為長期 Token（60 天）")
+            new_short_token = st.text_input(
+                "新的短期 Access Token",
+                type="password",
+                placeholder="貼上從 Graph API Explorer 取得的 token",
+                key="new_short_token_input"
+            )
+            if st.button("🔄 轉換並更新", type="primary", key="update_token_btn"):
+                if new_short_token:
+                    try:
+                        with st.spinner("轉換中..."):
+                            token_data_new = manager.exchange_short_to_long_token(new_short_token)
+                            st.success(f"✅ 轉換成功！請複製下方長期 Token 更新到 Zeabur")
+                            st.code(token_data_new['access_token'])
+                            st.caption("複製上方完整 Token → Zeabur → Variables → META_LONG_LIVED_TOKEN")
+                    except Exception as e:
+                        st.error(f"轉換失敗: {str(e)}")
+                else:
+                    st.warning("請輸入新的短期 Token")
+
+        # 顯示 Token（摺疊）
+        with st.expander("🔍 查看 Token 資訊"):
+            # 顯示完整 Token（可複製）
+            st.text_area(
+                "完整 Access Token（可複製）",
+                value=current_token,
+                height=100,
+                help="請複製此 Token 到 Zeabur 環境變數"
+            )
+
+            st.caption(f"Token 長度: {len(current_token)} 字元")
+            st.caption(f"開頭: {current_token[:20]}...")
+            st.caption(f"結尾: ...{current_token[-20:]}")
+
+            # Zeabur 環境變數設定提示
+            if manager.storage_mode == "session":
+                st.markdown("---")
+                st.markdown("**💾 長期儲存到 Zeabur 環境變數：**")
+                st.code(f"META_LONG_LIVED_TOKEN={current_token}", language="bash")
+                st.caption("⚠️ 複製上方完整 Token 到 Zeabur → Variables → META_LONG_LIVED_TOKEN")
+            else:
+                st.markdown("---")
+                st.markdown("**💾 設定到 Zeabur（如需雲端部署）：**")
+                st.caption("1. 複製上方完整 Token")
+                st.caption("2. 在 Zeabur Variables 中新增 META_LONG_LIVED_TOKEN")
+                st.caption("3. 貼上 Token 並儲存")
+
+            if st.button("🗑️ 刪除 Token"):
+                manager.delete_token()
+                st.success("Token 已刪除")
+                st.rerun()
+
+    else:
+        # 需要設定 Token
+        st.info("請輸入短期 Token，系統將自動轉換為長期 Token（60 天有效期）")
+
+        st.markdown("""
+        **📝 如何取得短期 Token：**
+        1. 前往 [Meta Graph API Explorer](https://developers.facebook.com/tools/explorer/)
+        2. 選擇你的應用程式
+        3. 在「權限」中勾選：`ads_read`、`ads_management`
+        4. 點擊「產生存取權杖」
+        5. 複製 Token 並貼到下方
+        """)
+
+        short_token = st.text_input(
+            "短期 Access Token",
+            type="password",
+            placeholder="請貼上從 Graph API Explorer 取得的 token"
+        )
+
+        if st.button("🔄 轉換為長期 Token", type="primary"):
+            if short_token:
+                try:
+                    with st.spinner("轉換中..."):
+                        token_data = manager.exchange_short_to_long_token(short_token)
+                        st.success(f"✅ 轉換成功！Token 有效期約 {token_data['expires_in'] // 86400} 天")
+                        st.balloons()
+                        st.rerun()
+                except Exception as e:
+                    st.error(f"❌ 轉換失敗: {str(e)}")
+                    st.info("請確認：\n1. Token 是否正確\n2. App ID 和 App Secret 是否正確\n3. Token 權限是否包含 ads_read")
+            else:
+                st.warning("請輸入短期 Token")
+
+    return current_token
+
+
+def show_token_management():
+    """顯示 Token 管理界面"""
+    # 為了避免循環導入，直接在這裡實現簡化版本
+    st.subheader("Meta Token 管理")
+    
+    # 顯示當前 token 狀態
+    if 'meta_token_info' in st.session_state:
+        token_info = st.session_state.meta_token_info
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.info("**當前 Token 狀態**")
+            if 'expires_at' in token_info:
+                expires_at = datetime.fromisoformat(token_info['expires_at'])
+                days_left = (expires_at - datetime.now()).days
+                
+                if days_left > 7:
+                    st.success(f"Token 有效，剩餘 {days_left} 天")
+                elif days_left > 0:
+                    st.warning(f"Token 將在 {days_left} 天後過期")
+                else:
+                    st.error("Token 已過期")
+                
+                st.caption(f"到期時間: {expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        with col2:
+            if st.button("手動刷新 Token"):
+                try:
+                    # 這裡需要獲取配置，但為了避免循環導入，簡化處理
+                    st.info("請使用下方的初始化功能重新生成 Token")
+                except Exception as e:
+                    st.error(f"刷新失敗: {str(e)}")
+    else:
+        st.info("尚未設定 Token 信息")
+    
+    # 初始化長期 Token
+    with st.expander("初始化長期 Token"):
+        st.info("首次使用時，請使用短期 Token 生成長期 Token")
+        short_token = st.text_input("短期 Access Token", type="password", key="short_token_input")
+        
+        if st.button("生成長期 Token") and short_token:
+            try:
+                # 獲取 Meta 配置
+                if hasattr(st, 'secrets') and 'meta' in st.secrets:
+                    app_id = st.secrets.meta.app_id
+                    app_secret = st.secrets.meta.app_secret
+                    account_id = st.secrets.meta.account_id
+                    
+                    api_client = MetaAdsAPI(
+                        app_id=app_id,
+                        app_secret=app_secret,
+                        account_id=account_id,
+                        token_store=st.session_state,
+                        reporter=StreamlitReporter()
+                    )
+                    token_info = api_client.refresh_long_lived_token(short_token)
+                    st.success("長期 Token 生成成功！")
+                    st.json(token_info)
+                else:
+                    st.error("無法獲取 Meta API 配置")
+            except Exception as e:
+                st.error(f"生成失敗: {str(e)}")
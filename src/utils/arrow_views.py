@@ -0,0 +1,42 @@
+# arrow_views.py - Arrow 表格視圖
+"""
+這個模組負責數據層到畫面的 Arrow 表格交接，包括：
+- 數據載入時將 DataFrame 一次轉為 pyarrow.Table
+- 以 select / rename_columns / slice / take 取得欄位投影與分頁，不複製欄位數據
+
+st.dataframe 可直接接收 pyarrow.Table，省去每次重新執行時 pandas -> Arrow 的轉換與 .copy()。
+"""
+
+import pandas as pd
+import pyarrow as pa
+from typing import Dict
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    將 DataFrame 轉為 Arrow 表格（不含索引）
+
+    Args:
+        df: 要轉換的 DataFrame
+
+    Returns:
+        pyarrow.Table
+    """
+    if df is None or len(df.columns) == 0:
+        return pa.table({})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def project(table: pa.Table, columns: Dict[str, str]) -> pa.Table:
+    """
+    取出欄位並改為顯示名稱（零複製，表格中不存在的欄位略過）
+
+    Args:
+        table: Arrow 表格
+        columns: 原欄位 -> 顯示名稱（依此順序排列）
+
+    Returns:
+        投影後的 Arrow 表格
+    """
+    present = [column for column in columns if column in table.column_names]
+    return table.select(present).rename_columns([columns[column] for column in present])
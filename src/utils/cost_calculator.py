@@ -12,6 +12,38 @@ from typing import Dict, Tuple
 from src.constants import SHIPPING_COSTS, PAYMENT_FEES, TAX_RATE
 
 
+def match_shipping_cost(method: str) -> float:
+    """
+    以模糊匹配取得運送方式的單筆運費
+
+    Args:
+        method: 運送方式名稱
+
+    Returns:
+        單筆運費，無法匹配時為 0
+    """
+    for key, cost in SHIPPING_COSTS.items():
+        if key.lower() in method.lower() or method.lower() in key.lower():
+            return cost
+    return 0
+
+
+def match_payment_fee_rate(method: str) -> float:
+    """
+    以模糊匹配取得付款方式的手續費率
+
+    Args:
+        method: 付款方式名稱
+
+    Returns:
+        手續費率 (百分比)，無法匹配時為 0
+    """
+    for key, rate in PAYMENT_FEES.items():
+        if key.lower() in method.lower() or method.lower() in key.lower():
+            return rate
+    return 0.0
+
+
 def calculate_shipping_costs(shipping_methods: Dict[str, int]) -> Tuple[Dict, float]:
     """
     計算運費
@@ -28,13 +60,8 @@ def calculate_shipping_costs(shipping_methods: Dict[str, int]) -> Tuple[Dict, fl
     total_shipping_cost = 0
 
     for method, count in shipping_methods.items():
-        cost_per_order = 0
-
         # 模糊匹配運送方式
-        for key, cost in SHIPPING_COSTS.items():
-            if key.lower() in method.lower() or method.lower() in key.lower():
-                cost_per_order = cost
-                break
+        cost_per_order = match_shipping_cost(method)
 
         total_cost = cost_per_order * count
         shipping_costs[method] = {
@@ -64,7 +91,7 @@ def calculate_payment_fees(orders_df: pd.DataFrame) -> Tuple[Dict, float]:
 
     if not orders_df.empty:
         # 按付款方式分組統計
-        payment_summary = orders_df.groupby('payment_method').agg({
+        payment_summary = orders_df.groupby('payment_method', observed=True).agg({
             'total': ['count', 'sum']
         }).round(2)
         payment_summary.columns = ['order_count', 'total_amount']
@@ -76,11 +103,7 @@ def calculate_payment_fees(orders_df: pd.DataFrame) -> Tuple[Dict, float]:
             amount = float(row['total_amount'])
 
             # 模糊匹配付款方式的手續費率
-            fee_rate = 0.0
-            for key, rate in PAYMENT_FEES.items():
-                if key.lower() in method.lower() or method.lower() in key.lower():
-                    fee_rate = rate
-                    break
+            fee_rate = match_payment_fee_rate(method)
 
             fee_amount = amount * (fee_rate / 100)
             payment_fees[method] = {
@@ -142,6 +165,27 @@ def calculate_net_profit(revenue: float, cogs: float, shipping_cost: float,
     return revenue - total_costs
 
 
+def apply_cogs_rate(facts_df: pd.DataFrame, cogs_rate: float) -> pd.DataFrame:
+    """
+    依進貨成本率計算每日（或每期）的估計進貨成本、淨利與 ROAS
+
+    只做欄位層級的向量運算，調整成本率時不需重新彙總訂單。
+
+    Args:
+        facts_df: 事實表（需含 revenue / spend / shipping_cost / payment_fee / tax 欄位）
+        cogs_rate: 進貨成本率 (百分比)
+
+    Returns:
+        新增 roas / estimated_cogs / estimated_net_profit 欄位的 DataFrame
+    """
+    result = facts_df.copy()
+    result['roas'] = result['revenue'] / result['spend'].replace(0, 1)
+    result['estimated_cogs'] = result['revenue'] * (cogs_rate / 100)
+    result['estimated_net_profit'] = (result['revenue'] - result['estimated_cogs'] - result['shipping_cost'] -
+                                      result['payment_fee'] - result['spend'] - result['tax'])
+    return result
+
+
 def calculate_total_costs(cogs: float, shipping_cost: float, payment_fee: float,
                          ad_spend: float, business_tax: float) -> float:
     """
@@ -0,0 +1,104 @@
+# downsample.py - 圖表降採樣
+"""
+這個模組負責長時間範圍趨勢圖的點數控制，包括：
+- LTTB（Largest-Triangle-Three-Buckets）降採樣，保留序列的視覺形狀
+- 多序列共用 x 軸時合併各序列選出的點
+- 依日期範圍長度自動選擇每日/每週/每月粒度
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Iterable
+
+# 自動粒度：範圍天數上限 -> 事實表粒度
+AUTO_GRAIN_MAX_DAYS = [
+    (180, 'day'),
+    (730, 'week'),
+]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    LTTB 降採樣，回傳保留點的位置
+
+    第一點與最後一點一定保留，其餘點分成 threshold - 2 個桶，
+    每桶選出與前一個選取點、下一桶平均點構成最大三角形面積的點。
+
+    Args:
+        x: x 值（數值，已遞增排序）
+        y: y 值
+        threshold: 目標點數
+
+    Returns:
+        保留點的位置（遞增）
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    bucket_edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        # 下一桶的平均點（最後一桶以最後一點為準）
+        next_start, next_end = end, bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_frame(df: pd.DataFrame, x: str, y_columns: Iterable[str], max_points: int) -> pd.DataFrame:
+    """
+    將圖表數據降採樣到最多約 max_points 列
+
+    每個 y 欄位各自做 LTTB，合併選出的列，確保每條線的峰谷都保留。
+
+    Args:
+        df: 圖表數據（依 x 遞增排序）
+        x: x 軸欄位（日期或數值）
+        y_columns: y 軸欄位
+        max_points: 每個序列的目標點數
+
+    Returns:
+        降採樣後的 DataFrame（未超過門檻時原樣返回）
+    """
+    if len(df) <= max_points:
+        return df
+
+    x_values = df[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values) or x_values.dtype == object:
+        x_values = pd.to_datetime(x_values).astype('int64')
+    x_array = x_values.to_numpy(dtype=float)
+
+    keep = np.unique(np.concatenate([
+        lttb_indices(x_array, df[column].to_numpy(), max_points) for column in y_columns
+    ]))
+    return df.iloc[keep]
+
+
+def auto_grain(start_date: date, end_date: date) -> str:
+    """
+    依日期範圍長度選擇事實表粒度
+
+    Args:
+        start_date: 開始日期
+        end_date: 結束日期
+
+    Returns:
+        'day' / 'week' / 'month'
+    """
+    days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1
+    for max_days, grain in AUTO_GRAIN_MAX_DAYS:
+        if days <= max_days:
+            return grain
+    return 'month'
@@ -0,0 +1,99 @@
+# exporter.py - 數據匯出
+"""
+這個模組負責將分析結果轉換為可下載的檔案，包括：
+- CSV（分塊寫入位元組緩衝區，不產生完整的中間字串）
+- Parquet
+- Excel（需要 openpyxl 或 xlsxwriter，未安裝時不提供此格式）
+
+匯出檔只在使用者要求時產生，由呼叫端依數據版本快取。
+"""
+
+import io
+import pandas as pd
+from src.constants import EXPORT_CSV_CHUNK_ROWS
+
+# Excel 引擎為選用依賴
+try:
+    import openpyxl  # noqa: F401
+    XLSX_ENGINE = 'openpyxl'
+except ImportError:
+    try:
+        import xlsxwriter  # noqa: F401
+        XLSX_ENGINE = 'xlsxwriter'
+    except ImportError:
+        XLSX_ENGINE = None
+
+# 匯出格式：顯示名稱 -> (副檔名, MIME 類型)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def available_formats() -> list:
+    """
+    目前環境可用的匯出格式
+
+    Returns:
+        格式顯示名稱列表（未安裝 Excel 引擎時不含 Excel）
+    """
+    return [name for name in EXPORT_FORMATS if name != 'Excel' or XLSX_ENGINE is not None]
+
+
+def write_csv_chunks(df: pd.DataFrame, buffer, chunk_rows: int = EXPORT_CSV_CHUNK_ROWS) -> None:
+    """
+    分塊將 DataFrame 以 UTF-8 CSV 寫入位元組緩衝區
+
+    Args:
+        df: 要匯出的 DataFrame
+        buffer: 可寫入位元組的檔案物件
+        chunk_rows: 每塊列數
+    """
+    if df.empty:
+        df.to_csv(buffer, index=False, encoding='utf-8')
+        return
+    for start in range(0, len(df), chunk_rows):
+        df.iloc[start:start + chunk_rows].to_csv(buffer, index=False, header=(start == 0), encoding='utf-8')
+
+
+def export_bytes(df: pd.DataFrame, fmt: str, chunk_rows: int = EXPORT_CSV_CHUNK_ROWS) -> bytes:
+    """
+    產生匯出檔內容
+
+    Args:
+        df: 要匯出的 DataFrame
+        fmt: 格式顯示名稱（EXPORT_FORMATS 的鍵）
+        chunk_rows: CSV 每塊列數
+
+    Returns:
+        檔案內容
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支援的匯出格式: {fmt}")
+
+    buffer = io.BytesIO()
+    if fmt == 'CSV':
+        write_csv_chunks(df, buffer, chunk_rows)
+    elif fmt == 'Parquet':
+        df.to_parquet(buffer, index=False)
+    else:
+        if XLSX_ENGINE is None:
+            raise ValueError("匯出 Excel 需要安裝 openpyxl 或 xlsxwriter")
+        df.to_excel(buffer, index=False, engine=XLSX_ENGINE)
+    return buffer.getvalue()
+
+
+def export_file_name(label: str, fmt: str, timestamp: str) -> str:
+    """
+    匯出檔名
+
+    Args:
+        label: 匯出項目名稱
+        fmt: 格式顯示名稱
+        timestamp: 時間戳字串
+
+    Returns:
+        檔名，例如「每日數據_20251001_1200.csv」
+    """
+    return f"{label}_{timestamp}.{EXPORT_FORMATS[fmt][0]}"
@@ -0,0 +1,322 @@
+# fact_table.py - 每日事實表
+"""
+這個模組負責每日事實表的建立與本地持久化，包括：
+- 由訂單與廣告數據以向量化方式建立每日事實（每天一列）
+- 增量更新：新抓取的日期覆蓋舊資料，其餘日期保留；只更新完整抓取的來源的欄位
+- 依商店網址與廣告帳號分開存檔，同一台主機上的多個商店/帳號互不覆蓋
+- 預先計算的週、月彙總，供趨勢圖與明細表直接讀取
+- 存檔先寫入同目錄的暫存檔再以 os.replace 取代；載入、合併與存檔期間持有鎖（程序之間以檔案鎖），
+  儀表板與批次作業同時更新時不會讀到寫到一半的檔案，也不會覆蓋對方的更新
+
+事實表只保存可加總的數值；ROAS、進貨成本、淨利等衍生指標
+在讀取後依當下的參數計算。
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from src.constants import DATA_DIR, TAX_RATE
+from src.utils.cost_calculator import match_shipping_cost, match_payment_fee_rate
+
+try:
+    import fcntl
+except ImportError:  # Windows：只有程序內的鎖
+    fcntl = None
+
+# 每日事實表欄位（皆可加總）
+FACT_COLUMNS = [
+    'date', 'revenue', 'gross_revenue', 'refunds', 'orders', 'spend', 'impressions', 'clicks',
+    'shipping_cost', 'payment_fee', 'tax'
+]
+MEASURE_COLUMNS = FACT_COLUMNS[1:]
+
+# 各來源負責的欄位：來源抓取不完整時只保留該來源的舊數據，不影響另一個來源
+SOURCE_COLUMNS = {
+    'woocommerce': ['revenue', 'gross_revenue', 'refunds', 'orders', 'shipping_cost', 'payment_fee', 'tax'],
+    'meta': ['spend', 'impressions', 'clicks'],
+}
+INT_COLUMNS = ['orders', 'impressions', 'clicks']
+
+# 彙總粒度：pandas 週期代碼（週以週一為起始）
+GRAIN_PERIODS = {
+    'week': 'W-SUN',
+    'month': 'M',
+}
+
+
+def build_daily_facts(orders_df: pd.DataFrame, ads_df: pd.DataFrame,
+                      start_date: Optional[date] = None, end_date: Optional[date] = None) -> pd.DataFrame:
+    """
+    由訂單與廣告數據建立每日事實表
+
+    運費與手續費率只對不重複的運送/付款方式做一次模糊匹配，
+    再以 map 套用到所有訂單，不需逐筆 apply。
+
+    Args:
+        orders_df: 訂單 DataFrame（經 apply_refunds 處理，含 net_total / refund_total）
+        ads_df: Meta 廣告每日數據
+        start_date: 開始日期，提供時會補齊期間內沒有數據的日期
+        end_date: 結束日期
+
+    Returns:
+        每天一列的事實表（FACT_COLUMNS）
+    """
+    frames = []
+
+    if orders_df is not None and not orders_df.empty:
+        orders = pd.DataFrame({
+            'date': pd.to_datetime(orders_df['date']),
+            'gross_revenue': orders_df['total'],
+            'refunds': orders_df['refund_total'] if 'refund_total' in orders_df.columns else 0.0,
+            'revenue': orders_df['net_total'] if 'net_total' in orders_df.columns else orders_df['total'],
+        })
+        shipping_lookup = {m: match_shipping_cost(m) for m in orders_df['shipping_method'].unique()}
+        fee_rate_lookup = {m: match_payment_fee_rate(m) for m in orders_df['payment_method'].unique()}
+        orders['shipping_cost'] = orders_df['shipping_method'].map(shipping_lookup).astype(float)
+        orders['payment_fee'] = orders_df['total'] * orders_df['payment_method'].map(fee_rate_lookup).astype(float) / 100
+
+        daily_orders = orders.groupby('date').agg(
+            revenue=('revenue', 'sum'),
+            gross_revenue=('gross_revenue', 'sum'),
+            refunds=('refunds', 'sum'),
+            orders=('revenue', 'size'),
+            shipping_cost=('shipping_cost', 'sum'),
+            payment_fee=('payment_fee', 'sum'),
+        )
+        frames.append(daily_orders)
+
+    if ads_df is not None and not ads_df.empty:
+        ads = ads_df.assign(date=pd.to_datetime(ads_df['date']))
+        daily_ads = ads.groupby('date')[['spend', 'impressions', 'clicks']].sum()
+        frames.append(daily_ads)
+
+    facts = pd.concat(frames, axis=1) if frames else pd.DataFrame(columns=MEASURE_COLUMNS)
+
+    if start_date is not None and end_date is not None:
+        facts = facts.reindex(pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq='D'))
+
+    facts = facts.reindex(columns=MEASURE_COLUMNS).fillna(0)
+    facts['tax'] = facts['revenue'] * TAX_RATE
+    facts[INT_COLUMNS] = facts[INT_COLUMNS].astype(int)
+    facts.index.name = 'date'
+    return facts.reset_index()[FACT_COLUMNS]
+
+
+def rollup_facts(daily: pd.DataFrame, grain: str) -> pd.DataFrame:
+    """
+    將每日事實彙總到週或月
+
+    Args:
+        daily: 每日事實表
+        grain: 'week' 或 'month'
+
+    Returns:
+        彙總表，date 為期間起始日，days 為期間內的天數
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=FACT_COLUMNS + ['days'])
+
+    period = pd.to_datetime(daily['date']).dt.to_period(GRAIN_PERIODS[grain]).rename('period')
+    grouped = daily[MEASURE_COLUMNS].groupby(period)
+    rolled = grouped.sum()
+    rolled['days'] = grouped.size()
+    rolled.index = rolled.index.to_timestamp()
+    rolled.index.name = 'date'
+    return rolled.reset_index()
+
+
+def fact_scope(store_url: Optional[str] = None, ad_account: Optional[str] = None) -> str:
+    """
+    事實表的存檔範圍：由商店網址與廣告帳號產生的短雜湊
+
+    Args:
+        store_url: WooCommerce 商店網址
+        ad_account: Meta 廣告帳號 ID（可不含 act_ 前綴）
+
+    Returns:
+        範圍識別碼，兩者皆未提供時為空字串（沿用未分範圍的檔名）
+    """
+    if not store_url and not ad_account:
+        return ''
+    store = (store_url or '').rstrip('/').lower()
+    account = (ad_account or '').removeprefix('act_')
+    return hashlib.blake2b(f"{store}|{account}".encode('utf-8'), digest_size=6).hexdigest()
+
+
+class DailyFactTable:
+    """每日事實表（本地持久化，含週/月彙總）"""
+
+    def __init__(self, data_dir: str = DATA_DIR, scope: str = ''):
+        """
+        初始化事實表，從本地 Parquet 載入既有數據
+
+        Args:
+            data_dir: 本地數據目錄
+            scope: 存檔範圍（fact_scope），不同商店/廣告帳號使用不同的檔案
+        """
+        self.data_dir = Path(data_dir)
+        self.scope = scope
+        suffix = f"_{scope}" if scope else ''
+        self.paths = {
+            'day': self.data_dir / f"daily_facts{suffix}.parquet",
+            'week': self.data_dir / f"weekly_facts{suffix}.parquet",
+            'month': self.data_dir / f"monthly_facts{suffix}.parquet",
+        }
+        self.lock_path = self.data_dir / f"daily_facts{suffix}.lock"
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.tables = {}
+        with self._locked(exclusive=False):
+            self._refresh()
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        """程序內以執行緒鎖、程序之間以檔案鎖（讀取為共用鎖）保護載入、合併與存檔"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _disk_mtime(self) -> Optional[int]:
+        path = self.paths['day']
+        return path.stat().st_mtime_ns if path.exists() else None
+
+    def _refresh(self) -> None:
+        """其他程序更新過檔案時重新載入（呼叫端須持有鎖）"""
+        mtime = self._disk_mtime()
+        if self.tables and mtime == self._mtime:
+            return
+        self.tables = {grain: self._load(grain) for grain in self.paths}
+        self._mtime = mtime
+
+    def _load(self, grain: str) -> pd.DataFrame:
+        """載入指定粒度的表，不存在時返回空表"""
+        path = self.paths[grain]
+        if path.exists():
+            return pd.read_parquet(path)
+        columns = FACT_COLUMNS if grain == 'day' else FACT_COLUMNS + ['days']
+        return pd.DataFrame(columns=columns)
+
+    @property
+    def daily(self) -> pd.DataFrame:
+        """每日事實表"""
+        return self.tables['day']
+
+    def upsert(self, facts: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> None:
+        """
+        增量更新：以新數據覆蓋相同日期，並重新計算週/月彙總後存檔
+
+        Args:
+            facts: build_daily_facts 的輸出
+            columns: 要更新的欄位（SOURCE_COLUMNS），None 表示全部；
+                     其餘欄位保留相同日期的舊數據，新日期補 0
+        """
+        if facts is None or facts.empty:
+            return
+        columns = MEASURE_COLUMNS if columns is None else [c for c in MEASURE_COLUMNS if c in set(columns)]
+        if not columns:
+            return
+
+        with self._locked():
+            self._refresh()
+            new_facts = facts[['date'] + columns].assign(date=pd.to_datetime(facts['date']))
+            existing = self.tables['day']
+            if not existing.empty:
+                existing = existing.assign(date=pd.to_datetime(existing['date']))
+                overlap = existing['date'].isin(new_facts['date'])
+                kept = [c for c in MEASURE_COLUMNS if c not in columns]
+                if kept:
+                    new_facts = new_facts.merge(existing.loc[overlap, ['date'] + kept], on='date', how='left')
+                new_facts = pd.concat([existing[~overlap], new_facts], ignore_index=True)
+            new_facts = new_facts.reindex(columns=FACT_COLUMNS)
+            new_facts[MEASURE_COLUMNS] = new_facts[MEASURE_COLUMNS].fillna(0)
+            new_facts[INT_COLUMNS] = new_facts[INT_COLUMNS].astype(int)
+            daily = new_facts.sort_values('date').reset_index(drop=True)
+
+            self.tables['day'] = daily
+            for grain in GRAIN_PERIODS:
+                self.tables[grain] = rollup_facts(daily, grain)
+            self._write()
+
+    def save(self) -> None:
+        """儲存所有粒度的表"""
+        with self._locked():
+            self._write()
+
+    def _write(self) -> None:
+        """寫入暫存檔後以 os.replace 取代原檔，讀取端不會看到寫到一半的檔案（呼叫端須持有鎖）"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        # 每日表最後取代：其修改時間是其他程序判斷是否重新載入的依據
+        for grain in ['week', 'month', 'day']:
+            path = self.paths[grain]
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, prefix=f".{path.name}.", suffix='.tmp')
+            os.close(fd)
+            try:
+                self.tables[grain].to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+        self._mtime = self._disk_mtime()
+
+    def read(self, start_date: date, end_date: date, grain: str = 'day') -> pd.DataFrame:
+        """
+        讀取日期範圍內的事實
+
+        週/月粒度時，完整落在範圍內的期間直接使用預先彙總的結果，
+        只有範圍頭尾不完整的期間才從每日表即時加總。
+
+        Args:
+            start_date: 開始日期（含）
+            end_date: 結束日期（含）
+            grain: 'day' / 'week' / 'month'
+
+        Returns:
+            事實表（date 為日期或期間起始日）
+        """
+        with self._locked(exclusive=False):
+            self._refresh()
+            tables = dict(self.tables)
+
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        daily = tables['day']
+        daily_dates = pd.to_datetime(daily['date'])
+        in_range = daily[(daily_dates >= start) & (daily_dates <= end)]
+
+        if grain == 'day':
+            return in_range[FACT_COLUMNS].reset_index(drop=True)
+
+        freq = GRAIN_PERIODS[grain]
+        first_period, last_period = start.to_period(freq), end.to_period(freq)
+        rolled = tables[grain]
+        rolled_periods = pd.to_datetime(rolled['date']).dt.to_period(freq)
+
+        # 範圍頭尾的期間若未完整包含，改用每日表加總
+        partial_periods = set()
+        if start != first_period.start_time:
+            partial_periods.add(first_period)
+        if end != last_period.end_time.normalize():
+            partial_periods.add(last_period)
+
+        full = rolled[(rolled_periods >= first_period) & (rolled_periods <= last_period)
+                      & ~rolled_periods.isin(partial_periods)]
+        edge_days = in_range[pd.to_datetime(in_range['date']).dt.to_period(freq).isin(partial_periods)]
+        edges = rollup_facts(edge_days, grain)
+
+        frames = [df for df in (full, edges) if not df.empty]
+        if not frames:
+            return edges
+        return pd.concat(frames, ignore_index=True).sort_values('date').reset_index(drop=True)
@@ -0,0 +1,144 @@
+# order_explorer.py - 訂單明細瀏覽
+"""
+這個模組負責訂單明細表的伺服器端篩選、排序與分頁，包括：
+- 訂單索引：數據載入時一次建立各排序欄位的排列順序及篩選欄位的類別代碼
+- 查詢：以代碼查表篩選，沿預先排序的順序取出結果，不需每次重新排序
+- 分頁：只從 Arrow 表格取出目前頁面的列，瀏覽器端只收到一頁數據
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Iterable, Optional, Tuple
+from src.utils.arrow_views import to_arrow
+
+# 訂單明細顯示欄位
+ORDER_COLUMNS = ['order_id', 'date', 'total', 'refund_total', 'status', 'customer_id', 'payment_method', 'shipping_method']
+
+# 可排序欄位：顯示名稱 -> 欄位
+SORT_COLUMNS = {
+    '日期': 'date',
+    '金額': 'total',
+    '退款': 'refund_total',
+    '訂單ID': 'order_id',
+}
+
+# 可篩選的類別欄位
+FILTER_COLUMNS = ['status', 'payment_method', 'shipping_method']
+
+
+class OrderIndex:
+    """訂單明細索引（預先排序、類別代碼化）"""
+
+    def __init__(self, orders_df: pd.DataFrame):
+        """
+        建立索引
+
+        Args:
+            orders_df: 訂單 DataFrame（經 apply_refunds 處理）
+        """
+        orders = orders_df.reindex(columns=ORDER_COLUMNS).reset_index(drop=True)
+        if not orders.empty:
+            orders['refund_total'] = orders['refund_total'].fillna(0.0)
+        self.orders = orders
+        self.table = to_arrow(orders)
+
+        # 各排序欄位的穩定排序順序（遞增）
+        self.sort_orders = {
+            column: np.argsort(orders[column].to_numpy(), kind='stable') for column in SORT_COLUMNS.values()
+        }
+        # 篩選欄位轉為類別代碼，篩選時以布林查表取代字串比對
+        self.categoricals = {column: pd.Categorical(orders[column].astype(str)) for column in FILTER_COLUMNS}
+        self.amounts = orders['total'].to_numpy(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def options(self, column: str) -> list:
+        """
+        篩選欄位的所有選項
+
+        Args:
+            column: FILTER_COLUMNS 之一
+
+        Returns:
+            選項列表
+        """
+        return list(self.categoricals[column].categories)
+
+    def amount_range(self) -> Tuple[float, float]:
+        """訂單金額的最小值與最大值"""
+        if len(self.amounts) == 0:
+            return 0.0, 0.0
+        return float(self.amounts.min()), float(self.amounts.max())
+
+    def _category_mask(self, column: str, selected: Iterable[str]) -> np.ndarray:
+        """選取值的布林遮罩（以類別代碼查表）"""
+        categorical = self.categoricals[column]
+        allowed = np.zeros(len(categorical.categories), dtype=bool)
+        selected_codes = categorical.categories.get_indexer(list(selected))
+        allowed[selected_codes[selected_codes >= 0]] = True
+        codes = categorical.codes
+        return allowed[codes] & (codes >= 0)
+
+    def match(self, statuses: Optional[Iterable[str]] = None, payment_methods: Optional[Iterable[str]] = None,
+              shipping_methods: Optional[Iterable[str]] = None, min_amount: Optional[float] = None,
+              max_amount: Optional[float] = None, sort_by: str = 'date', descending: bool = True) -> np.ndarray:
+        """
+        篩選並排序訂單
+
+        Args:
+            statuses: 訂單狀態（None 或空表示不篩選）
+            payment_methods: 付款方式
+            shipping_methods: 運送方式
+            min_amount: 最低金額（含）
+            max_amount: 最高金額（含）
+            sort_by: 排序欄位（SORT_COLUMNS 的值）
+            descending: 是否遞減排序
+
+        Returns:
+            符合條件的列位置（已依排序欄位排列）
+        """
+        mask = np.ones(len(self.orders), dtype=bool)
+        for column, selected in zip(FILTER_COLUMNS, (statuses, payment_methods, shipping_methods)):
+            if selected:
+                mask &= self._category_mask(column, selected)
+        if min_amount is not None:
+            mask &= self.amounts >= min_amount
+        if max_amount is not None:
+            mask &= self.amounts <= max_amount
+
+        order = self.sort_orders[sort_by]
+        if descending:
+            order = order[::-1]
+        return order[mask[order]]
+
+    def page(self, matched: np.ndarray, page: int = 1, page_size: int = 50) -> pa.Table:
+        """
+        取出一頁訂單
+
+        Args:
+            matched: match() 的結果
+            page: 頁碼（從 1 開始）
+            page_size: 每頁筆數
+
+        Returns:
+            目前頁面的訂單 Arrow 表格（只複製該頁的列）
+        """
+        start = max(page - 1, 0) * page_size
+        return self.table.take(matched[start:start + page_size])
+
+    def query(self, page: int = 1, page_size: int = 50, **filters) -> Tuple[pa.Table, int]:
+        """
+        篩選、排序並取出一頁訂單
+
+        Args:
+            page: 頁碼（從 1 開始）
+            page_size: 每頁筆數
+            **filters: match() 的篩選與排序參數
+
+        Returns:
+            (目前頁面的訂單 Arrow 表格, 符合條件的總筆數)
+        """
+        matched = self.match(**filters)
+        return self.page(matched, page, page_size), len(matched)
@@ -0,0 +1,141 @@
+# product_analytics.py - 商品績效分析
+"""
+這個模組負責商品層級的績效分析，包括：
+- 商品 × 日期的預先彙總分區（product-day partitions）
+- 營收、銷量、毛利、回購占比
+- 任意指標的 Top-N 查詢
+
+分區在資料抓取後只建立一次，之後切換排序指標或日期範圍
+都只對已彙總的小表做切片與加總，不再掃描所有商品明細。
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Optional
+
+# 可用於 Top-N 排序的指標及顯示名稱
+PRODUCT_METRICS = {
+    'revenue': '營收',
+    'units': '銷量',
+    'margin': '估計毛利',
+    'orders': '訂單數',
+    'repeat_share': '回購占比',
+}
+
+PARTITION_COLUMNS = [
+    'date', 'product_id', 'variation_id', 'name',
+    'revenue', 'units', 'orders', 'product_orders', 'repeat_units'
+]
+
+
+def build_product_day_partitions(line_items_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    建立商品 × 日期的預先彙總分區
+
+    每個 line item 會先標記是否為回購：同一位客戶在更早的訂單中
+    已購買過同一商品（同一規格）即視為回購。
+
+    Args:
+        line_items_df: 商品明細表（WooCommerceAPI.get_orders_with_line_items 的輸出）
+
+    Returns:
+        依日期排序的分區表，每列為 (date, product_id, variation_id) 的彙總
+    """
+    if line_items_df is None or line_items_df.empty:
+        return pd.DataFrame(columns=PARTITION_COLUMNS)
+
+    items = line_items_df[['order_id', 'date', 'customer_key', 'product_id', 'variation_id',
+                           'name', 'quantity', 'total']].copy()
+    items['date'] = pd.to_datetime(items['date']).dt.normalize()
+
+    # 回購標記：依 (客戶, 商品, 規格) 分組後，第一張訂單之後的購買都算回購
+    items = items.sort_values(['date', 'order_id'], kind='mergesort')
+    first_order = items.groupby(['customer_key', 'product_id', 'variation_id'],
+                                sort=False)['order_id'].transform('first')
+    is_repeat = (items['customer_key'] != '') & (items['order_id'] != first_order)
+    items['repeat_units'] = np.where(is_repeat, items['quantity'], 0)
+
+    partitions = items.groupby(['date', 'product_id', 'variation_id'], sort=True).agg(
+        name=('name', 'last'),
+        revenue=('total', 'sum'),
+        units=('quantity', 'sum'),
+        orders=('order_id', 'nunique'),
+        repeat_units=('repeat_units', 'sum'),
+    ).reset_index()
+
+    # 商品層級訂單數：同一張訂單可能包含同一商品的多個規格，依 (日期, 商品) 計算不重複的訂單 ID，
+    # 記在該商品當日的第一個規格列（其餘為 0），跨規格、跨日期加總都不會重複計算（每張訂單只有一個日期）
+    product_orders = items.groupby(['date', 'product_id'], sort=True)['order_id'].nunique()
+    keys = pd.MultiIndex.from_frame(partitions[['date', 'product_id']])
+    first_variation = ~partitions.duplicated(['date', 'product_id'])
+    partitions['product_orders'] = np.where(first_variation, product_orders.reindex(keys).to_numpy(), 0)
+
+    return partitions[PARTITION_COLUMNS]
+
+
+def slice_partitions(partitions: pd.DataFrame, start_date: Optional[date] = None,
+                     end_date: Optional[date] = None) -> pd.DataFrame:
+    """
+    依日期範圍切出分區（分區已依日期排序，使用二分搜尋定位）
+
+    Args:
+        partitions: build_product_day_partitions 的輸出
+        start_date: 開始日期（含），None 表示不限
+        end_date: 結束日期（含），None 表示不限
+
+    Returns:
+        日期範圍內的分區
+    """
+    if partitions.empty:
+        return partitions
+
+    dates = partitions['date'].values
+    lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left')
+    hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right')
+    return partitions.iloc[lo:hi]
+
+
+def query_top_products(partitions: pd.DataFrame, metric: str = 'revenue', n: int = 10,
+                       start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       cogs_rate: float = 50, by_variation: bool = False) -> pd.DataFrame:
+    """
+    查詢 Top-N 商品
+
+    Args:
+        partitions: build_product_day_partitions 的輸出
+        metric: 排序指標（見 PRODUCT_METRICS）
+        n: 返回筆數
+        start_date: 開始日期（含）
+        end_date: 結束日期（含）
+        cogs_rate: 進貨成本率 (百分比)，用於估計毛利
+        by_variation: True 時以商品規格為單位，否則彙總到商品層級
+
+    Returns:
+        Top-N 商品 DataFrame，含 revenue / units / orders / margin / repeat_share
+    """
+    if metric not in PRODUCT_METRICS:
+        raise ValueError(f"不支援的排序指標: {metric}")
+
+    keys = ['product_id', 'variation_id'] if by_variation else ['product_id']
+    columns = keys + ['name', 'revenue', 'units', 'orders', 'margin', 'repeat_share']
+
+    selected = slice_partitions(partitions, start_date, end_date)
+    if selected.empty:
+        return pd.DataFrame(columns=columns)
+
+    summary = selected.groupby(keys, sort=False).agg(
+        name=('name', 'last'),
+        revenue=('revenue', 'sum'),
+        units=('units', 'sum'),
+        orders=('orders' if by_variation else 'product_orders', 'sum'),
+        repeat_units=('repeat_units', 'sum'),
+    ).reset_index()
+
+    # 毛利與回購占比為彙總後的衍生指標，成本率變動不需重建分區
+    summary['margin'] = summary['revenue'] * (1 - cogs_rate / 100)
+    summary['repeat_share'] = (summary['repeat_units'] /
+                               summary['units'].where(summary['units'] > 0)).fillna(0) * 100
+
+    top = summary.nlargest(n, metric) if n else summary.sort_values(metric, ascending=False)
+    return top[columns].reset_index(drop=True)
@@ -0,0 +1,151 @@
+# refunds.py - 退款帳本
+"""
+這個模組負責退款數據的本地儲存與淨營收計算，包括：
+- 退款帳本（以訂單 ID 為鍵，持久化為 Parquet；依商店網址分開存檔）
+- 以 modified_after 增量同步（UTC 時間），只處理有異動的訂單
+- 以向量化 join 將退款套用到訂單並計算每日淨營收
+"""
+
+import hashlib
+import json
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+from src.constants import DATA_DIR, WC_REFUND_SYNC_LOOKBACK_DAYS, WC_REFUND_SYNC_OVERLAP_MINUTES
+
+LEDGER_COLUMNS = ['order_id', 'date', 'refund_total']
+
+
+def to_utc(value: datetime) -> datetime:
+    """轉為 UTC 時間（未帶時區的時間視為本機時間）"""
+    return value.astimezone(timezone.utc)
+
+
+class RefundLedger:
+    """退款帳本（本地持久化）"""
+
+    def __init__(self, data_dir: str = DATA_DIR, store_url: Optional[str] = None):
+        """
+        初始化退款帳本
+
+        Args:
+            data_dir: 本地數據目錄
+            store_url: WooCommerce 商店網址，不同商店使用不同的帳本與同步狀態檔案
+        """
+        suffix = ''
+        if store_url:
+            store = store_url.rstrip('/').lower()
+            suffix = '_' + hashlib.blake2b(store.encode('utf-8'), digest_size=6).hexdigest()
+        self.ledger_path = Path(data_dir) / f"refunds{suffix}.parquet"
+        self.state_path = Path(data_dir) / f"refunds_state{suffix}.json"
+        self.ledger = self._load_ledger()
+        self.last_synced_at = self._load_last_synced_at()
+
+    def _load_ledger(self) -> pd.DataFrame:
+        """載入帳本，不存在時返回空表"""
+        if self.ledger_path.exists():
+            return pd.read_parquet(self.ledger_path)
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+
+    def _load_last_synced_at(self) -> Optional[datetime]:
+        """載入上次同步時間（UTC）"""
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        synced_at = state.get('last_synced_at')
+        return to_utc(datetime.fromisoformat(synced_at)) if synced_at else None
+
+    def save(self) -> None:
+        """儲存帳本及同步狀態"""
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ledger.to_parquet(self.ledger_path, index=False)
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_synced_at': self.last_synced_at.isoformat() if self.last_synced_at else None},
+                      f, indent=2, ensure_ascii=False)
+
+    def upsert(self, updates: pd.DataFrame) -> None:
+        """
+        以訂單 ID 更新帳本（新值覆蓋舊值）
+
+        Args:
+            updates: DataFrame(order_id, date, refund_total)
+        """
+        if updates is None or updates.empty:
+            return
+        if self.ledger.empty:
+            self.ledger = updates[LEDGER_COLUMNS].drop_duplicates('order_id', keep='last').reset_index(drop=True)
+            return
+        combined = pd.concat([self.ledger, updates[LEDGER_COLUMNS]], ignore_index=True)
+        self.ledger = combined.drop_duplicates('order_id', keep='last').reset_index(drop=True)
+
+    def sync(self, api_client, now: Optional[datetime] = None) -> int:
+        """
+        增量同步退款：只抓取上次同步後有異動的訂單
+
+        Args:
+            api_client: 提供 get_refund_updates(modified_after) 的 WooCommerce 客戶端
+            now: 本次同步時間（預設為現在；游標一律以 UTC 保存，不受主機或商店時區影響）
+
+        Returns:
+            本次同步處理的訂單數
+        """
+        now = to_utc(now or datetime.now(timezone.utc))
+        if self.last_synced_at is None:
+            modified_after = now - timedelta(days=WC_REFUND_SYNC_LOOKBACK_DAYS)
+        else:
+            modified_after = self.last_synced_at - timedelta(minutes=WC_REFUND_SYNC_OVERLAP_MINUTES)
+
+        updates = api_client.get_refund_updates(modified_after)
+        self.upsert(updates)
+        self.last_synced_at = now
+        self.save()
+        return len(updates)
+
+
+def apply_refunds(orders_df: pd.DataFrame, ledger_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    將退款套用到訂單，新增 refund_total（以帳本為準）及 net_total 欄位
+
+    Args:
+        orders_df: 訂單 DataFrame（可含訂單本身的 refund_total 摘要）
+        ledger_df: 退款帳本，帳本中有的訂單以帳本金額為準
+
+    Returns:
+        新增 refund_total / net_total 欄位的訂單 DataFrame
+    """
+    if orders_df.empty:
+        return orders_df
+
+    result = orders_df.copy()
+    if 'refund_total' not in result.columns:
+        result['refund_total'] = 0.0
+
+    if ledger_df is not None and not ledger_df.empty:
+        ledger_refunds = result['order_id'].map(ledger_df.set_index('order_id')['refund_total'])
+        result['refund_total'] = ledger_refunds.fillna(result['refund_total']).astype(float)
+
+    result['net_total'] = result['total'] - result['refund_total']
+    return result
+
+
+def net_revenue_by_day(orders_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    計算每日總營收、退款與淨營收
+
+    Args:
+        orders_df: 經 apply_refunds 處理的訂單 DataFrame
+
+    Returns:
+        DataFrame(date, gross_revenue, refunds, revenue)，revenue 為淨營收
+    """
+    if orders_df.empty:
+        return pd.DataFrame(columns=['date', 'gross_revenue', 'refunds', 'revenue'])
+
+    daily = orders_df.groupby('date').agg(
+        gross_revenue=('total', 'sum'),
+        refunds=('refund_total', 'sum'),
+        revenue=('net_total', 'sum'),
+    ).reset_index()
+    return daily
@@ -0,0 +1,74 @@
+# schema.py - 數據表欄位型別
+"""
+這個模組定義訂單、商品明細及廣告數據表的欄位型別，包括：
+- 日期欄位使用 datetime64（日期欄位正規化到當天 00:00）
+- 付款方式、運送方式、訂單狀態使用 category（重複值多，分組時以代碼運算）
+- 數量、曝光、點擊等單日數值使用 int32；金額維持 float64 以免精度損失
+
+正規化（API 回應轉為 DataFrame）時即套用，後續分組、合併與顯示都依此型別。
+"""
+
+import pandas as pd
+from typing import Dict
+
+# 特殊型別：正規化到日期的 datetime64
+DATE = 'date'
+
+ORDER_SCHEMA: Dict[str, str] = {
+    'order_id': 'int64',
+    'date': DATE,
+    'created_at': 'datetime64[ns]',
+    'total': 'float64',
+    'status': 'category',
+    'customer_id': 'int64',
+    'payment_method': 'category',
+    'shipping_method': 'category',
+    'refund_total': 'float64',
+}
+
+LINE_ITEM_SCHEMA: Dict[str, str] = {
+    'order_id': 'int64',
+    'date': DATE,
+    'product_id': 'int64',
+    'variation_id': 'int64',
+    'quantity': 'int32',
+    'total': 'float64',
+}
+
+ADS_SCHEMA: Dict[str, str] = {
+    'date': DATE,
+    'spend': 'float64',
+    'impressions': 'int32',
+    'clicks': 'int32',
+    'reach': 'int32',
+    'ctr': 'float64',
+    'cpm': 'float64',
+    'cpc': 'float64',
+}
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    依欄位型別定義轉換 DataFrame（只處理存在的欄位）
+
+    Args:
+        df: 要轉換的 DataFrame
+        schema: 欄位 -> 型別
+
+    Returns:
+        轉換後的 DataFrame
+    """
+    if df is None or df.empty:
+        return df
+
+    converted = {}
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == DATE:
+            converted[column] = pd.to_datetime(df[column]).dt.normalize()
+        elif dtype.startswith('datetime64'):
+            converted[column] = pd.to_datetime(df[column])
+        else:
+            converted[column] = df[column].astype(dtype)
+    return df.assign(**converted)
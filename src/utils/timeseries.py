@@ -0,0 +1,82 @@
+# timeseries.py - 時間序列工具
+"""
+這個模組負責小時粒度的時間序列處理，包括：
+- 訂單營收轉為每小時序列
+- Meta 每小時廣告數據轉為序列
+- 以向量化 resample 對齊營收與廣告支出
+
+序列皆為以 DatetimeIndex 為索引的數值 Series，
+不保留逐筆明細，重新執行時只需對齊與繪圖。
+"""
+
+import pandas as pd
+from datetime import date
+from typing import List, Dict
+
+HOURLY_BREAKDOWN = 'hourly_stats_aggregated_by_advertiser_time_zone'
+
+
+def orders_to_hourly(orders_df: pd.DataFrame, value_column: str = 'net_total') -> pd.Series:
+    """
+    將訂單依建立時間的小時彙總為營收序列
+
+    Args:
+        orders_df: 訂單 DataFrame，需含 created_at 欄位
+        value_column: 加總的金額欄位（預設為扣除退款後的淨額）
+
+    Returns:
+        每小時營收 Series（DatetimeIndex）
+    """
+    if orders_df.empty or 'created_at' not in orders_df.columns:
+        return pd.Series(dtype='float64', name='revenue')
+
+    column = value_column if value_column in orders_df.columns else 'total'
+    index = pd.DatetimeIndex(pd.to_datetime(orders_df['created_at'])).tz_localize(None).floor('h')
+    series = pd.Series(orders_df[column].to_numpy(dtype='float64'), index=index)
+    return series.groupby(level=0).sum().rename('revenue')
+
+
+def insights_to_hourly(rows: List[Dict], metric: str = 'spend') -> pd.Series:
+    """
+    將 Meta 每小時廣告數據轉為序列
+
+    Args:
+        rows: MetaAdsAPI.get_hourly_insights 的輸出
+        metric: 指標欄位（spend / impressions / clicks）
+
+    Returns:
+        每小時指標 Series（DatetimeIndex）
+    """
+    if not rows:
+        return pd.Series(dtype='float64', name=metric)
+
+    raw = pd.DataFrame(rows)
+    # breakdown 格式為 "HH:MM:SS - HH:MM:SS"，取開始小時
+    hours = raw[HOURLY_BREAKDOWN].str.slice(0, 2).astype(int)
+    index = pd.DatetimeIndex(pd.to_datetime(raw['date_start']) + pd.to_timedelta(hours, unit='h'))
+    column = raw[metric] if metric in raw.columns else pd.Series(0, index=raw.index)
+    values = pd.to_numeric(column, errors='coerce').fillna(0).to_numpy(dtype='float64')
+    return pd.Series(values, index=index).groupby(level=0).sum().rename(metric)
+
+
+def align_hourly(revenue: pd.Series, spend: pd.Series, start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    將營收與廣告支出對齊到同一個完整的小時索引
+
+    Args:
+        revenue: 每小時營收序列
+        spend: 每小時廣告支出序列
+        start_date: 開始日期
+        end_date: 結束日期（含整天）
+
+    Returns:
+        DataFrame(datetime, revenue, spend, roas)，沒有數據的小時補 0
+    """
+    index = pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(hours=23), freq='h')
+    aligned = pd.DataFrame({
+        'revenue': revenue.resample('h').sum().reindex(index, fill_value=0.0) if not revenue.empty else 0.0,
+        'spend': spend.resample('h').sum().reindex(index, fill_value=0.0) if not spend.empty else 0.0,
+    }, index=index)
+    aligned['roas'] = aligned['revenue'] / aligned['spend'].replace(0, 1)
+    aligned.index.name = 'datetime'
+    return aligned.reset_index()
@@ -0,0 +1,64 @@
+"""測試儀表板區塊仍為 fragment（區塊內互動只重新執行該區塊），載入期間的輔助函式則不是"""
+import ast
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+SECTIONS = {
+    'render_overview_section': '營運總覽',
+    'render_trend_section': '趨勢分析',
+    'render_export_section': '數據匯出',
+    'render_detail_section': '詳細數據',
+}
+
+
+def _functions():
+    tree = ast.parse(APP.read_text(encoding='utf-8'))
+    return {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+
+def _decorators(node):
+    return [ast.unparse(decorator) for decorator in node.decorator_list]
+
+
+def test_sections_are_fragments():
+    functions = _functions()
+    for name, section in SECTIONS.items():
+        assert _decorators(functions[name]) == ['st.fragment', f"timed_section('{section}')"], name
+
+
+def test_placeholder_helpers_are_not_fragments():
+    functions = _functions()
+    for name in ('render_headline_cards', 'provisional_overview_renderer'):
+        assert 'st.fragment' not in _decorators(functions[name]), name
+
+
+def test_headline_cards_have_their_own_timing():
+    assert _decorators(_functions()['render_headline_cards']) == ["timed_section('標頭指標')"]
+
+
+def test_pushdown_mode_does_not_stop_the_script():
+    # 快速總覽模式以 render_pushdown_sections 取代各區塊，不以 st.stop() 略過其餘內容
+    calls = {ast.unparse(node.func) for node in ast.walk(ast.parse(APP.read_text(encoding='utf-8')))
+             if isinstance(node, ast.Call)}
+    assert 'st.stop' not in calls
+    assert 'render_pushdown_sections' in calls
+
+
+def test_order_max_amount_key_follows_loaded_data():
+    # 最高金額的預設值為數據的最高金額：鍵須隨期間與數據改變，否則換期間後沿用舊的上限而篩掉訂單
+    calls = [node for node in ast.walk(_functions()['render_detail_section'])
+             if isinstance(node, ast.Call) and ast.unparse(node.func) == 'st.number_input'
+             and node.args and ast.literal_eval(node.args[0]) == '最高金額']
+    key = next(keyword.value for keyword in calls[0].keywords if keyword.arg == 'key')
+    names = {node.id for node in ast.walk(key) if isinstance(node, ast.Name)}
+    assert {'start_date', 'end_date', 'amount_max'} <= names
+
+
+if __name__ == "__main__":
+    test_sections_are_fragments()
+    test_placeholder_helpers_are_not_fragments()
+    test_headline_cards_have_their_own_timing()
+    test_pushdown_mode_does_not_stop_the_script()
+    test_order_max_amount_key_follows_loaded_data()
+    print("所有測試通過！✓")
@@ -0,0 +1,27 @@
+"""測試 Arrow 表格投影（零複製）"""
+import pandas as pd
+
+from src.utils.arrow_views import to_arrow, project
+
+
+def test_project_is_zero_copy():
+    df = pd.DataFrame({'date': pd.date_range('2025-10-01', periods=3), 'revenue': [1.0, 2.0, 3.0], 'spend': [0.5, 0.5, 1.0]})
+    table = to_arrow(df)
+    projected = project(table, {'revenue': '營收', 'date': '日期', 'missing': '不存在'})
+
+    assert projected.column_names == ['營收', '日期']
+    assert projected.column('營收').to_pylist() == [1.0, 2.0, 3.0]
+    source_buffer = table.column('revenue').chunks[0].buffers()[1]
+    projected_buffer = projected.column('營收').chunks[0].buffers()[1]
+    assert source_buffer.address == projected_buffer.address, "投影不應複製欄位數據"
+
+
+def test_empty_frame():
+    assert to_arrow(pd.DataFrame()).num_columns == 0
+    assert project(to_arrow(pd.DataFrame()), {'date': '日期'}).num_columns == 0
+
+
+if __name__ == "__main__":
+    test_project_is_zero_copy()
+    test_empty_frame()
+    print("所有測試通過！✓")
@@ -0,0 +1,130 @@
+"""測試批次報表的期間換算、KPI 摘要及報表快照"""
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from src.pipeline import batch
+from src.pipeline.base_data import compute_base_data, fact_table_scope
+from src.pipeline.batch import ReportStore, resolve_ranges, run_batch_report, summarize_kpis
+
+
+def _base_data():
+    orders = pd.DataFrame({
+        'order_id': [1, 2, 3],
+        'date': pd.to_datetime(['2025-10-01', '2025-10-01', '2025-10-02']),
+        'total': [1000.0, 500.0, 300.0],
+        'refund_total': [0.0, 100.0, 0.0],
+        'net_total': [1000.0, 400.0, 300.0],
+        'payment_method': ['信用卡', 'Line Pay', '信用卡'],
+        'shipping_method': ['宅配', '全家', '宅配'],
+        'status': ['completed'] * 3,
+    })
+    ads = pd.DataFrame({'date': pd.to_datetime(['2025-10-01', '2025-10-02']), 'spend': [100.0, 50.0],
+                        'impressions': [1000, 500], 'clicks': [20, 10]})
+    return compute_base_data(orders, pd.DataFrame(), {'信用卡': 2, 'Line Pay': 1}, {'宅配': 2, '全家': 1},
+                             ads, date(2025, 10, 1), date(2025, 10, 2))
+
+
+def test_resolve_ranges():
+    today = date(2025, 10, 15)  # 週三
+    assert resolve_ranges(['yesterday', 'last_week', 'month_to_date', 'last_30_days'], today) == [
+        (date(2025, 10, 14), date(2025, 10, 14)),
+        (date(2025, 10, 6), date(2025, 10, 12)),
+        (date(2025, 10, 1), date(2025, 10, 15)),
+        (date(2025, 9, 15), date(2025, 10, 15)),
+    ]
+
+
+def test_summarize_kpis():
+    summary = summarize_kpis(_base_data()['totals'], 50)
+    assert summary['revenue'] == 1700.0 and summary['orders'] == 3
+    assert summary['roas'] == 1700.0 / 150.0
+    assert summary['estimated_cogs'] == 850.0
+    assert abs(summary['net_profit'] - (summary['revenue'] - summary['total_costs'])) < 1e-9
+
+
+def test_report_store_snapshot_round_trip(tmp_path):
+    store = ReportStore(str(tmp_path))
+    base_data = _base_data()
+    summary = summarize_kpis(base_data['totals'], 50)
+    generated_at = datetime(2025, 10, 3, 2, 0)
+    report_dir = store.save(date(2025, 10, 1), date(2025, 10, 2), base_data, pd.DataFrame({'date': []}), summary,
+                            ['woocommerce', 'meta'], ['csv'], generated_at)
+
+    assert (report_dir / "kpi_summary.csv").exists() and not (report_dir / "kpi_summary.parquet").exists()
+    assert pd.read_csv(report_dir / "shipping_costs.csv")['shipping_method'].tolist() == list(base_data['shipping_costs_detail'])
+
+    snapshot = store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], now=datetime(2025, 12, 1))
+    assert snapshot is not None, "期間在產生時已結束，報表應一直有效"
+    pd.testing.assert_frame_equal(snapshot['orders_df'], base_data['orders_df'])
+    assert snapshot['payment_methods'] == {'信用卡': 2, 'Line Pay': 1}
+    assert snapshot['generated_at'] == generated_at
+
+    # 來源不足或沒有報表
+    assert store.load_snapshot(date(2025, 9, 1), date(2025, 9, 2), ['woocommerce']) is None
+
+
+def test_open_range_report_expires(tmp_path):
+    store = ReportStore(str(tmp_path))
+    generated_at = datetime(2025, 10, 2, 10, 0)
+    store.save(date(2025, 10, 1), date(2025, 10, 2), _base_data(), pd.DataFrame({'date': []}), {}, ['meta'],
+               ['csv'], generated_at)
+
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['meta'], now=generated_at + timedelta(minutes=30))
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['meta'], now=generated_at + timedelta(hours=2)) is None
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce', 'meta'],
+                               now=generated_at) is None
+
+
+def test_snapshot_is_scoped_to_store_and_ad_account(tmp_path):
+    store = ReportStore(str(tmp_path))
+    scope = fact_table_scope(('https://shop-a.example', 'ck', 'cs'), None)
+    other = fact_table_scope(('https://shop-b.example', 'ck', 'cs'), None)
+    store.save(date(2025, 10, 1), date(2025, 10, 2), _base_data(), pd.DataFrame({'date': []}), {},
+               ['woocommerce'], ['csv'], datetime(2025, 10, 3), scope=scope)
+
+    now = datetime(2025, 12, 1)
+    assert store.has_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], scope, now=now)
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], scope, now=now) is not None
+    # 其他商店或未設定範圍的工作階段不會讀到此快照
+    assert not store.has_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], other, now=now)
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], other, now=now) is None
+    assert store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce'], now=now) is None
+
+
+def test_partial_source_is_left_out_of_snapshot(tmp_path, monkeypatch):
+    orders = _base_data()['orders_df'].copy()
+    orders.attrs['partial'] = True
+    ads = pd.DataFrame({'date': pd.to_datetime(['2025-10-01']), 'spend': [100.0], 'impressions': [1000],
+                        'clicks': [20]})
+    monkeypatch.setattr(batch, 'fetch_woocommerce',
+                        lambda *args: (orders, pd.DataFrame(), {'信用卡': 2}, {'宅配': 2}))
+    monkeypatch.setattr(batch, 'sync_refund_ledger', lambda *args: pd.DataFrame())
+    monkeypatch.setattr(batch, 'fetch_meta_ads', lambda *args: ads)
+
+    wc_credentials, meta_source = ('https://shop.example', 'ck', 'cs'), ('basic', 'token', 'act_1')
+    result = run_batch_report(date(2025, 10, 1), date(2025, 10, 2), wc_credentials, meta_source,
+                              formats=['csv'], data_dir=str(tmp_path))
+
+    assert result['sources'] == ['meta'] and result['missing'] == ['woocommerce']
+    scope = fact_table_scope(wc_credentials, meta_source)
+    store = ReportStore(str(tmp_path))
+    assert store.load_manifest(date(2025, 10, 1), date(2025, 10, 2), scope)['sources'] == ['meta']
+    assert not store.has_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['woocommerce', 'meta'], scope,
+                                  now=datetime(2025, 12, 1))
+    snapshot = store.load_snapshot(date(2025, 10, 1), date(2025, 10, 2), ['meta'], scope, now=datetime(2025, 12, 1))
+    assert snapshot['orders_df'].empty and not snapshot['ads_df'].empty
+    # 不完整的訂單不寫入事實表
+    facts = batch.DailyFactTable(str(tmp_path), scope).read(date(2025, 10, 1), date(2025, 10, 2))
+    assert (facts['revenue'] == 0).all() and facts['spend'].sum() == 100.0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_resolve_ranges()
+    test_summarize_kpis()
+    test_report_store_snapshot_round_trip(Path(tempfile.mkdtemp()))
+    test_open_range_report_expires(Path(tempfile.mkdtemp()))
+    test_snapshot_is_scoped_to_store_and_ad_account(Path(tempfile.mkdtemp()))
+    print("所有測試通過！✓")
@@ -0,0 +1,270 @@
+"""測試共用快取後端（SQLite 與 Redis 協定）"""
+import socket
+import socketserver
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.cache.backend import make_key
+from src.cache.data_cache import DataCache, create_cache_backend
+from src.cache.redis_cache import FORGET_SCRIPT, RELEASE_LOCK_SCRIPT, SET_ENTRY_SCRIPT, RedisCache, RESPClient
+from src.cache.sqlite_cache import SQLiteCache
+
+
+class _StandInRedis(socketserver.ThreadingTCPServer):
+    """本機 Redis 替身：支援快取後端使用的指令，PX 過期以讀取時檢查實作"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _RESPHandler)
+        self.data, self.expires, self.hashes, self.zsets = {}, {}, {}, {}
+        self.lock = threading.Lock()
+        self.commands = []
+        self.connections = []
+        self.delays = {}  # 指令 -> 回應前的等待秒數（模擬緩慢的伺服器）
+
+    def alive(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def incrby(self, key, amount):
+        value = int(self.data.get(key, b'0')) + amount
+        self.data[key] = str(value).encode()
+        return value
+
+    def run(self, args):
+        command, args = args[0].upper().decode(), args[1:]
+        self.commands.append(command)
+        if command == 'PING':
+            return b'+PONG'
+        if command == 'GET':
+            return self.data[args[0]] if self.alive(args[0]) else None
+        if command == 'SET':
+            key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+            if b'NX' in options and self.alive(key):
+                return None
+            self.data[key] = value
+            self.expires.pop(key, None)
+            if b'PX' in options:
+                self.expires[key] = time.time() + int(args[2 + options.index(b'PX') + 1]) / 1000
+            return b'+OK'
+        if command == 'EVAL' and args[0].decode() == RELEASE_LOCK_SCRIPT:
+            key, owner = args[2], args[3]
+            if self.alive(key) and self.data[key] == owner:
+                del self.data[key]
+                return 1
+            return 0
+        if command == 'EVAL' and args[0].decode() == SET_ENTRY_SCRIPT:
+            key, sizes, lru, total = args[2:6]
+            data, px, score = args[6:9]
+            self.data[key] = data
+            self.expires.pop(key, None)
+            if px != b'0':
+                self.expires[key] = time.time() + int(px) / 1000
+            previous = int(self.hashes.get(sizes, {}).get(key, 0))
+            self.hashes.setdefault(sizes, {})[key] = str(len(data)).encode()
+            self.zsets.setdefault(lru, {})[key] = float(score)
+            return self.incrby(total, len(data) - previous)
+        if command == 'EVAL' and args[0].decode() == FORGET_SCRIPT:
+            key, sizes, lru, total = args[2:6]
+            if args[6] != b'1' and self.alive(key):
+                return 0
+            size = int(self.hashes.get(sizes, {}).pop(key, 0))
+            self.data.pop(key, None)
+            self.zsets.get(lru, {}).pop(key, None)
+            if size:
+                self.incrby(total, -size)
+            return size
+        if command == 'EXISTS':
+            return sum(self.alive(key) for key in args)
+        if command == 'DEL':
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if command == 'INCRBY':
+            return self.incrby(args[0], int(args[1]))
+        if command == 'HGET':
+            return self.hashes.get(args[0], {}).get(args[1])
+        if command == 'HSET':
+            self.hashes.setdefault(args[0], {})[args[1]] = args[2]
+            return 1
+        if command == 'HDEL':
+            return int(self.hashes.get(args[0], {}).pop(args[1], None) is not None)
+        if command == 'ZADD':
+            self.zsets.setdefault(args[0], {})[args[2]] = float(args[1])
+            return 1
+        if command == 'ZREM':
+            return int(self.zsets.get(args[0], {}).pop(args[1], None) is not None)
+        if command == 'ZRANGE':
+            members = sorted(self.zsets.get(args[0], {}).items(), key=lambda item: item[1])
+            return [member for member, _ in members]
+        return Exception(f"ERR unknown command '{command}'")
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections.append(self.connection)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            with self.server.lock:
+                reply = self.server.run(args)
+            time.sleep(self.server.delays.get(args[0].upper().decode(), 0))
+            self.wfile.write(_encode_reply(reply))
+
+
+def _encode_reply(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-" + str(reply).encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode_reply(item) for item in reply)
+    if reply.startswith(b'+'):
+        return reply + b"\r\n"
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+@pytest.fixture
+def redis_server():
+    server = _StandInRedis()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis_url(redis_server):
+    return f"redis://127.0.0.1:{redis_server.server_address[1]}/0"
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend_factory(request, tmp_path, redis_url):
+    def factory(max_bytes=10_000):
+        if request.param == 'sqlite':
+            return SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes)
+        return RedisCache.from_url(redis_url, max_bytes)
+    return factory
+
+
+def test_round_trip_and_ttl(backend_factory):
+    cache = backend_factory()
+    frame = pd.DataFrame({'date': pd.to_datetime(['2025-10-01']), 'spend': [12.5]})
+    cache.set('k', (frame, {'信用卡': 3}), ttl=0.2)
+
+    restored, methods = cache.get('k')
+    pd.testing.assert_frame_equal(restored, frame)
+    assert methods == {'信用卡': 3}
+
+    time.sleep(0.3)
+    assert cache.get('k') is None
+
+
+def test_size_bound_evicts_least_recently_used(backend_factory):
+    cache = backend_factory(max_bytes=2500)
+    for key in ['a', 'b', 'c']:
+        cache.set_bytes(key, b'x' * 1000)
+        time.sleep(0.01)
+        if key == 'b':
+            cache.get_bytes('a')  # a 比 b 新
+    assert cache.get_bytes('b') is None, "最久未使用的 b 應被淘汰"
+    assert cache.get_bytes('a') is not None and cache.get_bytes('c') is not None
+    assert cache.total_bytes() <= 2500
+
+
+def test_set_bytes_updates_index_in_one_script(redis_server, redis_url):
+    cache = RedisCache.from_url(redis_url, max_bytes=10_000)
+    cache.set_bytes('a', b'x' * 300)
+    cache.set_bytes('a', b'x' * 100)
+    assert cache.total_bytes() == 100
+    assert not {'HGET', 'HSET', 'INCRBY'} & set(redis_server.commands), "大小記錄應在腳本內更新"
+
+
+def test_evict_drops_expired_keys_before_live_ones(redis_server, redis_url):
+    cache = RedisCache.from_url(redis_url, max_bytes=2500)
+    cache.set_bytes('old', b'x' * 1000)
+    cache.set_bytes('short', b'x' * 1000, ttl=0.05)
+    time.sleep(0.1)
+    cache.set_bytes('new', b'x' * 1000)
+
+    # 已過期的 short 不佔空間，移除其索引後總大小已在上限內，最久未使用的 old 不應被淘汰
+    assert cache.get_bytes('old') is not None and cache.get_bytes('new') is not None
+    assert cache.total_bytes() == 2000
+    assert b'short' not in redis_server.zsets[cache.lru_key.encode()]
+    assert b'short' not in redis_server.hashes[cache.sizes_key.encode()]
+
+
+def test_shared_between_instances(backend_factory):
+    calls = []
+    first, second = DataCache(backend_factory()), DataCache(backend_factory())
+    fetch = lambda: calls.append(1) or pd.DataFrame({'total': [1.0, 2.0]})
+
+    first.get_or_fetch('wc_orders', ('shop', '2025-10-01'), fetch)
+    result = second.get_or_fetch('wc_orders', ('shop', '2025-10-01'), fetch)
+    assert len(calls) == 1, "第二個副本應讀取共用快取"
+    assert result['total'].sum() == 3.0
+
+
+def test_versioned_keys_and_secrets():
+    key = make_key('wc_orders', 'https://shop.example', 'ck_secret', version=1)
+    assert key.startswith('dashboard:v1:wc_orders:')
+    assert 'ck_secret' not in key
+    assert make_key('wc_orders', 'https://shop.example', 'ck_secret', version=2) != key
+
+
+def test_unavailable_backend_falls_back_to_fetch():
+    cache = DataCache(RedisCache(RESPClient('127.0.0.1', 1, timeout=0.2)))
+    assert cache.get_or_fetch('meta_ads', (), lambda: 'fresh') == 'fresh'
+
+
+def test_timed_out_command_is_not_replayed(redis_server):
+    client = RESPClient('127.0.0.1', redis_server.server_address[1], timeout=0.2)
+    redis_server.delays['INCRBY'] = 0.5
+    with pytest.raises(OSError):
+        client.execute('INCRBY', 'counter', 5)
+    time.sleep(0.4)
+    assert redis_server.commands.count('INCRBY') == 1
+    assert client.execute('GET', 'counter') == b'5'
+
+
+def test_connection_closed_while_idle_is_reopened(redis_server):
+    client = RESPClient('127.0.0.1', redis_server.server_address[1])
+    client.execute('SET', 'k', 'v')
+    for connection in redis_server.connections:
+        connection.shutdown(socket.SHUT_RDWR)
+    time.sleep(0.05)
+    assert client.execute('GET', 'k') == b'v'
+    assert len(redis_server.connections) == 2
+
+
+def test_release_lock_only_deletes_own_lock_atomically(redis_server, redis_url):
+    backend = RedisCache.from_url(redis_url)
+    assert backend.acquire_lock('lock', 'a', 0.05)
+    time.sleep(0.1)
+    assert backend.acquire_lock('lock', 'b', 10)  # a 的鎖已過期並由 b 取得
+    backend.release_lock('lock', 'a')
+    assert not backend.acquire_lock('lock', 'c', 10)
+    backend.release_lock('lock', 'b')
+    assert backend.acquire_lock('lock', 'c', 10)
+    assert 'GET' not in redis_server.commands and redis_server.commands.count('EVAL') == 2
+
+
+def test_failed_fetch_is_not_shared(tmp_path):
+    cache = DataCache(create_cache_backend(f"sqlite:///{tmp_path / 'cache.sqlite3'}"))
+    cache.get_or_fetch('meta_ads', (), pd.DataFrame, cacheable=lambda df: not df.empty)
+    assert cache.get_or_fetch('meta_ads', (), lambda: 'refetched', cacheable=lambda _: True) == 'refetched'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,174 @@
+"""測試快取預熱排程（常用期間預熱、跨日重新預熱）"""
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+import src.pipeline.shared_sources as shared_sources
+import src.pipeline.warmer as warmer_module
+from src.cache.backend import make_key
+from src.cache.data_cache import DataCache
+from src.utils.fact_table import DailyFactTable
+from src.pipeline.warmer import WARM_PRESETS, CacheWarmer, seconds_until_next_day, warm_standard_ranges
+from tests.test_single_flight import _MemoryBackend
+
+CREDENTIALS = ('https://shop.example', 'ck', 'cs')
+META_SOURCE = ('basic', 'token', 'act_1')
+
+
+def _fake_sources(monkeypatch):
+    calls = []
+
+    def fake_orders(credentials, start_date, end_date, reporter=None, deadline=None, on_page=None):
+        calls.append(('orders', start_date, end_date))
+        orders = pd.DataFrame({'id': [1], 'order_id': [1], 'date': [pd.Timestamp(end_date)], 'total': [100.0],
+                               'shipping_method': ['宅配'], 'payment_method': ['信用卡']})
+        return orders, pd.DataFrame(), {}, {}
+
+    def fake_ledger(credentials, reporter=None):
+        calls.append(('ledger',))
+        return pd.DataFrame()
+
+    def fake_ads(meta_source, start_date, end_date, reporter=None, token_store=None, debug_mode=False, deadline=None):
+        calls.append(('ads', start_date, end_date))
+        return pd.DataFrame({'date': [pd.Timestamp(end_date)], 'spend': [10.0], 'impressions': [100], 'clicks': [3]})
+
+    monkeypatch.setattr(shared_sources, 'fetch_woocommerce', fake_orders)
+    monkeypatch.setattr(shared_sources, 'sync_refund_ledger', fake_ledger)
+    monkeypatch.setattr(shared_sources, 'fetch_meta_ads', fake_ads)
+    return calls
+
+
+def test_warm_fills_cache_for_dashboard_default_range(monkeypatch):
+    calls = _fake_sources(monkeypatch)
+    cache = DataCache(_MemoryBackend())
+    today = date(2025, 10, 15)
+
+    result = warm_standard_ranges(cache, CREDENTIALS, META_SOURCE, today)
+    assert result['failed'] == []
+    assert (date(2025, 9, 15), today) in result['ranges']
+    assert (date(2025, 10, 1), today) in result['ranges']
+    assert len([c for c in calls if c[0] == 'orders']) == len(WARM_PRESETS)
+    assert calls.count(('ledger',)) == 1
+
+    # 儀表板開啟預設範圍（近 30 天）：直接命中快取，不呼叫 API
+    calls.clear()
+    orders = shared_sources.cached_woocommerce(cache, CREDENTIALS, date(2025, 9, 15), today)
+    ads = shared_sources.cached_meta_ads(cache, META_SOURCE, date(2025, 9, 15), today)
+    ledger = shared_sources.cached_refund_ledger(cache, CREDENTIALS)
+    assert not orders.stale and not ads.stale and ledger.value.empty
+    assert calls == []
+
+
+def test_failed_source_does_not_stop_other_ranges(monkeypatch):
+    calls = _fake_sources(monkeypatch)
+
+    def broken_ads(*args, **kwargs):
+        raise ConnectionError("Meta API 無回應")
+
+    monkeypatch.setattr(shared_sources, 'fetch_meta_ads', broken_ads)
+    result = warm_standard_ranges(DataCache(_MemoryBackend()), CREDENTIALS, META_SOURCE, date(2025, 10, 15))
+    assert len(result['failed']) == len(WARM_PRESETS)
+    assert all(source == 'meta' for _, source in result['failed'])
+    assert len([c for c in calls if c[0] == 'orders']) == len(WARM_PRESETS)
+
+
+def test_single_source_deployment_writes_fact_table(monkeypatch, tmp_path):
+    _fake_sources(monkeypatch)
+    fact_table = DailyFactTable(data_dir=str(tmp_path))
+    warm_standard_ranges(DataCache(_MemoryBackend()), CREDENTIALS, None, date(2025, 10, 15), fact_table,
+                         presets=['last_7_days'])
+    assert fact_table.daily['orders'].sum() == 1
+
+
+def test_partial_source_is_not_upserted(monkeypatch, tmp_path):
+    _fake_sources(monkeypatch)
+    cache, fact_table = DataCache(_MemoryBackend()), DailyFactTable(data_dir=str(tmp_path))
+    today = date(2025, 10, 15)
+    warm_standard_ranges(cache, CREDENTIALS, META_SOURCE, today, fact_table, presets=['last_7_days'])
+    assert fact_table.daily['spend'].sum() == 10.0
+
+    # 上游失敗時共用快取回傳空的部分結果（不拋出例外）：廣告欄位保留舊數據並回報失敗
+    monkeypatch.setattr(shared_sources, 'fetch_meta_ads', lambda *args, **kwargs: pd.DataFrame())
+    result = warm_standard_ranges(DataCache(_MemoryBackend()), CREDENTIALS, META_SOURCE, today, fact_table,
+                                  presets=['last_7_days'])
+    assert result['failed'] == [(result['ranges'][0], 'meta')]
+    assert fact_table.daily['spend'].sum() == 10.0
+    assert fact_table.daily['orders'].sum() == 1
+
+
+def test_fresh_cache_hits_do_not_rewrite_fact_table(monkeypatch, tmp_path):
+    _fake_sources(monkeypatch)
+    writes = []
+    update = warmer_module.update_fact_table
+    monkeypatch.setattr(warmer_module, 'update_fact_table',
+                        lambda table, orders, ads, start, end, *args: writes.append((start, end))
+                        or update(table, orders, ads, start, end, *args))
+    cache, fact_table, upserted = DataCache(_MemoryBackend()), DailyFactTable(data_dir=str(tmp_path)), {}
+    today = date(2025, 10, 15)
+
+    warm_standard_ranges(cache, CREDENTIALS, META_SOURCE, today, fact_table, upserted=upserted)
+    assert len(writes) == len(WARM_PRESETS)
+
+    # 下一次預熱全部命中快取：不重寫事實表
+    writes.clear()
+    warm_standard_ranges(cache, CREDENTIALS, META_SOURCE, today, fact_table, upserted=upserted)
+    assert writes == []
+
+    # 某期間的數據重新抓取後（資料時間改變）只寫入該期間
+    cache.backend.delete(make_key('meta_ads', META_SOURCE, date(2025, 10, 8), today))
+    warm_standard_ranges(cache, CREDENTIALS, META_SOURCE, today, fact_table, upserted=upserted)
+    assert writes == [(date(2025, 10, 8), today)]
+
+
+def test_seconds_until_next_day():
+    assert seconds_until_next_day(datetime(2025, 10, 15, 23, 59, 0), delay=60) == 120
+    assert seconds_until_next_day(datetime(2025, 10, 15, 0, 0, 0), delay=0) == 86400
+
+
+def test_wait_is_shortened_before_midnight():
+    clock = {'now': datetime(2025, 10, 15, 12, 0, 0)}
+    warmer = CacheWarmer(lambda today: None, interval=600, now=lambda: clock['now'])
+    assert warmer.next_wait() == 600
+
+    clock['now'] = datetime(2025, 10, 15, 23, 58, 0)
+    assert warmer.next_wait() == 120 + 60
+
+
+def test_rollover_warms_the_new_day():
+    warmed = []
+    clock = {'now': datetime(2025, 10, 15, 23, 59, 0)}
+    warmer = CacheWarmer(warmed.append, now=lambda: clock['now'])
+    warmer.run_once()
+    clock['now'] = datetime(2025, 10, 16, 0, 1, 0)
+    warmer.run_once()
+    assert warmed == [date(2025, 10, 15), date(2025, 10, 16)]
+    assert warmer.last_warmed == date(2025, 10, 16)
+
+
+def test_retarget_switches_sources_on_the_same_thread():
+    warmed = []
+    warmer = CacheWarmer(None, now=lambda: datetime(2025, 10, 15, 12, 0, 0))
+    warmer.run_once()  # 尚未設定預熱對象
+    assert warmed == [] and warmer.last_warmed is None
+
+    warmer.retarget(lambda today: warmed.append(('old-token', today)), target='old-token')
+    warmer.retarget(lambda today: warmed.append(('same', today)), target='old-token')  # 相同對象不更換
+    warmer.run_once()
+    warmer.retarget(lambda today: warmed.append(('new-token', today)), target='new-token')
+    warmer.run_once()
+    assert [token for token, _ in warmed] == ['old-token', 'new-token']
+
+
+def test_background_thread_stops_and_survives_errors():
+    runs = threading.Event()
+
+    def flaky_warm(today):
+        runs.set()
+        raise RuntimeError("暫時無法連線")
+
+    warmer = CacheWarmer(flaky_warm, interval=0.01).start()
+    assert runs.wait(2)
+    warmer.stop(timeout=2)
+    assert not warmer._thread.is_alive()
+    assert warmer.last_warmed is None
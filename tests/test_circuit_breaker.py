@@ -0,0 +1,183 @@
+"""測試斷路器、載入時限與來源失敗時改用快取數據"""
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import pytest
+import requests
+
+from src.api.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Deadline,
+                                     DeadlineExceeded)
+from src.api.woocommerce import WooCommerceAPI
+from src.cache.data_cache import DataCache
+from src.pipeline.base_data import compute_base_data
+from src.utils.fact_table import DailyFactTable
+from src.utils.refunds import apply_refunds
+from tests.test_single_flight import _MemoryBackend
+from tests.test_woocommerce_sharding import _FakeSession
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Status:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def _timeout():
+    raise requests.exceptions.ReadTimeout("WooCommerce 回應逾時")
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_reset():
+    clock = _Clock()
+    breaker = CircuitBreaker('woocommerce', failure_threshold=2, reset_timeout=60, clock=clock)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            breaker.call(_timeout)
+    assert breaker.state == OPEN
+
+    # 斷路期間立即失敗，不送出請求
+    sent = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: sent.append(1))
+    assert sent == []
+
+    # 重設時間後只放行一次試探請求
+    clock.now = 61
+    assert breaker.state == HALF_OPEN
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_and_server_errors_count_as_failures():
+    clock = _Clock()
+    breaker = CircuitBreaker('meta', failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        breaker.call(lambda: _Status(503))
+    assert breaker.state == OPEN
+
+    clock.now = 11
+    breaker.call(lambda: _Status(500))
+    assert breaker.state == OPEN and breaker.opened_at == 11
+
+    clock.now = 22
+    assert breaker.call(lambda: _Status(200)).status_code == 200
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_deadline_caps_request_timeout():
+    clock = _Clock()
+    deadline = Deadline(5, clock=clock)
+    assert deadline.timeout(30) == 5
+    clock.now = 4.5
+    assert deadline.timeout(30) == 0.5
+    clock.now = 6
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("WooCommerce")
+
+
+def test_woocommerce_keeps_fetched_pages_when_deadline_passes():
+    start = datetime(2025, 9, 1)
+    orders = [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S')}
+              for i in range(900)]
+    clock = _Clock()
+    session = _FakeSession(orders)
+    original_get = session.get
+
+    def slow_get(*args, **kwargs):
+        clock.now += 1  # 每個請求耗時 1 秒
+        return original_get(*args, **kwargs)
+
+    session.get = slow_get
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs', deadline=Deadline(6, clock=clock))
+    api.session, api.breaker = session, CircuitBreaker('woocommerce')
+
+    fetched = api._fetch_raw_orders(datetime(2025, 9, 1), datetime(2025, 9, 30), 'completed')
+
+    assert api.partial
+    assert 0 < len(fetched) < 900
+    assert len(session.pages) <= 7
+
+
+def test_deadline_truncated_fetch_leaves_fact_rows_unchanged(tmp_path):
+    start = datetime(2025, 9, 1)
+    orders = [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S'),
+               'total': '100.00', 'status': 'completed', 'payment_method_title': '信用卡',
+               'shipping_lines': [{'method_title': '宅配'}]} for i in range(900)]
+    fact_table = DailyFactTable(data_dir=str(tmp_path))
+
+    def load(deadline):
+        # 與儀表板相同：經由共用快取抓取，再以 CacheResult.partial 決定是否寫入事實表
+        clock = _Clock()
+        session = _FakeSession(orders)
+        original_get = session.get
+
+        def slow_get(*args, **kwargs):
+            clock.now += 1
+            return original_get(*args, **kwargs)
+
+        session.get = slow_get
+        api = WooCommerceAPI('https://shop.example', 'ck', 'cs',
+                             deadline=Deadline(deadline, clock=clock) if deadline else None)
+        api.session, api.breaker = session, CircuitBreaker('woocommerce')
+        result = DataCache(_MemoryBackend()).fetch_result(
+            'wc_orders', (), lambda: api.get_orders_with_line_items(start, datetime(2025, 9, 30)), ttl=60,
+            cacheable=lambda value: not value[0].empty and not value[0].attrs.get('partial')
+        )
+        orders_df, line_items_df, payment_methods, shipping_methods = result.value
+        orders_df = apply_refunds(orders_df, pd.DataFrame())
+        compute_base_data(orders_df, line_items_df, payment_methods, shipping_methods, pd.DataFrame(),
+                          start.date(), date(2025, 9, 30), fact_table, ['woocommerce'] if result.partial else [])
+        return result
+
+    assert not load(None).partial
+    before = fact_table.daily.copy()
+    assert before['orders'].sum() == 900
+
+    truncated = load(6)
+    assert truncated.partial and 0 < len(truncated.value[0]) < 900
+    pd.testing.assert_frame_equal(DailyFactTable(data_dir=str(tmp_path)).daily, before)
+
+
+def test_fallback_to_last_complete_data_when_source_fails():
+    cache = DataCache(_MemoryBackend(), max_stale=0.05, fallback_max_age=60)
+    cache.fetch_result('wc_orders', (), lambda: [1, 2, 3], ttl=0.05, cacheable=bool)
+    time.sleep(0.15)
+
+    # 超過最長過期時間：前景抓取，來源失敗時改用最後一次完整的數據
+    result = cache.fetch_result('wc_orders', (), lambda: [], ttl=0.05, cacheable=bool)
+    assert result.value == [1, 2, 3] and result.stale and not result.partial
+
+    def broken():
+        raise ConnectionError("WooCommerce 無回應")
+
+    assert cache.fetch_result('wc_orders', (), broken, ttl=0.05).value == [1, 2, 3]
+    assert cache.stats['fallbacks'] == 2
+
+
+def test_incomplete_result_without_cache_is_marked_partial():
+    cache = DataCache(_MemoryBackend())
+    result = cache.fetch_result('meta_ads', (), lambda: [1], ttl=60, cacheable=lambda value: len(value) > 1)
+    assert result.value == [1] and result.partial
+
+    def broken():
+        raise ConnectionError("WooCommerce 無回應")
+
+    # 沒有舊數據時照常拋出例外
+    with pytest.raises(ConnectionError):
+        cache.fetch_result('wc_orders', (), broken, ttl=60)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,58 @@
+"""測試趨勢圖降採樣與自動粒度"""
+import numpy as np
+import pandas as pd
+from datetime import date
+
+from src.utils.downsample import lttb_indices, downsample_frame, auto_grain
+from src.ui.charts import trend_line_chart, profit_chart
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 50  # 單點尖峰
+    keep = lttb_indices(x, y, 200)
+
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == 9999
+    assert np.all(np.diff(keep) > 0), "保留點應依序遞增"
+    assert 4321 in keep, "尖峰應被保留"
+    assert len(lttb_indices(x[:50], y[:50], 200)) == 50, "未超過門檻時不降採樣"
+
+
+def test_downsample_frame_and_webgl_chart():
+    dates = pd.date_range('2020-01-01', periods=5000, freq='h')
+    df = pd.DataFrame({'datetime': dates, 'revenue': np.random.default_rng(0).random(5000),
+                       'spend': np.random.default_rng(1).random(5000)})
+
+    sampled = downsample_frame(df, 'datetime', ['revenue', 'spend'], 500)
+    assert 500 <= len(sampled) <= 1000
+    assert sampled['datetime'].is_monotonic_increasing
+
+    fig = trend_line_chart(df, 'datetime', ['revenue', 'spend'], '營收', max_points=500)
+    assert {trace.type for trace in fig.data} == {'scattergl'}
+    assert all(len(trace.x) <= 1000 for trace in fig.data)
+
+    small_fig = trend_line_chart(df.head(100), 'datetime', ['revenue'], '營收', max_points=500)
+    assert small_fig.data[0].type == 'scatter'
+
+
+def test_profit_chart_switches_to_webgl():
+    daily = pd.DataFrame({'date': pd.date_range('2015-01-01', periods=3000, freq='D'),
+                          'estimated_net_profit': np.linspace(-100, 100, 3000)})
+    assert profit_chart(daily.head(30), '淨利').data[0].type == 'bar'
+    assert profit_chart(daily, '淨利', max_points=500).data[0].type == 'scattergl'
+
+
+def test_auto_grain():
+    assert auto_grain(date(2025, 1, 1), date(2025, 3, 31)) == 'day'
+    assert auto_grain(date(2024, 1, 1), date(2025, 6, 30)) == 'week'
+    assert auto_grain(date(2020, 1, 1), date(2025, 6, 30)) == 'month'
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_peaks()
+    test_downsample_frame_and_webgl_chart()
+    test_profit_chart_switches_to_webgl()
+    test_auto_grain()
+    print("所有測試通過！✓")
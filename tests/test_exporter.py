@@ -0,0 +1,43 @@
+"""測試數據匯出（分塊 CSV、Parquet）"""
+import io
+import pandas as pd
+
+from src.utils.exporter import available_formats, export_bytes, export_file_name
+
+
+def _sample_df():
+    return pd.DataFrame({
+        'date': pd.date_range('2025-10-01', periods=7, freq='D'),
+        'revenue': [100.0, 200.5, 0.0, 50.25, 75.0, 0.0, 10.0],
+        '付款方式': ['信用卡', 'Line Pay', 'ATM轉帳', '信用卡', '信用卡', 'Line Pay', '超商取貨付款'],
+    })
+
+
+def test_chunked_csv_matches_full_csv():
+    df = _sample_df()
+    payload = export_bytes(df, 'CSV', chunk_rows=3)
+    assert payload.decode('utf-8') == df.to_csv(index=False), "分塊寫入的 CSV 應與一次寫入相同"
+    assert export_bytes(df.iloc[0:0], 'CSV').decode('utf-8') == df.iloc[0:0].to_csv(index=False)
+
+
+def test_parquet_round_trip():
+    df = _sample_df()
+    restored = pd.read_parquet(io.BytesIO(export_bytes(df, 'Parquet')))
+    pd.testing.assert_frame_equal(restored, df)
+
+
+def test_formats_and_file_name():
+    assert available_formats()[:2] == ['CSV', 'Parquet']
+    assert export_file_name('每日數據', 'Parquet', '20251001_1200') == '每日數據_20251001_1200.parquet'
+    try:
+        export_bytes(_sample_df(), 'PDF')
+        assert False, "不支援的格式應拋出 ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_chunked_csv_matches_full_csv()
+    test_parquet_round_trip()
+    test_formats_and_file_name()
+    print("所有測試通過！✓")
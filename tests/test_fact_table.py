@@ -0,0 +1,130 @@
+"""測試每日事實表與週/月彙總"""
+import pandas as pd
+import pytest
+from datetime import date
+
+from src.pipeline.base_data import update_fact_table
+from src.utils.fact_table import DailyFactTable, build_daily_facts, fact_scope
+
+
+def _orders():
+    return pd.DataFrame([
+        {'date': date(2025, 9, 29), 'total': 1000.0, 'refund_total': 0.0, 'net_total': 1000.0,
+         'shipping_method': '宅配', 'payment_method': '信用卡'},
+        {'date': date(2025, 10, 1), 'total': 500.0, 'refund_total': 100.0, 'net_total': 400.0,
+         'shipping_method': '全家', 'payment_method': 'ATM轉帳'},
+        {'date': date(2025, 10, 15), 'total': 300.0, 'refund_total': 0.0, 'net_total': 300.0,
+         'shipping_method': '全家', 'payment_method': 'Line Pay'},
+    ])
+
+
+def test_build_daily_facts():
+    ads = pd.DataFrame([{'date': date(2025, 10, 1), 'spend': 200.0, 'impressions': 1000, 'clicks': 30}])
+    facts = build_daily_facts(_orders(), ads, date(2025, 9, 28), date(2025, 10, 31))
+
+    assert len(facts) == 34, "每天應有一列（含無數據的日期）"
+    oct_1 = facts[facts['date'] == '2025-10-01'].iloc[0]
+    assert oct_1['revenue'] == 400.0 and oct_1['refunds'] == 100.0
+    assert oct_1['shipping_cost'] == 69 and oct_1['payment_fee'] == 0
+    assert oct_1['spend'] == 200.0 and oct_1['orders'] == 1
+    assert abs(facts['tax'].sum() - 1700 * 0.05) < 1e-9
+
+
+def test_incremental_upsert_and_rollups(tmp_path):
+    table = DailyFactTable(data_dir=str(tmp_path))
+    table.upsert(build_daily_facts(_orders(), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31)))
+
+    # 只重新抓取 10/15 當天，其他日期保留
+    updated = _orders().iloc[[2]].assign(net_total=250.0, refund_total=50.0)
+    table.upsert(build_daily_facts(updated, pd.DataFrame(), date(2025, 10, 15), date(2025, 10, 15)))
+
+    reloaded = DailyFactTable(data_dir=str(tmp_path))
+    assert reloaded.read(date(2025, 9, 28), date(2025, 10, 31))['revenue'].sum() == 1650.0
+
+    monthly = reloaded.read(date(2025, 9, 28), date(2025, 10, 31), 'month')
+    assert list(monthly['revenue']) == [1000.0, 650.0]
+    assert list(monthly['days']) == [3, 31]
+
+    # 範圍頭尾不完整的週只加總範圍內的日期
+    weekly = reloaded.read(date(2025, 9, 30), date(2025, 10, 16), 'week')
+    assert list(weekly['revenue']) == [400.0, 0.0, 250.0]
+    assert list(weekly['days']) == [6, 7, 4]
+
+
+def _ads():
+    return pd.DataFrame([{'date': date(2025, 10, 1), 'spend': 200.0, 'impressions': 1000, 'clicks': 30}])
+
+
+def test_failed_source_keeps_persisted_days(tmp_path):
+    table = DailyFactTable(data_dir=str(tmp_path))
+    update_fact_table(table, _orders(), _ads(), date(2025, 9, 28), date(2025, 10, 31))
+
+    # Meta 失敗（空表）：訂單欄位更新，廣告欄位保留
+    update_fact_table(table, _orders().assign(net_total=10.0), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31))
+    facts = table.read(date(2025, 9, 28), date(2025, 10, 31))
+    assert facts['spend'].sum() == 200.0 and facts['clicks'].sum() == 30
+    assert facts['revenue'].sum() == 30.0
+
+    # WooCommerce 逾時截斷：訂單欄位保留，不以部分加總覆蓋
+    truncated = _orders().iloc[[0]].copy()
+    truncated.attrs['partial'] = True
+    update_fact_table(table, truncated, _ads().assign(spend=250.0), date(2025, 9, 28), date(2025, 10, 31))
+    facts = DailyFactTable(data_dir=str(tmp_path)).read(date(2025, 9, 28), date(2025, 10, 31))
+    assert facts['revenue'].sum() == 30.0 and facts['orders'].sum() == 3
+    assert facts['spend'].sum() == 250.0
+
+
+def test_scopes_do_not_overwrite_each_other(tmp_path):
+    shop_a = DailyFactTable(str(tmp_path), fact_scope('https://a.example/', 'act_1'))
+    shop_b = DailyFactTable(str(tmp_path), fact_scope('https://b.example', '1'))
+    update_fact_table(shop_a, _orders(), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31))
+    update_fact_table(shop_b, _orders().assign(net_total=1.0), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31))
+
+    assert fact_scope('https://a.example/', 'act_1') == fact_scope('https://A.example', '1')
+    reloaded = DailyFactTable(str(tmp_path), fact_scope('https://a.example', '1'))
+    assert reloaded.read(date(2025, 9, 28), date(2025, 10, 31))['revenue'].sum() == 1700.0
+
+
+def test_concurrent_writers_merge_instead_of_overwriting(tmp_path):
+    # 儀表板與批次作業各有一個事實表物件：更新前重新載入另一方寫入的數據
+    dashboard, batch = DailyFactTable(str(tmp_path)), DailyFactTable(str(tmp_path))
+    update_fact_table(dashboard, _orders(), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31))
+    update_fact_table(batch, pd.DataFrame(), _ads(), date(2025, 9, 28), date(2025, 10, 31))
+
+    for table in (dashboard, batch, DailyFactTable(str(tmp_path))):
+        facts = table.read(date(2025, 9, 28), date(2025, 10, 31))
+        assert facts['revenue'].sum() == 1700.0 and facts['spend'].sum() == 200.0
+
+
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    table = DailyFactTable(str(tmp_path))
+    update_fact_table(table, _orders(), pd.DataFrame(), date(2025, 9, 28), date(2025, 10, 31))
+
+    def fail_midway(self, path, *args, **kwargs):
+        open(path, 'wb').write(b'PAR1')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', fail_midway)
+    with pytest.raises(OSError):
+        update_fact_table(table, _orders().assign(net_total=1.0), pd.DataFrame(),
+                          date(2025, 9, 28), date(2025, 10, 31))
+    monkeypatch.undo()
+
+    facts = DailyFactTable(str(tmp_path)).read(date(2025, 9, 28), date(2025, 10, 31))
+    assert facts['revenue'].sum() == 1700.0
+    assert not list(tmp_path.glob('*.tmp')), "失敗的暫存檔應移除"
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_build_daily_facts()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_upsert_and_rollups(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_failed_source_keeps_persisted_days(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_scopes_do_not_overwrite_each_other(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_concurrent_writers_merge_instead_of_overwriting(Path(tmp))
+    print("所有測試通過！✓")
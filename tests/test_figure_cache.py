@@ -0,0 +1,45 @@
+"""測試圖表快取（指紋、命中統計、LRU 淘汰）"""
+import pandas as pd
+
+from src.ui.charts import share_pie_chart
+from src.ui.figure_cache import FigureCache, frame_fingerprint
+
+
+def _df(amount=100.0):
+    return pd.DataFrame({'成本類型': ['運費', '廣告費'], '金額': [amount, 50.0]})
+
+
+def test_fingerprint_tracks_content_and_dtypes():
+    assert frame_fingerprint(_df()) == frame_fingerprint(_df())
+    assert frame_fingerprint(_df()) != frame_fingerprint(_df(101.0))
+    assert frame_fingerprint(_df()) != frame_fingerprint(_df().astype({'金額': 'float32'}))
+
+
+def test_hit_miss_and_eviction():
+    cache = FigureCache(max_entries=2)
+    builds = []
+
+    def build(df):
+        builds.append(1)
+        return share_pie_chart(df, '金額', '成本類型', '成本結構')
+
+    fig, hit = cache.get_or_build('成本', _df(), {}, lambda: build(_df()))
+    assert not hit
+    cached, hit = cache.get_or_build('成本', _df(), {}, lambda: build(_df()))
+    assert hit and cached is fig and len(builds) == 1
+
+    # 選項不同視為不同圖表
+    _, hit = cache.get_or_build('成本', _df(), {'label': '每週'}, lambda: build(_df()))
+    assert not hit
+    assert cache.stats['成本'] == {'hits': 1, 'misses': 2}
+
+    # 超過上限時淘汰最久未使用的圖表
+    cache.get_or_build('成本', _df(200.0), {}, lambda: build(_df(200.0)))
+    _, hit = cache.get_or_build('成本', _df(), {}, lambda: build(_df()))
+    assert not hit and len(builds) == 4
+
+
+if __name__ == "__main__":
+    test_fingerprint_tracks_content_and_dtypes()
+    test_hit_miss_and_eviction()
+    print("所有測試通過！✓")
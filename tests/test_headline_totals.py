@@ -0,0 +1,51 @@
+"""測試標頭指標快速路徑（X-WP-Total 訂單數、insights default_summary 廣告總計）"""
+from datetime import date, datetime, timedelta
+
+from src.api.meta_ads import MetaAdsAPI
+from src.api.woocommerce import WooCommerceAPI
+from tests.test_woocommerce_sharding import _FakeSession
+
+
+def test_order_count_uses_one_header_request():
+    start = datetime(2025, 9, 1)
+    orders = [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S')}
+              for i in range(900)]
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FakeSession(orders)
+
+    assert api.count_orders(datetime(2025, 9, 1), datetime(2025, 9, 10)) == len(
+        [o for o in orders if o['date_created'] <= '2025-09-10T23:59:59'])
+    assert api.session.pages == [1]
+
+
+def test_insights_summary_requests_default_summary():
+    api = MetaAdsAPI(app_id='', app_secret='', account_id='act_1', long_lived_token='token')
+    requests_sent = []
+
+    def fake_request(endpoint, params=None):
+        requests_sent.append((endpoint, params))
+        return {'data': [{'spend': '10.5'}],
+                'summary': {'spend': '321.75', 'impressions': '12000', 'clicks': '345'}}
+
+    api._make_api_request = fake_request
+    summary = api.get_insights_summary(date(2025, 9, 1), date(2025, 9, 10))
+
+    assert summary == {'ad_spend': 321.75, 'impressions': 12000, 'clicks': 345}
+    assert len(requests_sent) == 1
+    endpoint, params = requests_sent[0]
+    assert endpoint == 'act_1/insights' and params['default_summary'] == 'true'
+    assert 'time_increment' not in params
+
+
+def test_insights_summary_falls_back_to_single_row():
+    api = MetaAdsAPI(app_id='', app_secret='', account_id='act_1', long_lived_token='token')
+    api._make_api_request = lambda endpoint, params=None: {'data': [{'spend': '5', 'impressions': '10'}]}
+    assert api.get_insights_summary(date(2025, 9, 1), date(2025, 9, 10)) == {
+        'ad_spend': 5.0, 'impressions': 10, 'clicks': 0}
+
+
+if __name__ == "__main__":
+    test_order_count_uses_one_header_request()
+    test_insights_summary_requests_default_summary()
+    test_insights_summary_falls_back_to_single_row()
+    print("所有測試通過！✓")
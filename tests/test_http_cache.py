@@ -0,0 +1,174 @@
+"""測試 HTTP 條件式請求磁碟快取（ETag / Last-Modified 重新驗證、憑證不列入快取鍵、串流時保存、大小上限、有效時間）"""
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.api.http import read_json_items
+from src.api.http_cache import CachingAdapter, cache_url
+
+
+class _Server:
+    """依路徑回傳 gzip JSON 的本機伺服器，記錄每個請求的條件標頭與回應狀態"""
+
+    def __init__(self):
+        self.version = 'v1'
+        self.validator = 'etag'
+        self.log = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"{server.version}"'
+                modified = 'Wed, 01 Oct 2025 00:00:00 GMT' if server.version == 'v1' else 'Thu, 02 Oct 2025 00:00:00 GMT'
+                conditional = self.headers.get('If-None-Match') or self.headers.get('If-Modified-Since')
+                fresh = (self.headers.get('If-None-Match') == etag if server.validator == 'etag'
+                         else self.headers.get('If-Modified-Since') == modified)
+                server.log.append((self.path, conditional, 304 if fresh else 200))
+                self.send_response(304 if fresh else 200)
+                if server.validator == 'etag':
+                    self.send_header('ETag', etag)
+                elif server.validator == 'last-modified':
+                    self.send_header('Last-Modified', modified)
+                if fresh:
+                    self.end_headers()
+                    return
+                body = gzip.compress(json.dumps([{'id': i, 'version': server.version, 'path': self.path}
+                                                 for i in range(20)]).encode())
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def statuses(self):
+        return [status for _, _, status in self.log]
+
+
+@pytest.fixture
+def server():
+    server = _Server()
+    yield server
+    server.httpd.shutdown()
+
+
+def _session(tmp_path, **kwargs):
+    session = requests.Session()
+    adapter = CachingAdapter(path=str(tmp_path / 'http_cache.sqlite3'), **kwargs)
+    session.mount('http://', adapter)
+    return session, adapter
+
+
+def test_unchanged_pages_cost_only_304s(server, tmp_path):
+    session, adapter = _session(tmp_path)
+    params = {'after': '2025-09-01T00:00:00', 'page': 1}
+
+    first = session.get(f"{server.url}/orders", params={**params, 'access_token': 'old'}).json()
+    # 換發 token 後仍命中同一個快取項目
+    second = session.get(f"{server.url}/orders", params={**params, 'access_token': 'new'}).json()
+
+    assert first == second and len(second) == 20
+    assert server.statuses() == [200, 304]
+    assert server.log[1][1] == '"v1"'
+    assert adapter.stats == {'revalidated': 1, 'stored': 1, 'uncached': 0}
+
+
+def test_replayed_response_can_be_streamed(server, tmp_path):
+    session, _ = _session(tmp_path)
+    session.get(f"{server.url}/orders")
+    response = session.get(f"{server.url}/orders", stream=True)
+
+    assert server.statuses() == [200, 304]
+    assert read_json_items(response, ('id',))[:2] == [{'id': 0}, {'id': 1}]
+
+
+def test_streamed_response_is_stored_once_fully_read(server, tmp_path):
+    session, adapter = _session(tmp_path)
+    response = session.get(f"{server.url}/orders", stream=True)
+    assert adapter.stats['stored'] == 0  # 內容尚未讀取，未預先整份讀入
+
+    assert len(read_json_items(response, ('id',))) == 20
+    assert adapter.stats['stored'] == 1
+    assert session.get(f"{server.url}/orders").json()[19] == {'id': 19, 'version': 'v1', 'path': '/orders'}
+    assert server.statuses() == [200, 304]
+
+
+def test_partially_read_response_is_not_stored(server, tmp_path):
+    session, adapter = _session(tmp_path)
+    response = session.get(f"{server.url}/orders", stream=True)
+    response.raw.read(10)
+    response.close()
+    session.get(f"{server.url}/orders")
+    assert adapter.stats['stored'] == 1
+    assert server.statuses() == [200, 200]
+    assert server.log[1][1] is None
+
+
+def test_entries_expire_after_ttl_even_if_revalidated(server, tmp_path, monkeypatch):
+    session, _ = _session(tmp_path, ttl=60)
+    start = time.time()
+    session.get(f"{server.url}/orders")
+    monkeypatch.setattr(time, 'time', lambda: start + 40)
+    session.get(f"{server.url}/orders")  # 304 不延長有效時間
+    monkeypatch.setattr(time, 'time', lambda: start + 61)
+    session.get(f"{server.url}/orders")
+    assert server.statuses() == [200, 304, 200]
+    assert server.log[2][1] is None
+
+
+def test_changed_resource_is_refetched_and_stored(server, tmp_path):
+    session, _ = _session(tmp_path)
+    session.get(f"{server.url}/orders")
+    server.version = 'v2'
+    assert session.get(f"{server.url}/orders").json()[0]['version'] == 'v2'
+    assert session.get(f"{server.url}/orders").json()[0]['version'] == 'v2'
+    assert server.statuses() == [200, 200, 304]
+
+
+def test_last_modified_is_used_without_etag(server, tmp_path):
+    server.validator = 'last-modified'
+    session, _ = _session(tmp_path)
+    session.get(f"{server.url}/insights")
+    session.get(f"{server.url}/insights")
+    assert server.statuses() == [200, 304]
+    assert server.log[1][1] == 'Wed, 01 Oct 2025 00:00:00 GMT'
+
+
+def test_responses_without_validators_are_not_stored(server, tmp_path):
+    server.validator = None
+    session, adapter = _session(tmp_path)
+    session.get(f"{server.url}/orders")
+    session.get(f"{server.url}/orders")
+    assert server.statuses() == [200, 200]
+    assert all(conditional is None for _, conditional, _ in server.log)
+    assert adapter.stats['uncached'] == 2
+
+
+def test_size_cap_evicts_least_recently_used(server, tmp_path):
+    session, adapter = _session(tmp_path, max_bytes=700)
+    session.get(f"{server.url}/a")
+    session.get(f"{server.url}/b")  # 超過上限，淘汰 /a
+    session.get(f"{server.url}/a")
+    assert server.statuses() == [200, 200, 200]
+    assert adapter.store.total_bytes() <= 700
+
+
+def test_cache_url_drops_secrets_and_sorts_params():
+    url = 'https://graph.facebook.com/v21.0/act_1/insights?level=account&access_token=abc&fields=spend'
+    assert cache_url(url) == 'https://graph.facebook.com/v21.0/act_1/insights?fields=spend&level=account'
+    assert 'consumer_secret' not in cache_url('https://shop.example/orders?consumer_key=ck&consumer_secret=cs&page=2')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
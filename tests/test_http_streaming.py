@@ -0,0 +1,71 @@
+"""測試 HTTP 壓縮協商與串流 JSON 解析（只保留需要的欄位）"""
+import gzip
+import io
+import json
+
+import brotli
+import pytest
+import requests
+import urllib3
+
+import src.api.http as http
+
+
+def _streamed_response(payload: bytes, encoding: str = 'gzip') -> requests.Response:
+    """模擬以 stream=True 取得、內容尚未讀取的壓縮回應"""
+    body = {'gzip': gzip.compress, 'br': brotli.compress}.get(encoding, bytes)(payload)
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers={'Content-Encoding': encoding},
+                                        preload_content=False, decode_content=False)
+    return response
+
+
+ORDERS = [{'id': i, 'date_created': '2025-09-01T10:00:00', 'total': '100.00',
+           'meta_data': [{'key': 'note', 'value': 'x' * 200}], '_links': {'self': [{'href': 'https://shop'}]}}
+          for i in range(50)]
+
+
+def _fail_json(**kwargs):
+    raise AssertionError("串流回應不應整份解析")
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_items_are_streamed_and_projected(monkeypatch, encoding):
+    response = _streamed_response(json.dumps(ORDERS).encode(), encoding)
+    monkeypatch.setattr(response, 'json', _fail_json)
+
+    items = http.read_json_items(response, ('id', 'total'))
+
+    assert items == [{'id': i, 'total': '100.00'} for i in range(50)]
+
+
+def test_items_fall_back_to_full_parse_without_ijson(monkeypatch):
+    monkeypatch.setattr(http, 'ijson', None)
+    response = _streamed_response(json.dumps(ORDERS).encode())
+    assert http.read_json_items(response, ('id', 'total')) == [{'id': i, 'total': '100.00'} for i in range(50)]
+
+
+def test_truncated_body_raises_value_error():
+    response = _streamed_response(json.dumps(ORDERS).encode()[:-40])
+    with pytest.raises(ValueError):
+        http.read_json_items(response, ('id',))
+
+
+def test_buffered_response_is_parsed_directly():
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(ORDERS[:2]).encode()
+    assert http.read_json_items(response, ('id', 'missing')) == [{'id': 0}, {'id': 1}]
+    assert http.read_json_items(response) == ORDERS[:2]
+
+
+def test_session_negotiates_compression():
+    accepted = http.get_session().headers['Accept-Encoding']
+    assert http.ijson is not None and http.BROTLI_AVAILABLE  # requirements.txt 已列入 ijson / brotli
+    assert accepted == 'br, gzip, deflate'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,54 @@
+"""測試訂單明細索引（篩選、排序、分頁）"""
+import pandas as pd
+from datetime import date
+
+from src.utils.order_explorer import OrderIndex
+
+
+def _orders():
+    return pd.DataFrame({
+        'order_id': [101, 102, 103, 104, 105, 106],
+        'date': [date(2025, 10, d) for d in (3, 1, 2, 5, 4, 6)],
+        'total': [500.0, 1200.0, 80.0, 1200.0, 300.0, 2500.0],
+        'refund_total': [0.0, 100.0, 0.0, 0.0, 0.0, None],
+        'status': ['completed', 'processing', 'completed', 'on-hold', 'completed', 'processing'],
+        'customer_id': [1, 2, 3, 1, 2, 3],
+        'payment_method': ['信用卡', 'Line Pay', '信用卡', 'ATM轉帳', '信用卡', 'Line Pay'],
+        'shipping_method': ['宅配', '全家', '全家', '宅配', '萊爾富', '宅配'],
+    })
+
+
+def test_filter_sort_and_page():
+    index = OrderIndex(_orders())
+    assert len(index) == 6
+    assert index.options('status') == ['completed', 'on-hold', 'processing']
+    assert index.amount_range() == (80.0, 2500.0)
+
+    matched = index.match(statuses=['completed'], sort_by='total', descending=True)
+    assert index.page(matched, 1, 10)['order_id'].to_pylist() == [101, 105, 103]
+
+    matched = index.match(payment_methods=['信用卡', 'Line Pay'], min_amount=300, max_amount=1200, sort_by='date')
+    assert index.page(matched, 1, 10)['order_id'].to_pylist() == [105, 101, 102]
+
+    # 分頁只回傳該頁的列
+    matched = index.match(sort_by='date', descending=False)
+    assert index.page(matched, 2, 4)['order_id'].to_pylist() == [104, 106]
+
+    page, total = index.query(page=1, page_size=2, shipping_methods=['宅配'], sort_by='order_id', descending=False)
+    assert total == 3 and page['order_id'].to_pylist() == [101, 104]
+    assert page['refund_total'].null_count == 0
+
+
+def test_unknown_option_and_empty():
+    index = OrderIndex(_orders())
+    assert len(index.match(statuses=['cancelled'])) == 0
+
+    empty = OrderIndex(pd.DataFrame())
+    assert len(empty) == 0 and empty.amount_range() == (0.0, 0.0)
+    assert empty.page(empty.match(), 1, 50).num_rows == 0
+
+
+if __name__ == "__main__":
+    test_filter_sort_and_page()
+    test_unknown_option_and_empty()
+    print("所有測試通過！✓")
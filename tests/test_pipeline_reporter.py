@@ -0,0 +1,81 @@
+"""測試數據管線在沒有 Streamlit 的情況下經由 Reporter 回報事件"""
+import logging
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from src.api.meta_token_manager import MetaTokenManager
+from src.api.woocommerce import WooCommerceAPI
+from src.pipeline.reporter import CallbackReporter, LoggingReporter
+
+
+class _FakeResponse:
+    def __init__(self, status_code, payload, total=0):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = {'X-WP-Total': str(total)}
+        self.text = 'server error' if status_code != 200 else ''
+
+    def json(self):
+        return self._payload
+
+
+class _FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        return self.response
+
+
+def test_woocommerce_reports_through_callback():
+    events = []
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs', reporter=CallbackReporter(events.append))
+    api.session = _FakeSession(_FakeResponse(500, []))
+
+    orders_df, _, _, _ = api.get_orders_with_line_items(datetime(2025, 10, 1), datetime(2025, 10, 2))
+
+    assert orders_df.empty
+    levels = [event['level'] for event in events]
+    assert 'error' in levels
+    assert any(event.get('status_code') == 500 for event in events)
+    stages = [event for event in events if event['level'] == 'stage']
+    assert [event['status'] for event in stages] == ['started', 'finished']
+    assert 'elapsed_ms' in stages[-1]
+
+
+def test_logging_reporter_attaches_event(caplog):
+    with caplog.at_level(logging.INFO, logger="dashboard.pipeline"):
+        LoggingReporter().success("完成", orders=3)
+    assert caplog.records[-1].event == {'level': 'success', 'message': '完成', 'orders': 3}
+
+
+def test_token_manager_uses_injected_session_store():
+    events = []
+    store = {}
+    manager = MetaTokenManager('app', 'secret', storage_mode='secrets', session_store=store,
+                               reporter=CallbackReporter(events.append))
+    manager.save_token({'access_token': 'abc'})
+
+    assert store['meta_token_data'] == {'access_token': 'abc'}
+    assert manager.load_token() == {'access_token': 'abc'}
+    assert events and events[0]['level'] == 'info'
+    manager.delete_token()
+    assert 'meta_token_data' not in store
+
+
+def test_api_modules_do_not_import_ui_layer():
+    # 在獨立的直譯器中檢查：測試程序本身可能已由其他測試載入 Streamlit
+    code = ("import sys, src.api.meta_ads, src.api.meta_token_manager, src.api.woocommerce, src.pipeline.base_data; "
+            "print(sorted(m for m in sys.modules if m == 'streamlit' or m.startswith('src.ui')))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parents[1])
+    assert result.stdout.strip() == '[]'
+
+
+if __name__ == "__main__":
+    test_woocommerce_reports_through_callback()
+    test_token_manager_uses_injected_session_store()
+    test_api_modules_do_not_import_ui_layer()
+    print("所有測試通過！✓")
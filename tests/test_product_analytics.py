@@ -0,0 +1,74 @@
+"""測試商品績效分析（商品 × 日期分區與 Top-N 查詢）"""
+import pandas as pd
+from datetime import date
+
+from src.api.woocommerce import WooCommerceAPI
+from src.utils.product_analytics import build_product_day_partitions, query_top_products
+
+
+def _sample_orders():
+    return [
+        {'id': 1, 'date_created': '2025-10-01T10:00:00', 'customer_id': 7, 'billing': {'email': 'a@example.com'},
+         'line_items': [{'product_id': 100, 'variation_id': 0, 'name': '奶酪', 'quantity': 2, 'total': '200'},
+                        {'product_id': 200, 'variation_id': 201, 'name': '布丁', 'quantity': 1, 'total': '80'}]},
+        {'id': 2, 'date_created': '2025-10-02T09:00:00', 'customer_id': 0, 'billing': {'email': 'B@example.com'},
+         'line_items': [{'product_id': 100, 'variation_id': 0, 'name': '奶酪', 'quantity': 1, 'total': '100'}]},
+        {'id': 3, 'date_created': '2025-10-03T12:00:00', 'customer_id': 7, 'billing': {'email': 'a@example.com'},
+         'line_items': [{'product_id': 100, 'variation_id': 0, 'name': '奶酪', 'quantity': 3, 'total': '300'}]},
+    ]
+
+
+def test_product_partitions_and_top_n():
+    line_items = WooCommerceAPI._normalize_line_items(_sample_orders())
+    assert len(line_items) == 4, f"商品明細應為 4 列，實際為 {len(line_items)}"
+
+    partitions = build_product_day_partitions(line_items)
+    assert len(partitions) == 4, f"分區應為 4 列，實際為 {len(partitions)}"
+
+    top = query_top_products(partitions, metric='revenue', n=1, cogs_rate=40)
+    assert top.loc[0, 'product_id'] == 100
+    assert top.loc[0, 'revenue'] == 600
+    assert top.loc[0, 'units'] == 6
+    assert abs(top.loc[0, 'margin'] - 360) < 1e-9
+    # 客戶 7 在訂單 3 再次購買 3 件，共 6 件
+    assert abs(top.loc[0, 'repeat_share'] - 50.0) < 1e-9
+
+    # 日期範圍只切分區，不需重建
+    top_day2 = query_top_products(partitions, metric='units', n=5,
+                                  start_date=date(2025, 10, 2), end_date=date(2025, 10, 2))
+    assert list(top_day2['product_id']) == [100]
+    assert top_day2.loc[0, 'repeat_share'] == 0
+
+    by_variation = query_top_products(partitions, metric='revenue', n=5, by_variation=True)
+    assert 'variation_id' in by_variation.columns
+    assert len(by_variation) == 2
+
+
+def test_product_orders_count_each_order_once():
+    # 訂單 4 同時購買布丁的兩個規格：商品層級只算一張訂單，規格層級各算一張
+    orders = _sample_orders() + [
+        {'id': 4, 'date_created': '2025-10-03T15:00:00', 'customer_id': 8, 'billing': {'email': 'c@example.com'},
+         'line_items': [{'product_id': 200, 'variation_id': 201, 'name': '布丁', 'quantity': 1, 'total': '80'},
+                        {'product_id': 200, 'variation_id': 202, 'name': '布丁', 'quantity': 2, 'total': '160'}]},
+    ]
+    partitions = build_product_day_partitions(WooCommerceAPI._normalize_line_items(orders))
+
+    by_product = query_top_products(partitions, metric='orders', n=0).set_index('product_id')
+    assert by_product.loc[100, 'orders'] == 3
+    assert by_product.loc[200, 'orders'] == 2  # 訂單 1 與訂單 4
+
+    by_variation = query_top_products(partitions, metric='orders', n=0, by_variation=True)
+    assert by_variation.set_index('variation_id')['orders'].to_dict() == {0: 3, 201: 2, 202: 1}
+
+
+def test_empty_line_items():
+    partitions = build_product_day_partitions(pd.DataFrame())
+    assert partitions.empty
+    assert query_top_products(partitions, metric='units').empty
+
+
+if __name__ == "__main__":
+    test_product_partitions_and_top_n()
+    test_product_orders_count_each_order_once()
+    test_empty_line_items()
+    print("所有測試通過！✓")
@@ -0,0 +1,58 @@
+"""測試逐頁抓取訂單與暫估 KPI"""
+import threading
+from datetime import datetime, timedelta
+
+from src.api.woocommerce import WooCommerceAPI
+from src.pipeline.progressive import ProvisionalTotals
+from tests.test_woocommerce_sharding import _FakeSession
+
+
+def _orders(n, start=datetime(2025, 9, 1)):
+    return [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S'),
+             'total': '100.00'} for i in range(n)]
+
+
+def test_pages_arrive_in_caller_thread_with_expected_total():
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FakeSession(_orders(900))
+    seen = []
+
+    def on_page(orders, loaded, expected):
+        seen.append((len(orders), loaded, expected, threading.current_thread() is threading.main_thread()))
+
+    fetched = api._fetch_raw_orders(datetime(2025, 9, 1), datetime(2025, 9, 30), 'completed', on_page)
+
+    assert len(fetched) == 900
+    assert sum(size for size, _, _, _ in seen) >= 900  # 相鄰窗口的邊界訂單可能重複出現
+    assert all(expected == 900 for _, _, expected, _ in seen)
+    assert all(in_main for _, _, _, in_main in seen), "回呼應在呼叫端執行緒執行"
+    assert [loaded for _, loaded, _, _ in seen] == sorted(loaded for _, loaded, _, _ in seen)
+    assert seen[-1][1] == 900
+
+
+def test_provisional_totals_deduplicate_and_group_by_day():
+    totals = ProvisionalTotals()
+    page = [{'id': 1, 'date_created': '2025-09-01T10:00:00', 'total': '300.00'},
+            {'id': 2, 'date_created': '2025-09-02T11:00:00', 'total': '100.00'}]
+    totals.add_page(page, 2, 3)
+    totals.add_page(page[1:] + [{'id': 3, 'date_created': '2025-09-02T12:00:00', 'total': '200'}], 3, 3)
+
+    snapshot = totals.snapshot()
+    assert snapshot['orders'] == 3
+    assert snapshot['revenue'] == 600
+    assert snapshot['avg_order_value'] == 200
+    assert (snapshot['loaded'], snapshot['expected']) == (3, 3)
+    assert snapshot['daily']['revenue'].tolist() == [300, 300]
+
+
+def test_empty_snapshot():
+    snapshot = ProvisionalTotals().snapshot()
+    assert snapshot['orders'] == 0 and snapshot['avg_order_value'] == 0
+    assert snapshot['daily'].empty
+
+
+if __name__ == "__main__":
+    test_pages_arrive_in_caller_thread_with_expected_total()
+    test_provisional_totals_deduplicate_and_group_by_day()
+    test_empty_snapshot()
+    print("所有測試通過！✓")
@@ -0,0 +1,94 @@
+"""測試退款帳本與淨營收計算"""
+import pandas as pd
+import requests
+from datetime import date, datetime, timedelta, timezone
+
+from src.api.woocommerce import WooCommerceAPI
+from src.utils.refunds import RefundLedger, apply_refunds, net_revenue_by_day
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+class _FakeClient:
+    """記錄 modified_after 參數的假 WooCommerce 客戶端"""
+
+    def __init__(self, updates):
+        self.updates = updates
+        self.calls = []
+
+    def get_refund_updates(self, modified_after):
+        self.calls.append(modified_after)
+        return self.updates
+
+
+def test_incremental_sync_and_net_revenue(tmp_path):
+    ledger = RefundLedger(data_dir=str(tmp_path))
+    client = _FakeClient(pd.DataFrame([
+        {'order_id': 2, 'date': date(2025, 10, 1), 'refund_total': 300.0},
+    ]))
+    ledger.sync(client, now=datetime(2025, 10, 5, 12, 0, tzinfo=timezone.utc))
+
+    # 第二次同步只查詢上次同步之後（含重疊緩衝）的異動
+    reloaded = RefundLedger(data_dir=str(tmp_path))
+    assert reloaded.last_synced_at == datetime(2025, 10, 5, 12, 0, tzinfo=timezone.utc)
+    client.updates = pd.DataFrame(columns=['order_id', 'date', 'refund_total'])
+    reloaded.sync(client, now=datetime(2025, 10, 5, 21, 0, tzinfo=TAIPEI))
+    assert client.calls[-1] == datetime(2025, 10, 5, 11, 55, tzinfo=timezone.utc)
+    assert reloaded.last_synced_at == datetime(2025, 10, 5, 13, 0, tzinfo=timezone.utc)
+    assert len(reloaded.ledger) == 1
+
+    orders = pd.DataFrame([
+        {'order_id': 1, 'date': date(2025, 10, 1), 'total': 1000.0, 'refund_total': 0.0},
+        {'order_id': 2, 'date': date(2025, 10, 1), 'total': 500.0, 'refund_total': 0.0},
+        {'order_id': 3, 'date': date(2025, 10, 2), 'total': 800.0, 'refund_total': 100.0},
+    ])
+    orders = apply_refunds(orders, reloaded.ledger)
+    assert list(orders['refund_total']) == [0.0, 300.0, 100.0]
+
+    daily = net_revenue_by_day(orders)
+    assert list(daily['revenue']) == [1200.0, 700.0]
+    assert list(daily['refunds']) == [300.0, 100.0]
+
+
+def test_ledgers_are_kept_per_store(tmp_path):
+    updates = pd.DataFrame([{'order_id': 7, 'date': date(2025, 10, 1), 'refund_total': 50.0}])
+    RefundLedger(str(tmp_path), 'https://shop-a.example/').sync(_FakeClient(updates))
+
+    other = RefundLedger(str(tmp_path), 'https://shop-b.example')
+    assert other.ledger.empty and other.last_synced_at is None
+    same = RefundLedger(str(tmp_path), 'https://SHOP-A.example')
+    assert list(same.ledger['order_id']) == [7] and same.last_synced_at is not None
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.params = []
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        self.params.append(dict(params))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[]'
+        return response
+
+
+def test_refund_cursor_is_sent_in_utc():
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _RecordingSession()
+
+    api.get_refund_updates(datetime(2025, 10, 5, 19, 55, tzinfo=TAIPEI))
+
+    params = api.session.params[0]
+    assert params['modified_after'] == '2025-10-05T11:55:00Z'
+    assert params['dates_are_gmt'] == 'true'
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_sync_and_net_revenue(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_ledgers_are_kept_per_store(Path(tmp))
+    test_refund_cursor_is_sent_in_utc()
+    print("所有測試通過！✓")
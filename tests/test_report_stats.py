@@ -0,0 +1,93 @@
+"""測試 WooCommerce Analytics 報表統計（快速總覽模式的伺服器端彙總）"""
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+import requests
+
+from src.api.woocommerce import WooCommerceAPI
+
+
+def _response(status, payload, total_pages=1):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    response.headers['X-WP-TotalPages'] = str(total_pages)
+    return response
+
+
+def _interval(day, total_sales, orders_count, refunds):
+    return {'interval': day.strftime('%Y-%m-%d'), 'date_start': f"{day:%Y-%m-%d} 00:00:00",
+            'subtotals': {'total_sales': total_sales, 'orders_count': orders_count, 'refunds': refunds}}
+
+
+class _ReportSession:
+    """依報表名稱回傳 reports/{report}/stats 回應的假 Session，每頁兩個區間"""
+
+    def __init__(self, days, status=200):
+        self.days = days
+        self.status = status
+        self.requests = []
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        report = url.rstrip('/').split('/')[-2]
+        self.requests.append((report, dict(params)))
+        if self.status != 200:
+            return _response(self.status, {'code': 'rest_no_route', 'message': 'No route was found'})
+        if report == 'orders':
+            return _response(200, {'totals': {'orders_count': 7, 'avg_order_value': 150.0}, 'intervals': []})
+        pages = [self.days[i:i + 2] for i in range(0, len(self.days), 2)]
+        intervals = [_interval(day, 100.0 * (i + 1), i + 1, -10.0 if i == 1 else 0)
+                     for i, day in enumerate(self.days)]
+        page = params['page']
+        return _response(200, {
+            'totals': {'total_sales': 1000.0, 'orders_count': 6, 'refunds': -10.0},
+            'intervals': intervals[(page - 1) * 2: page * 2],
+        }, total_pages=len(pages))
+
+
+DAYS = [date(2025, 9, 1) + timedelta(days=i) for i in range(3)]
+
+
+def _api(session):
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = session
+    return api
+
+
+def test_report_stats_requests_daily_intervals_across_pages():
+    session = _ReportSession(DAYS)
+    totals, daily = _api(session).get_report_stats('revenue', datetime(2025, 9, 1), datetime(2025, 9, 3))
+
+    assert totals['total_sales'] == 1000.0
+    assert list(daily['date']) == DAYS
+    assert list(daily['total_sales']) == [100.0, 200.0, 300.0]
+    assert [params['page'] for _, params in session.requests] == [1, 2]
+    params = session.requests[0][1]
+    assert params['interval'] == 'day'
+    assert (params['after'], params['before']) == ('2025-09-01T00:00:00', '2025-09-03T23:59:59')
+
+
+def test_overview_stats_combines_revenue_and_orders_reports():
+    stats = _api(_ReportSession(DAYS)).get_overview_stats(datetime(2025, 9, 1), datetime(2025, 9, 3))
+
+    assert stats['totals'] == {'revenue': 1000.0, 'orders': 7, 'avg_order_value': 150.0, 'refunds': 10.0}
+    assert list(stats['daily'].columns) == ['date', 'revenue', 'orders', 'refunds']
+    assert list(stats['daily']['orders']) == [1, 2, 3]
+    assert list(stats['daily']['refunds']) == [0.0, 10.0, 0.0]
+
+
+def test_report_stats_raises_on_non_200():
+    with pytest.raises(requests.exceptions.HTTPError):
+        _api(_ReportSession(DAYS, status=404)).get_report_stats('revenue', datetime(2025, 9, 1),
+                                                                datetime(2025, 9, 3))
+
+
+def test_overview_stats_is_none_when_reports_are_unavailable():
+    session = _ReportSession(DAYS, status=404)
+    assert _api(session).get_overview_stats(datetime(2025, 9, 1), datetime(2025, 9, 3)) is None
+    assert len(session.requests) == 1  # revenue 報表失敗後不再請求 orders 報表
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,45 @@
+"""測試訂單、商品明細及廣告數據表的欄位型別"""
+import pandas as pd
+
+from src.api.woocommerce import WooCommerceAPI
+from src.utils.schema import apply_schema, ADS_SCHEMA
+
+
+def _raw_orders():
+    return [
+        {'id': 1, 'date_created': '2025-10-01T10:30:00', 'total': '1200.00', 'status': 'completed',
+         'customer_id': 7, 'payment_method_title': '信用卡', 'billing': {'email': 'a@example.com'},
+         'shipping_lines': [{'method_title': '宅配'}], 'refunds': [{'total': '-100.00'}],
+         'line_items': [{'product_id': 100, 'variation_id': 0, 'name': '奶酪', 'quantity': 2, 'total': '1200'}]},
+        {'id': 2, 'date_created': '2025-10-02T23:59:59', 'total': '80.00', 'status': 'processing',
+         'customer_id': 0, 'payment_method_title': 'Line Pay', 'billing': {}, 'shipping_lines': [], 'refunds': [],
+         'line_items': []},
+    ]
+
+
+def test_order_and_line_item_dtypes():
+    orders_df, _, _ = WooCommerceAPI._normalize_orders(_raw_orders())
+    assert str(orders_df['date'].dtype) == 'datetime64[ns]'
+    assert (orders_df['date'] == orders_df['date'].dt.normalize()).all(), "date 應正規化到當天"
+    for column in ['status', 'payment_method', 'shipping_method']:
+        assert isinstance(orders_df[column].dtype, pd.CategoricalDtype), f"{column} 應為 category"
+    assert orders_df['total'].dtype == 'float64'
+    assert orders_df.loc[1, 'shipping_method'] == '未知'
+
+    line_items = WooCommerceAPI._normalize_line_items(_raw_orders())
+    assert line_items['quantity'].dtype == 'int32'
+    assert str(line_items['date'].dtype) == 'datetime64[ns]'
+
+
+def test_ads_schema_and_empty_frames():
+    ads = apply_schema(pd.DataFrame([{'date': '2025-10-01', 'spend': '12.5', 'impressions': 1000, 'clicks': 30}]),
+                       ADS_SCHEMA)
+    assert ads['impressions'].dtype == 'int32' and ads['spend'].dtype == 'float64'
+    assert ads.loc[0, 'date'] == pd.Timestamp('2025-10-01')
+    assert apply_schema(pd.DataFrame(), ADS_SCHEMA).empty
+
+
+if __name__ == "__main__":
+    test_order_and_line_item_dtypes()
+    test_ads_schema_and_empty_frames()
+    print("所有測試通過！✓")
@@ -0,0 +1,107 @@
+"""測試共用快取的 single-flight 合併（執行緒間與跨程序）"""
+import threading
+import time
+
+import pytest
+
+from src.cache.backend import CacheBackend, make_key
+from src.cache.data_cache import DataCache
+from src.cache.redis_cache import RedisCache
+from src.cache.sqlite_cache import SQLiteCache
+from tests.test_cache_backend import redis_server, redis_url  # noqa: F401  本機 Redis 替身
+
+
+class _MemoryBackend(CacheBackend):
+    def __init__(self):
+        self.data = {}
+
+    def get_bytes(self, key):
+        return self.data.get(key)
+
+    def set_bytes(self, key, data, ttl=None):
+        self.data[key] = data
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def _run_concurrently(caches, fetch, n_threads=8):
+    barrier = threading.Barrier(n_threads)
+    results = [None] * n_threads
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = caches[i % len(caches)].get_or_fetch('wc_orders', ('shop', '2025-10-01'), fetch)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def _slow_fetch(calls):
+    def fetch():
+        calls.append(1)
+        time.sleep(0.3)
+        return {'orders': 42}
+    return fetch
+
+
+def test_threads_share_one_fetch():
+    calls = []
+    cache = DataCache(_MemoryBackend())
+    results = _run_concurrently([cache], _slow_fetch(calls))
+
+    assert len(calls) == 1
+    assert all(result == {'orders': 42} for result in results)
+    assert cache.stats['coalesced'] == 7
+
+
+def test_followers_receive_the_leaders_error():
+    started = threading.Event()
+
+    def failing_fetch():
+        started.set()
+        time.sleep(0.2)
+        raise ConnectionError("WooCommerce 無回應")
+
+    cache = DataCache(_MemoryBackend())
+    results = _run_concurrently([cache], failing_fetch, n_threads=4)
+    assert started.is_set()
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'redis'])
+def test_processes_share_one_fetch_through_backend_lock(kind, tmp_path, redis_url):  # noqa: F811
+    # 每個 DataCache 代表一個程序（程序內的合併互不相通），只共用後端
+    if kind == 'sqlite':
+        backends = [SQLiteCache(str(tmp_path / "cache.sqlite3")) for _ in range(3)]
+    else:
+        backends = [RedisCache.from_url(redis_url) for _ in range(3)]
+    caches = [DataCache(backend, poll_interval=0.05) for backend in backends]
+    calls = []
+
+    results = _run_concurrently(caches, _slow_fetch(calls), n_threads=6)
+
+    assert len(calls) == 1, f"應只抓取一次，實際 {len(calls)} 次"
+    assert all(result == {'orders': 42} for result in results)
+
+
+def test_orphaned_lock_does_not_block_forever(tmp_path):
+    # 持有鎖的副本異常結束：等待逾時後自行抓取
+    backend = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    backend.acquire_lock(f"{make_key('meta_ads')}:lock", 'crashed-replica', ttl=60)
+    cache = DataCache(backend, poll_interval=0.02, wait_timeout=0.1)
+
+    started = time.monotonic()
+    assert cache.get_or_fetch('meta_ads', (), lambda: 'fetched') == 'fetched'
+    assert time.monotonic() - started < 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,110 @@
+"""測試共用快取的 stale-while-revalidate 與背景重新抓取退避"""
+import time
+
+from src.cache.data_cache import DataCache
+from tests.test_single_flight import _MemoryBackend
+
+
+def _versions():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return f"v{len(calls)}"
+    return fetch, calls
+
+
+def test_stale_value_is_served_while_refreshing():
+    cache = DataCache(_MemoryBackend(), max_stale=60)
+    fetch, calls = _versions()
+    first = cache.fetch_result('wc_orders', (), fetch, ttl=0.1)
+    assert first.value == 'v1' and not first.stale
+
+    time.sleep(0.15)
+
+    def slow_refresh():
+        time.sleep(0.3)
+        return fetch()
+
+    started = time.monotonic()
+    stale = cache.fetch_result('wc_orders', (), fetch, ttl=0.1, refresh=slow_refresh)
+    assert time.monotonic() - started < 0.2, "過期數據應立即回傳，不等待重新抓取"
+    assert stale.value == 'v1' and stale.stale
+    assert stale.fetched_at == first.fetched_at
+
+    cache.wait_for_refreshes()
+    fresh = cache.fetch_result('wc_orders', (), fetch, ttl=0.1)
+    assert fresh.value == 'v2' and not fresh.stale
+    assert cache.generation('wc_orders', ()) == 1
+    assert len(calls) == 2
+
+
+def test_generation_is_tracked_per_key():
+    cache = DataCache(_MemoryBackend(), max_stale=60)
+    for start in ('2025-09-01', '2025-10-01'):
+        cache.fetch_result('wc_orders', (start,), lambda: 'v1', ttl=0.05)
+    cache.fetch_result('meta_ads', ('2025-09-01',), lambda: 'v1', ttl=60)
+    time.sleep(0.1)
+
+    cache.fetch_result('wc_orders', ('2025-09-01',), lambda: 'v2', ttl=0.05)
+    cache.wait_for_refreshes()
+
+    # 只有更新的期間遞增，其他期間及來源的衍生結果不需重新計算
+    assert cache.generation('wc_orders', ('2025-09-01',)) == 1
+    assert cache.generation('wc_orders', ('2025-10-01',)) == 0
+    assert cache.generation('meta_ads', ('2025-09-01',)) == 0
+
+
+def test_beyond_max_stale_fetches_in_foreground():
+    cache = DataCache(_MemoryBackend(), max_stale=0.05)
+    fetch, calls = _versions()
+    cache.fetch_result('meta_ads', (), fetch, ttl=0.05)
+    time.sleep(0.15)
+
+    result = cache.fetch_result('meta_ads', (), fetch, ttl=0.05)
+    assert result.value == 'v2' and not result.stale
+    assert cache.stats['refreshes'] == 0
+
+
+def test_refresh_failure_backs_off_and_keeps_stale_data():
+    cache = DataCache(_MemoryBackend(), max_stale=60, backoff_base=0.3, backoff_max=1)
+    cache.fetch_result('wc_orders', (), lambda: 'v1', ttl=0.05)
+    time.sleep(0.1)
+    attempts = []
+
+    def failing_refresh():
+        attempts.append(1)
+        raise ConnectionError("WooCommerce 無回應")
+
+    assert cache.fetch_result('wc_orders', (), failing_refresh, ttl=0.05).value == 'v1'
+    cache.wait_for_refreshes()
+    # 退避期間繼續使用舊數據，不重新抓取
+    for _ in range(3):
+        assert cache.fetch_result('wc_orders', (), failing_refresh, ttl=0.05).value == 'v1'
+    cache.wait_for_refreshes()
+    assert len(attempts) == 1
+
+    time.sleep(0.35)
+    cache.fetch_result('wc_orders', (), failing_refresh, ttl=0.05)
+    cache.wait_for_refreshes()
+    assert len(attempts) == 2
+    assert cache.stats['refresh_failures'] == 2
+
+
+def test_invalid_refresh_result_does_not_replace_good_data():
+    cache = DataCache(_MemoryBackend(), max_stale=60)
+    cache.fetch_result('meta_ads', (), lambda: [1, 2, 3], ttl=0.05)
+    time.sleep(0.1)
+
+    cache.fetch_result('meta_ads', (), lambda: [], ttl=0.05, cacheable=bool)
+    cache.wait_for_refreshes()
+    assert cache.fetch_result('meta_ads', (), lambda: [], ttl=0.05, cacheable=bool).value == [1, 2, 3]
+
+
+if __name__ == "__main__":
+    test_stale_value_is_served_while_refreshing()
+    test_generation_is_tracked_per_key()
+    test_beyond_max_stale_fetches_in_foreground()
+    test_refresh_failure_backs_off_and_keeps_stale_data()
+    test_invalid_refresh_result_does_not_replace_good_data()
+    print("所有測試通過！✓")
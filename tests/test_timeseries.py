@@ -0,0 +1,82 @@
+"""測試每小時序列：Meta 廣告主時區小時數據與訂單營收的對齊、補齊沒有數據的小時"""
+from datetime import date
+
+import pandas as pd
+
+from src.utils.timeseries import HOURLY_BREAKDOWN, align_hourly, insights_to_hourly, orders_to_hourly
+
+
+def _insight(day, hour, spend, **extra):
+    """get_hourly_insights 的一列（時段為廣告主時區）"""
+    return {'date_start': day, 'date_stop': day, 'spend': spend,
+            HOURLY_BREAKDOWN: f"{hour:02d}:00:00 - {hour:02d}:59:59", **extra}
+
+
+def _orders(*rows):
+    return pd.DataFrame([{'created_at': pd.Timestamp(created), 'net_total': total} for created, total in rows])
+
+
+def test_insights_use_breakdown_hour_on_date_start():
+    rows = [_insight('2025-09-01', 0, '10.5'), _insight('2025-09-01', 23, '4'), _insight('2025-09-02', 0, '6'),
+            _insight('2025-09-01', 23, '1.5')]  # 同一時段的多列（例如多個廣告活動）合併
+
+    spend = insights_to_hourly(rows, 'spend')
+
+    assert spend.to_dict() == {pd.Timestamp('2025-09-01 00:00'): 10.5, pd.Timestamp('2025-09-01 23:00'): 5.5,
+                               pd.Timestamp('2025-09-02 00:00'): 6.0}
+    assert spend.name == 'spend'
+
+
+def test_insights_missing_metric_counts_as_zero():
+    clicks = insights_to_hourly([_insight('2025-09-01', 5, '1')], 'clicks')
+    assert clicks.to_dict() == {pd.Timestamp('2025-09-01 05:00'): 0.0}
+    assert insights_to_hourly([], 'spend').empty
+
+
+def test_orders_keep_store_wall_clock_hour():
+    # WooCommerce 的 date_created 為商店時區；帶時區的時間保留當地時刻，與廣告主時區的時段對齊
+    revenue = orders_to_hourly(_orders(('2025-09-01T23:59:59', 100), ('2025-09-02T00:00:01', 50),
+                                       ('2025-09-02T00:40:00', 25)))
+    aware = orders_to_hourly(_orders(('2025-09-02T00:15:00+08:00', 80)))
+
+    assert revenue.to_dict() == {pd.Timestamp('2025-09-01 23:00'): 100.0, pd.Timestamp('2025-09-02 00:00'): 75.0}
+    assert aware.to_dict() == {pd.Timestamp('2025-09-02 00:00'): 80.0}
+
+
+def test_align_fills_every_hour_across_midnight():
+    revenue = orders_to_hourly(_orders(('2025-09-01T23:30:00', 300), ('2025-09-02T00:10:00', 120)))
+    spend = insights_to_hourly([_insight('2025-09-01', 23, '100'), _insight('2025-09-02', 0, '40')], 'spend')
+
+    aligned = align_hourly(revenue, spend, date(2025, 9, 1), date(2025, 9, 2))
+
+    assert len(aligned) == 48
+    assert aligned['datetime'].iloc[0] == pd.Timestamp('2025-09-01 00:00')
+    assert aligned['datetime'].iloc[-1] == pd.Timestamp('2025-09-02 23:00')
+    assert (aligned['datetime'].diff().dropna() == pd.Timedelta(hours=1)).all()
+
+    by_hour = aligned.set_index('datetime')
+    assert by_hour.loc['2025-09-01 23:00', ['revenue', 'spend', 'roas']].tolist() == [300.0, 100.0, 3.0]
+    assert by_hour.loc['2025-09-02 00:00', ['revenue', 'spend', 'roas']].tolist() == [120.0, 40.0, 3.0]
+    # 沒有數據的小時補 0，ROAS 不因除以 0 產生無限大
+    empty_hours = by_hour.drop([pd.Timestamp('2025-09-01 23:00'), pd.Timestamp('2025-09-02 00:00')])
+    assert (empty_hours[['revenue', 'spend', 'roas']] == 0).all().all()
+
+
+def test_align_with_one_empty_source_and_out_of_range_hours():
+    revenue = orders_to_hourly(_orders(('2025-08-31T23:00:00', 999), ('2025-09-01T12:05:00', 200)))
+
+    aligned = align_hourly(revenue, insights_to_hourly([], 'spend'), date(2025, 9, 1), date(2025, 9, 1))
+
+    assert len(aligned) == 24
+    assert aligned['revenue'].sum() == 200.0  # 期間外的小時不列入
+    assert (aligned['spend'] == 0).all()
+    assert aligned.set_index('datetime').loc['2025-09-01 12:00', 'roas'] == 200.0
+
+
+if __name__ == "__main__":
+    test_insights_use_breakdown_hour_on_date_start()
+    test_insights_missing_metric_counts_as_zero()
+    test_orders_keep_store_wall_clock_hour()
+    test_align_fills_every_hour_across_midnight()
+    test_align_with_one_empty_source_and_out_of_range_hours()
+    print("所有測試通過！✓")
@@ -0,0 +1,161 @@
+"""測試 WooCommerce 日期窗口分片抓取"""
+from datetime import datetime, timedelta
+
+import requests
+
+from src.api.woocommerce import WooCommerceAPI
+
+
+class _FakeResponse:
+    def __init__(self, payload, total):
+        self.status_code = 200
+        self._payload = payload
+        self.headers = {'X-WP-Total': str(total)}
+        self.text = ''
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _FakeSession:
+    """依 after/before 篩選訂單並分頁的假 Session，記錄每次請求的頁碼"""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.pages = []
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        selected = [o for o in self.orders if params['after'] <= o['date_created'] <= params['before']]
+        selected.sort(key=lambda o: o['date_created'], reverse=True)
+        per_page, page = params['per_page'], params['page']
+        self.pages.append(page)
+        return _FakeResponse(selected[(page - 1) * per_page: page * per_page], len(selected))
+
+
+def test_sharded_fetch_is_complete_and_shallow():
+    start = datetime(2025, 9, 1)
+    orders = [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S')}
+              for i in range(900)]
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FakeSession(orders)
+
+    fetched = api._fetch_raw_orders(datetime(2025, 9, 1), datetime(2025, 9, 30), 'completed')
+
+    assert len(fetched) == 900, f"應取得 900 筆訂單，實際為 {len(fetched)}"
+    assert len({o['id'] for o in fetched}) == 900, "訂單不應重複"
+    assert fetched[0]['date_created'] > fetched[-1]['date_created'], "應由新到舊排序"
+    # 每個窗口不超過 500 筆，分頁深度不超過 5 頁
+    assert max(api.session.pages) <= 5
+
+
+def _orders_fixture():
+    start = datetime(2025, 9, 1)
+    return [{'id': i, 'date_created': (start + timedelta(minutes=37 * i)).strftime('%Y-%m-%dT%H:%M:%S'),
+             'total': '100.00', 'status': 'completed'} for i in range(900)]
+
+
+class _FailingLaterPages(_FakeSession):
+    """第二頁之後回應非 200（例如深分頁逾時的 502）"""
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        if params['page'] >= 2:
+            self.pages.append(params['page'])
+            response = _FakeResponse({'code': 'bad_gateway'}, 0)
+            response.status_code = 502
+            return response
+        return super().get(url, auth, params, timeout, stream)
+
+
+def test_later_page_error_marks_result_partial():
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FailingLaterPages(_orders_fixture())
+    warnings = []
+    api.reporter.warning = lambda message, **event: warnings.append((message, event))
+
+    orders_df, _, _, _ = api.get_orders_with_line_items(datetime(2025, 9, 1), datetime(2025, 9, 30))
+
+    assert api.partial
+    assert orders_df.attrs.get('partial') is True
+    assert 0 < len(orders_df) < 900
+    message, event = warnings[0]
+    assert event['partial'] is True and event['statuses'] == [502]
+    assert 'HTTP 502' in message
+
+
+def test_complete_fetch_is_not_partial():
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FakeSession(_orders_fixture())
+
+    orders_df, _, _, _ = api.get_orders_with_line_items(datetime(2025, 9, 1), datetime(2025, 9, 30))
+
+    assert not api.partial and not orders_df.attrs.get('partial')
+    assert len(orders_df) == 900
+
+
+class _FailingProbe(_FakeSession):
+    """第一個子窗口的計數請求（per_page=1）回應 503，其餘請求正常"""
+
+    def __init__(self, orders, failing_after):
+        super().__init__(orders)
+        self.failing_after = failing_after
+
+    def get(self, url, auth=None, params=None, timeout=None, stream=False):
+        if params['per_page'] == 1 and params['after'] == self.failing_after and params['before'] < '2025-09-30':
+            response = _FakeResponse({'code': 'unavailable'}, 0)
+            response.status_code = 503
+            response.raise_for_status = lambda: (_ for _ in ()).throw(requests.HTTPError(response=response))
+            return response
+        return super().get(url, auth, params, timeout, stream)
+
+
+def test_failed_sub_window_count_keeps_other_windows():
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = _FailingProbe(_orders_fixture(), '2025-09-01T00:00:00')
+
+    orders_df, _, _, _ = api.get_orders_with_line_items(datetime(2025, 9, 1), datetime(2025, 9, 30))
+
+    assert api.partial and orders_df.attrs.get('partial') is True
+    assert api.error_statuses == [503]
+    assert 0 < len(orders_df) < 900
+    # 失敗的是最早的子窗口，其餘時段的訂單都已抓取
+    assert orders_df['order_id'].max() == 899
+
+
+def test_boundary_order_is_fetched_by_one_window():
+    # 901 筆訂單先對半切分，後半段子窗口在 9/15 23:59:59 開始；在該秒建立的訂單只應被一個窗口抓取
+    boundary = {'id': 'boundary', 'date_created': '2025-09-15T23:59:59'}
+    session = _FakeSession(_orders_fixture() + [boundary])
+    api = WooCommerceAPI('https://shop.example', 'ck', 'cs')
+    api.session = session
+    seen = []
+    session_get = session.get
+
+    def recording_get(url, auth=None, params=None, timeout=None, stream=False):
+        response = session_get(url, auth, params, timeout, stream)
+        if params['per_page'] > 1:
+            seen.extend(o['id'] for o in response.json())
+        return response
+
+    session.get = recording_get
+    windows = api._plan_windows(datetime(2025, 9, 1), datetime(2025, 9, 30, 23, 59, 59), 'completed', 901)
+    for (_, before, _), (after, _, _) in zip(windows, windows[1:]):
+        assert after - before == timedelta(seconds=1), "窗口應在下一個窗口開始的前一秒結束"
+    assert datetime(2025, 9, 15, 23, 59, 59) in [after for after, _, _ in windows]
+
+    api._fetch_raw_orders(datetime(2025, 9, 1), datetime(2025, 9, 30), 'completed')
+    assert seen.count('boundary') == 1
+
+
+if __name__ == "__main__":
+    test_sharded_fetch_is_complete_and_shallow()
+    test_later_page_error_marks_result_partial()
+    test_complete_fetch_is_not_partial()
+    test_failed_sub_window_count_keeps_other_windows()
+    test_boundary_order_is_fetched_by_one_window()
+    print("所有測試通過！✓")